@@ -7,389 +7,74 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 import datetime
-import re 
-# NIEUWE IMPORTS VOOR API CALL
-import requests
-from io import StringIO
-
-# 1. Configuratie en constanten (Constants and Configuration)
-
-# ===============================================================================
-# Dit is de basis-URL voor de map /weatherdata/ op GitHub.
-# ===============================================================================
-GITHUB_BASE_URL = "https://raw.githubusercontent.com/Pillmaster/ericmeteo/main/weatherdata/"
-
-# Het jaar waar de data in de repository begint. (AANDACHTSPUNT: Controleer of dit uw oudste jaar is)
-START_YEAR = 2025
-
-# Tijdzone definitie voor Stockholm (inclusief DST/CEST en CET)
-TARGET_TIMEZONE = 'Europe/Stockholm'
-
-# Mapping van Stations-ID naar gebruiksvriendelijke namen
-STATION_MAP = {
-    '2308LH047': 'Malmån huset',
-    '2102LH011': 'Malmån sjön'
-}
-
-# Lijst van numerieke kolommen die gevisualiseerd kunnen worden
-NUMERIC_COLS = ['battery', 'dauwpunt', 'luchtvocht', 'druk', 'zoninstraling', 'temp', 'natbol']
-
-# Vriendelijke namen voor kolommen in de UI en grafieken
-COL_DISPLAY_MAP = {
-    'battery': 'Batterijspanning (V)',
-    'dauwpunt': 'Dauwpunt (°C)', 
-    'luchtvocht': 'Luchtvochtigheid (%)',
-    'druk': 'Luchtdruk (hPa)', 
-    'zoninstraling': 'Zoninstraling (W/m²)',
-    'temp': 'Temperatuur (°C)',
-    'natbol': 'Natteboltemperatuur (°C)'
-}
-
-# Omgekeerde mapping voor het ophalen van de originele kolomnamen
-DISPLAY_TO_COL_MAP = {display_name: col_name for col_name, display_name in COL_DISPLAY_MAP.items()}
-
-# NIEUW: Definitie van de 30-jarige Klimaatnormaalperioden (Jaar-Jaar)
-# De waarden zijn (Startdatum YYYY-MM-DD, Einddatum YYYY-MM-DD)
-CLIMATE_NORMAL_PERIODS = {
-    "1990-2019 (Standaard WMO Normaal)": ("1990-01-01", "2019-12-31"),
-    "1980-2009": ("1980-01-01", "2009-12-31"),
-    "1970-1999": ("1970-01-01", "1999-12-31"),
-    "1960-1989": ("1960-01-01", "1989-12-31"),
-    "1950-1979": ("1950-01-01", "1979-12-31"),
-    "1940-1969": ("1940-01-01", "1969-12-31"),
-}
-
-# NIEUW: Bepaling van de totale periode voor één API-oproep (om 429 errors te voorkomen)
-BENCHMARK_START_DATE_FULL = "1940-01-01"
-BENCHMARK_END_DATE_FULL = "2019-12-31" 
-
-
-# 2. Functies voor Data (Loading & Processing)
-
-# Zoekt naar beschikbare jaren op GitHub (Gecached, NU ZONDER TTL VOOR ACTUEELHEID)
-@st.cache_data(show_spinner="Zoeken naar beschikbare jaren op GitHub...")
-def discover_available_years(start_year, station_id, github_base_url):
-    """
-    Probeert iteratief om weather_YYYY.csv te laden van het startjaar tot het huidige jaar.
-    """
-    current_year = datetime.datetime.now().year
-    available_years = []
-    
-    for year in range(start_year, current_year + 1):
-        full_url = f"{github_base_url}{station_id}/weather_{year}.csv"
-        
-        try:
-            # Laad alleen de header en de eerste rij (nrows=1) voor een snelle check
-            df_test = pd.read_csv(full_url, sep=';', on_bad_lines='skip', nrows=1)
-            
-            # Controleer of het DataFrame niet leeg is en de verwachte kolom bevat
-            if not df_test.empty and 'datum_waarneming_UTC' in df_test.columns:
-                available_years.append(year)
-            
-        except Exception:
-            pass
-            
-    return sorted(available_years)
-
-
-# Bestaande Laadfunctie (caching behouden voor performantie)
-@st.cache_data
-def load_data(station_id, years, github_base_url, station_map, target_timezone):
-    """
-    Laadt, parseert en pre-verwerkt weerdata van GitHub voor meerdere jaren.
-    """
-    all_years_data = []
-    station_name = station_map.get(station_id, station_id)
-
-    for year in years:
-        full_url = f"{github_base_url}{station_id}/weather_{year}.csv"
-
-        try:
-            df = pd.read_csv(full_url, sep=';', on_bad_lines='skip')
-
-            df['Timestamp_UTC_str'] = df['datum_waarneming_UTC'] + ' ' + df['tijd_waarneming_UTC']
-            df['Timestamp_UTC'] = pd.to_datetime(df['Timestamp_UTC_str'], format='%d.%m.%Y %H:%M:%S', errors='coerce')
-            df = df.dropna(subset=['Timestamp_UTC'])
-
-            for col in NUMERIC_COLS:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            if 'druk' in df.columns:
-                df['druk'] = df['druk'] / 100 
-
-            df['Timestamp_UTC'] = df['Timestamp_UTC'].dt.tz_localize('UTC') 
-            df['Timestamp_Local'] = df['Timestamp_UTC'].dt.tz_convert(target_timezone)
-            
-            all_years_data.append(df)
-            
-        except Exception as e:
-            st.warning(f"❌ Bestand niet gevonden of fout bij laden voor {station_name} in {year}. Reden: {e}")
-
-    if all_years_data:
-        df_station = pd.concat(all_years_data, ignore_index=True)
-        return df_station.sort_values('Timestamp_Local').copy() 
-    else:
-        return pd.DataFrame() 
-
-# -------------------------------------------------------------------
-# NIEUWE FUNCTIE: Ophalen COMPLETE Externe Historische Data via Open-Meteo API (Grote Cache)
-# Wordt eenmaal aangeroepen om alle benchmark data te verzamelen.
-# -------------------------------------------------------------------
-@st.cache_data(ttl=86400, show_spinner="Laden complete historische benchmark data (1940-2019)...") 
-def fetch_complete_historical_data(start_date_str, end_date_str):
-    """
-    Haalt de volledige reeks historische data op in één keer om rate limits te vermijden.
-    """
-    LAT = 62.9977
-    LON = 17.0811
-    
-    api_url = "https://archive-api.open-meteo.com/v1/era5"
-    params = {
-        "latitude": LAT,
-        "longitude": LON,
-        "start_date": start_date_str, 
-        "end_date": end_date_str,     
-        "daily": "temperature_2m_max,temperature_2m_min,temperature_2m_mean",
-        "timezone": "Europe/Stockholm",
-        "format": "csv"
-    }
-    
-    try:
-        response = requests.get(api_url, params=params)
-        response.raise_for_status() 
-        
-        csv_data = response.text.split('\n', 3)[3] 
-        df_hist = pd.read_csv(StringIO(csv_data))
-        
-        df_hist.columns = df_hist.columns.str.strip()
-        
-        df_hist = df_hist.rename(columns={
-            'time': 'Date',
-            'temperature_2m_max (°C)': 'Temp_High_C', 
-            'temperature_2m_min (°C)': 'Temp_Low_C',  
-            'temperature_2m_mean (°C)': 'Temp_Avg_C', 
-        })
-        
-        df_hist['Date'] = pd.to_datetime(df_hist['Date'])
-        
-        success_message = f"Complete historische data ({start_date_str[:4]}-{end_date_str[:4]}) van {len(df_hist)} dagen succesvol geladen via Open-Meteo (ERA5)."
-        return df_hist, ('success', success_message)
-        
-    except requests.exceptions.HTTPError as e:
-        error_message = f"❌ Kon historische data niet ophalen via API. Fout: {e}. Probeer later opnieuw of herlaad de app."
-        return pd.DataFrame(), ('error', error_message)
-    except Exception as e:
-        error_message = f"⚠️ Algemene fout bij het verwerken van API-data. Fout: {e}"
-        return pd.DataFrame(), ('warning', error_message)
 
-# -------------------------------------------------------------------
-# GECORRIGEERDE FUNCTIE: Ophalen Externe Historische Data via Open-Meteo API (voor Enkelvoudige Benchmark)
-# Roept de complete set op en filtert lokaal.
-# -------------------------------------------------------------------
-@st.cache_data(ttl=86400) 
-def fetch_historical_benchmark_data(start_date_str, end_date_str):
-    """
-    Haalt de historische data van één geselecteerde klimaatnormaalperiode op.
-    Roept de complete dataset op en filtert de data lokaal om rate limits te vermijden.
-    """
-    # Stap 1: Haal de complete dataset op (deze is gecached)
-    df_complete, status = fetch_complete_historical_data(BENCHMARK_START_DATE_FULL, BENCHMARK_END_DATE_FULL)
-    
-    if df_complete.empty:
-        return pd.DataFrame(), status
-
-    # Stap 2: Filter de complete data op de gevraagde periode
-    df_hist = df_complete[
-        (df_complete['Date'] >= start_date_str) & 
-        (df_complete['Date'] <= end_date_str)
-    ].copy()
-    
-    if df_hist.empty:
-        error_message = f"❌ Geen data gevonden in de complete set voor de periode {start_date_str} tot {end_date_str}."
-        return pd.DataFrame(), ('error', error_message)
-    
-    # Stap 3: Voltooi de verwerking voor de enkelvoudige benchmark
-    df_hist['Station Naam'] = 'Historische Benchmark'
-    success_message = f"Langjarige benchmarkdata (Klimaatnormaal {start_date_str[:4]}-{end_date_str[:4]}) van {len(df_hist)} dagen succesvol gefilterd van de complete set."
-    return df_hist.set_index('Date'), ('success', success_message)
-
-# -------------------------------------------------------------------
-# GECORRIGEERDE FUNCTIE: Ophalen Externe Historische Data voor ALLE Klimaatnormalen
-# Roept de complete set op en filtert lokaal.
-# -------------------------------------------------------------------
-@st.cache_data(ttl=86400) # Cache voor 24 uur
-def fetch_all_historical_benchmarks(climate_normal_periods):
-    """
-    Haalt de historische data voor alle gedefinieerde klimaatnormaalperioden op.
-    Gebruikt de complete set en filtert lokaal om rate limits te vermijden.
-    """
-    all_benchmarks = {}
-    
-    # Stap 1: Haal de complete dataset op (deze is gecached)
-    df_complete, status = fetch_complete_historical_data(BENCHMARK_START_DATE_FULL, BENCHMARK_END_DATE_FULL)
-    
-    if df_complete.empty:
-        # Als de complete set niet geladen kan worden, stoppen we hier.
-        return all_benchmarks 
-
-    # Sorteer de perioden van oud naar nieuw (laagste startjaar eerst)
-    sorted_periods = sorted(climate_normal_periods.items(), key=lambda item: int(item[1][0][:4]), reverse=False)
-    
-    for period_name, (start_date_str, end_date_str) in sorted_periods:
-        
-        # Stap 2: Filter de complete data op de gevraagde periode
-        df_hist = df_complete[
-            (df_complete['Date'] >= start_date_str) & 
-            (df_complete['Date'] <= end_date_str)
-        ].copy()
-        
-        if not df_hist.empty:
-            df_hist['Periode'] = period_name.split('(')[0].strip() # '1990-2019'
-            period_key = period_name.split('(')[0].strip() 
-            all_benchmarks[period_key] = df_hist
-            
-    return all_benchmarks
-
-
-# Nieuwe, veilige formatteer functie
-def safe_format_temp(x):
-    """Formats numeric value x to 'X.X °C', returns empty string for NaN or non-numeric types."""
-    if pd.isna(x):
-        return ""
-    try:
-        # Probeer om te zetten naar float en formatteer
-        return f"{float(x):.1f} °C"
-    except (ValueError, TypeError):
-        # Vang op als x een onverwacht type is dat niet naar float kan
-        return "" 
-        
-# NIEUWE FUNCTIE: Haalt de eenheid uit de display-naam
-def get_unit_from_display_name(display_name, plot_col):
-    """
-    Haalt de eenheid uit de display naam voor formatting.
-    """
-    if plot_col in ['temp', 'dauwpunt', 'natbol']:
-        return "°C" 
-    unit_match = re.search(r'\((.*?)\)', display_name)
-    if unit_match:
-        return unit_match.group(1).strip()
-    return display_name.split(' ')[-1].strip()
+# 1. Configuratie, constanten en data functies (zie malman/core.py)
+from malman.core import (
+    GITHUB_BASE_URL, START_YEAR, TARGET_TIMEZONE, PLOT_COLS, DAILY_FILTER_COLUMNS,
+    load_station_registry, station_location,
+    COL_DISPLAY_MAP, DISPLAY_TO_COL_MAP, CLIMATE_NORMAL_PERIODS,
+    discover_available_years, load_data, get_station_file_versions, combine_data_version,
+    fetch_all_historical_benchmarks, safe_format_temp, get_unit_from_display_name,
+    find_consecutive_periods, build_graph_figure, compute_daily_summary,
+    compute_daily_summary_with_benchmark, compute_extreme_days,
+    compute_climatology_benchmark_stats, build_kernwaarden, compute_kernwaarden,
+    compute_graph_figure, compute_daily_completeness, apply_coverage_policy, prefetch_historical_data,
+    compute_sort_positions, raw_data_page,
+)
+from malman.era5 import get_era5_fetcher
+from malman.query import QueryError, compile_query
+from malman.export import (
+    EXPORT_API_URL, EXPORT_APP_MAX_ROWS, EXPORT_CLI_HINT, EXPORT_FORMATS, export_api_url, export_bytes, iter_frame_chunks,
+)
+from malman.profiling import EXPORT_OPTIONS, RerunProfiler, build_waterfall_figure
+from malman.state import reuse_if_unchanged, share_across_sessions, clear_stage_results
+from malman.shared_cache import get_shared_cache, shared_cache_enabled
+from malman.live import LIVE_REFRESH_SECONDS, get_live_feed, append_live_rows
+from malman.archive import UnversionedYearError, archive_enabled, load_station_from_archive
+from malman.quality import MIN_DAY_COVERAGE, summarize_quality
+from malman.events import (
+    EVENT_TYPES, EVENT_WINDOWS, FOG_SPREAD_C, STORM_TENDENCY_HPA, TENDENCY_HOURS, classify_tendency, compute_event_view,
+    compute_station_events, summarize_events,
+)
+from malman.solar import SUNSHINE_THRESHOLD_WM2, build_radiation_figure, compute_daily_radiation, compute_period_radiation
+from malman.localtime import calendar_fields, date_day_number, dates_to_days, epoch_window_mask
+from malman.climatology import (
+    BAND_WINDOW_DAYS, ROLLING_ANOMALY_DAYS, attach_station_bands, count_anomaly_classes, classify_anomalies,
+    compute_period_percentiles, compute_anomalies, build_anomaly_figure,
+)
+from malman.comparison import CORRELATION_WINDOWS, compute_station_comparison, build_comparison_figure
+from malman.sql import SQL_EXAMPLES, SQL_MAX_ROWS, SqlConsoleError, compute_sql_sync, describe_sql_schema, run_sql_query, sql_enabled
 
+# Tijdsbereiken waarvoor de Live modus in Tab 1 beschikbaar is
+LIVE_TIME_RANGES = ["Huidige dag (sinds 00:00 uur)", "Laatste 24 uur"]
 
-def find_consecutive_periods(df_filtered, min_days, temp_column):
-    """Vindt en retourneert aaneengesloten periodes in een gefilterde DataFrame."""
-    
-    if df_filtered.empty:
-        return pd.DataFrame(), 0
+# Paginagroottes van de Ruwe Data (Tab 2)
+RAW_PAGE_SIZES = [100, 500, 2000]
 
-    df_groups = df_filtered.copy()
-    
-    if not isinstance(df_groups.index, pd.DatetimeIndex):
-        return pd.DataFrame(), 0 
-    
-    df_groups = df_groups.reset_index().sort_values('Date') 
+# Hoe vaak (seconden) de zijbalk de voortgang van de ERA5 achtergrond-download ververst
+BENCHMARK_POLL_SECONDS = 2
 
-    grouped = df_groups.groupby('Station Naam')
-    all_periods = []
 
-    for name, group in grouped:
-        group['new_period'] = (group['Date'].diff().dt.days.fillna(0) > 1).astype(int) 
-        group['group_id'] = group['new_period'].cumsum()
-        
-        periods = group.groupby('group_id').agg(
-            StartDatum=('Date', 'min'),
-            EindDatum=('Date', 'max'),
-            Duur=('Date', 'size'),
-            Gemiddelde_Temp_Periode=(temp_column, 'mean')
-        ).reset_index(drop=True)
-        
-        periods['Station Naam'] = name
-        
-        periods = periods[periods['Duur'] >= min_days]
-        all_periods.append(periods)
+# Boven dit aantal stations worden tabellen per station samengevoegd tot één tabel
+MAX_STATION_SECTIONS = 8
 
-    if not all_periods:
-        return pd.DataFrame(), 0
 
-    periods_combined = pd.concat(all_periods, ignore_index=True)
-    
-    periods_combined['StartDatum'] = periods_combined['StartDatum'].dt.strftime('%d-%m-%Y')
-    periods_combined['EindDatum'] = periods_combined['EindDatum'].dt.strftime('%d-%m-%Y')
-    
-    periods_combined['Gemiddelde_Temp_Periode'] = periods_combined['Gemiddelde_Temp_Periode'].map(safe_format_temp)
+# 2. Functies voor Weergave (Display Helpers)
 
-    total_periods = len(periods_combined)
-    
-    return periods_combined.reset_index(drop=True), total_periods
-
-
-def find_extreme_days(df_daily_summary, top_n=5):
+def display_station_tables(df_display, header_func):
     """
-    Vindt de warmste, koudste en meest extreme dagen uit de dagelijkse samenvatting.
+    Toont een tabel per station met een kop (header_func(station, df_group)).
+    Bij veel stations één gecombineerde tabel, zodat de tab ook met 50+ stations snel blijft.
     """
-    if df_daily_summary.empty:
-        return {}
-
-    df_analysis = df_daily_summary.copy()
-    df_analysis['Temp_Range_C'] = df_analysis['Temp_High_C'] - df_analysis['Temp_Low_C']
-
-    results = {}
-
-    extremes_config = {
-        'hoogste_max_temp': ('Temp_High_C', False, 'Max Temp (°C)'), 
-        'hoogste_min_temp': ('Temp_Low_C', False, 'Min Temp (°C)'),   
-        'hoogste_gem_temp': ('Temp_Avg_C', False, 'Gem Temp (°C)'),   
-        'laagste_min_temp': ('Temp_Low_C', True, 'Min Temp (°C)'),    
-        'laagste_max_temp': ('Temp_High_C', True, 'Max Temp (°C)'),   
-        'laagste_gem_temp': ('Temp_Avg_C', True, 'Gem Temp (°C)'),    
-        'grootste_range': ('Temp_Range_C', False, 'Range (°C)')
-    }
-
-    for key, (column, ascending, display_col) in extremes_config.items():
-        
-        extreme_df_list = []
-        for station, group in df_analysis.groupby('Station Naam'):
-            
-            top_days = group.sort_values(by=column, ascending=ascending).head(top_n)
-
-            df_display = top_days.reset_index().copy()
-
-            if 'Date' in df_display.columns:
-                 df_display['Datum'] = df_display['Date'].dt.strftime('%d-%m-%Y')
-                 df_display = df_display.drop(columns=['Date']) 
-            
-            rename_dict = {
-                'Temp_High_C': 'Max Temp (°C)', 
-                'Temp_Low_C': 'Min Temp (°C)',
-                'Temp_Avg_C': 'Gem Temp (°C)',
-                'Temp_Range_C': 'Range (°C)' 
-            }
-            
-            df_display = df_display.rename(columns=rename_dict)
-            
-            temp_display_cols = ['Max Temp (°C)', 'Min Temp (°C)', 'Range (°C)', 'Gem Temp (°C)']
-            for col_name in temp_display_cols:
-                if col_name in df_display.columns:
-                     df_display[col_name] = df_display[col_name].map(safe_format_temp)
-
-
-            if key in ['hoogste_max_temp', 'laagste_max_temp']:
-                 final_cols_order = ['Datum', 'Station Naam', 'Max Temp (°C)']
-            elif key in ['hoogste_min_temp', 'laagste_min_temp']:
-                 final_cols_order = ['Datum', 'Station Naam', 'Min Temp (°C)']
-            elif key in ['hoogste_gem_temp', 'laagste_gem_temp']:
-                 final_cols_order = ['Datum', 'Station Naam', 'Gem Temp (°C)']
-            else: # grootste_range
-                 final_cols_order = ['Datum', 'Station Naam', 'Range (°C)', 'Max Temp (°C)', 'Min Temp (°C)']
-            
-            df_final_display = df_display[[c for c in final_cols_order if c in df_display.columns]].copy()
-            
-            extreme_df_list.append(df_final_display)
+    if df_display['Station Naam'].nunique() > MAX_STATION_SECTIONS:
+        st.dataframe(df_display, use_container_width=True)
+        return
 
-        if extreme_df_list:
-             results[key] = pd.concat(extreme_df_list, ignore_index=True).sort_values(by='Station Naam', ascending=True)
+    for station_name, df_group in df_display.groupby('Station Naam'):
+        st.markdown(header_func(station_name, df_group))
+        st.dataframe(df_group.drop(columns=['Station Naam']), use_container_width=True)
+        st.markdown("---")
 
-    return results
 
 def display_extreme_results_by_station(df_results, title, info_text):
     """Toont extreme dagen, gegroepeerd per station met een duidelijke kop."""
@@ -400,11 +85,10 @@ def display_extreme_results_by_station(df_results, title, info_text):
         st.warning("Geen data gevonden voor deze extreme categorie.")
         return
 
-    for station_name, df_station in df_results.groupby('Station Naam'):
-        st.markdown(f"##### 📌 Station: **{station_name}**")
-        display_cols = [c for c in df_station.columns if c not in ['Station Naam']] 
-        st.dataframe(df_station[display_cols].set_index('Datum'), use_container_width=True)
-        st.markdown("---")
+    display_station_tables(
+        df_results.set_index('Datum'),
+        lambda station_name, df_group: f"##### 📌 Station: **{station_name}**"
+    )
 
 
 # 3. Streamlit Applicatie Hoofdsectie (Streamlit Application Main)
@@ -418,9 +102,14 @@ st.set_page_config(
 st.title(f"☀️ Weergrafieken ")
 st.markdown("Analyseer en visualiseer weerdata van de Malmån stations.")
 
+# Stationsregister (stations.json naast de data): namen, locaties, hoogtes en startjaren
+STATION_REGISTRY = load_station_registry()
+STATION_MAP = {station_id: info['naam'] for station_id, info in STATION_REGISTRY.items()}
+
 # CRUCIALE FIX: Initialiseer df_combined VOORDAT de sidebar deze gebruikt
 df_combined = pd.DataFrame() 
 failed_stations = []
+data_version = None
 
 # PlaatsHouders voor de sidebar (Nu ook de benchmark status)
 years_info_to_display = [] 
@@ -429,14 +118,22 @@ status_placeholder = None
 info_placeholder_start_year = None
 info_placeholder_years = None
 info_placeholder_last_check = None
+info_placeholder_data_version = None
+info_placeholder_quality = None
 info_placeholder_benchmark = None 
-all_hist_benchmarks = {} # NIEUW: Initialisatie van de all_hist_benchmarks variabele
 
 # --- Initialiseer de Session State voor de Benchmark Selectie ---
 if 'benchmark_period_select' not in st.session_state:
     st.session_state.benchmark_period_select = list(CLIMATE_NORMAL_PERIODS.keys())[0]
     st.session_state.benchmark_start_date, st.session_state.benchmark_end_date = CLIMATE_NORMAL_PERIODS[st.session_state.benchmark_period_select]
     st.session_state.benchmark_period_display = st.session_state.benchmark_period_select
+
+# --- Weergave-opties van Tab 1 (blijven bewaard, ook als Tab 1 niet zichtbaar is) ---
+PLOT_OPTIONS = [COL_DISPLAY_MAP[col] for col in PLOT_COLS]
+if 'variable_select' not in st.session_state:
+    st.session_state.variable_select = COL_DISPLAY_MAP.get('temp')
+if 'show_markers' not in st.session_state:
+    st.session_state.show_markers = False
     
 # 💥 Sectie 1: Data Selectie & Visualisatie Opties (Geconsolideerd)
 with st.sidebar.expander("🛠️ Data & Visualisatie Keuze", expanded=True):
@@ -452,30 +149,9 @@ with st.sidebar.expander("🛠️ Data & Visualisatie Keuze", expanded=True):
 
     # --- Scheiding ---
     st.markdown("---")
-    st.header("2. Grafiek & Tijd")
-    
-    # a. Grafiek Variabele
-    st.markdown("##### Variabele")
-    plot_options = [COL_DISPLAY_MAP[col] for col in NUMERIC_COLS if col in df_combined.columns or df_combined.empty]
-    
-    if df_combined.empty:
-        plot_options = [COL_DISPLAY_MAP[col] for col in NUMERIC_COLS]
-        
-    default_selection = [COL_DISPLAY_MAP.get('temp')] if COL_DISPLAY_MAP.get('temp') in plot_options else [plot_options[0]] if plot_options else []
-         
-    selected_variable_display = st.selectbox(
-        "Kies de variabele voor de grafiek:",
-        options=plot_options,
-        index=plot_options.index(default_selection[0]) if default_selection else 0, 
-        key='variable_select',
-    )
+    st.header("2. Tijd")
     
-    if plot_options:
-         selected_variables = [DISPLAY_TO_COL_MAP[selected_variable_display]]
-    else:
-         selected_variables = []
-    
-    # b. Tijdsbereik
+    # Tijdsbereik
     st.markdown("##### Tijdsbereik (Grafiek & Ruwe Data)")
     time_range_options = [
         "Huidige dag (sinds 00:00 uur)",
@@ -491,12 +167,17 @@ with st.sidebar.expander("🛠️ Data & Visualisatie Keuze", expanded=True):
         index=0,
         key='time_range_select'
     )
-    
-    # c. Datapunten
-    show_markers = st.checkbox(
-        "Toon Datapunten (Markers)", 
-        key="show_markers",
+
+    # --- Scheiding ---
+    st.markdown("---")
+    st.header("3. Datakwaliteit")
+    st.slider(
+        "Minimale dekking per dag (%):",
+        min_value=0, max_value=100, value=int(MIN_DAY_COVERAGE * 100), step=5,
+        key='min_day_coverage',
+        help="Dagen met minder metingen dan dit deel van het verwachte aantal tellen niet mee in de dagelijkse analyses (Tab 3 t/m 6)."
     )
+    min_coverage = st.session_state.min_day_coverage / 100
     
 
 # 💥 Sectie 2: Historische Benchmark Instellingen (NIEUW)
@@ -524,6 +205,11 @@ with st.sidebar.expander("⚙️ Programma Checks", expanded=False):
 
     if st.button("Herlaad Data (Wis Cache)", key="reload_button_check"):
         st.cache_data.clear()
+        # Ook de gedeelde cache (alle serverprocessen), anders komen dezelfde resultaten daar weer vandaan
+        if shared_cache_enabled():
+            get_shared_cache().clear()
+        get_era5_fetcher().forget()
+        clear_stage_results()
         button_action = True 
     
     st.markdown("---")
@@ -531,10 +217,22 @@ with st.sidebar.expander("⚙️ Programma Checks", expanded=False):
     info_placeholder_start_year = st.empty()
     info_placeholder_years = st.empty()
     info_placeholder_last_check = st.empty()
+    info_placeholder_data_version = st.empty()
+    info_placeholder_quality = st.empty()
     
     # Plaats de Benchmark Status HIER
     info_placeholder_benchmark = st.empty()
 
+    # Opt-in meting van de rerun (tijd, cache en rijen per fase)
+    st.markdown("---")
+    profiling_enabled = st.checkbox("Meet deze rerun (Profiling)", key="profiling_enabled")
+    profiling_export = EXPORT_OPTIONS[0]
+    if profiling_enabled:
+        profiling_export = st.selectbox("Export profiel:", EXPORT_OPTIONS, key="profiling_export")
+    info_placeholder_profiling = st.empty()
+
+profiler = RerunProfiler(enabled=profiling_enabled, export=profiling_export)
+
 
 # --- Data Loading Logic (Gebruikt de placeholders van hierboven) ---
 
@@ -547,34 +245,87 @@ if selected_station_ids:
     if status_placeholder:
         status_placeholder.info("Zoekt naar beschikbare datajaren op GitHub...", icon="⏳")
         
-    available_years = discover_available_years(START_YEAR, selected_station_ids[0], GITHUB_BASE_URL)
+    # Per station (elk station kan andere jaren hebben); alleen voor de geselecteerde stations
+    with profiler.stage("Jaarontdekking", cached=True):
+        years_by_station = {
+            station_id: discover_available_years(STATION_REGISTRY[station_id].get('start_jaar', START_YEAR), station_id, GITHUB_BASE_URL)
+            for station_id in selected_station_ids
+        }
+    available_years = sorted(set().union(*years_by_station.values()))
     
     if not available_years:
         if status_placeholder:
-            status_placeholder.error(f"Geen data gevonden van {START_YEAR} tot nu voor het pad {selected_station_ids[0]}. Controleer URL en startjaar.")
+            status_placeholder.error(f"Geen data gevonden van {START_YEAR} tot nu voor de geselecteerde stations. Controleer URL en startjaar.")
     else:
         years_info_to_display = available_years
         
-        all_data = []
-        for station_id in selected_station_ids:
-            station_name = STATION_MAP.get(station_id, station_id)
-            
-            # 2. Data Laden
-            if status_placeholder:
-                status_placeholder.info(f"Data van: **{station_name}** ({', '.join(map(str, available_years))}) wordt geladen...", icon="⬇️")
-            
-            df_station = load_data(station_id, available_years, GITHUB_BASE_URL, STATION_MAP, TARGET_TIMEZONE)
-            
-            if not df_station.empty:
-                df_station['Station Naam'] = station_name
-                all_data.append(df_station)
-            else:
-                failed_stations.append(station_name)
+        # 2. Dataversies: ETag/hash per jaarbestand (kort gecached). Alles wat hierna komt
+        #    is op deze versie gesleuteld; alleen een gewijzigd bestand wordt opnieuw gelezen.
+        with profiler.stage("Dataversies", cached=True):
+            file_versions = {
+                station_id: get_station_file_versions(station_id, tuple(years_by_station[station_id]), GITHUB_BASE_URL)
+                for station_id in selected_station_ids
+            }
+        # De afgeleide grootheden (zeeniveaudruk, helderheid) hangen ook van de stationslocatie af
+        locations_by_station = {station_id: station_location(STATION_REGISTRY[station_id]) for station_id in selected_station_ids}
+        data_version = combine_data_version(tuple(file_versions.items()), tuple(locations_by_station.items()))
+
+        # 3. Data Laden (alleen opnieuw als de dataversie wijzigt)
+        def load_selected_stations():
+            all_data = []
+            failed = []
+            for station_id in selected_station_ids:
+                station_name = STATION_MAP.get(station_id, station_id)
+                
+                if status_placeholder:
+                    status_placeholder.info(f"Data van: **{station_name}** ({', '.join(map(str, years_by_station[station_id]))}) wordt geladen...", icon="⬇️")
+                
+                df_station = None
+                if archive_enabled():
+                    # Memory-mapped archief: alleen gewijzigde jaarbestanden worden nog geparseerd
+                    try:
+                        with profiler.stage(f"Laden (archief): {station_name}") as stage:
+                            df_station = load_station_from_archive(
+                                station_id, file_versions[station_id], GITHUB_BASE_URL, TARGET_TIMEZONE,
+                                location=locations_by_station[station_id]
+                            )
+                            stage['rows'] = len(df_station)
+                    except Exception:
+                        df_station = None  # Terugvallen op het rechtstreeks laden van de CSV bestanden
+
+                if df_station is None:
+                    with profiler.stage(f"Laden: {station_name}", cached=True) as stage:
+                        df_station = load_data(
+                            station_id, years_by_station[station_id], GITHUB_BASE_URL, STATION_MAP, TARGET_TIMEZONE,
+                            file_versions[station_id], locations_by_station[station_id]
+                        )
+                        stage['rows'] = len(df_station)
+                
+                if not df_station.empty:
+                    df_station['Station Naam'] = station_name
+                    all_data.append(df_station)
+                else:
+                    failed.append(station_name)
+
+            if not all_data:
+                return pd.DataFrame(), failed
+
+            with profiler.stage("Samenvoegen (concat)") as stage:
+                df_all = pd.concat(all_data, ignore_index=True)
+                stage['rows'] = len(df_all)
+            return df_all, failed
+
+        with profiler.stage("Stationsdata (pipeline)") as stage:
+            # Eén exemplaar per proces: de volledige historie wordt niet per sessie vastgehouden
+            df_combined, failed_stations = share_across_sessions(
+                "stations_data",
+                (tuple(selected_station_ids), data_version),
+                load_selected_stations
+            )
+            stage['rows'] = len(df_combined)
         
-        # 3. Eindstatus
-        if all_data:
-            df_combined = pd.concat(all_data, ignore_index=True)
-            
+        # 4. Eindstatus
+        if not df_combined.empty:
             if failed_stations:
                 if status_placeholder:
                     status_placeholder.warning(f"Laden voltooid. Fout bij stations: {', '.join(failed_stations)}")
@@ -586,13 +337,22 @@ if selected_station_ids:
             if status_placeholder:
                 status_placeholder.error(f"Geen data geladen voor de geselecteerde stations uit de gevonden jaren.")
 
-    # 4. Update Programma Info
+    # 5. Update Programma Info
     if info_placeholder_start_year:
         info_placeholder_start_year.markdown(f"**Start Jaar Zoektocht:** `{START_YEAR}`")
     if info_placeholder_years:
         info_placeholder_years.markdown(f"**Gevonden Jaarbestanden:** `{', '.join(map(str, years_info_to_display))}`")
     if info_placeholder_last_check:
         info_placeholder_last_check.markdown(f"**Laatste Data Check:** {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    if info_placeholder_data_version and data_version:
+        info_placeholder_data_version.markdown(f"**Dataversie:** `{data_version}`")
+    if info_placeholder_quality and not df_combined.empty:
+        # QC tellingen per station (gaten, pieken/bereikfouten, lage batterij, onvolledige dagen)
+        with profiler.stage("Datakwaliteit (dekking per dag)", cached=True):
+            df_quality = summarize_quality(compute_daily_completeness(df_combined, data_version), min_coverage)
+        with info_placeholder_quality.container():
+            st.markdown(f"**Datakwaliteit** (dagen < {min_coverage:.0%} dekking tellen niet mee in de dagelijkse analyses):")
+            st.dataframe(df_quality, use_container_width=True)
 
 else:
     if status_placeholder:
@@ -661,10 +421,13 @@ else:
         if start_date_local > end_date_local:
              start_date_local, end_date_local = end_date_local, start_date_local
              
-        filtered_df = df_combined[
-            (df_combined['Timestamp_Local'] >= start_date_local) & 
-            (df_combined['Timestamp_Local'] <= end_date_local)
-        ]
+        with profiler.stage("Tijdsfilter") as stage:
+            filtered_df = reuse_if_unchanged(
+                "time_filter",
+                (tuple(selected_station_ids), data_version, start_date_local, end_date_local),
+                lambda: df_combined[epoch_window_mask(df_combined, start_date_local, end_date_local)]
+            )
+            stage['rows'] = len(filtered_df)
         
         if not filtered_df.empty:
             start_display = filtered_df['Timestamp_Local'].min()
@@ -675,75 +438,89 @@ else:
             
         date_range_display_start = start_display.strftime('%d-%m-%Y %H:%M')
         date_range_display_end = end_display.strftime('%d-%m-%Y %H:%M')
+        # Identificeert de inhoud van het tijdsvenster (voor de cache van afgeleide waarden)
+        time_window_key = (data_version, start_display, end_display, len(filtered_df))
 
     else:
         filtered_df = df_combined
         date_range_display_start = df_combined['Timestamp_Local'].min().strftime('%d-%m-%Y %H:%M')
         date_range_display_end = df_combined['Timestamp_Local'].max().strftime('%d-%m-%Y %H:%M')
+        time_window_key = (data_version, None, None, len(filtered_df))
         
-    # 2. Dagelijkse Samenvatting (voor Tab 3, 4, 5)
-    df_combined_indexed = df_combined.set_index('Timestamp_Local')
-
-    df_daily_summary = df_combined_indexed.groupby('Station Naam').resample('D').agg(
-        Temp_High_C=('temp', 'max'),
-        Temp_Low_C=('temp', 'min'),
-        Temp_Avg_C=('temp', 'mean'),
-        Pres_Avg_hPa=('druk', 'mean'), 
-        Hum_Avg_P=('luchtvocht', 'mean'), 
-    ).dropna(subset=['Temp_Avg_C']).reset_index()
-
-    df_daily_summary = df_daily_summary.rename(columns={'Timestamp_Local': 'Date'}).set_index('Date')
-    df_daily_summary.index.name = 'Date' 
-    
-    # -------------------------------------------------------------
-    # Langjarig Gemiddelde (Historical Benchmark) Berekenen
-    # -------------------------------------------------------------
-
-    df_hist_raw, benchmark_status = fetch_historical_benchmark_data(
-        st.session_state.benchmark_start_date, 
-        st.session_state.benchmark_end_date
-    ) 
-    
-    if info_placeholder_benchmark and benchmark_status:
-        status_type, message = benchmark_status
-        if status_type == 'success':
-            info_placeholder_benchmark.success(message, icon="📈")
-        elif status_type == 'warning':
-            info_placeholder_benchmark.warning(message, icon="⚠️")
-        elif status_type == 'error':
-            info_placeholder_benchmark.error(message, icon="❌")
-
-    if not df_hist_raw.empty and all(col in df_hist_raw.columns for col in ['Temp_Avg_C', 'Temp_High_C', 'Temp_Low_C']):
-        
-        df_hist_raw = df_hist_raw.reset_index() 
-        df_hist_raw['Month_Day'] = df_hist_raw['Date'].dt.strftime('%m-%d')
-        
-        # 1. Bereken de Langjarige Benchmark
-        df_langjarig_gemiddelde = df_hist_raw.groupby('Month_Day').agg(
-            Langjarig_Avg_Temp=('Temp_Avg_C', 'mean'),
-            Langjarig_Avg_Max=('Temp_High_C', 'mean'),
-            Langjarig_Avg_Min=('Temp_Low_C', 'mean'),
-        ).reset_index()
-        
-        df_langjarig_gemiddelde = df_langjarig_gemiddelde.set_index('Month_Day')
-        
-        # 2. Voeg de benchmark toe aan df_daily_summary
-        df_daily_summary_extended = df_daily_summary.copy().reset_index()
-        df_daily_summary_extended['Month_Day'] = df_daily_summary_extended['Date'].dt.strftime('%m-%d')
-        
-        df_daily_summary = pd.merge(
-            df_daily_summary_extended,
-            df_langjarig_gemiddelde,
-            on='Month_Day',
-            how='left'
-        ).drop(columns=['Month_Day']).set_index('Date')
-        
-        df_daily_summary.index.name = 'Date' 
-    
-    # -------------------------------------------------------------
-    # NIEUW: Ophalen van ALLE Historische Benchmarks voor Klimatologie Tab
-    # -------------------------------------------------------------
-    all_hist_benchmarks = fetch_all_historical_benchmarks(CLIMATE_NORMAL_PERIODS)
+    # 2. Dagelijkse Samenvatting & Langjarig Gemiddelde (Lazy)
+    # Deze worden pas berekend door de tab die ze nodig heeft (Tab 3 t/m 6) en
+    # daarna uit de cache hergebruikt zolang de invoer niet verandert.
+    def show_benchmark_status(benchmark_status):
+        if info_placeholder_benchmark and benchmark_status:
+            status_type, message = benchmark_status
+            if status_type == 'success':
+                info_placeholder_benchmark.success(message, icon="📈")
+            elif status_type == 'warning':
+                info_placeholder_benchmark.warning(message, icon="⚠️")
+            elif status_type == 'error':
+                info_placeholder_benchmark.error(message, icon="❌")
+
+    # ERA5 locatie per station (uit het stationsregister)
+    station_locations = tuple(
+        (STATION_MAP[station_id], station_location(STATION_REGISTRY[station_id])) for station_id in selected_station_ids
+    )
+    # Tab 6 vergelijkt met de klimaatnormalen op de locatie van het eerste geselecteerde station
+    clima_location = station_locations[0][1]
+
+    # De ERA5 benchmark wordt op de achtergrond geladen; de stationsdata wordt intussen al getoond.
+    # Tab 4 en Tab 6 vullen hun benchmarkdelen zodra de download klaar is (volledige rerun).
+    def benchmark_progress():
+        """(klaar, voortgang per locatie) van de ERA5 download van alle geselecteerde stations."""
+        progress = prefetch_historical_data([location for _, location in station_locations])
+        return all(state != 'pending' for state, _ in progress), progress
+
+    @st.fragment(run_every=BENCHMARK_POLL_SECONDS)
+    def poll_benchmark():
+        ready, progress = benchmark_progress()
+        if ready:
+            st.rerun()
+        seconds = max(elapsed for state, elapsed in progress if state == 'pending')
+        st.info(
+            f"ERA5 benchmark (1940-2019) wordt op de achtergrond geladen: "
+            f"{sum(state != 'pending' for state, _ in progress)}/{len(progress)} locatie(s) klaar ({seconds:.0f} s)...",
+            icon="⏳"
+        )
+
+    benchmark_ready, era5_progress = benchmark_progress()
+    if benchmark_ready:
+        # De ernstigste status wordt getoond
+        severity = {'error': 0, 'warning': 1, 'success': 2}
+        show_benchmark_status(min(era5_progress, key=lambda status: severity.get(status[0], 3)))
+    elif info_placeholder_benchmark:
+        with info_placeholder_benchmark.container():
+            poll_benchmark()
+
+    def get_daily_summary(with_benchmark=False):
+        """
+        Geeft de (gecachte) dagelijkse samenvatting, optioneel met het langjarig gemiddelde.
+        Dagen onder de gekozen minimale dekking vallen weg (met een melding hoeveel).
+        """
+        if not with_benchmark:
+            with profiler.stage("Dagelijkse resample", cached=True) as stage:
+                df_daily = compute_daily_summary(df_combined, data_version)
+                stage['rows'] = len(df_daily)
+        else:
+            with profiler.stage("Dagelijkse resample + Benchmark", cached=True) as stage:
+                df_daily, benchmark_status = compute_daily_summary_with_benchmark(
+                    df_combined,
+                    data_version,
+                    st.session_state.benchmark_start_date, 
+                    st.session_state.benchmark_end_date,
+                    station_locations
+                )
+                stage['rows'] = len(df_daily)
+            show_benchmark_status(benchmark_status)
+
+        df_daily_covered = apply_coverage_policy(df_daily, min_coverage)
+        excluded_days = len(df_daily) - len(df_daily_covered)
+        if excluded_days:
+            st.caption(f"ℹ️ {excluded_days} dag(en) met minder dan {min_coverage:.0%} dekking zijn buiten beschouwing gelaten.")
+        return df_daily_covered
 
 
 # -------------------------------------------------------------------
@@ -754,23 +531,21 @@ if df_combined.empty:
     st.warning("Geen weerdata geladen. Selecteer stations in de zijbalk.")
 else:
     
-    tab_titles_full = ["📈 Grafiek", "📊 Ruwe Data", "🔍 Historische Zoeker", "⭐ Maand/Jaar Analyse", "🏆 Extremen", "🌎 Klimatologie"] # <--- HIER IS DE WIJZIGING
-    
-    tab_graph, tab_raw, tab_history, tab_analysis, tab_extremes, tab_climatology = st.tabs(tab_titles_full) # <--- HIER IS DE WIJZIGING
+    tab_titles_full = ["📈 Grafiek", "📊 Ruwe Data", "🔍 Historische Zoeker", "⭐ Maand/Jaar Analyse", "🏆 Extremen", "🌎 Klimatologie", "🔀 Stationsvergelijking", "🧮 SQL Console", "⚡ Weergebeurtenissen", "☀️ Zonnestraling"] # <--- HIER IS DE WIJZIGING
     
-    # --- Tab 1: Grafiek ---
-    with tab_graph:
-        
-        st.header("Grafiek Weergave")
-        st.markdown(f"**Periode:** {date_range_display_start} tot {date_range_display_end} (Tijdzone: {TARGET_TIMEZONE})")
+    # --- Tab 1: Kernwaarden & Grafiek (ook gebruikt door de Live modus) ---
+    def render_graph_view(view_df, selected_variable_display, show_markers, period_start, period_end, window_key=None):
+        selected_variables = [DISPLAY_TO_COL_MAP[selected_variable_display]]
+
+        st.markdown(f"**Periode:** {period_start} tot {period_end} (Tijdzone: {TARGET_TIMEZONE})")
         st.markdown(f"**Gevisualiseerde Variabele:** **{selected_variable_display}**")
+    
+        if not view_df.empty:
         
-        if not filtered_df.empty:
-            
             # --- Samenvattingssectie: Kernwaarden (st.metric) ---
             st.markdown("---")
             st.subheader("📊 Kernwaarden van de Geselecteerde Periode")
-            
+        
             plot_col = selected_variables[0] 
             y_axis_title = selected_variable_display
             unit = get_unit_from_display_name(y_axis_title, plot_col)
@@ -779,121 +554,253 @@ else:
                 if pd.isna(val):
                     return "N/A"
                 return f"{val:.1f} {unit}"
+
+            def format_time_metric(ts):
+                return ts.strftime('%H:%M') if pd.notna(ts) else "-"
+
+            # Alle stations en variabelen in één keer (gecached per tijdsvenster; de live modus rekent zelf)
+            with profiler.stage("Tab 1: Kernwaarden", cached=window_key is not None):
+                if window_key is not None:
+                    df_kernwaarden = compute_kernwaarden(view_df, window_key)
+                else:
+                    df_kernwaarden = build_kernwaarden(view_df)
             
-            for station_name, group in filtered_df.groupby('Station Naam'):
+            df_kern_plot = df_kernwaarden.xs(plot_col, level='Variabele')
+            if len(df_kern_plot) > MAX_STATION_SECTIONS:
+                # Veel stations: één tabel in plaats van vier metrics per station
+                st.dataframe(
+                    df_kern_plot[['Laatste', 'Laatste Tijd', 'Min', 'Min Tijd', 'Gem', 'Max', 'Max Tijd']],
+                    use_container_width=True
+                )
+            else:
+                for (station_name, _), kern in df_kernwaarden.xs(plot_col, level='Variabele', drop_level=False).iterrows():
                 
-                st.markdown(f"##### 📌 Station: **{station_name}**")
-
-                max_val = group[plot_col].max()
-                avg_val = group[plot_col].mean()
-                min_val = group[plot_col].min()
+                    st.markdown(f"##### 📌 Station: **{station_name}**")
 
-                last_row = group.sort_values('Timestamp_Local', ascending=False).iloc[0]
-                last_val = last_row[plot_col]
-                last_time = last_row['Timestamp_Local'].strftime('%H:%M') 
+                    last_val, avg_val, min_val, max_val = kern['Laatste'], kern['Gem'], kern['Min'], kern['Max']
                 
-                last_delta_val_str = None
-                if not pd.isna(last_val) and not pd.isna(avg_val):
-                     delta_raw = last_val - avg_val
-                     if delta_raw > 0:
-                         last_delta_val_str = f"+{delta_raw:.1f} {unit}"
-                     elif delta_raw < 0:
-                          last_delta_val_str = f"{delta_raw:.1f} {unit}"
-                     else:
-                          last_delta_val_str = "0.0 " + unit
+                    last_delta_val_str = None
+                    if not pd.isna(last_val) and not pd.isna(avg_val):
+                         delta_raw = last_val - avg_val
+                         if delta_raw > 0:
+                             last_delta_val_str = f"+{delta_raw:.1f} {unit}"
+                         elif delta_raw < 0:
+                              last_delta_val_str = f"{delta_raw:.1f} {unit}"
+                         else:
+                              last_delta_val_str = "0.0 " + unit
                 
-                col_last, col_min, col_avg, col_max = st.columns(4)
-
-                with col_last:
-                    st.metric(
-                        label=f"Laatste ({last_time})", 
-                        value=format_value_metric(last_val),
-                        delta=f"vs. Gem: {last_delta_val_str}" if last_delta_val_str else None,
-                        delta_color="normal"
-                    )
-                with col_min:
-                    min_row = group[group[plot_col] == min_val].sort_values('Timestamp_Local', ascending=False).iloc[0]
-                    min_time = min_row['Timestamp_Local'].strftime('%H:%M')
-                    st.metric(label=f"Minimale ({min_time})", value=format_value_metric(min_val))
-                with col_avg:
-                    st.metric(label="Gemiddelde", value=format_value_metric(avg_val))
-                with col_max:
-                    max_row = group[group[plot_col] == max_val].sort_values('Timestamp_Local', ascending=False).iloc[0]
-                    max_time = max_row['Timestamp_Local'].strftime('%H:%M')
-                    st.metric(label=f"Maximale ({max_time})", value=format_value_metric(max_val))
-                st.markdown("---") 
+                    col_last, col_min, col_avg, col_max = st.columns(4)
+
+                    with col_last:
+                        st.metric(
+                            label=f"Laatste ({format_time_metric(kern['Laatste Tijd'])})", 
+                            value=format_value_metric(last_val),
+                            delta=f"vs. Gem: {last_delta_val_str}" if last_delta_val_str else None,
+                            delta_color="normal"
+                        )
+                    with col_min:
+                        st.metric(label=f"Minimale ({format_time_metric(kern['Min Tijd'])})", value=format_value_metric(min_val))
+                    with col_avg:
+                        st.metric(label="Gemiddelde", value=format_value_metric(avg_val))
+                    with col_max:
+                        st.metric(label=f"Maximale ({format_time_metric(kern['Max Tijd'])})", value=format_value_metric(max_val))
+                    st.markdown("---") 
             
             st.markdown("---") 
-            
+        
             # --- Grafiek ---
             plot_col = selected_variables[0] 
             y_axis_title = selected_variable_display
-            
-            trace_mode = 'lines+markers' if st.session_state.get('show_markers') else 'lines'
-
-            fig = px.line(
-                filtered_df,
-                x='Timestamp_Local',
-                y=plot_col,
-                color='Station Naam',
-                line_shape='linear',
-                title=f'Weerdata van {selected_variable_display} ({date_range_display_start} - {date_range_display_end})',
-                labels={'Timestamp_Local': f'Tijdstip ({TARGET_TIMEZONE})', plot_col: y_axis_title},
-                height=600
-            )
+        
+            with profiler.stage("Tab 1: Figuur bouwen", cached=window_key is not None, rows=len(view_df)):
+                if window_key is not None:
+                    fig = compute_graph_figure(
+                        view_df, window_key, plot_col, y_axis_title, unit,
+                        period_start, period_end,
+                        show_markers=show_markers
+                    )
+                else:
+                    fig = build_graph_figure(
+                        view_df, plot_col, y_axis_title, unit,
+                        period_start, period_end,
+                        show_markers=show_markers
+                    )
+
+            st.plotly_chart(fig, use_container_width=True)
+        
+        else:
+            st.warning("Geen data gevonden voor het geselecteerde tijdsbereik en station(s).")
+
+    # --- Tab 1: Live modus (ververst zichzelf, leest alleen de staart van het huidige jaarbestand) ---
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def render_live_graph_view(selected_variable_display, show_markers):
+        feed = get_live_feed()
+        live_frames = {}
+        for station_id in selected_station_ids:
+            station_name = STATION_MAP.get(station_id, station_id)
+            live_rows, live_error = feed.poll(station_id, GITHUB_BASE_URL, TARGET_TIMEZONE, station_location(STATION_REGISTRY[station_id]))
+            live_frames[station_name] = live_rows
+            if live_error:
+                st.warning(f"Live data van {station_name} kon niet opgehaald worden. Reden: {live_error}")
+
+        now_live = pd.Timestamp.now(tz=TARGET_TIMEZONE)
+        if st.session_state.time_range_select == "Laatste 24 uur":
+            window_start = now_live - pd.Timedelta(hours=24)
+        else:
+            window_start = now_live.normalize()
+
+        view_df = append_live_rows(filtered_df, live_frames, window_start=window_start)
+        n_new = len(view_df) - int((filtered_df['Timestamp_Local'] >= window_start).sum())
+        st.caption(f"🔴 Live bijgewerkt om {now_live.strftime('%H:%M:%S')} · {max(n_new, 0)} nieuwe metingen sinds het laden")
+
+        if view_df.empty:
+            period_start = window_start.strftime('%d-%m-%Y %H:%M')
+            period_end = now_live.strftime('%d-%m-%Y %H:%M')
+        else:
+            period_start = view_df['Timestamp_Local'].min().strftime('%d-%m-%Y %H:%M')
+            period_end = view_df['Timestamp_Local'].max().strftime('%d-%m-%Y %H:%M')
+        render_graph_view(view_df, selected_variable_display, show_markers, period_start, period_end)
 
-            trace_hovertemplate_tab1 = (
-                f"<b>{y_axis_title}:</b> %{{y:.1f}} {unit}<br>" +
-                "<b>Station:</b> %{full_data.name}<extra></extra>" 
+    # --- Tab 1: Grafiek ---
+    @st.fragment
+    def render_tab_graph():
+        
+        st.header("Grafiek Weergave")
+
+        # Weergave-opties: een wijziging hier herhaalt alleen dit fragment (Tab 1)
+        col_variable, col_markers = st.columns([3, 1])
+        with col_variable:
+            selected_variable_display = st.selectbox(
+                "Kies de variabele voor de grafiek:",
+                options=PLOT_OPTIONS,
+                index=PLOT_OPTIONS.index(st.session_state.variable_select), 
+                key='variable_select_input',
             )
-            
-            fig.update_traces(
-                mode=trace_mode, 
-                hovertemplate=trace_hovertemplate_tab1
-            ) 
-            
-            fig.update_layout(
-                hovermode="x unified",
-                xaxis_title=f'Tijdstip ({TARGET_TIMEZONE})',
-                yaxis_title=y_axis_title,
-                legend_title_text='Station',
+        with col_markers:
+            show_markers = st.checkbox(
+                "Toon Datapunten (Markers)", 
+                value=st.session_state.show_markers,
+                key="show_markers_input",
             )
+        st.session_state.variable_select = selected_variable_display
+        st.session_state.show_markers = show_markers
 
-            fig.update_xaxes(
-                 title=f'Tijdstip ({TARGET_TIMEZONE})',
-                 hoverformat="%d-%m-%Y %H:%M",
-                 tickformat="%H:%M\n%d-%m" 
-            )
+        # Live modus (alleen voor de recente tijdsbereiken)
+        live_enabled = False
+        if st.session_state.time_range_select in LIVE_TIME_RANGES:
+            live_enabled = st.toggle(f"🔴 Live modus (ververst elke {LIVE_REFRESH_SECONDS} s)", key="live_mode")
 
-            st.plotly_chart(fig, use_container_width=True)
-            
+        if live_enabled:
+            render_live_graph_view(selected_variable_display, show_markers)
         else:
-            st.warning("Geen data gevonden voor het geselecteerde tijdsbereik en station(s).")
+            render_graph_view(filtered_df, selected_variable_display, show_markers, date_range_display_start, date_range_display_end, window_key=time_window_key)
 
     # --- Tab 2: Ruwe Data ---
-    with tab_raw:
+    @st.fragment
+    def render_tab_raw():
         
         st.header("Ruwe Data")
         st.markdown(f"**Periode:** {date_range_display_start} tot {date_range_display_end} (Tijdzone: {TARGET_TIMEZONE})")
-        st.info(f"Dit zijn de ruwe meetwaarden. Getoond zijn de kolommen: `Timestamp_Local`, `Station Naam`, en de gekozen variabelen: `{', '.join(selected_variables)}`")
 
-        if not filtered_df.empty:
-            cols_to_display = ['Timestamp_Local', 'Station Naam'] + selected_variables
-            df_display_raw = filtered_df[cols_to_display].sort_values('Timestamp_Local', ascending=False)
-            
-            rename_dict_raw = {col: COL_DISPLAY_MAP.get(col, col) for col in cols_to_display}
-            df_display_raw = df_display_raw.rename(columns=rename_dict_raw)
-
-            st.dataframe(df_display_raw, use_container_width=True, height=700)
-            
-        else:
+        if filtered_df.empty:
             st.warning("Geen data gevonden voor het geselecteerde tijdsbereik en station(s).")
+            return
+
+        # Sorteren en pagineren gebeurt hier: alleen de zichtbare pagina gaat naar de browser
+        available_cols = [col for col in PLOT_COLS if col in filtered_df.columns]
+        col_select, col_sort, col_order, col_size = st.columns([4, 2, 1, 1])
+        with col_select:
+            selected_variables = st.multiselect(
+                "Kolommen:",
+                options=available_cols,
+                default=[DISPLAY_TO_COL_MAP[st.session_state.variable_select]],
+                format_func=lambda col: COL_DISPLAY_MAP.get(col, col),
+                key="raw_columns"
+            )
+        with col_sort:
+            sort_col = st.selectbox(
+                "Sorteer op:",
+                ['Timestamp_Local'] + available_cols,
+                format_func=lambda col: "Tijdstip" if col == 'Timestamp_Local' else COL_DISPLAY_MAP.get(col, col),
+                key="raw_sort_col"
+            )
+        with col_order:
+            sort_descending = st.toggle("Aflopend", value=True, key="raw_sort_desc")
+        with col_size:
+            page_size = st.selectbox("Rijen per pagina:", RAW_PAGE_SIZES, index=1, key="raw_page_size")
+
+        with profiler.stage("Tab 2: Sorteervolgorde", cached=True) as stage:
+            positions = compute_sort_positions(filtered_df, time_window_key, sort_col, not sort_descending)
+            stage['rows'] = len(positions)
+
+        total_rows = len(positions)
+        total_pages = max(1, -(-total_rows // page_size))
+        # Een andere sortering of paginagrootte begint weer op pagina 1; een kleiner venster mag
+        # de gekozen pagina niet ongeldig maken
+        raw_view_key = (sort_col, sort_descending, page_size)
+        if st.session_state.get('raw_view_key') != raw_view_key:
+            st.session_state.raw_view_key = raw_view_key
+            st.session_state.raw_page = 1
+        elif st.session_state.get('raw_page', 1) > total_pages:
+            st.session_state.raw_page = total_pages
+        page = st.number_input(f"Pagina (van {total_pages}):", min_value=1, max_value=total_pages, step=1, key="raw_page")
+
+        cols_to_display = ['Timestamp_Local', 'Station Naam'] + selected_variables
+        df_display_raw = raw_data_page(filtered_df, positions, cols_to_display, page, page_size)
+        df_display_raw = df_display_raw.rename(columns={col: COL_DISPLAY_MAP.get(col, col) for col in cols_to_display})
+
+        first_row = (page - 1) * page_size + 1
+        st.caption(f"Rijen {first_row}–{first_row + len(df_display_raw) - 1} van {total_rows}.")
+        st.dataframe(df_display_raw, use_container_width=True, height=700)
+
+        # --- Export: het bestand wordt pas bij het klikken in stukken opgebouwd ---
+        # Streamlit houdt het bestand in het geheugen: grote exports (volledige historie) streamt de API
+        with st.expander("⬇️ Exporteren (CSV/Parquet)"):
+            export_format = st.radio("Formaat:", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+            export_all_cols = st.checkbox("Alle kolommen (anders de kolommen van de tabel)", value=True, key="export_all_cols")
+
+            export_df = filtered_df
+            export_cols = available_cols if export_all_cols else selected_variables
+            extension, mime = EXPORT_FORMATS[export_format]
+            first_day, last_day = export_df['Timestamp_Local'].min(), export_df['Timestamp_Local'].max()
+            st.caption(f"{len(export_df)} rijen (gekozen tijdsvenster), {len(export_cols)} kolom(men), stations: {', '.join(sorted(export_df['Station Naam'].unique()))}.")
+            if EXPORT_API_URL:
+                # De API streamt het bestand stuk voor stuk naar de browser, zonder limiet (hele dagen, verdachte waarden leeg)
+                link_cols = st.columns(2)
+                link_cols[0].link_button(
+                    f"{export_format} via de API (gekozen dagen)",
+                    export_api_url(EXPORT_API_URL, selected_station_ids, export_cols, export_format, first_day, last_day),
+                )
+                link_cols[1].link_button(
+                    f"{export_format} via de API (volledige historie)",
+                    export_api_url(EXPORT_API_URL, selected_station_ids, export_cols, export_format),
+                )
+            if len(export_df) > EXPORT_APP_MAX_ROWS:
+                if EXPORT_API_URL:
+                    st.warning(f"De app zelf exporteert hoogstens {EXPORT_APP_MAX_ROWS} rijen; gebruik de download via de API.")
+                else:
+                    st.warning(
+                        f"De app exporteert hoogstens {EXPORT_APP_MAX_ROWS} rijen. Kies een korter tijdsvenster, "
+                        "of start de API (`python -m malman.api`) en zet WEER_API_URL voor een gestreamde download "
+                        f"zonder limiet. Op de server zelf kan het ook via de commandoregel:\n\n`{EXPORT_CLI_HINT}`"
+                    )
+                return
+            st.download_button(
+                f"Download {export_format}",
+                data=lambda: export_bytes(iter_frame_chunks(export_df, export_cols), export_format),
+                file_name=f"malman_{first_day:%Y%m%d}-{last_day:%Y%m%d}.{extension}",
+                mime=mime,
+                on_click="ignore",
+                key="export_download"
+            )
 
 
     # --- Tab 3: Historische Zoeker ---
-    with tab_history:
+    @st.fragment
+    def render_tab_history():
         
         st.header("Historische Zoeker (Dagelijkse Samenvatting)")
+        df_daily_summary = get_daily_summary()
         
         if df_daily_summary.empty:
             st.warning("Geen dagelijkse samenvatting beschikbaar. Laad eerst data.")
@@ -909,7 +816,7 @@ else:
                     key="period_select_hist"
                 )
                 
-                df_filtered_time = df_daily_summary.copy()
+                df_filtered_time = df_daily_summary
                 
                 min_date_hist = df_daily_summary.index.min().date()
                 max_date_hist = df_daily_summary.index.max().date()
@@ -921,7 +828,7 @@ else:
                         available_years_hist, 
                         key="hist_year"
                     )
-                    df_filtered_time = df_daily_summary[df_daily_summary.index.year == st.session_state.hist_year]
+                    df_filtered_time = df_daily_summary[calendar_fields(dates_to_days(df_daily_summary.index))[0] == st.session_state.hist_year]
                 
                 elif period_type == "Selecteer Maand":
                     df_temp_filter = df_daily_summary.copy()
@@ -970,8 +877,30 @@ else:
                 temp_column = 'Temp_Avg_C'
                 comparison = "Lager dan (<=)" 
                 temp_threshold = 0.0
+                threshold_unit = "°C"
                 min_consecutive_days = 0
 
+                # Temperaturen en (als ze in de data zitten) de afgeleide daggrootheden
+                temp_type_options = [
+                    f"{label} ({col})" for col, (label, _) in DAILY_FILTER_COLUMNS.items() if col in df_daily_summary.columns
+                ]
+                query_columns = tuple(col for col in DAILY_FILTER_COLUMNS if col in df_daily_summary.columns)
+                daily_query = None
+
+                def compound_query_input(key):
+                    """Tekstveld voor een samengestelde zoekvraag; geeft de gecompileerde zoekvraag, of None bij een fout."""
+                    query_text = st.text_input(
+                        "Zoekvraag (AND/OR/NOT of EN/OF/NIET, haakjes toegestaan):",
+                        value="Temp_High_C >= 25 AND Hum_Avg_P < 40",
+                        key=key
+                    )
+                    st.caption("Kolommen: " + ", ".join(f"`{col}` ({DAILY_FILTER_COLUMNS[col][0]}, {DAILY_FILTER_COLUMNS[col][1]})" for col in query_columns))
+                    try:
+                        return compile_query(query_text, query_columns)
+                    except QueryError as e:
+                        st.error(f"Ongeldige zoekvraag: {e}")
+                        return None
+
                 if filter_mode == "Hellmann Getal Berekenen":
                     st.markdown("---")
                     st.markdown(f"**3. Hellmann Berekening**")
@@ -989,54 +918,87 @@ else:
                     )
                     st.markdown("---")
                     st.markdown(f"**4. Temperatuurfilter**")
-                    temp_type_options = ["Max Temp (Temp_High_C)", "Min Temp (Temp_Low_C)", "Gemiddelde Temp (Temp_Avg_C)"]
-                    temp_type = st.selectbox(
-                        "Meetwaarde:", 
-                        temp_type_options, 
-                        index=2, 
-                        key="temp_type_period"
-                    )
-                    temp_column = temp_type.split(" (")[1][:-1] if " (" in temp_type else 'Temp_Avg_C'
+                    use_query = st.toggle("Samengestelde zoekvraag (meerdere daggrootheden)", key="use_query_period")
+                    if use_query:
+                        daily_query = compound_query_input("query_period")
+                        if daily_query is None:
+                            return
+                        temp_column = daily_query.columns[0]
+                        threshold_unit = DAILY_FILTER_COLUMNS[temp_column][1]
+                    else:
+                        temp_type = st.selectbox(
+                            "Meetwaarde:", 
+                            temp_type_options, 
+                            index=2, 
+                            key="temp_type_period"
+                        )
+                        temp_column = temp_type.split(" (")[1][:-1] if " (" in temp_type else 'Temp_Avg_C'
+                        threshold_unit = DAILY_FILTER_COLUMNS[temp_column][1]
                     
-                    comparison = st.radio(
-                        "Vergelijking:", 
-                        ["Hoger dan (>=)", "Lager dan (<=)"], 
-                        key="comparison_period"
-                    ) 
+                        comparison = st.radio(
+                            "Vergelijking:", 
+                            ["Hoger dan (>=)", "Lager dan (<=)"], 
+                            key="comparison_period"
+                        ) 
                     
-                    temp_threshold = st.number_input(
-                        "Temperatuur (°C):", 
-                        value=15.0, 
-                        step=0.5, 
-                        key="temp_threshold_period"
-                    )
+                        temp_threshold = st.number_input(
+                            "Temperatuur (°C):" if threshold_unit == "°C" else f"Drempelwaarde ({threshold_unit}):", 
+                            value=15.0, 
+                            step=0.5, 
+                            key="temp_threshold_period"
+                        )
 
                 else: # Losse Dagen
                     st.markdown("---")
                     st.markdown(f"**4. Temperatuurfilter**")
-                    temp_type_options = ["Max Temp (Temp_High_C)", "Min Temp (Temp_Low_C)", "Gemiddelde Temp (Temp_Avg_C)"]
-                    temp_type = st.selectbox(
-                        "Meetwaarde:", 
-                        temp_type_options, 
-                        index=2, 
-                        key="temp_type_days"
-                    )
-                    temp_column = temp_type.split(" (")[1][:-1] if " (" in temp_type else 'Temp_Avg_C'
+                    use_query = st.toggle("Samengestelde zoekvraag (meerdere daggrootheden)", key="use_query_days")
+                    if use_query:
+                        daily_query = compound_query_input("query_days")
+                        if daily_query is None:
+                            return
+                        temp_column = daily_query.columns[0]
+                        threshold_unit = DAILY_FILTER_COLUMNS[temp_column][1]
+                    else:
+                        temp_type = st.selectbox(
+                            "Meetwaarde:", 
+                            temp_type_options, 
+                            index=2, 
+                            key="temp_type_days"
+                        )
+                        temp_column = temp_type.split(" (")[1][:-1] if " (" in temp_type else 'Temp_Avg_C'
+                        threshold_unit = DAILY_FILTER_COLUMNS[temp_column][1]
                     
-                    comparison = st.radio(
-                        "Vergelijking:", 
-                        ["Hoger dan (>=)", "Lager dan (<=)"], 
-                        key="comparison_days"
-                    )
+                        comparison = st.radio(
+                            "Vergelijking:", 
+                            ["Hoger dan (>=)", "Lager dan (<=)"], 
+                            key="comparison_days"
+                        )
                     
-                    temp_threshold = st.number_input(
-                        "Temperatuur (°C):", 
-                        value=15.0, 
-                        step=0.5, 
-                        key="temp_threshold_days"
-                    )
+                        temp_threshold = st.number_input(
+                            "Temperatuur (°C):" if threshold_unit == "°C" else f"Drempelwaarde ({threshold_unit}):", 
+                            value=15.0, 
+                            step=0.5, 
+                            key="temp_threshold_days"
+                        )
             
-            filtered_data = df_filtered_time.copy()
+            filtered_data = df_filtered_time
+
+            # Eén drempel of een samengestelde zoekvraag: beide leveren één dagmasker
+            if filter_mode != "Hellmann Getal Berekenen":
+                if daily_query is not None:
+                    day_mask = daily_query.mask(filtered_data)
+                    criteria_text = f"`{daily_query.text}`"
+                else:
+                    display_temp_type = st.session_state.get(
+                        'temp_type_period' if filter_mode == "Aaneengesloten Periode" else 'temp_type_days',
+                        'Gemiddelde Temp (Temp_Avg_C)'
+                    ).split(" (")[0]
+                    comparison_char = "≥" if comparison == "Hoger dan (>=)" else "≤"
+                    if comparison == "Hoger dan (>=)":
+                        day_mask = filtered_data[temp_column] >= temp_threshold
+                    else:
+                        day_mask = filtered_data[temp_column] <= temp_threshold
+                    criteria_text = f"**{display_temp_type}** {comparison_char} **{temp_threshold} {threshold_unit}**"
 
             if filter_mode == "Hellmann Getal Berekenen":
                 
@@ -1077,33 +1039,28 @@ else:
                         
                     df_hellmann_days_display = df_hellmann_days_display.sort_values(['Station Naam', 'Datum'], ascending=[True, False]).set_index('Datum')
                     
-                    for station, df_group in df_hellmann_days_display.groupby('Station Naam'):
-                        st.markdown(f"##### 📌 Station: **{station}** ({len(df_group)} dagen)")
-                        st.dataframe(df_group.drop(columns=['Station Naam']), use_container_width=True)
-                        st.markdown("---")
+                    display_station_tables(
+                        df_hellmann_days_display,
+                        lambda station, df_group: f"##### 📌 Station: **{station}** ({len(df_group)} dagen)"
+                    )
 
 
             elif filter_mode == "Aaneengesloten Periode":
                 
-                display_temp_type = st.session_state.get('temp_type_period', 'Gemiddelde Temp (Temp_Avg_C)').split(" (")[0]
-                comparison_char = "≥" if comparison == "Hoger dan (>=)" else "≤"
                 start_date = df_filtered_time.index.min().strftime('%d-%m-%Y')
                 end_date = df_filtered_time.index.max().strftime('%d-%m-%Y')
                 
                 st.subheader(f"🔥 Zoekresultaten: Aaneengesloten Periodes van **{min_consecutive_days}**+ dagen")
                 
                 st.info(f"""
-                **Criteria:** {min_consecutive_days}+ aaneengesloten dagen waarbij **{display_temp_type}** {comparison_char} **{temp_threshold}°C**
+                **Criteria:** {min_consecutive_days}+ aaneengesloten dagen waarbij {criteria_text}
                 
                 📆 **Geselecteerde Periode:** {start_date} tot {end_date}
                 """)
 
-                if comparison == "Hoger dan (>=)":
-                    df_filtered_period = filtered_data[filtered_data[temp_column] >= temp_threshold]
-                else:
-                    df_filtered_period = filtered_data[filtered_data[temp_column] <= temp_threshold]
+                df_filtered_period = filtered_data[day_mask]
 
-                periods_df, total_periods = find_consecutive_periods(df_filtered_period, min_consecutive_days, temp_column)
+                periods_df, total_periods = find_consecutive_periods(df_filtered_period, min_consecutive_days, temp_column, threshold_unit)
                 
                 if total_periods > 0:
                     st.success(f"✅ **{total_periods}** aaneengesloten periodes van {min_consecutive_days} dagen of meer gevonden.")
@@ -1117,49 +1074,56 @@ else:
 
             else: # Losse Dagen
                 
-                display_temp_type = st.session_state.get('temp_type_days', 'Gemiddelde Temp (Temp_Avg_C)').split(" (")[0]
-                comparison_char = "≥" if comparison == "Hoger dan (>=)" else "≤"
                 start_date = df_filtered_time.index.min().strftime('%d-%m-%Y')
                 end_date = df_filtered_time.index.max().strftime('%d-%m-%Y')
                 
                 st.subheader(f"🔍 Zoekresultaten: Losse Dagen")
                 
                 st.info(f"""
-                **Criteria:** Dagen waarbij **{display_temp_type}** {comparison_char} **{temp_threshold}°C**
+                **Criteria:** Dagen waarbij {criteria_text}
                 
                 📆 **Geselecteerde Periode:** {start_date} tot {end_date}
                 """)
                 
-                if comparison == "Hoger dan (>=)":
-                    df_filtered_days = filtered_data[filtered_data[temp_column] >= temp_threshold].copy()
-                else:
-                    df_filtered_days = filtered_data[filtered_data[temp_column] <= temp_threshold].copy()
+                df_filtered_days = filtered_data[day_mask]
                 
                 total_days = len(df_filtered_days)
                 
                 if total_days > 0:
                     st.success(f"✅ **{total_days}** dagen gevonden die aan de criteria voldoen.")
                     
-                    df_filtered_days_display = df_filtered_days[['Station Naam', 'Temp_High_C', 'Temp_Low_C', 'Temp_Avg_C']].reset_index()
+                    display_cols = ['Station Naam', 'Temp_High_C', 'Temp_Low_C', 'Temp_Avg_C']
+                    # Gezocht op andere grootheden: die waarden ook tonen
+                    extra_cols = [col for col in (daily_query.columns if daily_query else (temp_column,)) if col not in display_cols]
+                    display_cols += extra_cols
+                    df_filtered_days_display = df_filtered_days[display_cols].reset_index()
                     df_filtered_days_display = df_filtered_days_display.rename(columns={'Date': 'Datum', 'Temp_High_C': 'Max Temp', 'Temp_Low_C': 'Min Temp', 'Temp_Avg_C': 'Gem Temp'})
                     
                     for col in ['Max Temp', 'Min Temp', 'Gem Temp']:
                         df_filtered_days_display[col] = df_filtered_days_display[col].map(safe_format_temp)
+                    for col in extra_cols:
+                        unit = DAILY_FILTER_COLUMNS[col][1]
+                        df_filtered_days_display[col] = df_filtered_days_display[col].map(lambda x: safe_format_temp(x, unit))
+                    df_filtered_days_display = df_filtered_days_display.rename(columns={col: DAILY_FILTER_COLUMNS[col][0] for col in extra_cols})
                         
                     df_filtered_days_display = df_filtered_days_display.sort_values(['Station Naam', 'Datum'], ascending=[True, False]).set_index('Datum')
                     
-                    for station, df_group in df_filtered_days_display.groupby('Station Naam'):
-                        st.markdown(f"##### 📌 Station: **{station}** ({len(df_group)} dagen)")
-                        st.dataframe(df_group.drop(columns=['Station Naam']), use_container_width=True)
-                        st.markdown("---")
+                    display_station_tables(
+                        df_filtered_days_display,
+                        lambda station, df_group: f"##### 📌 Station: **{station}** ({len(df_group)} dagen)"
+                    )
                 else:
                     st.warning("Geen dagen gevonden die aan de criteria voldoen in deze periode.")
 
 
     # --- Tab 4: Maand/Jaar Analyse ---
-    with tab_analysis:
+    @st.fragment
+    def render_tab_analysis():
         
         st.header(f"Maand/Jaar Analyse")
+        if not benchmark_ready:
+            st.info("De ERA5 benchmark wordt nog op de achtergrond geladen; de benchmarkkolommen en percentielbanden verschijnen vanzelf.", icon="⏳")
+        df_daily_summary = get_daily_summary(with_benchmark=benchmark_ready)
         
         if df_daily_summary.empty:
             st.warning("Geen dagelijkse data gevonden. Laad eerst data.")
@@ -1193,7 +1157,7 @@ else:
                     )
                     
                     df_analysis_selector = df_analysis_selector[
-                        df_analysis_selector.index.date == selected_date
+                        dates_to_days(df_analysis_selector.index) == date_day_number(selected_date)
                     ]
                     selected_period_str_analysis = selected_date.strftime('%d-%m-%Y')
 
@@ -1229,7 +1193,7 @@ else:
 
             if df_analysis_selector.empty:
                 st.warning(f"Geen dagelijkse data beschikbaar voor de geselecteerde periode: **{selected_period_str_analysis}**.")
-                st.stop()
+                return
 
             st.subheader(f"Overzicht per Station voor **{selected_period_str_analysis}**")
 
@@ -1338,6 +1302,20 @@ else:
                 df_summary_stats = df_summary_stats[final_col_order]
 
             st.dataframe(df_summary_stats, use_container_width=True)
+
+            # --- Percentielbanden (ERA5, per kalenderdag met ±7 dagen venster) en classificatie ---
+            df_analysis_bands = None
+            if benchmark_ready:
+                with profiler.stage("Tab 4: Percentielbanden", cached=True):
+                    df_analysis_bands = attach_station_bands(
+                        df_analysis_selector, CLIMATE_NORMAL_PERIODS, st.session_state.benchmark_period_display, station_locations
+                    )
+            if df_analysis_bands is not None:
+                st.markdown(
+                    f"**Classificatie van de Gem. Temp per dag** t.o.v. de percentielen van "
+                    f"{st.session_state.benchmark_period_display} (±{BAND_WINDOW_DAYS} dagen venster):"
+                )
+                st.dataframe(count_anomaly_classes(df_analysis_bands), use_container_width=True)
             
             # --- Dagelijkse Lijngrafiek (Alleen voor Maand/Jaar Analyse) ---
             if analysis_type != "Dag":
@@ -1425,6 +1403,23 @@ else:
                          hovertemplate=trace_hovertemplate_tab4
                      )
 
+                     if df_analysis_bands is not None:
+                         # Banden van de daggemiddelde temperatuur, onder de lijnen
+                         df_band_plot = df_analysis_bands.reset_index().drop_duplicates('Date')
+                         band_traces = []
+                         for low, high, opacity in [(5, 95, 0.12), (10, 90, 0.22)]:
+                             band_traces.append(go.Scatter(
+                                 x=df_band_plot['Date'], y=df_band_plot[f'Temp_Avg_C_P{low}'],
+                                 mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'
+                             ))
+                             band_traces.append(go.Scatter(
+                                 x=df_band_plot['Date'], y=df_band_plot[f'Temp_Avg_C_P{high}'],
+                                 mode='lines', line=dict(width=0), fill='tonexty', fillcolor=f'rgba(128, 128, 128, {opacity})',
+                                 name=f'Gem. Temp P{low}–P{high} ({benchmark_period_display})', hoverinfo='skip'
+                             ))
+                         fig_daily.add_traces(band_traces)
+                         fig_daily.data = fig_daily.data[-len(band_traces):] + fig_daily.data[:-len(band_traces)]
+
                      fig_daily.update_layout(hovermode="x unified")
 
                      fig_daily.update_xaxes(
@@ -1438,15 +1433,18 @@ else:
 
 
     # --- Tab 5: Extremen ---
-    with tab_extremes:
+    @st.fragment
+    def render_tab_extremes():
         
         st.header("Analyse van Historische Extremen")
+        df_daily_summary = get_daily_summary()
         
         if df_daily_summary.empty:
             st.warning("Geen dagelijkse samenvatting beschikbaar. Laad eerst data.")
         else:
             
-            extreme_results_full = find_extreme_days(df_daily_summary)
+            with profiler.stage("Tab 5: Extremen berekenen", cached=True, rows=len(df_daily_summary)):
+                extreme_results_full = compute_extreme_days(df_daily_summary, data_version, min_coverage)
 
             tab_high_max, tab_low_min, tab_high_min, tab_low_max, tab_high_avg, tab_low_avg, tab_range = st.tabs([
                 "Hoogste Max", "Laagste Min", "Warmste Nacht", "Koudste Dag", "Hoogste Gem", "Laagste Gem", "Grootste Range"
@@ -1503,10 +1501,18 @@ else:
 
 
     # --- Tab 6: Klimatologie (NIEUW) ---
-    with tab_climatology:
+    @st.fragment
+    def render_tab_climatology():
         
         st.header("🌎 Klimatologie: Vergelijking per Periode")
         st.info("Vergelijk de temperatuurextremen en gemiddeldes van een gekozen dag, maand of jaar met alle gedefinieerde historische klimaatnormalen (Langjarige Gemiddeldes van 30 jaar).")
+        if not benchmark_ready:
+            st.info("De ERA5 benchmark wordt nog op de achtergrond geladen; dit tabblad vult zich vanzelf zodra de download klaar is.", icon="⏳")
+            return
+        
+        df_daily_summary = get_daily_summary()
+        with profiler.stage("Alle benchmarks ophalen", cached=True):
+            all_hist_benchmarks = fetch_all_historical_benchmarks(CLIMATE_NORMAL_PERIODS, clima_location)
         
         if not all_hist_benchmarks:
             st.error("Geen historische benchmark data beschikbaar. Controleer de Open-Meteo API verbinding in de zijbalk (Programma Checks).")
@@ -1542,7 +1548,7 @@ else:
                     
                     # Filter de dagelijkse samenvatting op de gekozen datum
                     df_clima_filter_base = df_clima_filter_base[
-                        df_clima_filter_base.index.date == selected_date
+                        dates_to_days(df_clima_filter_base.index) == date_day_number(selected_date)
                     ]
 
                     # De benchmark data wordt gefilterd op de maand-dag combinatie
@@ -1616,74 +1622,33 @@ else:
             
             # --- De Benchmark data van alle periodes ---
             
-            all_benchmark_stats = []
-            
-            # all_hist_benchmarks is gesorteerd van oud naar nieuw (door de functie fetch_all_historical_benchmarks)
-            for period_name, df_hist in all_hist_benchmarks.items():
-                
-                df_hist_copy = df_hist.copy()
-                
-                if clima_analysis_type == "Dag":
-                    
-                    df_period_data = df_hist_copy[df_hist_copy['Date'].dt.strftime('%m-%d') == clima_month_day]
-                    
-                    if not df_period_data.empty:
-                         # Gemiddelde van die specifieke dag door alle jaren heen
-                         # FIX: Gebruik alleen de numerieke kolommen om de TypeError te voorkomen
-                         period_stats = df_period_data[['Temp_High_C', 'Temp_Low_C', 'Temp_Avg_C']].mean().to_dict()
-                         
-                         df_stats = pd.DataFrame([{
-                             'Abs. Max Temp (°C)': period_stats.get('Temp_High_C'),
-                             'Abs. Min Temp (°C)': period_stats.get('Temp_Low_C'),
-                             'Gem. Temp Periode (°C)': period_stats.get('Temp_Avg_C'),
-                             'Type': f"Benchmark: {period_name}",
-                             'Station Naam': 'Langjarig Gemiddelde'
-                         }]).set_index('Station Naam')
-                         all_benchmark_stats.append(df_stats)
-                    
-                
-                elif clima_analysis_type == "Maand":
-                    
-                    # Filter op de gekozen maand
-                    # OPMERKING: Bij Maand is 'selected_period_str_clima' YYYY-MM. We willen alleen MM
-                    clima_month = selected_period_str_clima.split('-')[1]
-                    df_period_data = df_hist_copy[df_hist_copy['Date'].dt.strftime('%m') == clima_month]
-                    
-                    if not df_period_data.empty:
-                        # Gemiddelde van de dagelijkse Min, Max, Gem. over die maand, door alle 30 jaren heen
-                        period_stats = df_period_data.agg({
-                            'Temp_High_C': 'mean', # Gemiddelde van de Maxima op dagbasis over die maand
-                            'Temp_Low_C': 'mean',  # Gemiddelde van de Minima op dagbasis over die maand
-                            'Temp_Avg_C': 'mean',  # Gemiddelde van de Gemiddeldes op dagbasis over die maand
-                        }).to_dict()
-                        
-                        df_stats = pd.DataFrame([{
-                            'Abs. Max Temp (°C)': period_stats.get('Temp_High_C'),
-                            'Abs. Min Temp (°C)': period_stats.get('Temp_Low_C'),
-                            'Gem. Temp Periode (°C)': period_stats.get('Temp_Avg_C'),
-                            'Type': f"Benchmark: {period_name}",
-                            'Station Naam': 'Langjarig Gemiddelde'
-                        }]).set_index('Station Naam')
-                        all_benchmark_stats.append(df_stats)
-
-                else: # Jaar
-                    
-                    if not df_hist_copy.empty:
-                        # Gemiddelde van de dagelijkse Min, Max, Gem. over het hele jaar, door alle 30 jaren heen
-                        period_stats = df_hist_copy.agg({
-                            'Temp_High_C': 'mean',
-                            'Temp_Low_C': 'mean',
-                            'Temp_Avg_C': 'mean',
-                        }).to_dict()
-                        
-                        df_stats = pd.DataFrame([{
-                            'Abs. Max Temp (°C)': period_stats.get('Temp_High_C'),
-                            'Abs. Min Temp (°C)': period_stats.get('Temp_Low_C'),
-                            'Gem. Temp Periode (°C)': period_stats.get('Temp_Avg_C'),
-                            'Type': f"Benchmark: {period_name}",
-                            'Station Naam': 'Langjarig Gemiddelde'
-                        }]).set_index('Station Naam')
-                        all_benchmark_stats.append(df_stats)
+            if clima_analysis_type == "Dag":
+                clima_key = clima_month_day
+            elif clima_analysis_type == "Maand":
+                # OPMERKING: Bij Maand is 'selected_period_str_clima' YYYY-MM. We willen alleen MM
+                clima_key = selected_period_str_clima.split('-')[1]
+            else: # Jaar
+                clima_key = None
+
+            with profiler.stage("Tab 6: Benchmark statistieken", cached=True):
+                all_benchmark_stats = compute_climatology_benchmark_stats(CLIMATE_NORMAL_PERIODS, clima_analysis_type, clima_key, clima_location)
+                df_period_percentiles = compute_period_percentiles(CLIMATE_NORMAL_PERIODS, clima_analysis_type, clima_key, clima_location)
+
+            # Percentielen van de gemiddelde temperatuur per normaalperiode, en de klasse van de
+            # huidige periode t.o.v. de in de zijbalk gekozen normaal
+            percentile_cols = {f"P{p}": f"P{p} Gem. Temp (°C)" for p in (10, 50, 90)}
+            for df_stats in all_benchmark_stats:
+                period = df_stats['Type'].iloc[0].removeprefix("Benchmark: ")
+                if period in df_period_percentiles.index:
+                    for col, label in percentile_cols.items():
+                        df_stats[label] = df_period_percentiles.at[period, col]
+            selected_normal = st.session_state.benchmark_period_display
+            if selected_normal in df_period_percentiles.index:
+                normal_percentiles = df_period_percentiles.loc[selected_normal]
+                df_huidige_data[f'Klasse Gem. Temp ({selected_normal})'] = classify_anomalies(
+                    df_huidige_data['Gem. Temp Periode (°C)'],
+                    *(normal_percentiles[f"P{p}"] for p in (5, 10, 90, 95))
+                ).astype(object)
 
             
             # --- Combineer en presenteer de resultaten ---
@@ -1706,20 +1671,384 @@ else:
                 
                 
                 # Formatteer de kolommen
-                for col in ['Abs. Max Temp (°C)', 'Abs. Min Temp (°C)', 'Gem. Temp Periode (°C)']:
+                for col in ['Abs. Max Temp (°C)', 'Abs. Min Temp (°C)', 'Gem. Temp Periode (°C)'] + [c for c in percentile_cols.values() if c in df_clima_combined.columns]:
                     df_clima_combined[col] = df_clima_combined[col].apply(lambda x: f"{x:.1f} °C" if pd.notna(x) else "N/A")
+                for col in [c for c in df_clima_combined.columns if c.startswith('Klasse')]:
+                    df_clima_combined[col] = df_clima_combined[col].fillna("")
                 
                 df_clima_final_display = df_clima_combined.rename(columns={'Type': 'Analyse Type'}).set_index(['Station Naam', 'Analyse Type'])
                 
                 # Toon per Station Naam (Langjarig Gemiddelde is ook een 'station' nu)
                 
-                for station, df_group in df_clima_final_display.groupby('Station Naam'):
-                    st.markdown(f"##### 📌 Station: **{station}**")
-                    df_to_show = df_group.reset_index().drop(columns=['Station Naam']).set_index('Analyse Type')
-                    
-                    # Verwijder kolommen die niet met temperatuur te maken hebben
-                    cols_to_keep = [col for col in df_to_show.columns if 'Temp' in col]
-                    st.dataframe(df_to_show[cols_to_keep], use_container_width=True)
-                    st.markdown("---")
+                df_to_show = df_clima_final_display.reset_index().set_index('Analyse Type')
+                
+                # Verwijder kolommen die niet met temperatuur te maken hebben
+                cols_to_keep = ['Station Naam'] + sorted([col for col in df_to_show.columns if 'Temp' in col], key=lambda col: col.startswith('Klasse'))
+                display_station_tables(
+                    df_to_show[cols_to_keep],
+                    lambda station, df_group: f"##### 📌 Station: **{station}**"
+                )
             else:
                 st.warning("Geen resultaten gevonden voor deze analyse.")
+
+            # --- Anomalieën door de tijd t.o.v. de gekozen normaal ---
+            # Alle perioden staan al in de gecachte matrix: een andere normaal kiezen is alleen een kolomkeuze
+            st.markdown("---")
+            st.subheader(f"📉 Anomalie Gem. Temp t.o.v. de normaal {selected_normal}")
+            with profiler.stage("Tab 6: Anomalieën", cached=True):
+                df_anomalies, df_monthly_anomalies = compute_anomalies(
+                    df_daily_summary, data_version, min_coverage, CLIMATE_NORMAL_PERIODS, station_locations
+                )
+
+            if df_anomalies is None or selected_normal not in df_anomalies.columns.get_level_values('Periode'):
+                st.warning("Geen ERA5 normalen beschikbaar om anomalieën te berekenen.")
+            else:
+                col_scale, col_measure = st.columns(2)
+                anomaly_scale = col_scale.radio(
+                    "Tijdschaal:", ["Dag", f"{ROLLING_ANOMALY_DAYS} dagen (voortschrijdend)", "Maand"],
+                    horizontal=True, key="anomaly_scale"
+                )
+                anomaly_measure = col_measure.radio(
+                    "Maat:", ["Anomalie (°C)", "Z-score (σ ERA5)"], horizontal=True, key="anomaly_measure"
+                )
+
+                measure = 'Anomalie' if anomaly_measure.startswith('Anomalie') else 'Z'
+                if anomaly_scale == "Maand":
+                    series = df_monthly_anomalies[(measure, selected_normal)]
+                elif anomaly_scale == "Dag":
+                    series = df_anomalies[(measure, selected_normal)]
+                else:
+                    series = df_anomalies[(f"{measure} {ROLLING_ANOMALY_DAYS}d", selected_normal)]
+
+                st.plotly_chart(
+                    build_anomaly_figure(
+                        series, anomaly_measure, "°C" if measure == 'Anomalie' else "σ",
+                        as_line=anomaly_scale.endswith("(voortschrijdend)")
+                    ),
+                    use_container_width=True
+                )
+                st.caption(
+                    f"Normaal per kalenderdag: ERA5 gemiddelde en standaardafwijking over {selected_normal} "
+                    f"(±{BAND_WINDOW_DAYS} dagen venster). De maand-z-score gebruikt de spreiding van de ERA5 maandgemiddelden."
+                )
+
+
+    # --- Tab 7: Stationsvergelijking (gemeenschappelijk tijdsrooster) ---
+    @st.fragment
+    def render_tab_comparison():
+
+        st.header("🔀 Stationsvergelijking")
+        st.info("Alle stations worden op een gemeenschappelijk 10-minuten rooster gezet (as-of join). Ontbrekende metingen blijven gaten en tellen niet mee in het verschil, de correlatie en de bias.")
+
+        station_names = sorted(df_combined['Station Naam'].unique())
+        if len(station_names) < 2:
+            st.warning("Selecteer minstens twee stations in de zijbalk om ze te vergelijken.")
+            return
+
+        with st.expander("⚙️ Vergelijkingsinstellingen", expanded=True):
+            col_var, col_a, col_b, col_window = st.columns([2, 2, 2, 1])
+            with col_var:
+                compare_display = st.selectbox(
+                    "Variabele:",
+                    options=PLOT_OPTIONS,
+                    index=PLOT_OPTIONS.index(st.session_state.variable_select),
+                    key="compare_variable"
+                )
+            with col_a:
+                # Standaard het tweede geselecteerde station min het eerste (bv. sjön − huset)
+                station_a = st.selectbox("Station A:", station_names, index=1, key="compare_station_a")
+            with col_b:
+                station_b = st.selectbox("Station B (A − B):", station_names, index=0, key="compare_station_b")
+            with col_window:
+                window_label = st.selectbox("Correlatievenster:", list(CORRELATION_WINDOWS.keys()), index=1, key="compare_window")
+
+            max_date = df_combined['Timestamp_Local'].max().date()
+            min_date = df_combined['Timestamp_Local'].min().date()
+            compare_range = st.date_input(
+                "Periode:",
+                value=[max(min_date, max_date - datetime.timedelta(days=365)), max_date],
+                min_value=min_date,
+                max_value=max_date,
+                key="compare_range"
+            )
+
+        if station_a == station_b:
+            st.warning("Kies twee verschillende stations.")
+            return
+
+        compare_col = DISPLAY_TO_COL_MAP[compare_display]
+        unit = get_unit_from_display_name(compare_display, compare_col)
+
+        with profiler.stage("Tab 7: Rooster & vergelijking", cached=True) as stage:
+            df_pair, df_bias_daily = compute_station_comparison(
+                df_combined, data_version, compare_col, station_a, station_b, CORRELATION_WINDOWS[window_label]
+            )
+            stage['rows'] = len(df_pair)
+
+        # Periode uit de (gecachte) volledige historie snijden
+        if len(compare_range) == 2:
+            period_start = pd.Timestamp(compare_range[0]).tz_localize(TARGET_TIMEZONE)
+            period_end = pd.Timestamp(compare_range[1]).tz_localize(TARGET_TIMEZONE) + pd.Timedelta(days=1)
+            df_pair = df_pair[(df_pair.index >= period_start) & (df_pair.index < period_end)]
+            df_bias_daily = df_bias_daily[(df_bias_daily.index >= period_start) & (df_bias_daily.index < period_end)]
+
+        if df_pair['Verschil'].notna().sum() == 0:
+            st.warning("Geen gelijktijdige metingen van beide stations in deze periode.")
+            return
+
+        diff = df_pair['Verschil']
+        col_bias, col_mae, col_corr, col_cov = st.columns(4)
+        with col_bias:
+            st.metric("Gemiddelde bias (A − B)", f"{diff.mean():+.2f} {unit}")
+        with col_mae:
+            st.metric("Gemiddelde absolute afwijking", f"{diff.abs().mean():.2f} {unit}")
+        with col_corr:
+            st.metric(f"Gem. correlatie ({window_label})", f"{df_pair['Correlatie'].mean():.3f}")
+        with col_cov:
+            st.metric("Gepaarde dekking", f"{(~df_pair['Gat']).mean() * 100:.1f}%", help="Aandeel roosterpunten waarop beide stations een meting hebben.")
+
+        with profiler.stage("Tab 7: Figuur bouwen", rows=len(df_pair)):
+            fig = build_comparison_figure(df_pair, df_bias_daily, station_a, station_b, unit, window_label)
+        st.plotly_chart(fig, use_container_width=True)
+
+        with st.expander("📋 Bias per dag"):
+            df_bias_display = df_bias_daily.sort_index(ascending=False)
+            df_bias_display.index = df_bias_display.index.strftime('%d-%m-%Y')
+            df_bias_display['Dekking'] = df_bias_display['Dekking'] * 100
+            st.dataframe(
+                df_bias_display.round(2).rename(columns={'Dekking': 'Dekking (%)'}),
+                use_container_width=True
+            )
+
+
+    # --- Tab 8: SQL Console (ad-hoc vragen op het archief, zie malman/sql.py) ---
+    @st.fragment
+    def render_tab_sql():
+
+        st.header("🧮 SQL Console")
+        if not (archive_enabled() and sql_enabled()):
+            st.info("De SQL console werkt op het stationsarchief: zet WEER_ARCHIVE_DIR (en eventueel WEER_SQL_DB).")
+            return
+        st.info(
+            "Alleen-lezen SQL (SQLite) op de volledige historie van de geselecteerde stations en de ERA5 benchmark. "
+            "De vraag loopt op het databasebestand; alleen het resultaat (max. "
+            f"{SQL_MAX_ROWS} rijen) wordt geladen. De daggemiddelden in de views zijn niet tijdgewogen."
+        )
+
+        # Eén keer per dataversie: alleen gewijzigde jaarbestanden worden overgezet
+        stations = tuple(
+            (station_id, STATION_MAP.get(station_id, station_id), locations_by_station[station_id], tuple(file_versions[station_id]))
+            for station_id in selected_station_ids
+        )
+        era5_locations = tuple(dict.fromkeys(locations_by_station.values())) if benchmark_ready else ()
+        try:
+            with profiler.stage("Tab 8: SQL database bijwerken", cached=True):
+                compute_sql_sync(data_version, stations, era5_locations)
+        except UnversionedYearError as e:
+            # Zonder bestandsversie is het archief niet bijgewerkt: de database blijft op de vorige stand
+            st.warning(f"SQL database niet bijgewerkt ({e}); de resultaten kunnen de nieuwste metingen missen.")
+        if not benchmark_ready:
+            st.caption("De ERA5 tabellen worden gevuld zodra de benchmark geladen is.")
+
+        with st.expander("📚 Tabellen en views"):
+            st.dataframe(describe_sql_schema(), hide_index=True, use_container_width=True)
+
+        # Een gekozen voorbeeld vult het tekstvak (vóór het aanmaken van de widget)
+        example = st.selectbox("Voorbeeld:", list(SQL_EXAMPLES), key="sql_example")
+        if st.session_state.get('sql_example_loaded') != example:
+            st.session_state.sql_example_loaded = example
+            st.session_state.sql_query = SQL_EXAMPLES[example]
+        query = st.text_area("SQL (één SELECT):", height=160, key="sql_query")
+
+        if st.button("▶️ Uitvoeren", key="sql_run"):
+            try:
+                with profiler.stage("Tab 8: SQL vraag") as stage:
+                    df_result, truncated, seconds = run_sql_query(query)
+                    stage['rows'] = len(df_result)
+                st.session_state.sql_result = (query, df_result, truncated, seconds, None)
+            except SqlConsoleError as e:
+                st.session_state.sql_result = (query, None, False, 0.0, str(e))
+
+        if 'sql_result' not in st.session_state:
+            return
+        result_query, df_result, truncated, seconds, error = st.session_state.sql_result
+        if error:
+            st.error(f"Fout in de SQL vraag: {error}")
+            return
+        if result_query != query:
+            st.caption("Resultaat van de vorige vraag; klik op Uitvoeren voor de aangepaste vraag.")
+        st.caption(f"{len(df_result)} rijen in {seconds:.2f} s" + (f" (afgekapt op {SQL_MAX_ROWS} rijen)" if truncated else ""))
+        st.dataframe(df_result, hide_index=True, use_container_width=True)
+        st.download_button(
+            "⬇️ Resultaat als CSV", data=df_result.to_csv(index=False), file_name="sql_resultaat.csv",
+            mime="text/csv", key="sql_download", on_click="ignore"
+        )
+
+
+    # --- Tab 9: Weergebeurtenissen (luchtdruktendens en gebeurteniscatalogus, zie malman/events.py) ---
+    @st.fragment
+    def render_tab_events():
+
+        st.header("⚡ Weergebeurtenissen")
+        st.info(
+            f"Gebeurtenissen uit de 10-minuten metingen: snelle drukdaling (≤ {STORM_TENDENCY_HPA} hPa in {TENDENCY_HOURS} uur), "
+            f"vorstnachten, mist-/dauwrisico (temperatuur binnen {FOG_SPREAD_C} °C van het dauwpunt) en heldere of "
+            "bewolkte perioden (instraling t.o.v. een heldere hemel). De catalogus wordt bij nieuwe data alleen met de nieuwe metingen bijgewerkt."
+        )
+
+        station_ids_by_name = {STATION_MAP.get(station_id, station_id): station_id for station_id in selected_station_ids}
+        col_station, col_types, col_window = st.columns([2, 4, 1])
+        with col_station:
+            event_station = st.selectbox("Station:", sorted(station_ids_by_name), key="event_station")
+        with col_types:
+            event_types = st.multiselect(
+                "Gebeurtenissen:", list(EVENT_TYPES), default=['storm', 'vorst', 'mist'],
+                format_func=lambda kind: EVENT_TYPES[kind][0], key="event_types"
+            )
+        with col_window:
+            window_label = st.selectbox("Venster:", list(EVENT_WINDOWS), index=1, key="event_window")
+
+        station_id = station_ids_by_name[event_station]
+        versions = tuple(file_versions[station_id])
+        location = locations_by_station[station_id]
+        with profiler.stage("Tab 9: Gebeurteniscatalogus", cached=True) as stage:
+            df_events = compute_station_events(df_combined, data_version, event_station, versions, location)
+            stage['rows'] = len(df_events)
+        with profiler.stage("Tab 9: Venster & figuur", cached=True):
+            fig, df_window_events, latest_tendency = compute_event_view(
+                df_combined, data_version, event_station, EVENT_WINDOWS[window_label], tuple(event_types), versions, location
+            )
+
+        metric_cols = st.columns(1 + len(event_types))
+        with metric_cols[0]:
+            if latest_tendency is None:
+                st.metric(f"Tendens ({TENDENCY_HOURS} uur)", "-")
+            else:
+                st.metric(f"Tendens ({TENDENCY_HOURS} uur)", f"{latest_tendency:+.1f} hPa", classify_tendency([latest_tendency])[0], delta_color="off")
+        counts = df_window_events['Type'].value_counts()
+        for column, kind in zip(metric_cols[1:], event_types):
+            with column:
+                st.metric(EVENT_TYPES[kind][0], int(counts.get(kind, 0)), help=f"Aantal in de laatste {window_label}.")
+
+        st.plotly_chart(fig, use_container_width=True)
+
+        if df_window_events.empty:
+            st.caption(f"Geen gebeurtenissen van de gekozen soorten in de laatste {window_label}.")
+        else:
+            df_display = df_window_events.sort_values('Begin', ascending=False).copy()
+            df_display['Eenheid'] = df_display['Type'].map(lambda kind: EVENT_TYPES[kind][1])
+            df_display['Type'] = df_display['Type'].map(lambda kind: EVENT_TYPES[kind][0])
+            for col in ['Begin', 'Einde']:
+                df_display[col] = df_display[col].dt.strftime('%d-%m-%Y %H:%M')
+            st.dataframe(df_display.drop(columns=['Station Naam']).round(2), hide_index=True, use_container_width=True)
+
+        with st.expander("📋 Volledige catalogus (alle jaren)"):
+            df_summary = summarize_events(df_events)
+            df_summary['Type'] = df_summary['Type'].map(lambda kind: EVENT_TYPES[kind][0])
+            st.dataframe(df_summary.round(1), hide_index=True, use_container_width=True)
+
+
+    # --- Tab 10: Zonnestraling (instraling in kWh/m² en zonuren, zie malman/solar.py) ---
+    @st.fragment
+    def render_tab_solar():
+
+        st.header("☀️ Zonnestraling")
+        st.info(
+            "Dagelijkse en maandelijkse instraling (kWh/m²) uit de zoninstraling (W/m², trapeziumregel; korte gaten worden overbrugd). "
+            f"Zonuren zijn de uren met minstens {SUNSHINE_THRESHOLD_WM2:.0f} W/m²; de heldere hemel is het maximum op de stationslocatie. "
+            f"Dagen onder {min_coverage:.0%} dekking tellen niet mee in de maand- en jaartotalen."
+        )
+
+        with profiler.stage("Tab 10: Instraling per dag", cached=True) as stage:
+            df_radiation = compute_daily_radiation(df_combined, data_version, station_locations)
+            stage['rows'] = len(df_radiation)
+        if df_radiation['Rad_kWh_m2'].fillna(0).eq(0).all():
+            st.warning("Geen zoninstraling gemeten voor de geselecteerde stations.")
+            return
+        with profiler.stage("Tab 10: Maand- en jaartotalen", cached=True):
+            df_monthly = compute_period_radiation(df_combined, data_version, station_locations, 'month', min_coverage)
+            df_yearly = compute_period_radiation(df_combined, data_version, station_locations, 'year', min_coverage)
+
+        col_station, col_year = st.columns([2, 1])
+        with col_station:
+            solar_station = st.selectbox("Station:", sorted(df_radiation['Station Naam'].unique()), key="solar_station")
+        station_years = df_yearly.loc[df_yearly['Station Naam'] == solar_station, 'Jaar'].tolist()
+        if not station_years:
+            st.warning(f"Geen dagen met voldoende dekking voor {solar_station}.")
+            return
+        with col_year:
+            solar_year = st.selectbox("Jaar:", station_years[::-1], key="solar_year")
+
+        df_station_daily = df_radiation[df_radiation['Station Naam'] == solar_station]
+        df_station_daily = df_station_daily[calendar_fields(dates_to_days(df_station_daily.index))[0] == solar_year]
+        df_station_monthly = df_monthly[(df_monthly['Station Naam'] == solar_station) & (df_monthly['Periode'].dt.year == solar_year)]
+        year_row = df_yearly[(df_yearly['Station Naam'] == solar_station) & (df_yearly['Jaar'] == solar_year)].iloc[0]
+
+        metric_cols = st.columns(4)
+        metric_cols[0].metric("Instraling", f"{year_row['Rad_kWh_m2']:.0f} kWh/m²", help=f"{year_row['Dagen']} dagen met voldoende dekking.")
+        metric_cols[1].metric("Zonuren", f"{year_row['Sun_Hours']:.0f} uur")
+        if pd.isna(year_row['Rad_Ratio']):
+            metric_cols[2].metric("T.o.v. heldere hemel", "-")
+            metric_cols[3].metric("Max. zonuren", "-")
+        else:
+            metric_cols[2].metric("T.o.v. heldere hemel", f"{year_row['Rad_Ratio']:.0%}")
+            metric_cols[3].metric("Max. zonuren", f"{year_row['SunMax_Hours']:.0f} uur")
+
+        st.plotly_chart(build_radiation_figure(df_station_daily, df_station_monthly, solar_station), use_container_width=True)
+
+        df_display = df_station_monthly.drop(columns=['Station Naam']).copy()
+        df_display['Periode'] = df_display['Periode'].dt.strftime('%m-%Y')
+        df_display['Rad_Ratio'] *= 100
+        df_display = df_display.rename(columns={
+            'Rad_kWh_m2': 'Instraling (kWh/m²)', 'ClearSky_kWh_m2': 'Heldere hemel (kWh/m²)', 'Rad_Ratio': 'Verhouding (%)',
+            'Sun_Hours': 'Zonuren', 'SunMax_Hours': 'Max. zonuren',
+        })
+        st.dataframe(df_display.round(1), hide_index=True, use_container_width=True)
+
+
+    # --- Render alleen de zichtbare tab ---
+    TAB_RENDERERS = {
+        title: renderer for title, renderer in zip(tab_titles_full, [
+            render_tab_graph, render_tab_raw, render_tab_history,
+            render_tab_analysis, render_tab_extremes, render_tab_climatology,
+            render_tab_comparison, render_tab_sql, render_tab_events, render_tab_solar,
+        ])
+    }
+
+    # Navigatie als fragment: wisselen van tab herhaalt de data pipeline niet.
+    @st.fragment
+    def render_active_tab():
+        # Alleen de gekozen tab wordt gerenderd (en doet dus werk); st.tabs zou alle tabs uitvoeren.
+        active_tab = st.radio(
+            "Navigatie",
+            tab_titles_full,
+            horizontal=True,
+            key="active_tab",
+            label_visibility="collapsed"
+        )
+        with profiler.stage(active_tab):
+            TAB_RENDERERS[active_tab]()
+
+    render_active_tab()
+
+
+# -------------------------------------------------------------------
+# --- Profiling Resultaat (Programma Checks) ---
+# -------------------------------------------------------------------
+if profiler.enabled and info_placeholder_profiling:
+    profile_export = profiler.finish()
+    df_stages = profiler.stages_frame()
+
+    with info_placeholder_profiling.container():
+        st.markdown(f"**Totale Rerun Tijd:** `{profiler.total_ms():.0f} ms`")
+        if not df_stages.empty:
+            st.plotly_chart(build_waterfall_figure(df_stages), use_container_width=True)
+            st.dataframe(
+                df_stages.style.format({'Start (ms)': '{:.1f}', 'Duur (ms)': '{:.1f}'}, na_rep='-'),
+                use_container_width=True, hide_index=True
+            )
+        if profile_export:
+            file_name, profile_text = profile_export
+            st.download_button("Download Profiel", data=profile_text, file_name=file_name, key="profiling_download")
+        elif profiling_export == "pyinstrument":
+            st.info("pyinstrument is niet geïnstalleerd (`pip install pyinstrument`).")
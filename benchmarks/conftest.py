@@ -0,0 +1,117 @@
+"""
+Fixtures voor de benchmark suite (pytest-benchmark).
+
+De benchmarks draaien tegen de gebundelde bestanden in weatherdata/ en tegen
+een synthetische meerjarige opschaling daarvan (standaard 20 jaar, instelbaar
+met WEER_BENCH_YEARS). Er is geen netwerk nodig: de ERA5 benchmark wordt
+synthetisch opgebouwd.
+
+Baseline opslaan (na een bewuste wijziging):
+    python -m pytest benchmarks --benchmark-only \
+        --benchmark-storage=benchmarks/.baselines --benchmark-save=baseline
+
+Vergelijken met de opgeslagen baseline (bv. voor een deploy):
+    python -m pytest benchmarks --benchmark-only \
+        --benchmark-storage=benchmarks/.baselines \
+        --benchmark-compare --benchmark-compare-fail=mean:25%
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from malman.core import STATION_MAP, TARGET_TIMEZONE, load_data, load_year_data  # noqa: E402
+
+BUNDLED_BASE_URL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'weatherdata') + os.sep
+BUNDLED_YEARS = [2025, 2026]
+SCALE_YEARS = int(os.environ.get('WEER_BENCH_YEARS', '20'))
+SCALE_START_YEAR = 2000
+
+# load_data leest elk jaarbestand via de (versie-gesleutelde) cache van load_year_data.
+def load_data_uncached(station_id, years, github_base_url, station_map, target_timezone):
+    """load_data met een lege jaarcache, zodat elke meting de bestanden echt parseert."""
+    load_year_data.clear()
+    return load_data(station_id, years, github_base_url, station_map, target_timezone)
+
+
+def combine_stations(frames):
+    """Voegt de stationsframes samen zoals het hoofdscript dat doet."""
+    all_data = []
+    for station_id, df_station in frames.items():
+        df_station = df_station.copy()
+        df_station['Station Naam'] = STATION_MAP.get(station_id, station_id)
+        all_data.append(df_station)
+    return pd.concat(all_data, ignore_index=True)
+
+
+@pytest.fixture(scope='session')
+def bundled_base_url():
+    return BUNDLED_BASE_URL
+
+
+@pytest.fixture(scope='session')
+def scaled_base_url(tmp_path_factory):
+    """
+    Schrijft per station SCALE_YEARS synthetische jaarbestanden weg.
+    Elk jaar bestaat uit sep-dec van 2025 en jan-aug van 2026, met het jaartal vervangen.
+    """
+    root = tmp_path_factory.mktemp('weatherdata_scaled')
+    for station_id in STATION_MAP:
+        raw = pd.concat([
+            pd.read_csv(f"{BUNDLED_BASE_URL}{station_id}/weather_{year}.csv", sep=';', dtype=str)
+            for year in BUNDLED_YEARS
+        ], ignore_index=True)
+        month = raw['datum_waarneming_UTC'].str[3:5].astype(int)
+        year_src = raw['datum_waarneming_UTC'].str[6:10].astype(int)
+        template = pd.concat([
+            raw[(year_src == 2026) & (month < 9)],
+            raw[(year_src == 2025) & (month >= 9)],
+        ], ignore_index=True)
+
+        station_dir = root / station_id
+        station_dir.mkdir()
+        for year in range(SCALE_START_YEAR, SCALE_START_YEAR + SCALE_YEARS):
+            df_year = template.copy()
+            df_year['datum_waarneming_UTC'] = df_year['datum_waarneming_UTC'].str[:6] + str(year)
+            df_year.to_csv(station_dir / f"weather_{year}.csv", sep=';', index=False)
+    return str(root) + os.sep
+
+
+@pytest.fixture(scope='session')
+def scaled_years():
+    return list(range(SCALE_START_YEAR, SCALE_START_YEAR + SCALE_YEARS))
+
+
+@pytest.fixture(scope='session')
+def bundled_combined(bundled_base_url):
+    return combine_stations({
+        station_id: load_data_uncached(station_id, BUNDLED_YEARS, bundled_base_url, STATION_MAP, TARGET_TIMEZONE)
+        for station_id in STATION_MAP
+    })
+
+
+@pytest.fixture(scope='session')
+def scaled_combined(scaled_base_url, scaled_years):
+    return combine_stations({
+        station_id: load_data_uncached(station_id, scaled_years, scaled_base_url, STATION_MAP, TARGET_TIMEZONE)
+        for station_id in STATION_MAP
+    })
+
+
+@pytest.fixture(scope='session')
+def synthetic_era5():
+    """Synthetische ERA5 dagreeks 1940-2019 in het formaat van fetch_complete_historical_data."""
+    dates = pd.date_range('1940-01-01', '2019-12-31', freq='D')
+    rng = np.random.default_rng(42)
+    seasonal = -5 + 12 * np.sin((dates.dayofyear.values - 110) / 365.25 * 2 * np.pi)
+    avg = seasonal + rng.normal(0, 3, len(dates))
+    return pd.DataFrame({
+        'Date': dates,
+        'Temp_High_C': avg + 4,
+        'Temp_Low_C': avg - 4,
+        'Temp_Avg_C': avg,
+    })
@@ -0,0 +1,350 @@
+"""
+Benchmarks voor de data- en analyse-hot-paths van de weerapp.
+
+Elke meting bestaat in twee varianten: de gebundelde data (weatherdata/)
+en de synthetische meerjarige opschaling uit conftest.py.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from malman.core import (
+    CLIMATE_NORMAL_PERIODS, DAILY_FILTER_COLUMNS, DEFAULT_STATIONS, STATION_MAP, TARGET_TIMEZONE, BENCHMARK_LATITUDE, BENCHMARK_LONGITUDE, PLOT_COLS, build_daily_summary, build_graph_figure,
+    build_kernwaarden, find_consecutive_periods, find_extreme_days,
+    merge_langjarig_benchmark, get_station_file_versions, raw_data_page, sort_positions,
+)
+from malman.archive import read_station_archive, sync_station_archive
+from malman.events import EVENT_TYPES, EventCatalog, detect_events, station_rows
+from malman.solar import RADIATION_COLUMNS, build_daily_radiation, build_period_radiation
+from malman.localtime import LOCAL_DAY_COL, epoch_window_mask, local_day_numbers
+from malman.quality import QC_FLAG_COLS, build_daily_completeness, quality_check
+from malman.derived import DERIVED_COLS, add_derived_columns
+from malman.climatology import ANOMALY_MEASURES, build_anomalies, build_normals, build_percentile_bands
+from malman.query import compile_query
+from malman.export import EXPORT_FORMATS, export_bytes, iter_frame_chunks
+from malman.api import ApiSnapshot, WeatherApi, downsample_range
+from malman.shared_cache import SharedCache
+from malman.sql import run_sql_query, sync_sql_database
+from malman.comparison import align_stations, build_comparison_figure, compare_pair, daily_bias_stats
+
+from conftest import BUNDLED_YEARS, load_data_uncached
+
+ROUNDS = int(os.environ.get('WEER_BENCH_ROUNDS', '3'))
+STATION_ID = next(iter(STATION_MAP))
+
+
+def _pedantic(benchmark, func, *args, **kwargs):
+    return benchmark.pedantic(func, args=args, kwargs=kwargs, rounds=ROUNDS, iterations=1, warmup_rounds=0)
+
+
+def _benchmark_period(synthetic_era5):
+    """Filtert de synthetische ERA5 reeks zoals fetch_historical_benchmark_data (1990-2019)."""
+    df_hist = synthetic_era5[
+        (synthetic_era5['Date'] >= '1990-01-01') & (synthetic_era5['Date'] <= '2019-12-31')
+    ].copy()
+    df_hist['Station Naam'] = 'Historische Benchmark'
+    return df_hist.set_index('Date')
+
+
+# --- load_data (CSV parsen) ---
+
+def test_load_data_bundled(benchmark, bundled_base_url):
+    df = _pedantic(benchmark, load_data_uncached, STATION_ID, BUNDLED_YEARS, bundled_base_url, STATION_MAP, TARGET_TIMEZONE)
+    assert not df.empty
+
+
+def test_load_data_scaled(benchmark, scaled_base_url, scaled_years):
+    df = _pedantic(benchmark, load_data_uncached, STATION_ID, scaled_years, scaled_base_url, STATION_MAP, TARGET_TIMEZONE)
+    assert not df.empty
+
+
+# --- Memory-mapped archief (volledige historie en één maand) ---
+
+def test_archive_read_scaled(benchmark, scaled_base_url, scaled_years, tmp_path):
+    versions = get_station_file_versions(STATION_ID, tuple(scaled_years), scaled_base_url)
+    version = sync_station_archive(STATION_ID, versions, scaled_base_url, TARGET_TIMEZONE, archive_dir=str(tmp_path))
+    df = _pedantic(benchmark, read_station_archive, STATION_ID, version, archive_dir=str(tmp_path))
+    assert len(df) == len(load_data_uncached(STATION_ID, scaled_years, scaled_base_url, STATION_MAP, TARGET_TIMEZONE))
+
+
+def test_archive_range_scaled(benchmark, scaled_base_url, scaled_years, tmp_path):
+    versions = get_station_file_versions(STATION_ID, tuple(scaled_years), scaled_base_url)
+    version = sync_station_archive(STATION_ID, versions, scaled_base_url, TARGET_TIMEZONE, archive_dir=str(tmp_path))
+    start = pd.Timestamp(f"{scaled_years[-1]}-03-01", tz=TARGET_TIMEZONE)
+    df = _pedantic(benchmark, read_station_archive, STATION_ID, version, start=start, end=start + pd.Timedelta(days=31), archive_dir=str(tmp_path))
+    assert 0 < len(df) < 31 * 24 * 6 + 1
+
+
+# --- Dagelijkse resample ---
+
+def test_daily_summary_bundled(benchmark, bundled_combined):
+    df_daily = _pedantic(benchmark, build_daily_summary, bundled_combined)
+    assert not df_daily.empty
+
+
+def test_daily_summary_scaled(benchmark, scaled_combined):
+    df_daily = _pedantic(benchmark, build_daily_summary, scaled_combined)
+    assert not df_daily.empty
+
+
+# --- Benchmark merge ---
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_benchmark_merge(benchmark, request, scale, synthetic_era5):
+    df_daily = build_daily_summary(request.getfixturevalue(f'{scale}_combined'))
+    df_hist_raw = _benchmark_period(synthetic_era5)
+    df_merged = _pedantic(benchmark, merge_langjarig_benchmark, df_daily, df_hist_raw)
+    assert 'Langjarig_Avg_Temp' in df_merged.columns
+
+
+# --- Historische Zoeker & Extremen ---
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_find_consecutive_periods(benchmark, request, scale):
+    df_daily = build_daily_summary(request.getfixturevalue(f'{scale}_combined'))
+    df_warm = df_daily[df_daily['Temp_Avg_C'] >= 10.0]
+    _pedantic(benchmark, find_consecutive_periods, df_warm, 3, 'Temp_Avg_C')
+
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_find_extreme_days(benchmark, request, scale):
+    df_daily = build_daily_summary(request.getfixturevalue(f'{scale}_combined'))
+    results = _pedantic(benchmark, find_extreme_days, df_daily)
+    assert 'hoogste_max_temp' in results
+
+
+# --- Tab 1 figuur ---
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_build_graph_figure(benchmark, request, scale):
+    df_combined = request.getfixturevalue(f'{scale}_combined')
+    # Eén kalenderjaar (zoals "Huidig jaar") voor alle stations
+    last_year = df_combined['Timestamp_Local'].dt.year.max()
+    filtered_df = df_combined[df_combined['Timestamp_Local'].dt.year == last_year]
+    fig = _pedantic(
+        benchmark, build_graph_figure, filtered_df, 'temp', 'Temperatuur (°C)', '°C',
+        'start', 'eind', show_markers=False
+    )
+    assert len(fig.data) == filtered_df['Station Naam'].nunique()
+
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_build_kernwaarden(benchmark, request, scale):
+    df_combined = request.getfixturevalue(f'{scale}_combined')
+    df_kernwaarden = _pedantic(benchmark, build_kernwaarden, df_combined)
+    assert len(df_kernwaarden) == df_combined['Station Naam'].nunique() * len(PLOT_COLS)
+
+
+# --- Stationsvergelijking (rooster, verschil, correlatie, bias per dag) ---
+
+def _compare_all(df_combined):
+    df_aligned = align_stations(df_combined, 'temp')
+    station_a, station_b = df_aligned.columns[:2]
+    df_pair = compare_pair(df_aligned, station_a, station_b)
+    return df_pair, daily_bias_stats(df_pair)
+
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_station_comparison(benchmark, request, scale):
+    df_combined = request.getfixturevalue(f'{scale}_combined')
+    df_pair, df_daily = _pedantic(benchmark, _compare_all, df_combined)
+    assert df_pair['Verschil'].notna().any() and not df_daily.empty
+
+
+def test_build_comparison_figure(benchmark, bundled_combined):
+    # Een vol jaar aan gepaarde 10-minuten verschillen
+    df_pair, df_daily = _compare_all(bundled_combined)
+    df_pair, df_daily = df_pair.iloc[-365 * 144:], df_daily.iloc[-365:]
+    fig = _pedantic(benchmark, build_comparison_figure, df_pair, df_daily, 'A', 'B', '°C', '1 dag')
+    assert len(fig.data) == 3
+
+
+# --- Datakwaliteit (QC vlaggen en dekking per dag) ---
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_quality_check(benchmark, request, scale):
+    df_combined = request.getfixturevalue(f'{scale}_combined')
+    df_station = df_combined[df_combined['Station Naam'] == STATION_MAP[STATION_ID]].drop(columns=QC_FLAG_COLS)
+    df_checked = _pedantic(benchmark, quality_check, df_station.sort_values('Timestamp_UTC', kind='stable'))
+    assert df_checked['QC_Flags'].dtype == 'uint8'
+
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_daily_completeness(benchmark, request, scale):
+    df_combined = request.getfixturevalue(f'{scale}_combined')
+    df_completeness = _pedantic(benchmark, build_daily_completeness, df_combined)
+    assert df_completeness['Dekking'].between(0, 1).all()
+
+
+# --- Lokaal dagnummer (bij het inlezen) en het tijdsfilter op de UTC epoch ---
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_local_day_numbers(benchmark, request, scale):
+    df_combined = request.getfixturevalue(f'{scale}_combined')
+    epoch_ns = df_combined['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    days = _pedantic(benchmark, local_day_numbers, epoch_ns, TARGET_TIMEZONE)
+    assert days.dtype == np.int32 and (days == df_combined[LOCAL_DAY_COL].to_numpy()).all()
+
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_epoch_window_mask(benchmark, request, scale):
+    df_combined = request.getfixturevalue(f'{scale}_combined')
+    end = df_combined['Timestamp_Local'].max()
+    start = end - pd.Timedelta(days=365)
+    mask = _pedantic(benchmark, epoch_window_mask, df_combined, start, end)
+    assert mask.sum() == ((df_combined['Timestamp_Local'] >= start) & (df_combined['Timestamp_Local'] <= end)).sum()
+
+
+# --- Weergebeurtenissen: volledige detectie en een incrementele update met één nieuwe dag ---
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_detect_events(benchmark, request, scale):
+    df_station = station_rows(request.getfixturevalue(f'{scale}_combined'), STATION_MAP[STATION_ID])
+    df_events = _pedantic(benchmark, detect_events, df_station, STATION_MAP[STATION_ID])
+    assert (df_events['Einde'] >= df_events['Begin']).all() and df_events['Type'].isin(EVENT_TYPES).all()
+
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_event_catalog_update(benchmark, request, scale):
+    df_station = station_rows(request.getfixturevalue(f'{scale}_combined'), STATION_MAP[STATION_ID])
+    df_previous = df_station.iloc[:-144]
+    catalogs = []
+
+    def setup():
+        # Alleen de update met de laatste dag wordt gemeten
+        catalog = EventCatalog(STATION_MAP[STATION_ID])
+        catalog.update(df_previous, ((0, 'a'),))
+        catalogs.append(catalog)
+        return (df_station, ((0, 'b'),)), {}
+
+    benchmark.pedantic(lambda *args: catalogs[-1].update(*args), setup=setup, rounds=ROUNDS, iterations=1)
+    df_events = catalogs[-1].events
+    pd.testing.assert_frame_equal(df_events, detect_events(df_station, STATION_MAP[STATION_ID]), check_dtype=False)
+
+
+# --- Zonnestraling: dagrollup (trapeziumregel + heldere hemel) en maandtotalen ---
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_daily_radiation(benchmark, request, scale):
+    df_combined = request.getfixturevalue(f'{scale}_combined')
+    station_locations = tuple((name, (BENCHMARK_LATITUDE, BENCHMARK_LONGITUDE, None)) for name in STATION_MAP.values())
+    df_daily = _pedantic(benchmark, build_daily_radiation, df_combined, station_locations)
+    assert list(df_daily.columns) == ['Station Naam'] + RADIATION_COLUMNS
+    assert (df_daily['Rad_kWh_m2'] >= 0).all() and not build_period_radiation(df_daily).empty
+
+
+# --- Afgeleide grootheden (per ingelezen stuk) ---
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_add_derived_columns(benchmark, request, scale):
+    df_combined = request.getfixturevalue(f'{scale}_combined')
+    df_station = df_combined[df_combined['Station Naam'] == STATION_MAP[STATION_ID]].drop(columns=DERIVED_COLS)
+    location = (BENCHMARK_LATITUDE, BENCHMARK_LONGITUDE, 250.0)
+    df_derived = _pedantic(benchmark, add_derived_columns, df_station, location)
+    assert df_derived['druk_zee'].notna().any() and df_derived['helderheid'].notna().any()
+
+
+# --- Percentielbanden van de klimaatnormaal (30 jaar × 366 dagen, ±7 dagen venster) ---
+
+def test_build_percentile_bands(benchmark, synthetic_era5):
+    df_hist = _benchmark_period(synthetic_era5).reset_index()
+    df_bands = _pedantic(benchmark, build_percentile_bands, df_hist)
+    assert len(df_bands) == 366 and (df_bands['Temp_Avg_C_P5'] <= df_bands['Temp_Avg_C_P95']).all()
+
+
+# --- Anomalieën: normalen van alle perioden in één stap, daarna alle perioden per dag ---
+
+def test_build_normals(benchmark, synthetic_era5):
+    normals = _pedantic(benchmark, build_normals, synthetic_era5, CLIMATE_NORMAL_PERIODS)
+    assert normals['mean'].shape == (len(CLIMATE_NORMAL_PERIODS), 366) and np.isfinite(normals['std']).all()
+
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_build_anomalies(benchmark, request, scale, synthetic_era5):
+    df_daily = build_daily_summary(request.getfixturevalue(f'{scale}_combined'))
+    normals = build_normals(synthetic_era5, CLIMATE_NORMAL_PERIODS)
+    df_anomalies = _pedantic(benchmark, build_anomalies, df_daily, normals)
+    assert len(df_anomalies) == len(df_daily)
+    assert df_anomalies.shape[1] == len(ANOMALY_MEASURES) * len(CLIMATE_NORMAL_PERIODS)
+
+
+# --- Samengestelde zoekvraag (Tab 3): gecompileerd dagmasker over de dagelijkse samenvatting ---
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_daily_query_mask(benchmark, request, scale):
+    df_daily = build_daily_summary(request.getfixturevalue(f'{scale}_combined'))
+    columns = tuple(col for col in DAILY_FILTER_COLUMNS if col in df_daily.columns)
+    daily_query = compile_query("(Temp_High_C >= 15 AND Hum_Avg_P < 70) OR NOT Pres_Avg_hPa > 990", columns)
+    mask = _pedantic(benchmark, daily_query.mask, df_daily)
+    # NaN voldoet aan geen vergelijking, ook niet via NOT: NOT Pres_Avg_hPa > 990 is Pres_Avg_hPa <= 990
+    expected = ((df_daily['Temp_High_C'] >= 15) & (df_daily['Hum_Avg_P'] < 70)) | (df_daily['Pres_Avg_hPa'] <= 990)
+    assert (mask == expected.to_numpy()).all()
+
+
+
+# --- Ruwe Data (Tab 2): sorteervolgorde en één pagina ophalen ---
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_raw_data_page(benchmark, request, scale):
+    df = request.getfixturevalue(f'{scale}_combined')
+
+    def sorted_page():
+        positions = sort_positions(df, 'temp', ascending=False)
+        return raw_data_page(df, positions, ['Timestamp_Local', 'Station Naam', 'temp'], 2, 500)
+
+    df_page = _pedantic(benchmark, sorted_page)
+    assert len(df_page) == 500 and df_page['temp'].is_monotonic_decreasing
+
+
+# --- Export (CSV/Parquet) in stukken ---
+
+@pytest.mark.parametrize('export_format', list(EXPORT_FORMATS))
+def test_export_scaled(benchmark, scaled_combined, export_format):
+    data = _pedantic(benchmark, lambda: export_bytes(iter_frame_chunks(scaled_combined, PLOT_COLS), export_format))
+    assert len(data) > 0
+
+
+# --- HTTP API: rollup bij een cache miss en 1000 antwoorden uit de cache ---
+
+@pytest.mark.parametrize('scale', ['bundled', 'scaled'])
+def test_api_downsample_range(benchmark, request, scale):
+    df = request.getfixturevalue(f'{scale}_combined').sort_values(['Station Naam', 'Timestamp_UTC'])
+    df_hourly = _pedantic(benchmark, downsample_range, df, PLOT_COLS, pd.Timedelta(hours=1))
+    assert len(df_hourly) < len(df)
+
+
+def test_api_cached_responses(benchmark, scaled_combined):
+    api = WeatherApi(DEFAULT_STATIONS)
+    api.snapshot = ApiSnapshot('benchmark', scaled_combined)
+    paths = [('/latest', ''), ('/daily', 'start=2005-01-01'), ('/monthly', ''), ('/range', 'every=1h&columns=temp')]
+    for path, query in paths:
+        assert api.respond(path, query)[0] == 200
+
+    def thousand_requests():
+        return [api.respond(*paths[i % len(paths)])[0] for i in range(1000)]
+
+    assert set(_pedantic(benchmark, thousand_requests)) == {200}
+
+
+# --- Gedeelde cache (SQLite): een jaarbestand lezen dat een ander proces schreef ---
+
+def test_shared_cache_read(benchmark, bundled_combined, tmp_path):
+    cache = SharedCache(str(tmp_path / 'cache.sqlite'))
+    cache.put('year_data', 'benchmark', bundled_combined, version='v1')
+    found, df = _pedantic(benchmark, cache.get, 'year_data', 'benchmark', 'v1')
+    assert found and len(df) == len(bundled_combined)
+
+
+# --- SQL analyse (SQLite): maandoverzicht via de views, op het databasebestand ---
+
+def test_sql_monthly_summary_scaled(benchmark, scaled_base_url, scaled_years, tmp_path):
+    versions = get_station_file_versions(STATION_ID, tuple(scaled_years), scaled_base_url)
+    location = (BENCHMARK_LATITUDE, BENCHMARK_LONGITUDE, None)
+    sync_station_archive(STATION_ID, versions, scaled_base_url, TARGET_TIMEZONE, archive_dir=str(tmp_path), location=location)
+    db_path = str(tmp_path / 'weer.sqlite')
+    sync_sql_database([(STATION_ID, STATION_MAP[STATION_ID], location, versions)], db_path=db_path, archive_dir=str(tmp_path))
+    df, truncated, _ = _pedantic(benchmark, run_sql_query, "SELECT * FROM monthly_summary", db_path)
+    assert len(df) >= 12 * len(scaled_years) and not truncated
+
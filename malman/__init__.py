@@ -0,0 +1 @@
+"""Hulpmodules van de Malmån weerapp (data, analyse en benchmarks)."""
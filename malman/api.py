@@ -0,0 +1,614 @@
+"""
+Alleen-lezen HTTP API (JSON en Arrow IPC) op de weerdata, voor andere systemen
+op de locatie (alarmering, een display in de gang).
+
+De API draait als eigen proces naast de app en gebruikt dezelfde laders en
+rollups (archief of load_data, build_daily_summary, build_monthly_summary,
+de ERA5 normalen van malman.climatology):
+
+    python -m malman.api --port 8502
+    curl 'http://localhost:8502/latest'
+    curl 'http://localhost:8502/range?station=2308LH047&start=2026-01-01&end=2026-01-31&every=1h&columns=temp,druk'
+
+Endpoints (GET; parameters zijn optioneel):
+
+    /stations                                       het stationsregister
+    /latest?station=ID,ID&columns=                  laatste waarneming per station
+    /range?station=&start=&end=&every=&columns=     10-minuten data, gemiddeld per interval every
+                                                    (bv. 1h, 1D; intervallen op de UTC klok;
+                                                    zonder start het laatste etmaal)
+    /daily?station=&start=&end=&min_coverage=       dagelijkse samenvatting
+    /monthly?station=&start=&end=&min_coverage=     maandrollup van de dagelijkse samenvatting
+    /normals?station=ID&period=1990-2019&scale=day  ERA5 klimaatnormaal (per kalenderdag of
+                                                    scale=month) op de stationslocatie
+    /export?station=&start=&end=&columns=&format=   10-minuten data als download (format=csv of
+                                                    parquet; zonder start/end de volledige historie)
+
+Datums zijn YYYY-MM-DD in lokale tijd (einddatum inclusief). Verdachte waarden
+(QC) zijn leeg, net als in de rollups van de app. Een antwoord is JSON (een lijst
+records; lokale tijden zonder tijdzone, UTC tijden met 'Z') of, met ?format=arrow
+of 'Accept: application/vnd.apache.arrow.stream', een Arrow IPC stream (vraagt pyarrow).
+
+Caching: een achtergrondthread controleert hoogstens eens per API_REFRESH_SECONDS
+de dataversie (get_station_file_versions, zoals de app) en laadt alleen bij een
+nieuwe versie opnieuw. Elk antwoord wordt als kant-en-klare bytes bewaard, gesleuteld
+op (dataversie, pad, parameters, formaat); een herhaalde vraag kost alleen een
+dict-opzoeking. De ETag is een hash van de inhoud, zodat een client met If-None-Match
+een 304 zonder inhoud krijgt, ook na een nieuwe dataversie waarin het antwoord gelijk bleef.
+
+/export wordt niet bewaard en kent geen rijlimiet: het bestand wordt in stukken van
+EXPORT_CHUNK_ROWS (zie malman/export.py) opgebouwd en elk stuk gaat direct als HTTP
+chunk naar de client. De ETag volgt daar uit de dataversie en de parameters.
+"""
+import argparse
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from malman.core import (
+    CLIMATE_NORMAL_PERIODS, DATA_VERSION_TTL_SECONDS, GITHUB_BASE_URL, PLOT_COLS, START_YEAR, TARGET_TIMEZONE,
+    apply_coverage_policy, benchmark_location, build_daily_summary, build_monthly_summary, combine_data_version,
+    discover_available_years, get_station_file_versions, load_data, load_station_registry, prefetch_historical_data,
+    station_location,
+)
+from malman.archive import archive_enabled, load_station_from_archive
+from malman.climatology import MONTH_DAYS, compute_normals, period_key
+from malman.export import EXPORT_FORMATS, iter_frame_chunks, write_export
+from malman.quality import CADENCE, MIN_DAY_COVERAGE, QC_FLAG_COLS, masked_values
+from malman.localtime import epoch_window_mask
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow antwoorden niet beschikbaar
+    pa = None
+
+API_HOST = '127.0.0.1'
+API_PORT = 8502
+
+# Hoe vaak de dataversie gecontroleerd wordt (gelijk aan de TTL van de versies in de app)
+API_REFRESH_SECONDS = DATA_VERSION_TTL_SECONDS
+
+# Cache-Control max-age: data en rollups veranderen hoogstens per controle, de normalen per dag
+API_MAX_AGE_SECONDS = API_REFRESH_SECONDS
+API_NORMALS_MAX_AGE_SECONDS = 86400
+
+# Aantal en totale grootte van de bewaarde antwoorden (LRU), en het maximale aantal rijen van een /range antwoord
+API_CACHE_ENTRIES = 1024
+API_CACHE_BYTES = 256 * 1024 * 1024
+API_MAX_RANGE_ROWS = 200_000
+
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+JSON_MIME = 'application/json'
+
+TIME_COLS = ['Station Naam', 'Timestamp_UTC', 'Timestamp_Local']
+
+
+class ApiError(Exception):
+    """Fout die als HTTP status en JSON melding naar de client gaat."""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+# -------------------------------------------------------------------
+# Parameters
+# -------------------------------------------------------------------
+def _parse_date(value, name, end=False):
+    """YYYY-MM-DD (lokale tijd) als tz-aware Timestamp; met end=True het einde van die dag."""
+    try:
+        day = pd.Timestamp(value).tz_localize(TARGET_TIMEZONE)
+    except (ValueError, TypeError):
+        raise ApiError(400, f"Ongeldige datum voor {name}: '{value}' (verwacht YYYY-MM-DD).")
+    return day + pd.Timedelta(days=1) - pd.Timedelta(seconds=1) if end else day
+
+
+def _parse_columns(value, available):
+    if not value:
+        return [col for col in PLOT_COLS if col in available]
+    columns = value.split(',')
+    unknown = [col for col in columns if col not in PLOT_COLS or col not in available]
+    if unknown:
+        raise ApiError(400, f"Onbekende kolommen: {', '.join(unknown)}. Beschikbaar: {', '.join(c for c in PLOT_COLS if c in available)}.")
+    return columns
+
+
+def _parse_every(value):
+    if not value:
+        return CADENCE
+    try:
+        every = pd.Timedelta(value)
+    except ValueError:
+        raise ApiError(400, f"Ongeldig interval every='{value}' (bv. 10min, 1h, 1D).")
+    if every < CADENCE:
+        raise ApiError(400, f"Het interval every is minstens {CADENCE}.")
+    return every
+
+
+def _parse_coverage(value):
+    if not value:
+        return MIN_DAY_COVERAGE
+    try:
+        min_coverage = float(value)
+    except ValueError:
+        min_coverage = -1.0
+    if not 0.0 <= min_coverage <= 1.0:
+        raise ApiError(400, f"min_coverage moet tussen 0 en 1 liggen, niet '{value}'.")
+    return min_coverage
+
+
+# -------------------------------------------------------------------
+# Rollups per dataversie
+# -------------------------------------------------------------------
+def latest_observations(df_combined, columns):
+    """Laatste waarneming per station (verdachte waarden leeg); df_combined gesorteerd op station en tijd."""
+    last = df_combined.groupby('Station Naam', sort=True).tail(1)
+    return pd.DataFrame(
+        {**{col: last[col] for col in TIME_COLS}, **{col: masked_values(last, col) for col in columns}}
+    ).reset_index(drop=True)
+
+
+def downsample_range(df, columns, every):
+    """
+    Gemiddelde per station en interval every (op de UTC klok) van de niet-verdachte waarden.
+    Met every gelijk aan de meetcadans komen de 10-minuten rijen ongewijzigd (behalve QC) terug.
+    """
+    values = {col: masked_values(df, col).to_numpy(dtype=np.float64, na_value=np.nan) for col in columns}
+    if every == CADENCE:
+        return pd.DataFrame({**{col: df[col].to_numpy() for col in TIME_COLS}, **values})
+
+    step = every.value
+    epoch_ns = df['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    bins = epoch_ns - epoch_ns % step
+    df_binned = pd.DataFrame(values).groupby([df['Station Naam'].to_numpy(), bins], sort=True).mean()
+    timestamps = pd.to_datetime(df_binned.index.get_level_values(1), utc=True)
+    df_binned.insert(0, 'Timestamp_Local', timestamps.tz_convert(TARGET_TIMEZONE))
+    df_binned.insert(0, 'Timestamp_UTC', timestamps)
+    df_binned.insert(0, 'Station Naam', df_binned.index.get_level_values(0))
+    return df_binned.reset_index(drop=True)
+
+
+class ApiSnapshot:
+    """Eén dataversie: de 10-minuten data van alle stations en (lui berekend) de rollups daarvan."""
+
+    def __init__(self, data_version, df_combined):
+        self.data_version = data_version
+        self.df_combined = df_combined.sort_values(['Station Naam', 'Timestamp_UTC'], kind='stable').reset_index(drop=True)
+
+    @functools.cached_property
+    def daily(self):
+        return build_daily_summary(self.df_combined)
+
+    def range_rows(self, stations, start, end):
+        """Posities van de rijen van stations binnen [start, end]."""
+        df = self.df_combined
+        return np.flatnonzero(df['Station Naam'].isin(stations).to_numpy() & epoch_window_mask(df, start, end))
+
+
+# -------------------------------------------------------------------
+# Serialisatie
+# -------------------------------------------------------------------
+def frame_to_json(df):
+    """Records als JSON bytes; lokale tijden als kloktijd zonder tijdzone, NaN als null."""
+    df = df.copy(deep=False)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.DatetimeTZDtype) and str(df[col].dt.tz) != 'UTC':
+            df[col] = df[col].dt.tz_localize(None)
+    return df.to_json(orient='records', date_format='iso', date_unit='s').encode('utf-8')
+
+
+def frame_to_arrow(df):
+    """Arrow IPC stream (één record batch) als bytes."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+class _ChunkedWriter:
+    """Schrijfbaar bestandsobject dat elke write() als HTTP/1.1 chunk verstuurt (Transfer-Encoding: chunked)."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        if data:
+            self.wfile.write(b'%x\r\n' % len(data))
+            self.wfile.write(data)
+            self.wfile.write(b'\r\n')
+            self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        self.wfile.flush()
+
+    def close(self):
+        # De verbinding blijft open (keep-alive); finish() sluit alleen de body af
+        pass
+
+    def finish(self):
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+
+def _masked_chunks(chunks, columns):
+    """De stukken zonder de QC kolommen, met verdachte waarden leeg (zoals de andere endpoints)."""
+    for df_chunk in chunks:
+        yield pd.DataFrame({
+            **{col: df_chunk[col] for col in TIME_COLS}, **{col: masked_values(df_chunk, col) for col in columns}
+        })
+
+
+class WeatherApi:
+    """
+    De gedeelde toestand van de API-server: de huidige ApiSnapshot en de antwoordcache.
+    respond() is los van HTTP aan te roepen (benchmarks, andere servers).
+    """
+
+    def __init__(self, registry, station_ids=None, github_base_url=GITHUB_BASE_URL,
+                 refresh_seconds=API_REFRESH_SECONDS, cache_entries=API_CACHE_ENTRIES, cache_bytes=API_CACHE_BYTES):
+        self.registry = registry
+        self.station_ids = list(station_ids or registry)
+        self.github_base_url = github_base_url
+        self.refresh_seconds = refresh_seconds
+        self.cache_entries = cache_entries
+        self.cache_bytes = cache_bytes
+        self.names = {station_id: registry[station_id]['naam'] for station_id in self.station_ids}
+        self.snapshot = None
+        self._reload_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._responses = OrderedDict()
+        self._cached_bytes = 0
+        self._endpoints = {
+            '/stations': self._stations,
+            '/latest': self._latest,
+            '/range': self._range,
+            '/daily': self._daily,
+            '/monthly': self._monthly,
+            '/normals': self._normals,
+        }
+
+    # --- Laden ---
+
+    def _station_versions(self):
+        versions = {}
+        for station_id in self.station_ids:
+            start_year = self.registry[station_id].get('start_jaar', START_YEAR)
+            years = discover_available_years(start_year, station_id, self.github_base_url)
+            versions[station_id] = get_station_file_versions(station_id, tuple(years), self.github_base_url)
+        return versions
+
+    def _load(self, versions, data_version):
+        all_data = []
+        for station_id in self.station_ids:
+            location = station_location(self.registry[station_id])
+            df_station = None
+            if archive_enabled():
+                try:
+                    df_station = load_station_from_archive(station_id, versions[station_id], self.github_base_url, TARGET_TIMEZONE, location=location)
+                except Exception:
+                    df_station = None  # Terugvallen op het rechtstreeks laden van de CSV bestanden
+            if df_station is None:
+                years = [year for year, _ in versions[station_id]]
+                df_station = load_data(station_id, years, self.github_base_url, self.names, TARGET_TIMEZONE, versions[station_id], location)
+            if not df_station.empty:
+                df_station['Station Naam'] = self.names[station_id]
+                all_data.append(df_station)
+        if not all_data:
+            raise RuntimeError("Geen data geladen voor de stations van de API.")
+        return ApiSnapshot(data_version, pd.concat(all_data, ignore_index=True))
+
+    def refresh(self):
+        """Laadt de data opnieuw als de dataversie gewijzigd is; geeft True bij een nieuwe versie."""
+        with self._reload_lock:
+            versions = self._station_versions()
+            locations = tuple((station_id, station_location(self.registry[station_id])) for station_id in self.station_ids)
+            data_version = combine_data_version(tuple(versions.items()), locations)
+            if self.snapshot is not None and self.snapshot.data_version == data_version:
+                return False
+            self.snapshot = self._load(versions, data_version)
+        with self._cache_lock:
+            self._responses.clear()
+            self._cached_bytes = 0
+        return True
+
+    def start_refresher(self):
+        """Achtergrondthread die de dataversie om de refresh_seconds controleert."""
+        def run():
+            while True:
+                time.sleep(self.refresh_seconds)
+                try:
+                    self.refresh()
+                except Exception as e:  # De vorige versie blijft beschikbaar
+                    print(f"Verversen mislukt: {e}")
+
+        thread = threading.Thread(target=run, name='api-refresh', daemon=True)
+        thread.start()
+        return thread
+
+    # --- Verzoeken ---
+
+    def respond(self, path, query_string='', accept='', if_none_match=None):
+        """
+        Geeft (status, headers, body) voor een GET verzoek. body is bytes, of voor /export een
+        functie die het bestand in stukken naar een schrijfbaar bestandsobject schrijft.
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            return self._error(ApiError(503, "De data wordt nog geladen.", {'Retry-After': '5'}))
+        if path.rstrip('/') == '/export':
+            try:
+                return self._export(snapshot, query_string, if_none_match)
+            except ApiError as e:
+                return self._error(e)
+
+        want_arrow = 'format=arrow' in query_string or ARROW_MIME in accept
+        key = (snapshot.data_version, path, query_string, want_arrow)
+        with self._cache_lock:
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+
+        if cached is None:
+            endpoint = self._endpoints.get(path.rstrip('/') or '/')
+            if endpoint is None:
+                return self._error(ApiError(404, f"Onbekend pad '{path}'. Beschikbaar: {', '.join(self._endpoints)}, /export."))
+            if want_arrow and pa is None:
+                return self._error(ApiError(406, "Arrow antwoorden vragen pyarrow op de server."))
+            query = dict(parse_qsl(query_string))
+            query.pop('format', None)
+            try:
+                df, max_age = endpoint(snapshot, query)
+            except ApiError as e:
+                return self._error(e)
+            body = frame_to_arrow(df) if want_arrow else frame_to_json(df)
+            cached = (
+                f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+                ARROW_MIME if want_arrow else JSON_MIME,
+                f'public, max-age={max_age}',
+                body,
+            )
+            with self._cache_lock:
+                if key not in self._responses:
+                    self._responses[key] = cached
+                    self._cached_bytes += len(body)
+                while len(self._responses) > self.cache_entries or self._cached_bytes > self.cache_bytes:
+                    self._cached_bytes -= len(self._responses.popitem(last=False)[1][3])
+
+        etag, content_type, cache_control, body = cached
+        headers = {'ETag': etag, 'Cache-Control': cache_control, 'Vary': 'Accept'}
+        if if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(',')):
+            return 304, headers, b''
+        headers['Content-Type'] = content_type
+        return 200, headers, body
+
+    @staticmethod
+    def _error(error):
+        body = json.dumps({'fout': error.message}).encode('utf-8')
+        return error.status, {'Content-Type': JSON_MIME, 'Cache-Control': 'no-store', **error.headers}, body
+
+    def _stations_param(self, query):
+        """Stationsnamen uit ?station=ID,ID (standaard alle stations van de API)."""
+        if not query.get('station'):
+            return list(self.names.values())
+        station_ids = query['station'].split(',')
+        unknown = [station_id for station_id in station_ids if station_id not in self.names]
+        if unknown:
+            raise ApiError(400, f"Onbekende stations: {', '.join(unknown)}. Beschikbaar: {', '.join(self.names)}.")
+        return [self.names[station_id] for station_id in station_ids]
+
+    def _period_param(self, df, date_col, query):
+        """Filtert df op ?start= en ?end= (lokale datums, einddatum inclusief)."""
+        keep = np.ones(len(df), dtype=bool)
+        dates = df[date_col]
+        if query.get('start'):
+            start = _parse_date(query['start'], 'start')
+            keep &= (dates >= (start if dates.dt.tz is not None else start.tz_localize(None))).to_numpy()
+        if query.get('end'):
+            end = _parse_date(query['end'], 'end', end=True)
+            keep &= (dates <= (end if dates.dt.tz is not None else end.tz_localize(None))).to_numpy()
+        return df[keep]
+
+    # --- Endpoints: geven (DataFrame, max-age) ---
+
+    def _stations(self, snapshot, query):
+        df = pd.DataFrame([{'id': station_id, **self.registry[station_id]} for station_id in self.station_ids])
+        return df, API_MAX_AGE_SECONDS
+
+    def _latest(self, snapshot, query):
+        stations = self._stations_param(query)
+        columns = _parse_columns(query.get('columns'), snapshot.df_combined.columns)
+        df = latest_observations(snapshot.df_combined, columns)
+        return df[df['Station Naam'].isin(stations)], API_MAX_AGE_SECONDS
+
+    def _range(self, snapshot, query):
+        stations = self._stations_param(query)
+        columns = _parse_columns(query.get('columns'), snapshot.df_combined.columns)
+        every = _parse_every(query.get('every'))
+        if query.get('end'):
+            end = _parse_date(query['end'], 'end', end=True)
+        else:
+            end = snapshot.df_combined['Timestamp_Local'].max()
+        start = _parse_date(query['start'], 'start') if query.get('start') else end - pd.Timedelta(days=1)
+
+        positions = snapshot.range_rows(stations, start, end)
+        expected_rows = len(positions) if every == CADENCE else len(stations) * ((end - start) // every + 1)
+        if expected_rows > API_MAX_RANGE_ROWS:
+            raise ApiError(400, f"Te veel rijen (±{expected_rows}); kies een korter bereik of een groter interval every (max {API_MAX_RANGE_ROWS} rijen).")
+        df = snapshot.df_combined.iloc[positions]
+        return downsample_range(df, columns, every), API_MAX_AGE_SECONDS
+
+    def _daily_filtered(self, snapshot, query):
+        df = apply_coverage_policy(snapshot.daily, _parse_coverage(query.get('min_coverage')))
+        return df[df['Station Naam'].isin(self._stations_param(query))]
+
+    def _daily(self, snapshot, query):
+        df = self._daily_filtered(snapshot, query).reset_index()
+        df = self._period_param(df, 'Date', query)
+        return df[['Station Naam'] + [col for col in df.columns if col != 'Station Naam']], API_MAX_AGE_SECONDS
+
+    def _monthly(self, snapshot, query):
+        df = build_monthly_summary(self._daily_filtered(snapshot, query))
+        if query.get('start'):
+            # Een maand telt mee vanaf de maand van de startdatum
+            query = {**query, 'start': _parse_date(query['start'], 'start').strftime('%Y-%m-01')}
+        return self._period_param(df, 'Maand', query), API_MAX_AGE_SECONDS
+
+    def _normals(self, snapshot, query):
+        station_id = query.get('station') or self.station_ids[0]
+        if station_id not in self.names:
+            raise ApiError(400, f"Onbekend station '{station_id}'. Beschikbaar: {', '.join(self.names)}.")
+        periods = [period_key(name) for name in CLIMATE_NORMAL_PERIODS]
+        period = query.get('period') or periods[0]
+        if period not in periods:
+            raise ApiError(400, f"Onbekende normaalperiode '{period}'. Beschikbaar: {', '.join(periods)}.")
+        scale = query.get('scale') or 'day'
+        if scale not in ('day', 'month'):
+            raise ApiError(400, "scale is 'day' of 'month'.")
+
+        location = benchmark_location(station_location(self.registry[station_id]))
+        status = prefetch_historical_data([location])[0]
+        if status[0] == 'pending':
+            raise ApiError(503, f"De ERA5 reeks wordt nog opgehaald ({status[1]:.0f} s bezig).", {'Retry-After': '10'})
+        normals = compute_normals(CLIMATE_NORMAL_PERIODS, location)
+        if normals is None:
+            raise ApiError(503, f"ERA5 niet beschikbaar: {status[1]}", {'Retry-After': '60'})
+
+        row = periods.index(period)
+        if scale == 'day':
+            df = pd.DataFrame({'Month_Day': MONTH_DAYS, 'Temp_Avg_C': normals['mean'][row], 'Temp_Avg_Std_C': normals['std'][row]})
+        else:
+            df = pd.DataFrame({'Maand': np.arange(1, 13), 'Temp_Avg_C': normals['month_mean'][row], 'Temp_Avg_Std_C': normals['month_std'][row]})
+        df.insert(0, 'Periode', period)
+        df.insert(0, 'Station Naam', self.names[station_id])
+        return df, API_NORMALS_MAX_AGE_SECONDS
+
+
+    def _export(self, snapshot, query_string, if_none_match):
+        """/export: de 10-minuten data als CSV of Parquet, gestreamd in stukken (niet in de antwoordcache)."""
+        query = dict(parse_qsl(query_string))
+        formats = {extension: name for name, (extension, _) in EXPORT_FORMATS.items()}
+        extension = (query.get('format') or 'csv').lower()
+        if extension not in formats:
+            raise ApiError(406 if extension == 'parquet' else 400, f"Onbekend of niet beschikbaar formaat '{extension}'. Beschikbaar: {', '.join(formats)}.")
+        stations = self._stations_param(query)
+        columns = _parse_columns(query.get('columns'), snapshot.df_combined.columns)
+        start = _parse_date(query['start'], 'start') if query.get('start') else None
+        end = _parse_date(query['end'], 'end', end=True) if query.get('end') else None
+
+        etag = f'"{hashlib.blake2b(repr((snapshot.data_version, sorted(query.items()))).encode("utf-8"), digest_size=16).hexdigest()}"'
+        headers = {'ETag': etag, 'Cache-Control': f'public, max-age={API_MAX_AGE_SECONDS}'}
+        if if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(',')):
+            return 304, headers, b''
+
+        period = f"{start:%Y%m%d}-{end:%Y%m%d}" if start is not None and end is not None else snapshot.data_version
+        headers['Content-Type'] = EXPORT_FORMATS[formats[extension]][1]
+        headers['Content-Disposition'] = f'attachment; filename="malman_{period}.{extension}"'
+        # De QC kolommen gaan mee in de stukken voor de maskering en vallen daarna weg
+        qc_cols = [col for col in QC_FLAG_COLS if col in snapshot.df_combined.columns]
+        chunks = iter_frame_chunks(snapshot.df_combined, columns + qc_cols, start, end, stations=stations)
+        return 200, headers, functools.partial(write_export, _masked_chunks(chunks, columns), export_format=formats[extension])
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 (keep-alive) handler rond WeatherApi.respond()."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MalmanAPI/1'
+    # Kopregels en inhoud gaan als losse writes; zonder TCP_NODELAY kost elk keep-alive antwoord ±40 ms
+    disable_nagle_algorithm = True
+    quiet = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            status, headers, body = self.server.api.respond(
+                url.path, url.query, self.headers.get('Accept', ''), self.headers.get('If-None-Match')
+            )
+        except Exception as e:
+            status, headers, body = WeatherApi._error(ApiError(500, f"Interne fout: {e}"))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if callable(body):
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            writer = _ChunkedWriter(self.wfile)
+            try:
+                body(writer)
+            except Exception:
+                # De status is al verstuurd: de verbinding sluiten zodat de client een afgebroken download ziet
+                self.close_connection = True
+                raise
+            writer.finish()
+            return
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(api, host=API_HOST, port=API_PORT):
+    """ThreadingHTTPServer (één thread per verbinding) rond een WeatherApi."""
+    server = ThreadingHTTPServer((host, port), ApiRequestHandler)
+    server.daemon_threads = True
+    server.api = api
+    return server
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m malman.api', description="Alleen-lezen HTTP API (JSON/Arrow) op de weerdata.")
+    parser.add_argument('--host', default=API_HOST, help=f"Adres (standaard {API_HOST})")
+    parser.add_argument('--port', type=int, default=API_PORT, help=f"Poort (standaard {API_PORT})")
+    parser.add_argument('--stations', help="Komma-gescheiden station-ID's (standaard alle stations)")
+    parser.add_argument('--verbose', action='store_true', help="Log elk verzoek")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    registry = load_station_registry()
+    station_ids = args.stations.split(',') if args.stations else list(registry)
+    unknown = [station_id for station_id in station_ids if station_id not in registry]
+    if unknown:
+        raise SystemExit(f"Onbekende stations: {', '.join(unknown)}")
+
+    api = WeatherApi(registry, station_ids)
+    # De ERA5 reeksen (voor /normals) komen op de achtergrond binnen terwijl de stationsdata laadt
+    prefetch_historical_data([station_location(registry[station_id]) for station_id in station_ids])
+    api.refresh()
+    api.start_refresher()
+
+    ApiRequestHandler.quiet = not args.verbose
+    server = make_server(api, args.host, args.port)
+    print(f"Malmån API op http://{args.host}:{args.port} ({len(station_ids)} stations, versie {api.snapshot.data_version})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,377 @@
+"""
+Memory-mapped kolomarchief van de volledige 10-minuten historie.
+
+Per station en archiefversie één map met één bestand per kolom (vaste dtype)
+en een int64 epoch-kolom (nanoseconden sinds 1970, UTC), gesorteerd op tijd:
+
+    <archief>/<station_id>/manifest.json               (huidige versie, zie hieronder)
+    <archief>/<station_id>/<versie>/epoch.i8
+    <archief>/<station_id>/<versie>/<kolom>.f8        (één per kolom uit NUMERIC_COLS en DERIVED_COLS)
+    <archief>/<station_id>/<versie>/QC_*.u1           (QC vlaggen, zie malman/quality.py)
+    <archief>/<station_id>/<versie>/manifest.json     (rijen en bronversie per jaarbestand, stationslocatie)
+
+De kolommen worden met np.memmap geopend. Alle Streamlit workers op dezelfde
+machine delen zo de page cache van het OS, en een tijdsbereik (np.searchsorted
+op de epoch-kolom) leest alleen de pagina's die het nodig heeft. Een jaarbestand
+wordt alleen geparseerd als zijn versie (zie get_station_file_versions) wijzigt;
+eerdere jaren worden uit de vorige versie gekopieerd. De afgeleide grootheden
+hangen van de stationslocatie af: wijzigt die in het register, dan wordt het
+archief van dat station volledig herbouwd.
+
+Een versiemap wordt nooit meer gewijzigd: andere sessies en processen (de API,
+de SQL sync) kunnen haar zonder vergrendeling gemapt hebben. Een nieuwe versie
+wordt in een tijdelijke map opgebouwd en met os.replace op haar plaats gezet;
+daarna wijst manifest.json van het station (ook via os.replace) ernaar. Lezers
+openen het archief altijd op versie. Van de oudere versies blijven er
+ARCHIVE_KEEP_VERSIONS staan voor lezers die nog een oudere versie opvragen;
+een verwijderde versie blijft bestaan (POSIX) zolang een proces haar gemapt heeft.
+
+Met WEER_ARCHIVE_DIR wordt de archiefmap gekozen (leeg = archief uitgeschakeld).
+Vooraf opbouwen, bv. bij een deploy:
+
+    python -m malman.archive
+"""
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from malman.core import (
+    GITHUB_BASE_URL, START_YEAR, TARGET_TIMEZONE, NUMERIC_COLS,
+    parse_weather_frame, station_year_url, discover_available_years, load_station_registry,
+    station_location, get_station_file_versions, combine_data_version,
+)
+from malman.derived import DERIVED_COLS, add_derived_columns
+from malman.localtime import LOCAL_DAY_COL, local_day_numbers
+from malman.quality import QC_FLAG_COLS, quality_check, recheck_boundary
+
+try:
+    import fcntl
+except ImportError:  # Windows: geen bestandsvergrendeling tussen processen
+    fcntl = None
+
+ARCHIVE_DIR = os.environ.get(
+    "WEER_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.weerarchief')
+)
+
+EPOCH_FILE = 'epoch.i8'
+MANIFEST_FILE = 'manifest.json'
+# Verhogen bij een wijziging van de kolommen: een ouder archief wordt dan volledig herbouwd
+ARCHIVE_FORMAT = 4
+# Oudere versiemappen die per station blijven staan (naast de huidige)
+ARCHIVE_KEEP_VERSIONS = 2
+_TMP_PREFIX = '.tmp-'
+COLUMN_DTYPE = np.float64
+COLUMN_SUFFIX = '.f8'
+
+
+class UnversionedYearError(ValueError):
+    """
+    Een jaarbestand zonder versie (bv. een mislukte HEAD request in get_station_file_versions). Het
+    archief kan dan niet bepalen of de opgeslagen rijen nog kloppen; de aanroeper laadt de CSV
+    bestanden rechtstreeks (load_data) in plaats van een onvolledige historie te tonen.
+    """
+
+
+def archive_enabled(archive_dir=ARCHIVE_DIR):
+    return bool(archive_dir)
+
+
+def _station_dir(station_id, archive_dir):
+    return os.path.join(archive_dir, station_id)
+
+
+def _version_dir(station_id, version, archive_dir):
+    return os.path.join(_station_dir(station_id, archive_dir), version)
+
+
+def _column_files(version_dir):
+    files = {'epoch': (os.path.join(version_dir, EPOCH_FILE), np.int64)}
+    for col in NUMERIC_COLS + DERIVED_COLS:
+        files[col] = (os.path.join(version_dir, col + COLUMN_SUFFIX), COLUMN_DTYPE)
+    for col in QC_FLAG_COLS:
+        files[col] = (os.path.join(version_dir, col + '.u1'), np.uint8)
+    return files
+
+
+def _read_rows(files, start, stop):
+    """Leest de rijen [start, stop) rechtstreeks uit de kolombestanden (voor de QC naad)."""
+    data = {}
+    for name, (path, dtype) in files.items():
+        itemsize = np.dtype(dtype).itemsize
+        data[name] = np.fromfile(path, dtype=dtype, count=stop - start, offset=start * itemsize)
+    df = pd.DataFrame(data)
+    df.insert(0, 'Timestamp_UTC', pd.to_datetime(df.pop('epoch'), unit='ns', utc=True))
+    return df
+
+
+def _write_flags(files, row, df_row):
+    """Overschrijft de QC vlaggen van één rij in een (nog niet geplaatste) versie."""
+    for col in QC_FLAG_COLS:
+        path, dtype = files[col]
+        flags = np.memmap(path, dtype=dtype, mode='r+', offset=row, shape=(1,))
+        flags[0] = df_row[col]
+        flags.flush()
+
+
+@contextmanager
+def _locked(station_dir):
+    """Eén schrijver per station, ook over meerdere serverprocessen heen."""
+    os.makedirs(station_dir, exist_ok=True)
+    with open(os.path.join(station_dir, '.lock'), 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_manifest(directory):
+    """Manifest van een station (de huidige versie) of van een versiemap."""
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {'years': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def archive_version(file_versions, location=None):
+    """
+    Versie van het archief van één station: volgt direct uit de versies van de bronbestanden (en de locatie).
+    Geeft UnversionedYearError als een jaarbestand geen versie heeft.
+    """
+    wanted = tuple(file_versions)
+    missing = [year for year, version in wanted if version is None]
+    if missing:
+        raise UnversionedYearError(f"Geen versie voor jaarbestand(en) {', '.join(map(str, missing))}")
+    if location is None:
+        return combine_data_version(ARCHIVE_FORMAT, wanted)
+    return combine_data_version(ARCHIVE_FORMAT, wanted, tuple(location))
+
+
+def _copy_rows(source_files, target_files, rows):
+    """Kopieert de eerste rows rijen van elke kolom naar een nieuwe versie (de bron wordt alleen gelezen)."""
+    for name, (target, dtype) in target_files.items():
+        source = source_files[name][0]
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            remaining = rows * np.dtype(dtype).itemsize
+            while remaining > 0:
+                block = src.read(min(remaining, 1 << 20))
+                if not block:
+                    raise OSError(f"Archiefbestand {source} is korter dan het manifest aangeeft.")
+                dst.write(block)
+                remaining -= len(block)
+
+
+def _prune_versions(station_dir, current):
+    """Ruimt tijdelijke mappen, het oude (platte) formaat en versies buiten ARCHIVE_KEEP_VERSIONS op."""
+    versions = []
+    for entry in os.scandir(station_dir):
+        if entry.is_dir():
+            if entry.name.startswith(_TMP_PREFIX):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            elif entry.name != current:
+                versions.append((entry.stat().st_mtime, entry.path))
+        elif entry.name.endswith((COLUMN_SUFFIX, '.i8', '.u1')):
+            # Kolombestand van een archief van vóór de versiemappen
+            os.remove(entry.path)
+    for _, path in sorted(versions, reverse=True)[ARCHIVE_KEEP_VERSIONS:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def sync_station_archive(station_id, file_versions, github_base_url=GITHUB_BASE_URL,
+                         target_timezone=TARGET_TIMEZONE, archive_dir=ARCHIVE_DIR, location=None):
+    """
+    Brengt het archief van één station in lijn met file_versions (paren (jaar, versie)).
+    Alleen jaren vanaf het eerste gewijzigde jaarbestand worden opnieuw geparseerd; de nieuwe
+    versie komt in een eigen map, bestaande versies blijven ongewijzigd.
+    location: (lat, lon, hoogte) voor de afgeleide grootheden. Geeft de archiefversie terug, of
+    UnversionedYearError als een jaarbestand geen versie heeft (er wordt dan niets geschreven).
+    """
+    archive_ver = archive_version(file_versions, location)
+    wanted = list(file_versions)
+    station_dir = _station_dir(station_id, archive_dir)
+    stored_location = list(location) if location is not None else None
+    target_dir = os.path.join(station_dir, archive_ver)
+
+    with _locked(station_dir):
+        manifest = read_manifest(station_dir)
+        if manifest.get('version') == archive_ver and os.path.isdir(target_dir):
+            return archive_ver
+
+        if not os.path.isdir(target_dir):
+            _build_version(station_id, station_dir, manifest, wanted, stored_location, target_dir,
+                           github_base_url, target_timezone, location)
+        # De nieuwe versie is compleet op haar plaats: nu pas het manifest van het station omzetten
+        _write_manifest(station_dir, dict(read_manifest(target_dir), version=archive_ver))
+        _prune_versions(station_dir, archive_ver)
+
+    return archive_ver
+
+
+def _build_version(station_id, station_dir, manifest, wanted, stored_location, target_dir,
+                   github_base_url, target_timezone, location):
+    """Bouwt een nieuwe versie in een tijdelijke map (met de ongewijzigde jaren van de huidige versie) en plaatst haar."""
+    previous_dir = os.path.join(station_dir, manifest['version']) if manifest.get('version') else None
+    same_layout = (
+        previous_dir is not None and os.path.isdir(previous_dir)
+        and manifest.get('format') == ARCHIVE_FORMAT and manifest.get('location') == stored_location
+    )
+    stored = manifest['years'] if same_layout else []
+
+    # Eerste jaar waarvan de opgeslagen versie afwijkt
+    keep = 0
+    while keep < min(len(stored), len(wanted)) and (stored[keep]['year'], stored[keep]['version']) == tuple(wanted[keep]):
+        keep += 1
+    keep_rows = sum(entry['rows'] for entry in stored[:keep])
+
+    tmp_dir = os.path.join(station_dir, f'{_TMP_PREFIX}{os.path.basename(target_dir)}-{os.getpid()}')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        files = _column_files(tmp_dir)
+        if keep_rows:
+            _copy_rows(_column_files(previous_dir), files, keep_rows)
+        else:
+            for path, _ in files.values():
+                open(path, 'wb').close()
+
+        entries = stored[:keep]
+        rows_written = keep_rows
+        for year, version in wanted[keep:]:
+            df = pd.read_csv(station_year_url(station_id, year, github_base_url), sep=';', on_bad_lines='skip')
+            df = parse_weather_frame(df, target_timezone).sort_values('Timestamp_UTC', kind='stable')
+            df = quality_check(add_derived_columns(df.reset_index(drop=True), location))
+
+            # QC naad met het archief: alleen de laatste opgeslagen rij wordt herschreven
+            if rows_written > 0 and not df.empty:
+                df_tail = _read_rows(files, max(0, rows_written - 2), rows_written)
+                recheck_boundary(df_tail, df)
+                _write_flags(files, rows_written - 1, df_tail.iloc[-1])
+
+            columns = {'epoch': df['Timestamp_UTC'].dt.tz_convert('UTC').dt.tz_localize(None).to_numpy('datetime64[ns]').view(np.int64)}
+            for col in NUMERIC_COLS + DERIVED_COLS:
+                columns[col] = df[col].to_numpy(dtype=COLUMN_DTYPE, na_value=np.nan) if col in df.columns else np.full(len(df), np.nan, dtype=COLUMN_DTYPE)
+            for col in QC_FLAG_COLS:
+                columns[col] = df[col].to_numpy()
+
+            for name, (path, dtype) in files.items():
+                with open(path, 'ab') as f:
+                    np.ascontiguousarray(columns[name], dtype=dtype).tofile(f)
+            entries.append({'year': year, 'version': version, 'rows': len(df)})
+            rows_written += len(df)
+
+        _write_manifest(tmp_dir, {
+            'format': ARCHIVE_FORMAT, 'station_id': station_id, 'location': stored_location, 'years': entries,
+        })
+        os.replace(tmp_dir, target_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+@st.cache_resource(max_entries=128, show_spinner=False)
+def open_station_archive(station_id, version, archive_dir=ARCHIVE_DIR):
+    """
+    Opent de kolommen van één archiefversie als read-only memmaps (één keer per proces en versie).
+    Een versiemap wijzigt nooit; een bijgewerkt archief is een nieuwe versie (en map).
+    """
+    version_dir = _version_dir(station_id, version, archive_dir)
+    if not os.path.isdir(version_dir):
+        raise FileNotFoundError(f"Archiefversie {version} van station {station_id} bestaat niet (meer); synchroniseer opnieuw.")
+    arrays = {}
+    for name, (path, dtype) in _column_files(version_dir).items():
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r')
+        else:
+            arrays[name] = np.empty(0, dtype=dtype)
+    return arrays
+
+
+def archive_row_range(station_id, version, start=None, end=None, archive_dir=ARCHIVE_DIR):
+    """Rijen [lo, hi) van het archief binnen [start, end] (tz-aware Timestamps, None = open)."""
+    epoch = open_station_archive(station_id, version, archive_dir)['epoch']
+    lo = 0 if start is None else int(np.searchsorted(epoch, pd.Timestamp(start).tz_convert('UTC').value, side='left'))
+    hi = len(epoch) if end is None else int(np.searchsorted(epoch, pd.Timestamp(end).tz_convert('UTC').value, side='right'))
+    return lo, hi
+
+
+def read_archive_rows(station_id, version, lo, hi, columns=None, target_timezone=TARGET_TIMEZONE, archive_dir=ARCHIVE_DIR):
+    """
+    Rijen [lo, hi) uit het archief als DataFrame. De meetkolommen en QC vlaggen zijn read-only views
+    op de memmaps (niet gekopieerd): ze staan in de page cache van het OS, die alle processen delen.
+    Alleen de tijdkolommen worden berekend.
+    """
+    arrays = open_station_archive(station_id, version, archive_dir)
+    epoch = arrays['epoch'][lo:hi]
+    timestamps = pd.to_datetime(epoch, unit='ns', utc=True)
+    data = {
+        'Timestamp_UTC': timestamps,
+        'Timestamp_Local': timestamps.tz_convert(target_timezone),
+        LOCAL_DAY_COL: local_day_numbers(epoch, target_timezone),
+    }
+    for col in (columns or NUMERIC_COLS + DERIVED_COLS + QC_FLAG_COLS):
+        data[col] = arrays[col][lo:hi]
+    return pd.DataFrame(data, copy=False)
+
+
+def archive_years(station_id, version, archive_dir=ARCHIVE_DIR):
+    """Per jaarbestand in een archiefversie: (jaar, bronversie, lo, hi) met [lo, hi) de rijen van dat jaar."""
+    version_dir = _version_dir(station_id, version, archive_dir)
+    if not os.path.isdir(version_dir):
+        raise FileNotFoundError(f"Archiefversie {version} van station {station_id} bestaat niet (meer); synchroniseer opnieuw.")
+    years = []
+    lo = 0
+    for entry in read_manifest(version_dir)['years']:
+        years.append((entry['year'], entry['version'], lo, lo + entry['rows']))
+        lo += entry['rows']
+    return years
+
+
+def read_station_archive(station_id, version, start=None, end=None, columns=None,
+                         target_timezone=TARGET_TIMEZONE, archive_dir=ARCHIVE_DIR):
+    """
+    Leest [start, end] (tz-aware Timestamps, None = open) uit het archief als DataFrame met
+    Timestamp_UTC, Timestamp_Local, LOCAL_DAY_COL en de gevraagde kolommen (standaard alle NUMERIC_COLS, DERIVED_COLS
+    en de QC vlaggen).
+    Alleen de rijen binnen het bereik worden gelezen (als views, zie read_archive_rows).
+    """
+    lo, hi = archive_row_range(station_id, version, start, end, archive_dir)
+    return read_archive_rows(station_id, version, lo, hi, columns, target_timezone, archive_dir)
+
+
+def load_station_from_archive(station_id, file_versions, github_base_url=GITHUB_BASE_URL,
+                              target_timezone=TARGET_TIMEZONE, archive_dir=ARCHIVE_DIR, location=None):
+    """
+    Synchroniseert het archief van een station en geeft de volledige historie terug (zoals load_data),
+    met de kolommen als views op de memmaps (zie read_archive_rows).
+    """
+    version = sync_station_archive(station_id, file_versions, github_base_url, target_timezone, archive_dir, location)
+    return read_station_archive(station_id, version, target_timezone=target_timezone, archive_dir=archive_dir)
+
+
+if __name__ == '__main__':
+    if not archive_enabled():
+        raise SystemExit("WEER_ARCHIVE_DIR is leeg: archief uitgeschakeld.")
+    for station_id, station_info in load_station_registry().items():
+        station_name = station_info['naam']
+        years = discover_available_years(station_info.get('start_jaar', START_YEAR), station_id, GITHUB_BASE_URL)
+        versions = get_station_file_versions(station_id, tuple(years), GITHUB_BASE_URL)
+        version = sync_station_archive(station_id, versions, location=station_location(station_info))
+        rows = sum(entry['rows'] for entry in read_manifest(_version_dir(station_id, version, ARCHIVE_DIR))['years'])
+        print(f"{station_name} ({station_id}): {rows} rijen, jaren {years}, versie {version}")
@@ -0,0 +1,341 @@
+"""
+Percentielbanden uit de ERA5 klimaatnormalen.
+
+Per klimaatnormaalperiode wordt elke temperatuurkolom als matrix jaren × 366
+dagen gezet (kalender van een schrikkeljaar; 29 februari is NaN in gewone
+jaren). Voor de banden telt elke dag ook de BAND_WINDOW_DAYS dagen ervoor en
+erna mee: de matrix wordt daarvoor verschoven gestapeld (np.roll) en de
+percentielen komen in één np.nanpercentile aanroep over de gestapelde as.
+Zo blijft ook de ±7 dagen vensterberekening volledig gevectoriseerd.
+
+De banden zijn per periode en locatie gecached; wisselen van normaalperiode
+in de zijbalk is daarna alleen een opzoeking.
+
+De anomalieën (dag, voortschrijdend 30 dagen, maand, met z-scores op de
+ERA5 spreiding) worden voor alle normaalperioden tegelijk berekend en als
+matrix (kolommen per periode) gecached; de gekozen normaal selecteert alleen
+een kolom.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from malman.core import (
+    BENCHMARK_START_DATE_FULL, BENCHMARK_END_DATE_FULL, fetch_all_historical_benchmarks, fetch_complete_historical_data,
+)
+from malman.era5 import ERA5_TTL_SECONDS, Era5Unavailable, era5_cached
+from malman.localtime import LEAP_MONTH_OFFSETS, calendar_fields, dates_to_days, leap_day_of_year, month_numbers, month_starts
+from malman.profiling import note_cache_miss
+from malman.shared_cache import shared_cached
+
+PERCENTILES = (5, 10, 50, 90, 95)
+
+# Venster (dagen voor en na) waarmee elke kalenderdag gladgestreken wordt
+BAND_WINDOW_DAYS = 7
+
+BAND_COLUMNS = ['Temp_High_C', 'Temp_Low_C', 'Temp_Avg_C']
+
+# 'MM-DD' van alle 366 dagen (schrikkeljaar)
+MONTH_DAYS = pd.date_range('2000-01-01', '2000-12-31', freq='D').strftime('%m-%d')
+
+# Klassen ten opzichte van de banden, van laag naar hoog
+ANOMALY_CLASSES = [
+    "Zeer laag (< P5)",
+    "Laag (P5–P10)",
+    "Normaal (P10–P90)",
+    "Hoog (P90–P95)",
+    "Zeer hoog (> P95)",
+]
+
+
+def day_of_year_index(dates):
+    """Dagnummer (0-365) in de kalender van een schrikkeljaar; 1 maart is altijd dag 60."""
+    return leap_day_of_year(dates_to_days(dates))
+
+
+def year_day_matrix(df_hist, value_col):
+    """Matrix (jaren × 366) van value_col; geeft (matrix, jaren)."""
+    days = dates_to_days(df_hist['Date'])
+    years, year_rows = np.unique(calendar_fields(days)[0], return_inverse=True)
+    matrix = np.full((len(years), 366), np.nan)
+    matrix[year_rows, leap_day_of_year(days)] = df_hist[value_col].to_numpy(dtype=np.float64)
+    return matrix, years
+
+
+def build_percentile_bands(df_hist, value_cols=BAND_COLUMNS, percentiles=PERCENTILES, window=BAND_WINDOW_DAYS):
+    """
+    Percentielbanden per kalenderdag (index 'MM-DD') met kolommen '<kolom>_P<p>'.
+    Elke dag gebruikt alle jaren en de dagen binnen ±window (over de jaargrens heen).
+    """
+    bands = {}
+    for col in value_cols:
+        if col not in df_hist.columns:
+            continue
+        matrix, _ = year_day_matrix(df_hist, col)
+        # (2·window+1) verschoven kopieën onder elkaar: elke kolom bevat dan zijn hele venster
+        stacked = np.concatenate([np.roll(matrix, shift, axis=1) for shift in range(-window, window + 1)], axis=0)
+        with np.errstate(all='ignore'):
+            values = np.nanpercentile(stacked, percentiles, axis=0)
+        for p, row in zip(percentiles, values):
+            bands[f"{col}_P{p}"] = row
+    return pd.DataFrame(bands, index=pd.Index(MONTH_DAYS, name='Month_Day'))
+
+
+def merge_percentile_bands(df_daily_summary, df_bands):
+    """Voegt de banden van de bijbehorende kalenderdag toe aan de dagelijkse samenvatting."""
+    df_day_bands = df_bands.iloc[day_of_year_index(df_daily_summary.index)].set_axis(df_daily_summary.index)
+    return pd.concat([df_daily_summary, df_day_bands], axis=1)
+
+
+def classify_anomalies(values, p5, p10, p90, p95):
+    """Klasse uit ANOMALY_CLASSES per waarde (NaN zonder waarde of band)."""
+    values = np.asarray(values, dtype=np.float64)
+    labels = np.select(
+        [values < p5, values < p10, values <= p90, values <= p95, values > p95],
+        ANOMALY_CLASSES,
+        default='',
+    )
+    return pd.Categorical(np.where(labels == '', None, labels), categories=ANOMALY_CLASSES, ordered=True)
+
+
+def count_anomaly_classes(df_daily_with_bands, value_col='Temp_Avg_C'):
+    """Aantal dagen per station in elke klasse (kolommen in de volgorde van ANOMALY_CLASSES)."""
+    classes = classify_anomalies(
+        df_daily_with_bands[value_col],
+        *(df_daily_with_bands[f"{value_col}_P{p}"] for p in (5, 10, 90, 95))
+    )
+    counts = pd.crosstab(df_daily_with_bands['Station Naam'], classes, dropna=False)
+    return counts.reindex(columns=ANOMALY_CLASSES, fill_value=0).rename_axis(columns=None)
+
+
+def period_mean_percentiles(df_hist, clima_analysis_type, clima_key=None, value_col='Temp_Avg_C',
+                            percentiles=PERCENTILES, window=BAND_WINDOW_DAYS):
+    """
+    Percentielen van de gemiddelde value_col over een dag, maand of jaar, over de jaren van één periode.
+    Dag: de gladgestreken band van die kalenderdag; Maand ('MM') en Jaar: per jaar het gemiddelde
+    over de dagen, daarna de percentielen over de jaren.
+    """
+    if clima_analysis_type == "Dag":
+        df_bands = build_percentile_bands(df_hist, [value_col], percentiles, window)
+        return df_bands.loc[clima_key].to_numpy() if clima_key in df_bands.index else np.full(len(percentiles), np.nan)
+
+    matrix, _ = year_day_matrix(df_hist, value_col)
+    if clima_analysis_type == "Maand":
+        month = int(clima_key)
+        matrix = matrix[:, LEAP_MONTH_OFFSETS[month - 1]:(LEAP_MONTH_OFFSETS[month] if month < 12 else 366)]
+    with np.errstate(all='ignore'):
+        per_year = np.nanmean(matrix, axis=1)
+        return np.nanpercentile(per_year, percentiles)
+
+
+# -------------------------------------------------------------------
+# Gecachte varianten (de ERA5 reeksen komen uit de gecachte fetch_all_historical_benchmarks;
+# zonder ERA5 wordt niets gecached, zie era5_cached)
+# -------------------------------------------------------------------
+@era5_cached(show_spinner=False)
+def compute_percentile_bands(climate_normal_periods, location=None):
+    """Banden voor alle klimaatnormaalperioden: dict periode ('1990-2019') -> DataFrame (index 'MM-DD')."""
+    note_cache_miss('compute_percentile_bands')
+    all_hist_benchmarks = fetch_all_historical_benchmarks(climate_normal_periods, location)
+    return {period: build_percentile_bands(df_hist) for period, df_hist in all_hist_benchmarks.items()}
+
+
+@era5_cached(show_spinner=False)
+def compute_period_percentiles(climate_normal_periods, clima_analysis_type, clima_key=None, location=None):
+    """Percentielen (PERCENTILES) van de gemiddelde temperatuur van de gekozen dag, maand of jaar, per periode (Tab 6)."""
+    note_cache_miss('compute_period_percentiles')
+    try:
+        all_hist_benchmarks = fetch_all_historical_benchmarks(climate_normal_periods, location)
+    except Era5Unavailable as error:
+        raise Era5Unavailable(error.status, pd.DataFrame(columns=[f"P{p}" for p in PERCENTILES])) from error
+    rows = {
+        period: period_mean_percentiles(df_hist, clima_analysis_type, clima_key)
+        for period, df_hist in all_hist_benchmarks.items()
+    }
+    return pd.DataFrame.from_dict(rows, orient='index', columns=[f"P{p}" for p in PERCENTILES])
+
+
+def attach_station_bands(df_daily, climate_normal_periods, period, station_locations=()):
+    """
+    Voegt aan elke dag de banden van de gekozen periode toe, elk station met de banden van zijn
+    eigen locatie (station_locations: paren (Station Naam, (lat, lon, hoogte))).
+    Geeft None als er voor geen enkel station banden zijn.
+    """
+    locations = dict(station_locations)
+    parts = []
+    for station_name, df_station in df_daily.groupby('Station Naam', sort=False):
+        df_bands = compute_percentile_bands(climate_normal_periods, locations.get(station_name)).get(period)
+        if df_bands is not None:
+            parts.append(merge_percentile_bands(df_station, df_bands))
+    return pd.concat(parts) if parts else None
+
+
+# -------------------------------------------------------------------
+# Anomalieën: alle normaalperioden in één stap (perioden × kalenderdagen)
+# -------------------------------------------------------------------
+# Venster van de voortschrijdende anomalie (dagen)
+ROLLING_ANOMALY_DAYS = 30
+
+ANOMALY_MEASURES = ['Anomalie', 'Z', f'Anomalie {ROLLING_ANOMALY_DAYS}d', f'Z {ROLLING_ANOMALY_DAYS}d']
+
+
+def period_key(period_name):
+    """'1990-2019 (Standaard WMO Normaal)' -> '1990-2019' (zoals in fetch_all_historical_benchmarks)."""
+    return period_name.split('(')[0].strip()
+
+
+def build_normals(df_complete, climate_normal_periods, value_col='Temp_Avg_C', window=BAND_WINDOW_DAYS):
+    """
+    Normalen van alle perioden tegelijk uit de volledige ERA5 reeks. Elke periode is een
+    gewichtsrij over de jaren (1 binnen de periode), zodat sommen, kwadraatsommen en aantallen
+    van alle perioden met één matrixproduct volgen. Geeft een dict met:
+
+        periods                ['1990-2019', ...]
+        mean, std              perioden × 366: per kalenderdag (±window dagen venster)
+        month_mean, month_std  perioden × 12: van de maandgemiddelden over de jaren
+    """
+    matrix, years = year_day_matrix(df_complete, value_col)
+    periods = [period_key(name) for name in climate_normal_periods]
+    weights = np.array([
+        (years >= int(start[:4])) & (years <= int(end[:4])) for start, end in climate_normal_periods.values()
+    ], dtype=np.float64)
+
+    def weighted_moments(sums, squares, counts):
+        n = weights @ counts
+        with np.errstate(all='ignore'):
+            mean = (weights @ sums) / n
+            variance = ((weights @ squares) / n - mean ** 2) * n / (n - 1)
+        return mean, np.sqrt(np.clip(variance, 0, None))
+
+    # Per jaar en kalenderdag: som, kwadraatsom en aantal over het venster
+    shifted = np.stack([np.roll(matrix, shift, axis=1) for shift in range(-window, window + 1)])
+    valid = ~np.isnan(shifted)
+    filled = np.where(valid, shifted, 0.0)
+    mean, std = weighted_moments(filled.sum(axis=0), (filled ** 2).sum(axis=0), valid.sum(axis=0))
+
+    # Maandgemiddelde per jaar, daarna de momenten over de jaren van elke periode
+    day_valid = ~np.isnan(matrix)
+    with np.errstate(all='ignore'):
+        month_values = np.add.reduceat(np.where(day_valid, matrix, 0.0), LEAP_MONTH_OFFSETS, axis=1) / \
+            np.add.reduceat(day_valid, LEAP_MONTH_OFFSETS, axis=1)
+    month_valid = ~np.isnan(month_values)
+    month_filled = np.where(month_valid, month_values, 0.0)
+    month_mean, month_std = weighted_moments(month_filled, month_filled ** 2, month_valid)
+
+    return {'periods': periods, 'mean': mean, 'std': std, 'month_mean': month_mean, 'month_std': month_std}
+
+
+def build_anomalies(df_daily, normals, value_col='Temp_Avg_C', rolling_days=ROLLING_ANOMALY_DAYS):
+    """
+    Dagelijkse en voortschrijdende anomalieën (en z-scores) van value_col voor alle perioden.
+    Geeft een DataFrame met index (Station Naam, Date) en kolommen (maat, periode), maat uit ANOMALY_MEASURES.
+    """
+    df_daily = df_daily.sort_values('Station Naam', kind='stable')
+    day = day_of_year_index(df_daily.index)
+    values = df_daily[value_col].to_numpy(dtype=np.float64)
+
+    anomalies = values[:, None] - normals['mean'][:, day].T
+    z_scores = anomalies / normals['std'][:, day].T
+
+    # Voortschrijdend gemiddelde over kalenderdagen (ontbrekende dagen verkleinen alleen het venster)
+    daily = np.hstack([anomalies, z_scores])
+    rolling = (
+        pd.DataFrame(daily, index=df_daily.index)
+        .groupby(df_daily['Station Naam'].to_numpy(), sort=False)
+        .rolling(f'{rolling_days}D', min_periods=rolling_days // 2)
+        .mean()
+        .to_numpy()
+    )
+
+    index = pd.MultiIndex.from_arrays([df_daily['Station Naam'], df_daily.index], names=['Station Naam', 'Date'])
+    columns = pd.MultiIndex.from_product([ANOMALY_MEASURES, normals['periods']], names=['Maat', 'Periode'])
+    return pd.DataFrame(np.hstack([daily, rolling]), index=index, columns=columns)
+
+
+def build_monthly_anomalies(df_anomalies, normals):
+    """
+    Maandanomalie per station: het gemiddelde van de dagelijkse anomalieën, met een z-score op de
+    spreiding van de ERA5 maandgemiddelden. Index (Station Naam, Maand), kolommen (maat, periode) en 'Dagen'.
+    """
+    months = month_numbers(dates_to_days(df_anomalies.index.get_level_values('Date')))
+    grouped = df_anomalies['Anomalie'].groupby([df_anomalies.index.get_level_values('Station Naam'), months])
+    monthly = grouped.mean()
+    monthly.index = pd.MultiIndex.from_arrays([
+        monthly.index.get_level_values(0), month_starts(monthly.index.get_level_values(1)),
+    ], names=['Station Naam', 'Maand'])
+
+    month_std = normals['month_std'][:, monthly.index.get_level_values('Maand').month - 1].T
+    df_monthly = pd.concat({'Anomalie': monthly, 'Z': monthly / month_std}, axis=1, names=['Maat', 'Periode'])
+    df_monthly['Dagen'] = grouped.size().to_numpy()
+    return df_monthly
+
+
+def build_anomaly_figure(df_anomaly, measure_label, unit, as_line=False):
+    """Anomalie per station door de tijd: staven (dag, maand) of met as_line een lijn (voortschrijdend)."""
+    fig = go.Figure()
+    for station_name, series in df_anomaly.groupby(level='Station Naam', sort=True):
+        # Lokale kloktijd zonder tijdzone (zie build_comparison_figure)
+        x = pd.DatetimeIndex(series.index.get_level_values(-1))
+        x = x.tz_localize(None) if x.tz is not None else x
+        hovertemplate = f"%{{x|%d-%m-%Y}}<br>{station_name}: %{{y:+.2f}} {unit}<extra></extra>"
+        if as_line:
+            fig.add_trace(go.Scatter(x=x, y=series.to_numpy(), mode='lines', name=station_name, hovertemplate=hovertemplate))
+        else:
+            fig.add_trace(go.Bar(x=x, y=series.to_numpy(), name=station_name, hovertemplate=hovertemplate))
+    fig.add_hline(y=0, line_width=1, line_color='grey')
+    fig.update_layout(height=450, barmode='group', hovermode='x unified', yaxis_title=measure_label, margin=dict(t=30))
+    return fig
+
+
+@era5_cached(show_spinner=False)
+def compute_normals(climate_normal_periods, location=None):
+    """Gecachte normalen van alle perioden voor één locatie (None zonder ERA5 data)."""
+    note_cache_miss('compute_normals')
+    df_complete, status = fetch_complete_historical_data(BENCHMARK_START_DATE_FULL, BENCHMARK_END_DATE_FULL, location)
+    if df_complete.empty:
+        raise Era5Unavailable(status, None)
+    return shared_cached(
+        'normals', (tuple(climate_normal_periods.items()), location), lambda: build_normals(df_complete, climate_normal_periods),
+        ttl=ERA5_TTL_SECONDS,
+    )
+
+
+@era5_cached(show_spinner=False)
+def compute_anomalies(_df_daily_summary, data_version, min_coverage, climate_normal_periods, station_locations=()):
+    """
+    Gecachte anomalieën (dag, voortschrijdend en maand) voor alle normaalperioden.
+    _df_daily_summary is de samenvatting na het dekkingsbeleid: data_version en min_coverage
+    identificeren haar. Elk station gebruikt de normalen van zijn eigen locatie.
+    Geeft (df_anomalies, df_monthly), of (None, None) zonder ERA5 data.
+    """
+    note_cache_miss('compute_anomalies')
+    return shared_cached(
+        'anomalies', (data_version, min_coverage, tuple(climate_normal_periods.items()), station_locations),
+        lambda: build_station_anomalies(_df_daily_summary, climate_normal_periods, station_locations),
+        ttl=ERA5_TTL_SECONDS, keep=lambda result: result[0] is not None,
+    )
+
+
+def build_station_anomalies(df_daily_summary, climate_normal_periods, station_locations=()):
+    """
+    Anomalieën (dag en maand) van alle stations, elk met de normalen van zijn eigen locatie.
+    Stations zonder ERA5 vallen weg; binnen compute_anomalies wordt het resultaat dan niet gecached.
+    """
+    locations = dict(station_locations)
+    daily_parts, monthly_parts = [], []
+    unavailable = []
+    for station_name, df_station in df_daily_summary.groupby('Station Naam', sort=True):
+        try:
+            normals = compute_normals(climate_normal_periods, locations.get(station_name))
+        except Era5Unavailable as error:
+            unavailable.append(error)
+            normals = error.result
+        if normals is None:
+            continue
+        df_anomalies = build_anomalies(df_station, normals)
+        daily_parts.append(df_anomalies)
+        monthly_parts.append(build_monthly_anomalies(df_anomalies, normals))
+    result = (pd.concat(daily_parts), pd.concat(monthly_parts)) if daily_parts else (None, None)
+    if unavailable:
+        raise Era5Unavailable(unavailable[0].status, result)
+    return result
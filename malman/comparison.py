@@ -0,0 +1,143 @@
+"""
+Stationsvergelijking op een gemeenschappelijk tijdsrooster.
+
+De stations loggen op (mogelijk verschoven) punten van hetzelfde 10-minuten
+rooster en hebben elk hun eigen gaten. Alle stations worden met een as-of join
+(pd.merge_asof, 'nearest' binnen een halve stap) op één regelmatig UTC-rooster
+gezet; een roosterpunt zonder meting blijft NaN en geldt als gat. Daarop
+volgen het verschil tussen twee stations, de voortschrijdende correlatie en
+de bias-statistieken per dag. Alles is gecached op de dataversie, zodat een
+vol jaar aan gepaarde verschillen direct getoond kan worden.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from plotly.subplots import make_subplots
+
+from malman.core import TARGET_TIMEZONE
+from malman.profiling import note_cache_miss
+
+# Rooster van de loggers
+COMPARISON_FREQ = '10min'
+
+# Vensters voor de voortschrijdende correlatie (aantal roosterpunten)
+CORRELATION_WINDOWS = {
+    "6 uur": 36,
+    "1 dag": 144,
+    "7 dagen": 1008,
+}
+
+
+def align_stations(df_combined, value_col, freq=COMPARISON_FREQ):
+    """
+    Zet value_col van alle stations op één regelmatig rooster (index: Timestamp_Local).
+    Geeft een breed DataFrame met één kolom per station; NaN markeert een gat.
+    """
+    step = pd.Timedelta(freq)
+    timestamps = df_combined['Timestamp_UTC']
+    grid_index = pd.date_range(timestamps.min().floor(freq), timestamps.max().ceil(freq), freq=freq)
+    grid = pd.DataFrame({'Timestamp_UTC': grid_index})
+
+    aligned = {}
+    for station_name, df_station in df_combined.groupby('Station Naam', sort=True):
+        right = df_station[['Timestamp_UTC', value_col]].dropna()
+        right = right.astype({'Timestamp_UTC': grid['Timestamp_UTC'].dtype}).sort_values('Timestamp_UTC')
+        # Net minder dan een halve stap: elke meting hoort bij hoogstens één roosterpunt
+        merged = pd.merge_asof(grid, right, on='Timestamp_UTC', direction='nearest', tolerance=step / 2 - pd.Timedelta('1s'))
+        aligned[station_name] = merged[value_col].to_numpy()
+
+    df_aligned = pd.DataFrame(aligned, index=grid_index.tz_convert(TARGET_TIMEZONE))
+    df_aligned.index.name = 'Timestamp_Local'
+    return df_aligned
+
+
+def compare_pair(df_aligned, station_a, station_b, window_points=CORRELATION_WINDOWS["1 dag"]):
+    """
+    Verschil (A - B) en voortschrijdende correlatie van twee stations op het rooster.
+    Een verschil bestaat alleen waar beide stations een meting hebben.
+    """
+    series_a = df_aligned[station_a]
+    series_b = df_aligned[station_b]
+    df_pair = pd.DataFrame({
+        'Verschil': series_a - series_b,
+        'Correlatie': series_a.rolling(window_points, min_periods=max(2, window_points // 2)).corr(series_b),
+        'Gat': series_a.isna() | series_b.isna(),
+    })
+    return df_pair
+
+
+def daily_bias_stats(df_pair):
+    """Bias, MAE, RMSE, spreiding en dekking (gepaarde roosterpunten) per lokale dag."""
+    diff = df_pair['Verschil']
+    day = diff.index.normalize()
+    grouped = diff.groupby(day)
+
+    df_daily = pd.DataFrame({
+        'Bias': grouped.mean(),
+        'MAE': diff.abs().groupby(day).mean(),
+        'RMSE': np.sqrt((diff ** 2).groupby(day).mean()),
+        'Std': grouped.std(),
+        'Paren': grouped.count(),
+        'Dekking': grouped.count() / grouped.size(),
+    })
+    df_daily.index.name = 'Date'
+    return df_daily
+
+
+def build_comparison_figure(df_pair, df_daily, station_a, station_b, unit, window_label):
+    """Drie panelen: verschil (met gaten als onderbrekingen), correlatie en dagelijkse bias."""
+    fig = make_subplots(
+        rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.06, row_heights=[0.45, 0.25, 0.30],
+        subplot_titles=(
+            f"Verschil {station_a} − {station_b} ({unit})",
+            f"Voortschrijdende correlatie ({window_label})",
+            f"Bias per dag ({unit})",
+        )
+    )
+    # Lokale kloktijd zonder tijdzone: plotly serialiseert dan een numpy-array in plaats van
+    # elk tijdstip apart (tientallen keren sneller). Scattergl houdt een vol jaar vlot.
+    x_pair = df_pair.index.tz_localize(None)
+    x_daily = df_daily.index.tz_localize(None)
+    fig.add_trace(go.Scattergl(
+        x=x_pair, y=df_pair['Verschil'], mode='lines', name='Verschil',
+        connectgaps=False, line=dict(width=1),
+        hovertemplate=f"%{{y:.2f}} {unit}<extra></extra>",
+    ), row=1, col=1)
+    fig.add_trace(go.Scattergl(
+        x=x_pair, y=df_pair['Correlatie'], mode='lines', name='Correlatie',
+        connectgaps=False, line=dict(width=1, color='#2ca02c'),
+        hovertemplate="r = %{y:.2f}<extra></extra>",
+    ), row=2, col=1)
+    fig.add_trace(go.Bar(
+        x=x_daily, y=df_daily['Bias'], name='Bias per dag',
+        error_y=dict(type='data', array=df_daily['Std'], visible=True, thickness=0.5),
+        marker_color=np.where(df_daily['Bias'] >= 0, '#d62728', '#1f77b4'),
+        customdata=np.stack([df_daily['Dekking'] * 100, df_daily['Paren']], axis=-1),
+        hovertemplate=f"%{{x|%d-%m-%Y}}<br>Bias: %{{y:.2f}} {unit}<br>Dekking: %{{customdata[0]:.0f}}% (%{{customdata[1]}} paren)<extra></extra>",
+    ), row=3, col=1)
+
+    fig.add_hline(y=0, line_width=1, line_color='grey', row=1, col=1)
+    fig.update_yaxes(range=[-1, 1], row=2, col=1)
+    fig.update_layout(height=800, showlegend=False, hovermode='x unified', margin=dict(t=40))
+    fig.update_xaxes(hoverformat="%d-%m-%Y %H:%M")
+    return fig
+
+
+# -------------------------------------------------------------------
+# Gecachte varianten (gesleuteld op de dataversie; het DataFrame wordt niet gehasht)
+# -------------------------------------------------------------------
+@st.cache_data(show_spinner=False, max_entries=16)
+def compute_aligned_grid(_df_combined, data_version, value_col):
+    """Gecachte align_stations voor alle geladen stations en één variabele."""
+    note_cache_miss('compute_aligned_grid')
+    return align_stations(_df_combined, value_col)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def compute_station_comparison(_df_combined, data_version, value_col, station_a, station_b, window_points):
+    """Gecachte vergelijking van twee stations: (df_pair, df_daily) over de volledige historie."""
+    note_cache_miss('compute_station_comparison')
+    df_aligned = compute_aligned_grid(_df_combined, data_version, value_col)
+    df_pair = compare_pair(df_aligned, station_a, station_b, window_points)
+    return df_pair, daily_bias_stats(df_pair)
@@ -0,0 +1,1019 @@
+"""
+Data- en analysefuncties voor de Malmån weerapp.
+
+Deze module bevat alles wat geen Streamlit-layout is (laden, parsen,
+dagelijkse samenvatting, benchmark en extremen), zodat de functies ook
+buiten het Streamlit-script gebruikt en gemeten kunnen worden.
+"""
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+import datetime
+import functools
+import hashlib
+import json
+import os
+import re
+import requests
+
+from malman.profiling import note_cache_miss
+from malman.derived import DERIVED_COLS, add_derived_columns
+from malman.era5 import Era5Unavailable, era5_cached, get_era5_fetcher
+from malman.shared_cache import shared_cached
+from malman.localtime import (
+    LOCAL_DAY_COL, local_day_numbers, frame_local_days, day_starts, day_lengths_ns, dates_to_days, month_numbers,
+    month_starts, calendar_fields, leap_day_of_year, group_starts,
+)
+from malman.quality import (
+    CADENCE, FLAG_DUPLICATE, MIN_DAY_COVERAGE, QC_FLAG_COLS, quality_check, recheck_boundary, masked_values,
+    build_daily_completeness,
+)
+
+# 1. Configuratie en constanten (Constants and Configuration)
+
+# ===============================================================================
+# Dit is de basis-URL voor de map /weatherdata/ op GitHub.
+# ===============================================================================
+# Met WEER_DATA_BASE_URL kan een lokale map (bv. de gebundelde weatherdata/) gebruikt worden.
+GITHUB_BASE_URL = os.environ.get(
+    "WEER_DATA_BASE_URL",
+    "https://raw.githubusercontent.com/Pillmaster/ericmeteo/main/weatherdata/"
+)
+
+# Het jaar waar de data in de repository begint. (AANDACHTSPUNT: Controleer of dit uw oudste jaar is)
+START_YEAR = 2025
+
+# Tijdzone definitie voor Stockholm (inclusief DST/CEST en CET)
+TARGET_TIMEZONE = 'Europe/Stockholm'
+
+# Locatie van de ERA5 benchmark als een station geen eigen coördinaten heeft
+BENCHMARK_LATITUDE = 62.9977
+BENCHMARK_LONGITUDE = 17.0811
+
+# Stationsregister: per station naam, locatie (lat/lon) en hoogte (m, optioneel).
+# Wordt gelezen uit stations.json naast de data (zie load_station_registry); dit is de terugval.
+DEFAULT_STATIONS = {
+    '2308LH047': {'naam': 'Malmån huset', 'lat': BENCHMARK_LATITUDE, 'lon': BENCHMARK_LONGITUDE, 'hoogte': None},
+    '2102LH011': {'naam': 'Malmån sjön', 'lat': BENCHMARK_LATITUDE, 'lon': BENCHMARK_LONGITUDE, 'hoogte': None},
+}
+STATIONS_FILE = os.environ.get("WEER_STATIONS_FILE", GITHUB_BASE_URL + "stations.json")
+
+# Mapping van Stations-ID naar gebruiksvriendelijke namen (standaardregister)
+STATION_MAP = {station_id: info['naam'] for station_id, info in DEFAULT_STATIONS.items()}
+
+# Lijst van numerieke kolommen die gevisualiseerd kunnen worden
+NUMERIC_COLS = ['battery', 'dauwpunt', 'luchtvocht', 'druk', 'zoninstraling', 'temp', 'natbol']
+
+# Vriendelijke namen voor kolommen in de UI en grafieken
+COL_DISPLAY_MAP = {
+    'battery': 'Batterijspanning (V)',
+    'dauwpunt': 'Dauwpunt (°C)', 
+    'luchtvocht': 'Luchtvochtigheid (%)',
+    'druk': 'Luchtdruk (hPa)', 
+    'zoninstraling': 'Zoninstraling (W/m²)',
+    'temp': 'Temperatuur (°C)',
+    'natbol': 'Natteboltemperatuur (°C)',
+    # Afgeleide grootheden (malman/derived.py)
+    'druk_zee': 'Luchtdruk zeeniveau (hPa)',
+    'dampdruk': 'Dampdruk (hPa)',
+    'abs_vocht': 'Absolute vochtigheid (g/m³)',
+    'gevoelstemp': 'Gevoelstemperatuur (°C)',
+    'humidex': 'Humidex (°C)',
+    'helderheid': 'Helderheidsindex (-)',
+}
+
+# Kolommen die geplot en gefilterd kunnen worden: ruwe meetwaarden plus afgeleide grootheden
+PLOT_COLS = NUMERIC_COLS + DERIVED_COLS
+
+# Omgekeerde mapping voor het ophalen van de originele kolomnamen
+DISPLAY_TO_COL_MAP = {display_name: col_name for col_name, display_name in COL_DISPLAY_MAP.items()}
+
+# NIEUW: Definitie van de 30-jarige Klimaatnormaalperioden (Jaar-Jaar)
+# De waarden zijn (Startdatum YYYY-MM-DD, Einddatum YYYY-MM-DD)
+CLIMATE_NORMAL_PERIODS = {
+    "1990-2019 (Standaard WMO Normaal)": ("1990-01-01", "2019-12-31"),
+    "1980-2009": ("1980-01-01", "2009-12-31"),
+    "1970-1999": ("1970-01-01", "1999-12-31"),
+    "1960-1989": ("1960-01-01", "1989-12-31"),
+    "1950-1979": ("1950-01-01", "1979-12-31"),
+    "1940-1969": ("1940-01-01", "1969-12-31"),
+}
+
+# NIEUW: Bepaling van de totale periode voor één API-oproep (om 429 errors te voorkomen)
+BENCHMARK_START_DATE_FULL = "1940-01-01"
+BENCHMARK_END_DATE_FULL = "2019-12-31" 
+
+
+# 2. Functies voor Data (Loading & Processing)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_station_registry(stations_file=STATIONS_FILE):
+    """
+    Leest het stationsregister (JSON: {"stations": [{"id", "naam", "lat", "lon", "hoogte", "start_jaar"}]}).
+    Geeft een dict station_id -> gegevens; bij een fout het standaardregister.
+    """
+    note_cache_miss('load_station_registry')
+    try:
+        if stations_file.startswith('http://') or stations_file.startswith('https://'):
+            response = requests.get(stations_file, timeout=10)
+            response.raise_for_status()
+            manifest = response.json()
+        else:
+            with open(stations_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+
+        registry = {}
+        for entry in manifest['stations']:
+            registry[entry['id']] = {
+                'naam': entry.get('naam', entry['id']),
+                'lat': entry.get('lat', BENCHMARK_LATITUDE),
+                'lon': entry.get('lon', BENCHMARK_LONGITUDE),
+                'hoogte': entry.get('hoogte'),
+                'start_jaar': entry.get('start_jaar', START_YEAR),
+            }
+        return registry or dict(DEFAULT_STATIONS)
+    except Exception:
+        return dict(DEFAULT_STATIONS)
+
+
+def station_location(station_info):
+    """(lat, lon, hoogte) van een station, als hashbare sleutel voor de ERA5 benchmark."""
+    return (
+        station_info.get('lat', BENCHMARK_LATITUDE),
+        station_info.get('lon', BENCHMARK_LONGITUDE),
+        station_info.get('hoogte'),
+    )
+
+
+# Zoekt naar beschikbare jaren op GitHub (Gecached, NU ZONDER TTL VOOR ACTUEELHEID)
+@st.cache_data(show_spinner="Zoeken naar beschikbare jaren op GitHub...")
+def discover_available_years(start_year, station_id, github_base_url):
+    """
+    Probeert iteratief om weather_YYYY.csv te laden van het startjaar tot het huidige jaar.
+    """
+    note_cache_miss('discover_available_years')
+    current_year = datetime.datetime.now().year
+    available_years = []
+    
+    for year in range(start_year, current_year + 1):
+        full_url = f"{github_base_url}{station_id}/weather_{year}.csv"
+        
+        try:
+            # Laad alleen de header en de eerste rij (nrows=1) voor een snelle check
+            df_test = pd.read_csv(full_url, sep=';', on_bad_lines='skip', nrows=1)
+            
+            # Controleer of het DataFrame niet leeg is en de verwachte kolom bevat
+            if not df_test.empty and 'datum_waarneming_UTC' in df_test.columns:
+                available_years.append(year)
+            
+        except Exception:
+            pass
+            
+    return sorted(available_years)
+
+
+def parse_weather_frame(df, target_timezone):
+    """
+    Parseert een ruw (CSV) frame van de logger: tijdstempels (UTC en lokaal), het lokale dagnummer
+    (LOCAL_DAY_COL, zie malman/localtime.py), numerieke kolommen en druk in hPa.
+    """
+    df['Timestamp_UTC_str'] = df['datum_waarneming_UTC'] + ' ' + df['tijd_waarneming_UTC']
+    df['Timestamp_UTC'] = pd.to_datetime(df['Timestamp_UTC_str'], format='%d.%m.%Y %H:%M:%S', errors='coerce')
+    df = df.dropna(subset=['Timestamp_UTC'])
+
+    for col in NUMERIC_COLS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    
+    if 'druk' in df.columns:
+        df['druk'] = df['druk'] / 100 
+
+    df['Timestamp_UTC'] = df['Timestamp_UTC'].dt.tz_localize('UTC') 
+    df['Timestamp_Local'] = df['Timestamp_UTC'].dt.tz_convert(target_timezone)
+    df[LOCAL_DAY_COL] = local_day_numbers(df['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64), target_timezone)
+    return df
+
+
+# -------------------------------------------------------------------
+# Dataversies: elk jaarbestand krijgt een inhoudsversie (ETag op GitHub, hash lokaal).
+# Het laden en alle afgeleide caches (samenvatting, benchmark, extremen, figuren)
+# zijn op deze versies gesleuteld, zodat alleen wat van een gewijzigd bestand
+# afhangt opnieuw berekend wordt. "Wis Cache" is daarvoor niet meer nodig.
+# -------------------------------------------------------------------
+# Hoe lang een opgehaalde bestandsversie geldig blijft voor er opnieuw gecontroleerd wordt
+DATA_VERSION_TTL_SECONDS = 60
+
+
+def station_year_url(station_id, year, github_base_url):
+    return f"{github_base_url}{station_id}/weather_{year}.csv"
+
+
+@functools.lru_cache(maxsize=512)
+def _hash_local_file(path, size, mtime_ns):
+    """Inhoudshash van een lokaal bestand; alleen opnieuw berekend als grootte of mtime wijzigt."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def get_file_version(url):
+    """
+    Geeft een versie-string voor één bestand: de ETag (of Last-Modified) via een HEAD request,
+    of een inhoudshash voor een lokaal bestand. None als het bestand niet bestaat.
+    """
+    if url.startswith('http://') or url.startswith('https://'):
+        response = requests.head(url, timeout=10, allow_redirects=True)
+        if response.status_code != 200:
+            return None
+        version = response.headers.get('ETag') or response.headers.get('Last-Modified') or response.headers.get('Content-Length')
+        return version.strip('"') if version else None
+
+    if not os.path.exists(url):
+        return None
+    stat = os.stat(url)
+    return _hash_local_file(url, stat.st_size, stat.st_mtime_ns)
+
+
+@st.cache_data(ttl=DATA_VERSION_TTL_SECONDS, show_spinner=False)
+def get_station_file_versions(station_id, years, github_base_url):
+    """Versies van de jaarbestanden van één station als tuple van (jaar, versie)."""
+    note_cache_miss('get_station_file_versions')
+    versions = []
+    for year in years:
+        try:
+            version = get_file_version(station_year_url(station_id, year, github_base_url))
+        except Exception:
+            version = None
+        versions.append((year, version))
+    return tuple(versions)
+
+
+def combine_data_version(*parts):
+    """Korte, stabiele versie-string voor een combinatie van bestandsversies (en andere sleutels)."""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:12]
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def load_year_data(station_id, year, github_base_url, target_timezone, file_version, location=None):
+    """
+    Laadt, parseert en controleert (QC) één jaarbestand en voegt de afgeleide grootheden toe.
+    Door file_version in de sleutel wordt een bestand alleen opnieuw gelezen en gecontroleerd
+    als de inhoud veranderd is. location: (lat, lon, hoogte), zie station_location.
+    """
+    note_cache_miss('load_year_data')
+
+    def read_year():
+        df = pd.read_csv(station_year_url(station_id, year, github_base_url), sep=';', on_bad_lines='skip')
+        df = parse_weather_frame(df, target_timezone).sort_values('Timestamp_UTC', kind='stable')
+        df = add_derived_columns(df.reset_index(drop=True), location)
+        return quality_check(df)
+
+    if file_version is None:  # Onbekende versie: niet delen met andere processen
+        return read_year()
+    # Eén rij per jaarbestand in de gedeelde cache; een nieuwe versie vervangt de vorige
+    return shared_cached('year_data', (station_id, year, github_base_url, target_timezone, location), read_year, version=file_version)
+
+
+def load_data(station_id, years, github_base_url, station_map, target_timezone, file_versions=None, location=None):
+    """
+    Laadt, parseert en pre-verwerkt weerdata van GitHub voor meerdere jaren.
+    Elk jaarbestand komt uit de cache van load_year_data, gesleuteld op zijn versie
+    (file_versions: paren (jaar, versie); standaard opgehaald met get_station_file_versions).
+    """
+    if file_versions is None:
+        file_versions = get_station_file_versions(station_id, tuple(years), github_base_url)
+    versions = dict(file_versions)
+    all_years_data = []
+    station_name = station_map.get(station_id, station_id)
+
+    for year in years:
+        try:
+            all_years_data.append(load_year_data(station_id, year, github_base_url, target_timezone, versions.get(year), location))
+            
+        except Exception as e:
+            st.warning(f"❌ Bestand niet gevonden of fout bij laden voor {station_name} in {year}. Reden: {e}")
+
+    # QC rond de jaargrens: alleen de twee rijen aan de naad worden opnieuw gecontroleerd
+    for df_before, df_after in zip(all_years_data, all_years_data[1:]):
+        recheck_boundary(df_before, df_after)
+
+    if all_years_data:
+        df_station = pd.concat(all_years_data, ignore_index=True)
+        return df_station.sort_values('Timestamp_Local', kind='stable').copy() 
+    else:
+        return pd.DataFrame() 
+
+# -------------------------------------------------------------------
+# NIEUWE FUNCTIE: Ophalen COMPLETE Externe Historische Data via Open-Meteo API (Grote Cache)
+# Wordt eenmaal aangeroepen om alle benchmark data te verzamelen.
+# De download zelf loopt via de gedeelde achtergrond-worker (malman/era5.py).
+# -------------------------------------------------------------------
+def benchmark_location(location=None):
+    """(lat, lon, hoogte) van de ERA5 benchmark; standaard de Malmån locatie."""
+    return location or (BENCHMARK_LATITUDE, BENCHMARK_LONGITUDE, None)
+
+
+def prefetch_historical_data(locations):
+    """
+    Start de ERA5 download van alle locaties op de achtergrond (als die nog niet loopt)
+    en geeft per locatie de voortgang: ('pending', seconden bezig) of de status van de download.
+    """
+    fetcher = get_era5_fetcher()
+    progress = []
+    for location in dict.fromkeys(benchmark_location(location) for location in locations):
+        fetcher.submit(BENCHMARK_START_DATE_FULL, BENCHMARK_END_DATE_FULL, location)
+        progress.append(fetcher.progress(BENCHMARK_START_DATE_FULL, BENCHMARK_END_DATE_FULL, location))
+    return progress
+
+
+def fetch_complete_historical_data(start_date_str, end_date_str, location=None):
+    """
+    Haalt de volledige reeks historische data op in één keer om rate limits te vermijden.
+    location: (lat, lon, hoogte) van het station; standaard de Malmån locatie.
+    Een lopende achtergrond-download (prefetch_historical_data) wordt afgewacht, niet herhaald.
+    Niet via st.cache_data: de Era5Fetcher onthoudt het resultaat zelf, en een mislukte
+    download maar ERA5_RETRY_SECONDS.
+    """
+    return get_era5_fetcher().result(start_date_str, end_date_str, benchmark_location(location))
+
+# -------------------------------------------------------------------
+# GECORRIGEERDE FUNCTIE: Ophalen Externe Historische Data via Open-Meteo API (voor Enkelvoudige Benchmark)
+# Roept de complete set op en filtert lokaal.
+# -------------------------------------------------------------------
+@era5_cached(ttl=86400)
+def fetch_historical_benchmark_data(start_date_str, end_date_str, location=None):
+    """
+    Haalt de historische data van één geselecteerde klimaatnormaalperiode op.
+    Roept de complete dataset op en filtert de data lokaal om rate limits te vermijden.
+    """
+    note_cache_miss('fetch_historical_benchmark_data')
+    # Stap 1: Haal de complete dataset op (deze is gecached)
+    df_complete, status = fetch_complete_historical_data(BENCHMARK_START_DATE_FULL, BENCHMARK_END_DATE_FULL, location)
+    
+    if df_complete.empty:
+        raise Era5Unavailable(status, (pd.DataFrame(), status))
+
+    # Stap 2: Filter de complete data op de gevraagde periode
+    df_hist = df_complete[
+        (df_complete['Date'] >= start_date_str) & 
+        (df_complete['Date'] <= end_date_str)
+    ].copy()
+    
+    if df_hist.empty:
+        error_message = f"❌ Geen data gevonden in de complete set voor de periode {start_date_str} tot {end_date_str}."
+        return pd.DataFrame(), ('error', error_message)
+    
+    # Stap 3: Voltooi de verwerking voor de enkelvoudige benchmark
+    df_hist['Station Naam'] = 'Historische Benchmark'
+    success_message = f"Langjarige benchmarkdata (Klimaatnormaal {start_date_str[:4]}-{end_date_str[:4]}) van {len(df_hist)} dagen succesvol gefilterd van de complete set."
+    return df_hist.set_index('Date'), ('success', success_message)
+
+# -------------------------------------------------------------------
+# GECORRIGEERDE FUNCTIE: Ophalen Externe Historische Data voor ALLE Klimaatnormalen
+# Roept de complete set op en filtert lokaal.
+# -------------------------------------------------------------------
+@era5_cached(ttl=86400) # Cache voor 24 uur (een mislukte download niet)
+def fetch_all_historical_benchmarks(climate_normal_periods, location=None):
+    """
+    Haalt de historische data voor alle gedefinieerde klimaatnormaalperioden op.
+    Gebruikt de complete set en filtert lokaal om rate limits te vermijden.
+    """
+    note_cache_miss('fetch_all_historical_benchmarks')
+    all_benchmarks = {}
+    
+    # Stap 1: Haal de complete dataset op (deze is gecached)
+    df_complete, status = fetch_complete_historical_data(BENCHMARK_START_DATE_FULL, BENCHMARK_END_DATE_FULL, location)
+    
+    if df_complete.empty:
+        # Als de complete set niet geladen kan worden, stoppen we hier.
+        raise Era5Unavailable(status, all_benchmarks)
+
+    # Sorteer de perioden van oud naar nieuw (laagste startjaar eerst)
+    sorted_periods = sorted(climate_normal_periods.items(), key=lambda item: int(item[1][0][:4]), reverse=False)
+    
+    for period_name, (start_date_str, end_date_str) in sorted_periods:
+        
+        # Stap 2: Filter de complete data op de gevraagde periode
+        df_hist = df_complete[
+            (df_complete['Date'] >= start_date_str) & 
+            (df_complete['Date'] <= end_date_str)
+        ].copy()
+        
+        if not df_hist.empty:
+            df_hist['Periode'] = period_name.split('(')[0].strip() # '1990-2019'
+            period_key = period_name.split('(')[0].strip() 
+            all_benchmarks[period_key] = df_hist
+            
+    return all_benchmarks
+
+
+# Nieuwe, veilige formatteer functie
+def safe_format_temp(x, unit="°C"):
+    """Formats numeric value x to 'X.X °C' (or another unit), returns empty string for NaN or non-numeric types."""
+    if pd.isna(x):
+        return ""
+    try:
+        # Probeer om te zetten naar float en formatteer
+        return f"{float(x):.1f} {unit}"
+    except (ValueError, TypeError):
+        # Vang op als x een onverwacht type is dat niet naar float kan
+        return "" 
+        
+# NIEUWE FUNCTIE: Haalt de eenheid uit de display-naam
+def get_unit_from_display_name(display_name, plot_col):
+    """
+    Haalt de eenheid uit de display naam voor formatting.
+    """
+    if plot_col in ['temp', 'dauwpunt', 'natbol']:
+        return "°C" 
+    unit_match = re.search(r'\((.*?)\)', display_name)
+    if unit_match:
+        return unit_match.group(1).strip()
+    return display_name.split(' ')[-1].strip()
+
+
+def find_consecutive_periods(df_filtered, min_days, temp_column, unit="°C"):
+    """Vindt en retourneert aaneengesloten periodes in een gefilterde DataFrame."""
+    
+    if df_filtered.empty:
+        return pd.DataFrame(), 0
+
+    df_groups = df_filtered.copy()
+    
+    if not isinstance(df_groups.index, pd.DatetimeIndex):
+        return pd.DataFrame(), 0 
+    
+    df_groups = df_groups.reset_index().sort_values('Date') 
+
+    grouped = df_groups.groupby('Station Naam')
+    all_periods = []
+
+    for name, group in grouped:
+        group['new_period'] = (group['Date'].diff().dt.days.fillna(0) > 1).astype(int) 
+        group['group_id'] = group['new_period'].cumsum()
+        
+        periods = group.groupby('group_id').agg(
+            StartDatum=('Date', 'min'),
+            EindDatum=('Date', 'max'),
+            Duur=('Date', 'size'),
+            Gemiddelde_Temp_Periode=(temp_column, 'mean')
+        ).reset_index(drop=True)
+        
+        periods['Station Naam'] = name
+        
+        periods = periods[periods['Duur'] >= min_days]
+        all_periods.append(periods)
+
+    if not all_periods:
+        return pd.DataFrame(), 0
+
+    periods_combined = pd.concat(all_periods, ignore_index=True)
+    
+    periods_combined['StartDatum'] = periods_combined['StartDatum'].dt.strftime('%d-%m-%Y')
+    periods_combined['EindDatum'] = periods_combined['EindDatum'].dt.strftime('%d-%m-%Y')
+    
+    periods_combined['Gemiddelde_Temp_Periode'] = periods_combined['Gemiddelde_Temp_Periode'].map(lambda x: safe_format_temp(x, unit))
+
+    total_periods = len(periods_combined)
+    
+    return periods_combined.reset_index(drop=True), total_periods
+
+
+def find_extreme_days(df_daily_summary, top_n=5, min_coverage=MIN_DAY_COVERAGE):
+    """
+    Vindt de warmste, koudste en meest extreme dagen uit de dagelijkse samenvatting.
+    Dagen met een dekking onder min_coverage (bv. de lopende dag) tellen niet mee.
+    """
+    df_daily_summary = apply_coverage_policy(df_daily_summary, min_coverage)
+
+    if df_daily_summary.empty:
+        return {}
+
+    df_analysis = df_daily_summary.copy()
+    df_analysis['Temp_Range_C'] = df_analysis['Temp_High_C'] - df_analysis['Temp_Low_C']
+
+    results = {}
+
+    extremes_config = {
+        'hoogste_max_temp': ('Temp_High_C', False, 'Max Temp (°C)'), 
+        'hoogste_min_temp': ('Temp_Low_C', False, 'Min Temp (°C)'),   
+        'hoogste_gem_temp': ('Temp_Avg_C', False, 'Gem Temp (°C)'),   
+        'laagste_min_temp': ('Temp_Low_C', True, 'Min Temp (°C)'),    
+        'laagste_max_temp': ('Temp_High_C', True, 'Max Temp (°C)'),   
+        'laagste_gem_temp': ('Temp_Avg_C', True, 'Gem Temp (°C)'),    
+        'grootste_range': ('Temp_Range_C', False, 'Range (°C)')
+    }
+
+    for key, (column, ascending, display_col) in extremes_config.items():
+        
+        extreme_df_list = []
+        for station, group in df_analysis.groupby('Station Naam'):
+            
+            top_days = group.sort_values(by=column, ascending=ascending).head(top_n)
+
+            df_display = top_days.reset_index().copy()
+
+            if 'Date' in df_display.columns:
+                 df_display['Datum'] = df_display['Date'].dt.strftime('%d-%m-%Y')
+                 df_display = df_display.drop(columns=['Date']) 
+            
+            rename_dict = {
+                'Temp_High_C': 'Max Temp (°C)', 
+                'Temp_Low_C': 'Min Temp (°C)',
+                'Temp_Avg_C': 'Gem Temp (°C)',
+                'Temp_Range_C': 'Range (°C)' 
+            }
+            
+            df_display = df_display.rename(columns=rename_dict)
+            
+            temp_display_cols = ['Max Temp (°C)', 'Min Temp (°C)', 'Range (°C)', 'Gem Temp (°C)']
+            for col_name in temp_display_cols:
+                if col_name in df_display.columns:
+                     df_display[col_name] = df_display[col_name].map(safe_format_temp)
+
+
+            if key in ['hoogste_max_temp', 'laagste_max_temp']:
+                 final_cols_order = ['Datum', 'Station Naam', 'Max Temp (°C)']
+            elif key in ['hoogste_min_temp', 'laagste_min_temp']:
+                 final_cols_order = ['Datum', 'Station Naam', 'Min Temp (°C)']
+            elif key in ['hoogste_gem_temp', 'laagste_gem_temp']:
+                 final_cols_order = ['Datum', 'Station Naam', 'Gem Temp (°C)']
+            else: # grootste_range
+                 final_cols_order = ['Datum', 'Station Naam', 'Range (°C)', 'Max Temp (°C)', 'Min Temp (°C)']
+            
+            df_final_display = df_display[[c for c in final_cols_order if c in df_display.columns]].copy()
+            
+            extreme_df_list.append(df_final_display)
+
+        if extreme_df_list:
+             results[key] = pd.concat(extreme_df_list, ignore_index=True).sort_values(by='Station Naam', ascending=True)
+
+    return results
+
+
+# -------------------------------------------------------------------
+# Dagelijkse Samenvatting en Benchmark Koppeling
+# -------------------------------------------------------------------
+# Gaten tot deze lengte worden bij de tijdgewogen gemiddelden lineair overbrugd
+MAX_INTERPOLATION_GAP = pd.Timedelta(hours=3)
+
+
+def observation_weights(epoch_ns, station_codes, valid, cadence=CADENCE, max_gap=MAX_INTERPOLATION_GAP):
+    """
+    Tijdgewicht (minuten) per meting: de helft van het interval naar de vorige plus de helft van
+    het interval naar de volgende geldige meting van hetzelfde station (trapeziumregel). Een gat
+    langer dan max_gap wordt niet overbrugd en telt als één meetinterval. Ongeldige rijen wegen 0.
+    Verwacht rijen gesorteerd per station en daarbinnen op tijd.
+    """
+    weights = np.zeros(len(epoch_ns))
+    rows = np.flatnonzero(valid)
+    if len(rows) == 0:
+        return weights
+
+    times = epoch_ns[rows]
+    intervals = np.diff(times).astype(np.float64)
+    same_station = station_codes[rows][1:] == station_codes[rows][:-1]
+    bridged = same_station & (intervals <= max_gap.value)
+    intervals = np.where(bridged, intervals, cadence.value)
+
+    before = np.concatenate(([cadence.value], intervals))
+    after = np.concatenate((intervals, [cadence.value]))
+    weights[rows] = (before + after) / 2 / pd.Timedelta(minutes=1).value
+    return weights
+
+
+# Tijdgewogen daggemiddelden: ruwe of afgeleide kolom -> kolom in de dagelijkse samenvatting
+DAILY_MEAN_COLS = {
+    'temp': 'Temp_Avg_C',
+    'druk': 'Pres_Avg_hPa',
+    'luchtvocht': 'Hum_Avg_P',
+    'druk_zee': 'PresSea_Avg_hPa',
+    'dampdruk': 'Vap_Avg_hPa',
+    'abs_vocht': 'AbsHum_Avg_gm3',
+    'helderheid': 'ClearSky_Avg',
+}
+# Dagmaxima van de comfortindices
+DAILY_MAX_COLS = {
+    'gevoelstemp': 'Feel_High_C',
+    'humidex': 'Humidex_High_C',
+}
+
+# Dagkolommen waarop gezocht kan worden (Tab 3): kolom -> (omschrijving, eenheid)
+DAILY_FILTER_COLUMNS = {
+    'Temp_High_C': ("Max Temp", "°C"),
+    'Temp_Low_C': ("Min Temp", "°C"),
+    'Temp_Avg_C': ("Gemiddelde Temp", "°C"),
+    'Pres_Avg_hPa': ("Gem. Luchtdruk", "hPa"),
+    'Hum_Avg_P': ("Gem. Luchtvochtigheid", "%"),
+    'Feel_High_C': ("Max Gevoelstemperatuur", "°C"),
+    'Humidex_High_C': ("Max Humidex", "°C"),
+    'PresSea_Avg_hPa': ("Gem. Luchtdruk zeeniveau", "hPa"),
+    'Vap_Avg_hPa': ("Gem. Dampdruk", "hPa"),
+    'AbsHum_Avg_gm3': ("Gem. Absolute vochtigheid", "g/m³"),
+    'ClearSky_Avg': ("Gem. Helderheidsindex", "-"),
+}
+
+
+def build_daily_summary(df_combined):
+    """
+    Maakt de dagelijkse samenvatting (per station) uit de 10-minuten data, in één gegroepeerde stap.
+    Dubbele rijen en verdachte waarden (QC) tellen niet mee. Gemiddelden zijn tijdgewogen
+    (trapeziumregel over gaten tot MAX_INTERPOLATION_GAP), zodat een dag met ongelijk verdeelde
+    metingen niet scheef trekt. Elke dag krijgt het aantal waarnemingen en de dekking (0-1)
+    ten opzichte van het verwachte aantal (23/24/25 uur rond de zomertijd).
+    Afgeleide grootheden (DAILY_MEAN_COLS, DAILY_MAX_COLS) komen mee als ze in de data zitten.
+    Na het sorteren per station en tijd is elke (station, LOCAL_DAY_COL) groep aaneengesloten;
+    alle dagwaarden volgen met np.*.reduceat over die groepen.
+    """
+    # Alleen de gebruikte kolommen worden (per station en tijd) gesorteerd
+    station_codes, stations = pd.factorize(df_combined['Station Naam'], sort=True)
+    epoch_ns = df_combined['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    order = np.lexsort((epoch_ns, station_codes))
+    value_cols = [col for col in [*DAILY_MEAN_COLS, *DAILY_MAX_COLS, *QC_FLAG_COLS] if col in df_combined.columns]
+    df = df_combined[value_cols].take(order)
+    station_codes, epoch_ns = station_codes[order], epoch_ns[order]
+    days = frame_local_days(df_combined)[order]
+    starts = group_starts(station_codes, days)
+    is_observation = ((df['QC_Flags'] & FLAG_DUPLICATE) == 0).to_numpy() if 'QC_Flags' in df.columns else np.ones(len(df), dtype=bool)
+
+    def daily(ufunc, values):
+        return ufunc.reduceat(values, starts) if len(starts) else np.empty(0, dtype=values.dtype)
+
+    temp = masked_values(df, 'temp').to_numpy(dtype=np.float64, na_value=np.nan)
+    columns = {
+        'Station Naam': stations[station_codes[starts]],
+        # fmax/fmin slaan NaN over (zoals groupby max/min); een dag zonder waarden blijft NaN
+        'Temp_High_C': daily(np.fmax, temp),
+        'Temp_Low_C': daily(np.fmin, temp),
+        'Waarnemingen': daily(np.add, is_observation.astype(np.int64)),
+    }
+    mean_cols = [col for col in DAILY_MEAN_COLS if col in df.columns]
+    for col in mean_cols:
+        values = temp if col == 'temp' else masked_values(df, col).to_numpy(dtype=np.float64, na_value=np.nan)
+        weights = observation_weights(epoch_ns, station_codes, ~np.isnan(values))
+        total_weight = daily(np.add, weights)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            columns[DAILY_MEAN_COLS[col]] = np.where(
+                total_weight > 0, daily(np.add, np.where(weights > 0, values * weights, 0.0)) / total_weight, np.nan
+            )
+    max_cols = [col for col in DAILY_MAX_COLS if col in df.columns]
+    for col in max_cols:
+        columns[DAILY_MAX_COLS[col]] = daily(np.fmax, masked_values(df, col).to_numpy(dtype=np.float64, na_value=np.nan))
+
+    tz = df_combined['Timestamp_Local'].dt.tz
+    group_days = days[starts]
+    expected = day_lengths_ns(group_days, tz) / CADENCE.value
+    columns['Dekking'] = np.minimum(columns['Waarnemingen'] / expected, 1.0)
+    df_daily_summary = pd.DataFrame(
+        columns, index=day_starts(group_days, tz, df_combined['Timestamp_Local'].dt.unit).rename('Date'),
+    )
+
+    df_daily_summary = df_daily_summary.dropna(subset=['Temp_Avg_C'])
+    extra_cols = [DAILY_MEAN_COLS[col] for col in mean_cols if col in DERIVED_COLS] + [DAILY_MAX_COLS[col] for col in max_cols]
+    return df_daily_summary[[
+        'Station Naam', 'Temp_High_C', 'Temp_Low_C', 'Temp_Avg_C', 'Pres_Avg_hPa', 'Hum_Avg_P', 'Waarnemingen', 'Dekking'
+    ] + extra_cols]
+
+
+def apply_coverage_policy(df_daily_summary, min_coverage=MIN_DAY_COVERAGE):
+    """Houdt alleen de dagen met minstens min_coverage dekking (0-1) over."""
+    if 'Dekking' not in df_daily_summary.columns or min_coverage <= 0:
+        return df_daily_summary
+    return df_daily_summary[df_daily_summary['Dekking'] >= min_coverage]
+
+
+def build_monthly_summary(df_daily_summary):
+    """
+    Maandrollup (per station) van de dagelijkse samenvatting: gemiddelden van de daggrootheden,
+    de hoogste en laagste temperatuur van de maand en het aantal dagen. Pas eerst
+    apply_coverage_policy toe als onvolledige dagen niet mee mogen tellen.
+    Geeft een DataFrame met kolommen 'Station Naam' en 'Maand' (eerste dag, zonder tijdzone).
+    """
+    station_codes, stations = pd.factorize(df_daily_summary['Station Naam'], sort=True)
+    months = month_numbers(dates_to_days(df_daily_summary.index))
+    order = np.lexsort((months, station_codes))
+    station_codes, months = station_codes[order], months[order]
+    starts = group_starts(station_codes, months)
+
+    def monthly(ufunc, col):
+        values = df_daily_summary[col].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        return ufunc.reduceat(values, starts) if len(starts) else np.empty(0)
+
+    def monthly_mean(col):
+        values = df_daily_summary[col].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        valid = ~np.isnan(values)
+        if not len(starts):
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        counts = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.add.reduceat(np.where(valid, values, 0.0), starts) / np.where(counts > 0, counts, np.nan), counts
+
+    temp_avg, days_counted = monthly_mean('Temp_Avg_C')
+    return pd.DataFrame({
+        'Station Naam': stations[station_codes[starts]],
+        'Maand': month_starts(months[starts]),
+        'Temp_Avg_C': temp_avg,
+        'Temp_High_Avg_C': monthly_mean('Temp_High_C')[0],
+        'Temp_Low_Avg_C': monthly_mean('Temp_Low_C')[0],
+        'Temp_High_C': monthly(np.fmax, 'Temp_High_C'),
+        'Temp_Low_C': monthly(np.fmin, 'Temp_Low_C'),
+        'Pres_Avg_hPa': monthly_mean('Pres_Avg_hPa')[0],
+        'Hum_Avg_P': monthly_mean('Hum_Avg_P')[0],
+        'Dagen': days_counted,
+    })
+
+
+# Kolommen van het langjarig gemiddelde: kolom in de samenvatting -> bronkolom van ERA5
+LANGJARIG_COLS = {
+    'Langjarig_Avg_Temp': 'Temp_Avg_C',
+    'Langjarig_Avg_Max': 'Temp_High_C',
+    'Langjarig_Avg_Min': 'Temp_Low_C',
+}
+
+
+def merge_langjarig_benchmark(df_daily_summary, df_hist_raw):
+    """
+    Berekent het langjarig gemiddelde per kalenderdag en voegt het toe aan de dagelijkse samenvatting.
+    Kalenderdagen zijn dagnummers in een schrikkeljaar (leap_day_of_year): de gemiddelden zijn
+    np.bincount sommen over 366 vakken, de koppeling een gewone indexering.
+    Zonder (geldige) benchmark data wordt de samenvatting ongewijzigd teruggegeven.
+    """
+    if df_hist_raw.empty or not all(col in df_hist_raw.columns for col in LANGJARIG_COLS.values()):
+        return df_daily_summary
+
+    hist_dates = df_hist_raw['Date'] if 'Date' in df_hist_raw.columns else df_hist_raw.index
+    hist_day = leap_day_of_year(dates_to_days(hist_dates))
+    summary_day = leap_day_of_year(dates_to_days(df_daily_summary.index))
+
+    df_daily_summary = df_daily_summary.copy()
+    for name, col in LANGJARIG_COLS.items():
+        values = df_hist_raw[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(values)
+        sums = np.bincount(hist_day, weights=np.where(valid, values, 0.0), minlength=366)
+        counts = np.bincount(hist_day, weights=valid, minlength=366)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            df_daily_summary[name] = (sums / np.where(counts > 0, counts, np.nan))[summary_day]
+    return df_daily_summary
+
+
+# -------------------------------------------------------------------
+# Grafiek (Tab 1)
+# -------------------------------------------------------------------
+def build_graph_figure(filtered_df, plot_col, y_axis_title, unit, date_range_display_start, date_range_display_end, show_markers=False):
+    """
+    Bouwt de Plotly lijngrafiek van Tab 1 voor één variabele en alle stations.
+    """
+    trace_mode = 'lines+markers' if show_markers else 'lines'
+
+    fig = px.line(
+        filtered_df,
+        x='Timestamp_Local',
+        y=plot_col,
+        color='Station Naam',
+        line_shape='linear',
+        title=f'Weerdata van {y_axis_title} ({date_range_display_start} - {date_range_display_end})',
+        labels={'Timestamp_Local': f'Tijdstip ({TARGET_TIMEZONE})', plot_col: y_axis_title},
+        height=600
+    )
+
+    trace_hovertemplate_tab1 = (
+        f"<b>{y_axis_title}:</b> %{{y:.1f}} {unit}<br>" +
+        "<b>Station:</b> %{full_data.name}<extra></extra>" 
+    )
+    
+    fig.update_traces(
+        mode=trace_mode, 
+        hovertemplate=trace_hovertemplate_tab1
+    ) 
+    
+    fig.update_layout(
+        hovermode="x unified",
+        xaxis_title=f'Tijdstip ({TARGET_TIMEZONE})',
+        yaxis_title=y_axis_title,
+        legend_title_text='Station',
+    )
+
+    fig.update_xaxes(
+         title=f'Tijdstip ({TARGET_TIMEZONE})',
+         hoverformat="%d-%m-%Y %H:%M",
+         tickformat="%H:%M\n%d-%m" 
+    )
+    return fig
+
+
+# -------------------------------------------------------------------
+# Klimatologie (Tab 6): Benchmark statistieken per periode
+# -------------------------------------------------------------------
+def build_climatology_benchmark_stats(all_hist_benchmarks, clima_analysis_type, clima_key=None):
+    """
+    Berekent per klimaatnormaalperiode het gemiddelde van de dagelijkse Max/Min/Gem.
+    clima_key is 'MM-DD' (Dag), 'MM' (Maand) of None (Jaar).
+    """
+    all_benchmark_stats = []
+
+    # all_hist_benchmarks is gesorteerd van oud naar nieuw (door de functie fetch_all_historical_benchmarks)
+    for period_name, df_hist in all_hist_benchmarks.items():
+
+        if clima_analysis_type == "Dag":
+            _, month, day = calendar_fields(dates_to_days(df_hist['Date']))
+            df_period_data = df_hist[(month == int(clima_key[:2])) & (day == int(clima_key[3:]))]
+        elif clima_analysis_type == "Maand":
+            _, month, _ = calendar_fields(dates_to_days(df_hist['Date']))
+            df_period_data = df_hist[month == int(clima_key)]
+        else: # Jaar
+            df_period_data = df_hist
+
+        if df_period_data.empty:
+            continue
+
+        # Gemiddelde van de dagelijkse Min, Max, Gem. over de periode, door alle 30 jaren heen
+        period_stats = df_period_data[['Temp_High_C', 'Temp_Low_C', 'Temp_Avg_C']].mean().to_dict()
+
+        df_stats = pd.DataFrame([{
+            'Abs. Max Temp (°C)': period_stats.get('Temp_High_C'),
+            'Abs. Min Temp (°C)': period_stats.get('Temp_Low_C'),
+            'Gem. Temp Periode (°C)': period_stats.get('Temp_Avg_C'),
+            'Type': f"Benchmark: {period_name}",
+            'Station Naam': 'Langjarig Gemiddelde'
+        }]).set_index('Station Naam')
+        all_benchmark_stats.append(df_stats)
+
+    return all_benchmark_stats
+
+
+# -------------------------------------------------------------------
+# Gememoriseerde Tab Berekeningen (Lazy: alleen aangeroepen door de zichtbare tab)
+# -------------------------------------------------------------------
+# Het DataFrame wordt niet gehasht (underscore); data_version identificeert de inhoud.
+@st.cache_data(show_spinner=False)
+def compute_daily_summary(_df_combined, data_version):
+    """Gecachte dagelijkse samenvatting (Tab 3 t/m 6)."""
+    note_cache_miss('compute_daily_summary')
+    return shared_cached('daily_summary', data_version, lambda: build_daily_summary(_df_combined))
+
+
+@st.cache_data(show_spinner=False)
+def compute_daily_completeness(_df_combined, data_version):
+    """Gecachte dekking en QC tellingen per station en dag (Programma Checks)."""
+    note_cache_miss('compute_daily_completeness')
+    return shared_cached('daily_completeness', data_version, lambda: build_daily_completeness(_df_combined))
+
+
+@era5_cached(show_spinner=False)
+def compute_daily_summary_with_benchmark(_df_combined, data_version, benchmark_start_date, benchmark_end_date, station_locations=()):
+    """
+    Gecachte dagelijkse samenvatting inclusief het langjarig gemiddelde (Tab 4).
+    station_locations: paren (Station Naam, (lat, lon, hoogte)); elke locatie krijgt een eigen
+    ERA5 benchmark (stations op dezelfde locatie delen één opvraging).
+    Geeft (df_daily_summary, benchmark_status) terug. Zonder ERA5 voor een locatie wordt het
+    resultaat (zonder die benchmark) getoond maar niet gecached.
+    """
+    note_cache_miss('compute_daily_summary_with_benchmark')
+    df_daily_summary = compute_daily_summary(_df_combined, data_version)
+    locations = dict(station_locations)
+    unavailable = []
+
+    def benchmark_data(location):
+        try:
+            return fetch_historical_benchmark_data(benchmark_start_date, benchmark_end_date, location)
+        except Era5Unavailable as error:
+            unavailable.append(error)
+            return error.result
+
+    stations_by_location = {}
+    for station_name in df_daily_summary['Station Naam'].unique():
+        stations_by_location.setdefault(locations.get(station_name), []).append(station_name)
+
+    if len(stations_by_location) <= 1:
+        location = next(iter(stations_by_location), None)
+        df_hist_raw, benchmark_status = benchmark_data(location)
+        result = merge_langjarig_benchmark(df_daily_summary, df_hist_raw), benchmark_status
+    else:
+        parts = []
+        statuses = []
+        for location, station_names in stations_by_location.items():
+            df_hist_raw, status = benchmark_data(location)
+            statuses.append(status)
+            parts.append(merge_langjarig_benchmark(df_daily_summary[df_daily_summary['Station Naam'].isin(station_names)], df_hist_raw))
+
+        # Volgorde van build_daily_summary herstellen (per station, daarna op datum)
+        df_daily_summary = pd.concat(parts).sort_values('Station Naam', kind='stable')
+
+        # De ernstigste status wordt getoond
+        severity = {'error': 0, 'warning': 1, 'success': 2}
+        result = df_daily_summary, min(statuses, key=lambda status: severity.get(status[0], 3))
+    if unavailable:
+        raise Era5Unavailable(unavailable[0].status, result)
+    return result
+
+
+@st.cache_data(show_spinner=False)
+def compute_extreme_days(_df_daily_summary, data_version, min_coverage=MIN_DAY_COVERAGE, top_n=5):
+    """Gecachte versie van find_extreme_days (Tab 5)."""
+    note_cache_miss('compute_extreme_days')
+    return find_extreme_days(_df_daily_summary, top_n=top_n, min_coverage=min_coverage)
+
+
+@era5_cached(show_spinner=False)
+def compute_climatology_benchmark_stats(climate_normal_periods, clima_analysis_type, clima_key=None, location=None):
+    """Gecachte benchmark statistieken voor Tab 6 (haalt zelf de gecachte benchmarks op)."""
+    note_cache_miss('compute_climatology_benchmark_stats')
+    try:
+        all_hist_benchmarks = fetch_all_historical_benchmarks(climate_normal_periods, location)
+    except Era5Unavailable as error:
+        raise Era5Unavailable(error.status, build_climatology_benchmark_stats(error.result, clima_analysis_type, clima_key)) from error
+    return build_climatology_benchmark_stats(all_hist_benchmarks, clima_analysis_type, clima_key)
+
+
+# -------------------------------------------------------------------
+# Kernwaarden (Tab 1): Laatste/Min/Gem/Max met tijdstip, alle stations en variabelen in één keer
+# -------------------------------------------------------------------
+def build_kernwaarden(view_df, value_cols=None):
+    """
+    Berekent per station en variabele de laatste waarde, het minimum, het gemiddelde en het
+    maximum, met de tijdstippen. Bij gelijke minima/maxima telt het laatste tijdstip.
+    Geeft een DataFrame met index (Station Naam, Variabele).
+    """
+    value_cols = [c for c in (value_cols or PLOT_COLS) if c in view_df.columns]
+    result_cols = ['Laatste', 'Laatste Tijd', 'Min', 'Min Tijd', 'Gem', 'Max', 'Max Tijd']
+    if view_df.empty or not value_cols:
+        return pd.DataFrame(columns=result_cols, index=pd.MultiIndex.from_arrays([[], []], names=['Station Naam', 'Variabele']))
+
+    df = view_df[['Station Naam', 'Timestamp_Local'] + value_cols].sort_values(['Station Naam', 'Timestamp_Local'], kind='stable')
+    grouped = df.groupby('Station Naam', sort=True)
+    values = df[value_cols]
+    timestamps = df['Timestamp_Local']
+
+    # Eén gegroepeerde aggregatie voor min/gem/max van alle variabelen
+    stats = grouped[value_cols].agg(['min', 'mean', 'max'])
+
+    # Tijdstip van min/max: het laatste tijdstip waarop de waarde gelijk is aan het groepsextreem
+    station = df['Station Naam']
+    is_min = values.eq(stats.xs('min', axis=1, level=1).reindex(station).set_axis(df.index))
+    is_max = values.eq(stats.xs('max', axis=1, level=1).reindex(station).set_axis(df.index))
+    min_time = pd.DataFrame({col: timestamps.where(is_min[col]) for col in value_cols}).groupby(station, sort=True).max()
+    max_time = pd.DataFrame({col: timestamps.where(is_max[col]) for col in value_cols}).groupby(station, sort=True).max()
+
+    # Laatste rij per station (ook als de waarde daar ontbreekt, zoals de originele weergave)
+    last_rows = df.drop_duplicates('Station Naam', keep='last').set_index('Station Naam')
+    last_time = pd.DataFrame({col: last_rows['Timestamp_Local'] for col in value_cols})
+
+    def to_long(frame, name):
+        return frame[value_cols].stack(future_stack=True).rename(name)
+
+    kernwaarden = pd.concat([
+        to_long(last_rows, 'Laatste'),
+        to_long(last_time, 'Laatste Tijd'),
+        to_long(stats.xs('min', axis=1, level=1), 'Min'),
+        to_long(min_time, 'Min Tijd'),
+        to_long(stats.xs('mean', axis=1, level=1), 'Gem'),
+        to_long(stats.xs('max', axis=1, level=1), 'Max'),
+        to_long(max_time, 'Max Tijd'),
+    ], axis=1)
+    kernwaarden.index.names = ['Station Naam', 'Variabele']
+    return kernwaarden
+
+
+def sort_positions(df, sort_col, ascending=True):
+    """
+    Rijposities (np.int64) die df stabiel op sort_col sorteren; ontbrekende waarden komen achteraan.
+    Tijdstempels worden als int64 (ns) gesorteerd, zodat dit ook over vele jaren snel blijft.
+    """
+    series = df[sort_col]
+    if isinstance(series.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(series):
+        keys = pd.DatetimeIndex(series).asi8.astype(np.float64)
+    else:
+        keys = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.argsort(keys if ascending else -keys, kind='stable')
+
+
+def raw_data_page(df, positions, columns, page, page_size):
+    """Eén pagina (1-based) van df in de volgorde van positions; alleen die rijen en kolommen worden opgehaald."""
+    page_positions = positions[(page - 1) * page_size:page * page_size]
+    return df.iloc[page_positions][columns]
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def compute_kernwaarden(_view_df, window_key):
+    """
+    Gecachte Kernwaarden per tijdsvenster. window_key identificeert het venster
+    (dataversie, start en einde); het DataFrame zelf wordt niet gehasht.
+    """
+    note_cache_miss('compute_kernwaarden')
+    return build_kernwaarden(_view_df)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def compute_sort_positions(_view_df, window_key, sort_col, ascending=True):
+    """Gecachte sorteervolgorde van de Ruwe Data (Tab 2), gesleuteld op het tijdsvenster."""
+    note_cache_miss('compute_sort_positions')
+    return sort_positions(_view_df, sort_col, ascending)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def compute_graph_figure(_view_df, window_key, plot_col, y_axis_title, unit, date_range_display_start, date_range_display_end, show_markers=False):
+    """Gecachte grafiek van Tab 1, gesleuteld op het tijdsvenster (window_key) en de weergave-opties."""
+    note_cache_miss('compute_graph_figure')
+    return build_graph_figure(_view_df, plot_col, y_axis_title, unit, date_range_display_start, date_range_display_end, show_markers=show_markers)
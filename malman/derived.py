@@ -0,0 +1,144 @@
+"""
+Afgeleide meteorologische grootheden uit de ruwe loggerkolommen.
+
+Alle grootheden zijn puntsgewijze NumPy expressies (geen buren nodig) en worden
+één keer per ingelezen stuk berekend: per jaarbestand in load_year_data, per
+jaar bij het bijwerken van het archief en per poll in de live staart. Ze zitten
+daarna gewoon als kolommen in de (gecachte) data.
+
+    druk_zee      luchtdruk herleid tot zeeniveau (hPa), alleen met een bekende stationshoogte
+    dampdruk      dampdruk uit het dauwpunt (hPa, Magnus)
+    abs_vocht     absolute vochtigheid (g/m³)
+    gevoelstemp   gevoelstemperatuur (°C): hitte-index (NWS) vanaf 26.7 °C, anders de temperatuur.
+                  De loggers meten geen wind, dus een windchill is niet te bepalen.
+    humidex       humidex (°C, Canadese comfortindex uit temperatuur en dauwpunt)
+    helderheid    zoninstraling gedeeld door de instraling bij onbewolkte hemel (Haurwitz),
+                  alleen bij een zonshoogte van minstens MIN_SUN_ELEVATION graden
+
+Deze module importeert niets uit malman.core (core gebruikt haar bij het inlezen).
+"""
+import numpy as np
+
+DERIVED_COLS = ['druk_zee', 'dampdruk', 'abs_vocht', 'gevoelstemp', 'humidex', 'helderheid']
+
+# Ruwe kolommen waar elke afgeleide kolom van afhangt (voor de QC maskering, zie masked_values)
+DERIVED_SOURCES = {
+    'druk_zee': ['druk', 'temp'],
+    'dampdruk': ['dauwpunt'],
+    'abs_vocht': ['dauwpunt', 'temp'],
+    'gevoelstemp': ['temp', 'luchtvocht'],
+    'humidex': ['temp', 'dauwpunt'],
+    'helderheid': ['zoninstraling'],
+}
+
+# Onder deze zonshoogte (graden) is de verhouding met de heldere hemel te gevoelig
+MIN_SUN_ELEVATION = 10.0
+
+# Hitte-index (NWS) geldt pas vanaf 80 °F
+HEAT_INDEX_MIN_TEMP = 26.7
+
+
+def saturation_vapour_pressure(temp_c):
+    """Verzadigingsdampdruk boven water (hPa) volgens Magnus (Alduchov & Eskridge)."""
+    return 6.1094 * np.exp(17.625 * temp_c / (temp_c + 243.04))
+
+
+def sea_level_pressure(pressure_hpa, temp_c, elevation_m):
+    """Herleidt de stationsdruk tot zeeniveau (barometrische hoogteformule met de actuele temperatuur)."""
+    height = 0.0065 * elevation_m
+    return pressure_hpa * (1 - height / (temp_c + height + 273.15)) ** -5.257
+
+
+def heat_index(temp_c, humidity):
+    """
+    Hitte-index (°C) volgens het NWS algoritme (Rothfusz regressie met correcties).
+    Onder HEAT_INDEX_MIN_TEMP is het resultaat de temperatuur zelf.
+    """
+    t = temp_c * 9 / 5 + 32
+    rh = humidity
+    hi = (
+        -42.379 + 2.04901523 * t + 10.14333127 * rh - 0.22475541 * t * rh
+        - 0.00683783 * t ** 2 - 0.05481717 * rh ** 2 + 0.00122874 * t ** 2 * rh
+        + 0.00085282 * t * rh ** 2 - 0.00000199 * t ** 2 * rh ** 2
+    )
+    dry = (rh < 13) & (t >= 80) & (t <= 112)
+    hi = np.where(dry, hi - (13 - rh) / 4 * np.sqrt(np.clip(17 - np.abs(t - 95), 0, None) / 17), hi)
+    humid = (rh > 85) & (t >= 80) & (t <= 87)
+    hi = np.where(humid, hi + (rh - 85) / 10 * (87 - t) / 5, hi)
+    return np.where(temp_c >= HEAT_INDEX_MIN_TEMP, (hi - 32) * 5 / 9, temp_c)
+
+
+def humidex(temp_c, dewpoint_c):
+    """Humidex (°C) uit temperatuur en dauwpunt (Environment Canada)."""
+    vapour = 6.11 * np.exp(5417.7530 * (1 / 273.16 - 1 / (dewpoint_c + 273.15)))
+    return temp_c + 0.5555 * (vapour - 10)
+
+
+def solar_cos_zenith(epoch_ns, latitude, longitude):
+    """Cosinus van de zenithoek voor UTC tijdstippen (ns sinds 1970), NOAA benadering."""
+    timestamps = np.asarray(epoch_ns, dtype=np.int64).view('datetime64[ns]')
+    year_start = timestamps.astype('datetime64[Y]').astype('datetime64[ns]')
+    days = (timestamps - year_start) / np.timedelta64(1, 'D')
+    day_of_year = np.floor(days)
+    hours = (days - day_of_year) * 24
+    gamma = 2 * np.pi / 365 * (day_of_year + (hours - 12) / 24)
+
+    eqtime = 229.18 * (
+        0.000075 + 0.001868 * np.cos(gamma) - 0.032077 * np.sin(gamma)
+        - 0.014615 * np.cos(2 * gamma) - 0.040849 * np.sin(2 * gamma)
+    )
+    declination = (
+        0.006918 - 0.399912 * np.cos(gamma) + 0.070257 * np.sin(gamma)
+        - 0.006758 * np.cos(2 * gamma) + 0.000907 * np.sin(2 * gamma)
+        - 0.002697 * np.cos(3 * gamma) + 0.00148 * np.sin(3 * gamma)
+    )
+    true_solar_minutes = hours * 60 + eqtime + 4 * longitude
+    hour_angle = np.radians(true_solar_minutes / 4 - 180)
+
+    lat = np.radians(latitude)
+    return np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(declination) * np.cos(hour_angle)
+
+
+def clear_sky_irradiance(epoch_ns, latitude, longitude):
+    """Globale instraling bij onbewolkte hemel (W/m², Haurwitz); 0 als de zon onder is."""
+    cos_zenith = solar_cos_zenith(epoch_ns, latitude, longitude)
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+        irradiance = 1098.0 * cos_zenith * np.exp(-0.057 / cos_zenith)
+    return np.where(cos_zenith > 0, irradiance, 0.0)
+
+
+def add_derived_columns(df, location=None):
+    """
+    Voegt DERIVED_COLS toe aan een geparseerd frame (met Timestamp_UTC en de ruwe kolommen).
+    location: (lat, lon, hoogte) van het station; zonder locatie of hoogte blijven
+    helderheid respectievelijk druk_zee leeg (NaN).
+    """
+    def values(col):
+        if col not in df.columns:
+            return np.full(len(df), np.nan)
+        return df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    temp = values('temp')
+    dewpoint = values('dauwpunt')
+    humidity = values('luchtvocht')
+    latitude, longitude, elevation = location or (None, None, None)
+
+    with np.errstate(invalid='ignore', over='ignore'):
+        vapour = saturation_vapour_pressure(dewpoint)
+        derived = {
+            'druk_zee': sea_level_pressure(values('druk'), temp, elevation) if elevation is not None else np.full(len(df), np.nan),
+            'dampdruk': vapour,
+            'abs_vocht': 216.7 * vapour / (temp + 273.15),
+            'gevoelstemp': heat_index(temp, humidity),
+            'humidex': humidex(temp, dewpoint),
+            'helderheid': np.full(len(df), np.nan),
+        }
+
+        if latitude is not None and len(df):
+            epoch_ns = df['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+            cos_zenith = solar_cos_zenith(epoch_ns, latitude, longitude)
+            clear_sky = clear_sky_irradiance(epoch_ns, latitude, longitude)
+            sun_up = cos_zenith >= np.sin(np.radians(MIN_SUN_ELEVATION))
+            derived['helderheid'] = np.where(sun_up, values('zoninstraling') / np.where(sun_up, clear_sky, 1.0), np.nan)
+
+    return df.assign(**derived)
@@ -0,0 +1,202 @@
+"""
+ERA5 benchmark (Open-Meteo) op de achtergrond.
+
+De download van de complete reeks 1940-2019 duurt koud al snel tientallen
+seconden. Eén Era5Fetcher per serverproces (via st.cache_resource) voert
+de downloads uit in een kleine thread pool, zodat het script de stationsdata
+al kan tonen terwijl de benchmark nog binnenkomt. Dezelfde locatie wordt
+nooit twee keer tegelijk opgevraagd: een synchrone aanroep (zie
+fetch_complete_historical_data) wacht op de lopende download.
+
+Mislukte downloads worden na ERA5_RETRY_SECONDS opnieuw geprobeerd. Gecachte
+functies die van de reeks afhangen gebruiken daarom era5_cached in plaats van
+st.cache_data: zo onthoudt geen enkele cachelaag een mislukking voor een dag.
+
+Deze module importeert niets uit malman.core; de standaardlocatie wordt
+door core ingevuld.
+"""
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+import pandas as pd
+import requests
+import streamlit as st
+
+from malman.shared_cache import shared_cached
+
+ERA5_API_URL = "https://archive-api.open-meteo.com/v1/era5"
+
+# Aantal gelijktijdige downloads (één per stationslocatie)
+ERA5_WORKERS = 2
+
+# Een mislukte download wordt na zoveel seconden opnieuw geprobeerd, een gelukte na een dag
+ERA5_RETRY_SECONDS = 60
+ERA5_TTL_SECONDS = 86400
+
+# (verbinden, lezen) in seconden: een hangende verbinding mag geen worker blijven bezetten
+ERA5_TIMEOUT = (10, 120)
+
+
+def download_complete_historical_data(start_date_str, end_date_str, location):
+    """
+    Downloadt de ERA5 dagreeks (max, min, gemiddelde temperatuur) van één locatie.
+    location: (lat, lon, hoogte); met een hoogte wordt statistisch naar het station geschaald.
+    Geeft (df_hist, (status_type, bericht)) terug; bij een fout is df_hist leeg.
+    """
+    latitude, longitude, elevation = location
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "start_date": start_date_str,
+        "end_date": end_date_str,
+        "daily": "temperature_2m_max,temperature_2m_min,temperature_2m_mean",
+        "timezone": "Europe/Stockholm",
+        "format": "csv"
+    }
+    if elevation is not None:
+        # Statistische downscaling naar de hoogte van het station
+        params["elevation"] = elevation
+
+    try:
+        response = requests.get(ERA5_API_URL, params=params, timeout=ERA5_TIMEOUT)
+        response.raise_for_status()
+
+        csv_data = response.text.split('\n', 3)[3]
+        df_hist = pd.read_csv(StringIO(csv_data))
+
+        df_hist.columns = df_hist.columns.str.strip()
+
+        df_hist = df_hist.rename(columns={
+            'time': 'Date',
+            'temperature_2m_max (°C)': 'Temp_High_C',
+            'temperature_2m_min (°C)': 'Temp_Low_C',
+            'temperature_2m_mean (°C)': 'Temp_Avg_C',
+        })
+
+        df_hist['Date'] = pd.to_datetime(df_hist['Date'])
+
+        success_message = f"Complete historische data ({start_date_str[:4]}-{end_date_str[:4]}) van {len(df_hist)} dagen succesvol geladen via Open-Meteo (ERA5)."
+        return df_hist, ('success', success_message)
+
+    except requests.exceptions.HTTPError as e:
+        error_message = f"❌ Kon historische data niet ophalen via API. Fout: {e}. Probeer later opnieuw of herlaad de app."
+        return pd.DataFrame(), ('error', error_message)
+    except Exception as e:
+        error_message = f"⚠️ Algemene fout bij het verwerken van API-data. Fout: {e}"
+        return pd.DataFrame(), ('warning', error_message)
+
+
+def download_shared(start_date_str, end_date_str, location):
+    """
+    download_complete_historical_data via de gedeelde cache (malman/shared_cache.py): met meerdere
+    serverprocessen downloadt er één, de andere lezen het resultaat. Alleen gelukte downloads worden gedeeld.
+    """
+    return shared_cached(
+        'era5', (start_date_str, end_date_str, location),
+        lambda: download_complete_historical_data(start_date_str, end_date_str, location),
+        ttl=ERA5_TTL_SECONDS, keep=lambda result: not result[0].empty,
+    )
+
+
+class Era5Unavailable(Exception):
+    """
+    De ERA5 reeks is (nog) niet beschikbaar. status is (status_type, bericht) van de download;
+    result is wat de functie zonder ERA5 teruggeeft (de terugvalwaarde van era5_cached).
+    """
+
+    def __init__(self, status, result=None):
+        super().__init__(status[1])
+        self.status = status
+        self.result = result
+
+
+# Diepte van geneste era5_cached aanroepen in deze thread
+_era5_cached_depth = contextvars.ContextVar('era5_cached_depth', default=0)
+
+
+def era5_cached(**cache_kwargs):
+    """
+    st.cache_data voor functies die van de ERA5 reeks afhangen. Een functie die Era5Unavailable
+    opgooit wordt niet gecached; de buitenste aanroep geeft dan de result van de fout terug.
+    Binnen een andere era5_cached functie wordt de fout doorgegeven, zodat ook die niets onthoudt.
+    """
+    def decorate(func):
+        cached = st.cache_data(**cache_kwargs)(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            depth = _era5_cached_depth.get()
+            token = _era5_cached_depth.set(depth + 1)
+            try:
+                return cached(*args, **kwargs)
+            except Era5Unavailable as error:
+                if depth:
+                    raise
+                return error.result
+            finally:
+                _era5_cached_depth.reset(token)
+
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorate
+
+
+class Era5Fetcher:
+    """Gedeelde achtergrond-downloads van de ERA5 reeks, per (start, eind, locatie)."""
+
+    def __init__(self, max_workers=ERA5_WORKERS):
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='era5')
+        self._jobs = {}
+
+    def _is_stale(self, started, future):
+        if not future.done():
+            return False
+        df_hist, _ = future.result()
+        max_age = ERA5_RETRY_SECONDS if df_hist.empty else ERA5_TTL_SECONDS
+        return time.monotonic() - started >= max_age
+
+    def _job(self, start_date_str, end_date_str, location, restart_stale=True):
+        """(gestart, Future) van de download; gestart als die nog niet loopt (of, met restart_stale, verouderd is)."""
+        key = (start_date_str, end_date_str, location)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or (restart_stale and self._is_stale(*job)):
+                job = self._jobs[key] = (
+                    time.monotonic(),
+                    self._executor.submit(download_shared, start_date_str, end_date_str, location),
+                )
+            return job
+
+    def submit(self, start_date_str, end_date_str, location):
+        """Start de download als die nog niet loopt (of verouderd is); geeft de Future terug."""
+        return self._job(start_date_str, end_date_str, location)[1]
+
+    def result(self, start_date_str, end_date_str, location):
+        """(df_hist, status) van de locatie; wacht zo nodig op de (lopende) download."""
+        return self.submit(start_date_str, end_date_str, location).result()
+
+    def progress(self, start_date_str, end_date_str, location):
+        """
+        ('pending', seconden bezig) tijdens de download, daarna de status van de download.
+        Heeft een andere sessie de download intussen vergeten (forget), dan wordt die opnieuw gestart.
+        """
+        started, future = self._job(start_date_str, end_date_str, location, restart_stale=False)
+        if not future.done():
+            return 'pending', time.monotonic() - started
+        return future.result()[1]
+
+    def forget(self):
+        """Vergeet afgeronde downloads (Herlaad Data); lopende downloads blijven doorgaan."""
+        with self._lock:
+            self._jobs = {key: job for key, job in self._jobs.items() if not job[1].done()}
+
+
+@st.cache_resource
+def get_era5_fetcher():
+    """Eén Era5Fetcher per serverproces."""
+    return Era5Fetcher()
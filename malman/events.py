@@ -0,0 +1,365 @@
+"""
+Weergebeurtenissen uit de 10-minuten reeks: luchtdruktendens en een catalogus per station.
+
+Per station (rijen gesorteerd op tijd, QC gemaskeerd) krijgt elke meting een voorwaarde per type:
+
+    storm      3-uurs luchtdruktendens <= STORM_TENDENCY_HPA (snelle daling: stormwaarschuwing)
+    vorst      temperatuur <= FROST_TEMP_C 's nachts (NIGHT_START_HOUR tot NIGHT_END_HOUR lokale tijd)
+    mist       temperatuur - dauwpunt <= FOG_SPREAD_C (dauw- of mistrisico)
+    helder     helderheid (instraling / heldere hemel, zie malman/derived.py) >= CLEAR_SKY_INDEX
+    bewolkt    helderheid <= OVERCAST_INDEX (helderheid bestaat alleen overdag)
+
+Een gebeurtenis is een aaneengesloten reeks metingen die aan de voorwaarde voldoen;
+een gat van meer dan EVENT_MAX_GAP breekt de reeks, en korter dan de minimale duur
+van het type telt niet. Alles is gevectoriseerd: de tendens is één np.searchsorted
+op de epoch, de reeksen volgen uit np.diff en begin, einde en extreemwaarde uit
+np.*.reduceat.
+
+De catalogus wordt incrementeel bijgewerkt (EventCatalog.update): alleen de nieuwe
+rijen worden bekeken, teruggaand tot het begin van gebeurtenissen die nog liepen
+(plus EVENT_CONTEXT voor de tendens). Eén EventStore per serverproces
+(st.cache_resource) deelt de catalogi tussen alle sessies.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from plotly.subplots import make_subplots
+
+from malman.localtime import day_start_ns, epoch_window_mask, frame_local_days
+from malman.profiling import note_cache_miss
+from malman.quality import CADENCE, masked_values
+
+# Luchtdruktendens over de voorgaande TENDENCY_HOURS uur; de meting van toen mag
+# TENDENCY_TOLERANCE van het exacte tijdstip afwijken
+TENDENCY_HOURS = 3
+TENDENCY_TOLERANCE = CADENCE / 2
+
+# Klassen van de 3-uurs tendens (hPa), van snel dalend naar snel stijgend
+TENDENCY_BINS = [-np.inf, -6.0, -3.5, -1.5, -0.1, 0.1, 1.5, 3.5, 6.0, np.inf]
+TENDENCY_CLASSES = [
+    "Zeer snel dalend", "Snel dalend", "Dalend", "Langzaam dalend", "Constant",
+    "Langzaam stijgend", "Stijgend", "Snel stijgend", "Zeer snel stijgend",
+]
+
+STORM_TENDENCY_HPA = -3.5
+FROST_TEMP_C = 0.0
+FOG_SPREAD_C = 1.0
+CLEAR_SKY_INDEX = 0.75
+OVERCAST_INDEX = 0.3
+
+# Nacht in lokale kloktijd (voor de vorstnachten)
+NIGHT_START_HOUR = 18
+NIGHT_END_HOUR = 9
+
+# Een gat tot deze lengte onderbreekt een gebeurtenis niet
+EVENT_MAX_GAP = pd.Timedelta(minutes=30)
+
+# Type -> (omschrijving, eenheid van de waarde, reductie van de waarde, minimale duur)
+EVENT_TYPES = {
+    'storm': ("Stormwaarschuwing (snelle drukdaling)", "hPa/3u", 'min', pd.Timedelta(0)),
+    'vorst': ("Vorstnacht", "°C", 'min', pd.Timedelta(minutes=30)),
+    'mist': ("Mist-/dauwrisico", "°C", 'min', pd.Timedelta(hours=1)),
+    'helder': ("Heldere hemel", "-", 'mean', pd.Timedelta(hours=1)),
+    'bewolkt': ("Bewolkt", "-", 'mean', pd.Timedelta(hours=1)),
+}
+
+# Terugkijken bij een incrementele update: tendens plus de langste minimale duur
+EVENT_CONTEXT = pd.Timedelta(hours=TENDENCY_HOURS) + max(min_duration for *_, min_duration in EVENT_TYPES.values()) + CADENCE
+
+EVENT_COLUMNS = ['Station Naam', 'Type', 'Begin', 'Einde', 'Duur (uur)', 'Waarde']
+
+# Vensters voor de figuur en de lijst (dagen)
+EVENT_WINDOWS = {
+    "7 dagen": 7,
+    "30 dagen": 30,
+    "1 jaar": 365,
+}
+
+# Zoveel gebeurtenissen worden hoogstens als vlak in de figuur getekend
+EVENT_FIGURE_MAX_SHAPES = 150
+
+EVENT_COLORS = {
+    'storm': '#d62728',
+    'vorst': '#1f77b4',
+    'mist': '#7f7f7f',
+    'helder': '#ffbf00',
+    'bewolkt': '#8c564b',
+}
+
+
+def pressure_tendency(epoch_ns, pressure, hours=TENDENCY_HOURS, tolerance=TENDENCY_TOLERANCE):
+    """
+    Verandering van de druk (hPa) ten opzichte van de meting TENDENCY_HOURS uur eerder, per rij.
+    Verwacht de rijen van één station gesorteerd op tijd; NaN zonder (geldige) meting rond dat tijdstip.
+    """
+    n = len(epoch_ns)
+    if n == 0:
+        return np.empty(0)
+    target = epoch_ns - pd.Timedelta(hours=hours).value
+    after = np.clip(np.searchsorted(epoch_ns, target, side='left'), 0, n - 1)
+    before = np.clip(after - 1, 0, n - 1)
+    # De dichtstbijzijnde van de twee buren
+    nearest = np.where(np.abs(epoch_ns[before] - target) < np.abs(epoch_ns[after] - target), before, after)
+    matched = np.abs(epoch_ns[nearest] - target) <= tolerance.value
+    return np.where(matched, pressure - pressure[nearest], np.nan)
+
+
+def classify_tendency(tendency):
+    """Klasse (TENDENCY_CLASSES) van 3-uurs tendensen; None voor NaN."""
+    tendency = np.asarray(tendency, dtype=np.float64)
+    classes = np.array(TENDENCY_CLASSES, dtype=object)[np.clip(np.digitize(tendency, TENDENCY_BINS[1:-1]), 0, len(TENDENCY_CLASSES) - 1)]
+    return np.where(np.isnan(tendency), None, classes)
+
+
+def event_signals(df_station):
+    """
+    Per type de voorwaarde en de waarde per rij: {type: (voorwaarde, waarde)}.
+    Rijen waar de waarde NaN is (ontbreekt of verdacht) doen niet mee en breken een gebeurtenis niet.
+    """
+    def values(col):
+        if col not in df_station.columns:
+            return np.full(len(df_station), np.nan)
+        return masked_values(df_station, col).to_numpy(dtype=np.float64, na_value=np.nan)
+
+    epoch_ns = df_station['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    temp = values('temp')
+    tendency = pressure_tendency(epoch_ns, values('druk'))
+    spread = temp - values('dauwpunt')
+    clearness = values('helderheid')
+
+    # Uur van de lokale kloktijd: tijd sinds het begin van de lokale dag
+    hour = np.zeros(len(epoch_ns))
+    if len(epoch_ns):
+        hour = (epoch_ns - day_start_ns(frame_local_days(df_station), df_station['Timestamp_Local'].dt.tz)) / 3.6e12
+    night = (hour >= NIGHT_START_HOUR) | (hour < NIGHT_END_HOUR)
+
+    with np.errstate(invalid='ignore'):
+        return {
+            'storm': (tendency <= STORM_TENDENCY_HPA, tendency),
+            'vorst': (night & (temp <= FROST_TEMP_C), temp),
+            'mist': (spread <= FOG_SPREAD_C, spread),
+            'helder': (clearness >= CLEAR_SKY_INDEX, clearness),
+            'bewolkt': (clearness <= OVERCAST_INDEX, clearness),
+        }
+
+
+_REDUCTIONS = {'min': np.minimum, 'max': np.maximum}
+
+
+def _runs(epoch_ns, condition, values, reduction, min_duration, max_gap=EVENT_MAX_GAP):
+    """(begin_ns, einde_ns, waarde) van de aaneengesloten reeksen waar condition geldt."""
+    valid = ~np.isnan(values)
+    times, values = epoch_ns[valid], values[valid]
+    rows = np.flatnonzero(condition[valid])
+    if len(rows) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+    run_times = times[rows]
+    new_run = np.ones(len(rows), dtype=bool)
+    new_run[1:] = (np.diff(rows) > 1) | (np.diff(run_times) > max_gap.value)
+    starts = np.flatnonzero(new_run)
+    ends = np.append(starts[1:], len(rows)) - 1
+
+    run_values = values[rows]
+    if reduction == 'mean':
+        value = np.add.reduceat(run_values, starts) / (ends - starts + 1)
+    else:
+        value = _REDUCTIONS[reduction].reduceat(run_values, starts)
+
+    begin, end = run_times[starts], run_times[ends]
+    # Elke meting staat voor één meetinterval
+    long_enough = end - begin + CADENCE.value >= min_duration.value
+    return begin[long_enough], end[long_enough], value[long_enough]
+
+
+def detect_events(df_station, station_name=None):
+    """Alle gebeurtenissen van één station (rijen gesorteerd op Timestamp_UTC) als DataFrame met EVENT_COLUMNS."""
+    epoch_ns = df_station['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    tz = df_station['Timestamp_Local'].dt.tz
+    parts = []
+    for kind, (condition, values) in event_signals(df_station).items():
+        _, _, reduction, min_duration = EVENT_TYPES[kind]
+        begin, end, value = _runs(epoch_ns, condition, values, reduction, min_duration)
+        parts.append(pd.DataFrame({
+            'Type': kind,
+            'Begin': pd.to_datetime(begin, unit='ns', utc=True).tz_convert(tz),
+            'Einde': pd.to_datetime(end, unit='ns', utc=True).tz_convert(tz),
+            'Duur (uur)': (end - begin + CADENCE.value) / 3.6e12,
+            'Waarde': value,
+        }))
+    df_events = pd.concat(parts, ignore_index=True)
+    df_events.insert(0, 'Station Naam', station_name)
+    return df_events.sort_values(['Begin', 'Type'], kind='stable', ignore_index=True)
+
+
+class EventCatalog:
+    """Gebeurtenissen van één station, incrementeel bijgewerkt bij nieuwe rijen."""
+
+    def __init__(self, station_name):
+        self.station_name = station_name
+        self.lock = threading.Lock()
+        self.events = pd.DataFrame(columns=EVENT_COLUMNS)
+        self.versions = None
+        self.processed_until = None  # Epoch (ns) van de laatst verwerkte rij
+        self.processed_rows = 0
+
+    def _is_extension(self, epoch_ns, versions):
+        """
+        Alleen nieuwe rijen achteraan: de eerdere jaarbestanden zijn ongewijzigd (alleen het laatst
+        verwerkte jaar mag gegroeid zijn) en er zijn evenveel rijen tot de laatst verwerkte.
+        """
+        if self.processed_until is None:
+            return False
+        previous = dict(self.versions or ())
+        current = dict(versions)
+        last_year = max(previous, default=None)
+        if any(current.get(year) != version for year, version in previous.items() if year != last_year):
+            return False
+        return int(np.searchsorted(epoch_ns, self.processed_until, side='right')) == self.processed_rows
+
+    def update(self, df_station, versions=()):
+        """
+        Werkt de catalogus bij met df_station: alle rijen van het station, gesorteerd op tijd.
+        versions: ((jaar, versie), ...) van de bronbestanden; een gewijzigd ouder jaar geeft een volledige herberekening.
+        """
+        epoch_ns = df_station['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+        if len(epoch_ns) == 0:
+            return self.events
+
+        if not self._is_extension(epoch_ns, versions):
+            self.events = detect_events(df_station, self.station_name)
+        elif epoch_ns[-1] > self.processed_until:
+            # Gebeurtenissen tot aan de laatst verwerkte rij kunnen doorlopen: vanaf hun begin opnieuw
+            rewind = self.processed_until + 1
+            ends = self.events['Einde'].to_numpy('datetime64[ns]').view(np.int64)
+            running = ends >= self.processed_until - EVENT_MAX_GAP.value
+            if running.any():
+                rewind = min(rewind, int(self.events['Begin'].to_numpy('datetime64[ns]').view(np.int64)[running].min()))
+            lo = int(np.searchsorted(epoch_ns, rewind - EVENT_CONTEXT.value, side='left'))
+            df_new = detect_events(df_station.iloc[lo:], self.station_name)
+            new_ends = df_new['Einde'].to_numpy('datetime64[ns]').view(np.int64)
+            self.events = pd.concat([
+                self.events[ends < rewind], df_new[new_ends >= rewind],
+            ], ignore_index=True).sort_values(['Begin', 'Type'], kind='stable', ignore_index=True)
+
+        self.versions = tuple(versions)
+        self.processed_until = int(epoch_ns[-1])
+        self.processed_rows = len(epoch_ns)
+        return self.events
+
+
+class EventStore:
+    """Gedeelde catalogi voor alle sessies in dit serverproces, per station en locatie."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._catalogs = {}
+
+    def events(self, station_name, df_station, versions=(), location=None):
+        key = (station_name, location)
+        with self._lock:
+            catalog = self._catalogs.get(key)
+            if catalog is None:
+                catalog = self._catalogs[key] = EventCatalog(station_name)
+        with catalog.lock:
+            return catalog.update(df_station, versions).copy()
+
+
+@st.cache_resource
+def get_event_store():
+    """Eén EventStore per serverproces."""
+    return EventStore()
+
+
+def station_rows(df_combined, station_name):
+    """De rijen van één station, gesorteerd op Timestamp_UTC."""
+    df_station = df_combined[df_combined['Station Naam'] == station_name]
+    epoch_ns = df_station['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    if len(epoch_ns) > 1 and (np.diff(epoch_ns) < 0).any():
+        df_station = df_station.sort_values('Timestamp_UTC', kind='stable')
+    return df_station
+
+
+def summarize_events(df_events):
+    """Aantal gebeurtenissen en totale duur (uur) per station en type."""
+    summary = df_events.groupby(['Station Naam', 'Type'], sort=True).agg(
+        Aantal=('Begin', 'size'), Uren=('Duur (uur)', 'sum'),
+    )
+    return summary.reset_index()
+
+
+def station_tendency(df_station):
+    """3-uurs luchtdruktendens van de (QC gemaskeerde) druk voor alle rijen van één station."""
+    epoch_ns = df_station['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    return pressure_tendency(epoch_ns, masked_values(df_station, 'druk').to_numpy(dtype=np.float64, na_value=np.nan))
+
+
+def build_event_figure(df_window, tendency, df_events, station_name, event_types=tuple(EVENT_TYPES)):
+    """
+    Twee panelen voor één station: luchtdruk en de 3-uurs tendens (met de stormdrempel),
+    met de gebeurtenissen van event_types als gekleurde vlakken.
+    """
+    fig = make_subplots(
+        rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08, row_heights=[0.6, 0.4],
+        subplot_titles=(f"Luchtdruk {station_name} (hPa)", f"{TENDENCY_HOURS}-uurs luchtdruktendens (hPa)"),
+    )
+    # Lokale kloktijd zonder tijdzone (zie build_comparison_figure)
+    x = df_window['Timestamp_Local'].dt.tz_localize(None).to_numpy()
+    fig.add_trace(go.Scattergl(
+        x=x, y=masked_values(df_window, 'druk').to_numpy(dtype=np.float64, na_value=np.nan), mode='lines',
+        name='Luchtdruk', connectgaps=False, line=dict(width=1),
+        hovertemplate="%{y:.1f} hPa<extra></extra>",
+    ), row=1, col=1)
+    fig.add_trace(go.Scattergl(
+        x=x, y=tendency, mode='lines', name='Tendens', connectgaps=False, line=dict(width=1, color='#9467bd'),
+        hovertemplate="%{y:+.1f} hPa/3u<extra></extra>",
+    ), row=2, col=1)
+    fig.add_hline(y=0, line_width=1, line_color='grey', row=2, col=1)
+    fig.add_hline(y=STORM_TENDENCY_HPA, line_width=1, line_dash='dash', line_color=EVENT_COLORS['storm'], row=2, col=1)
+
+    # Alle vlakken in één keer (add_vrect per gebeurtenis valideert de hele layout telkens opnieuw)
+    df_shapes = df_events[df_events['Type'].isin(event_types)].tail(EVENT_FIGURE_MAX_SHAPES)
+    shapes = [
+        dict(
+            type='rect', xref='x', yref='paper', y0=0, y1=1, layer='below', line_width=0, opacity=0.2,
+            x0=begin.tz_localize(None), x1=(end + CADENCE).tz_localize(None), fillcolor=EVENT_COLORS[kind],
+        )
+        for kind, begin, end in zip(df_shapes['Type'], df_shapes['Begin'], df_shapes['Einde'])
+    ]
+    fig.update_layout(shapes=list(fig.layout.shapes) + shapes, height=650, showlegend=False, hovermode='x unified', margin=dict(t=40))
+    fig.update_xaxes(hoverformat="%d-%m-%Y %H:%M")
+    return fig
+
+
+# -------------------------------------------------------------------
+# Gecachte varianten (gesleuteld op de dataversie; het DataFrame wordt niet gehasht)
+# -------------------------------------------------------------------
+@st.cache_data(show_spinner=False, max_entries=16)
+def compute_station_events(_df_combined, data_version, station_name, versions=(), location=None):
+    """
+    Catalogus van één station uit de gedeelde EventStore. Bij een nieuwe dataversie met alleen
+    nieuwe rijen worden alleen die rijen bekeken; daarna is elke rerun een cache hit.
+    """
+    note_cache_miss('compute_station_events')
+    return get_event_store().events(station_name, station_rows(_df_combined, station_name), versions, location)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def compute_event_view(_df_combined, data_version, station_name, window_days, event_types, versions=(), location=None):
+    """
+    De laatste window_days dagen van één station: (figuur, gebeurtenissen in het venster, laatste tendens).
+    """
+    note_cache_miss('compute_event_view')
+    df_station = station_rows(_df_combined, station_name)
+    df_events = compute_station_events(_df_combined, data_version, station_name, versions, location)
+    tendency = station_tendency(df_station)
+    latest = tendency[~np.isnan(tendency)][-1:]
+
+    start = df_station['Timestamp_UTC'].max() - pd.Timedelta(days=window_days)
+    in_window = epoch_window_mask(df_station, start)
+    df_window_events = df_events[(df_events['Einde'] >= start) & df_events['Type'].isin(event_types)]
+    fig = build_event_figure(df_station[in_window], tendency[in_window], df_window_events, station_name, event_types)
+    return fig, df_window_events, (float(latest[0]) if len(latest) else None)
@@ -0,0 +1,203 @@
+"""
+Export van de 10-minuten data als CSV of Parquet, in stukken.
+
+De export wordt nooit als één DataFrame of één CSV tekst opgebouwd: een
+generator levert stukken van EXPORT_CHUNK_ROWS rijen en een schrijver zet
+elk stuk direct in het doelbestand (CSV met één kopregel, Parquet met één
+row group per stuk). De stukken komen uit
+
+    - het memory-mapped archief (iter_archive_chunks): alleen de rijen van
+      het gevraagde tijdsbereik worden per stuk uit de memmaps gekopieerd;
+    - het al geladen frame van de app (iter_frame_chunks): stukken zijn
+      rijselecties van dat frame.
+
+In de app wordt het bestand pas gemaakt als op de downloadknop geklikt wordt.
+Streamlit houdt het afgeronde bestand zelf in het geheugen om het aan te
+bieden; de app exporteert daarom hoogstens EXPORT_APP_MAX_ROWS rijen (het
+gekozen tijdsvenster; ruim een jaar van twee stations). Grotere downloads, tot
+de volledige historie, streamt de API (/export, zie malman/api.py) stuk voor
+stuk naar de browser; met WEER_API_URL (het adres van de API zoals de browser
+het ziet) toont de app daar een link naar. Op de server zelf schrijft de
+commandoregel de stukken uit het archief rechtstreeks naar schijf:
+
+    python -m malman.export --format parquet --out malman.parquet
+    python -m malman.export --stations 2308LH047 --start 2025-01-01 --end 2025-12-31 --columns temp,druk --out 2025.csv
+
+Parquet vraagt pyarrow; zonder pyarrow is alleen CSV beschikbaar.
+"""
+import argparse
+import os
+import tempfile
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+from malman.core import (
+    GITHUB_BASE_URL, START_YEAR, TARGET_TIMEZONE, PLOT_COLS,
+    discover_available_years, get_station_file_versions, load_station_registry, station_location,
+)
+from malman.archive import ARCHIVE_DIR, archive_enabled, archive_row_range, read_archive_rows, sync_station_archive
+from malman.localtime import epoch_window_mask
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export niet beschikbaar
+    pa = pq = None
+
+# Rijen per stuk (±50k rijen × 20 kolommen ≈ 8 MB)
+EXPORT_CHUNK_ROWS = 50_000
+
+# Tot deze grootte blijft het exportbestand van de app in het geheugen, daarboven op schijf
+EXPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
+# Grootste export via de app (±25 MB CSV; een jaar van twee stations is ±105k rijen); daarboven de API of de commandoregel
+EXPORT_APP_MAX_ROWS = 150_000
+
+# Adres van de API (python -m malman.api) zoals de browser het bereikt; leeg = geen gestreamde download in de app
+EXPORT_API_URL = os.environ.get("WEER_API_URL", "")
+
+EXPORT_CLI_HINT = "python -m malman.export --stations <ID> --start YYYY-MM-DD --end YYYY-MM-DD --out bestand.parquet"
+
+# Kolommen die elke export vooraan heeft
+EXPORT_BASE_COLS = ['Station Naam', 'Timestamp_UTC', 'Timestamp_Local']
+
+# Formaat -> (bestandsextensie, MIME type)
+EXPORT_FORMATS = {'CSV': ('csv', 'text/csv')}
+if pq is not None:
+    EXPORT_FORMATS['Parquet'] = ('parquet', 'application/vnd.apache.parquet')
+
+
+def iter_frame_chunks(df, columns, start=None, end=None, chunk_rows=EXPORT_CHUNK_ROWS, stations=None):
+    """
+    Stukken van een geladen frame (met 'Station Naam' en Timestamp_Local) binnen [start, end],
+    met stations (namen) alleen die stations.
+    Levert altijd minstens één (eventueel leeg) stuk, zodat ook een lege export een kopregel heeft.
+    """
+    keep = epoch_window_mask(df, start, end)
+    if stations is not None:
+        keep &= df['Station Naam'].isin(stations).to_numpy()
+    positions = np.flatnonzero(keep)
+
+    export_cols = EXPORT_BASE_COLS + list(columns)
+    for offset in range(0, max(len(positions), 1), chunk_rows):
+        yield df.iloc[positions[offset:offset + chunk_rows]][export_cols]
+
+
+def iter_archive_chunks(stations, columns, start=None, end=None, chunk_rows=EXPORT_CHUNK_ROWS,
+                        target_timezone=TARGET_TIMEZONE, archive_dir=ARCHIVE_DIR):
+    """
+    Stukken uit het archief, station na station. stations: (station_id, station_naam, archiefversie).
+    Levert altijd minstens één (eventueel leeg) stuk.
+    """
+    empty = True
+    for station_id, station_name, version in stations:
+        lo, hi = archive_row_range(station_id, version, start, end, archive_dir)
+        for chunk_lo in range(lo, hi, chunk_rows):
+            chunk_hi = min(chunk_lo + chunk_rows, hi)
+            df_chunk = read_archive_rows(station_id, version, chunk_lo, chunk_hi, list(columns), target_timezone, archive_dir)
+            df_chunk.insert(0, 'Station Naam', station_name)
+            empty = False
+            yield df_chunk
+    if empty:
+        yield pd.DataFrame({col: pd.Series(dtype=np.float64) for col in EXPORT_BASE_COLS + list(columns)})
+
+
+def write_export(chunks, file, export_format):
+    """Schrijft de stukken naar een binair bestand(sobject) als 'CSV' of 'Parquet'; geeft het aantal rijen."""
+    rows = 0
+    if export_format == 'CSV':
+        header = True
+        for df_chunk in chunks:
+            file.write(df_chunk.to_csv(index=False, header=header, date_format='%Y-%m-%dT%H:%M:%S%z').encode('utf-8'))
+            header = False
+            rows += len(df_chunk)
+        return rows
+
+    if pq is None:
+        raise ValueError("Parquet export vraagt pyarrow.")
+    writer = None
+    try:
+        for df_chunk in chunks:
+            table = pa.Table.from_pandas(df_chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(file, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(df_chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def export_bytes(chunks, export_format, spool_bytes=EXPORT_SPOOL_BYTES):
+    """
+    De export als bytes (voor st.download_button, die het hele bestand nodig heeft; daarom begrensd
+    door EXPORT_APP_MAX_ROWS). De stukken gaan eerst naar een tijdelijk bestand (boven spool_bytes op
+    schijf), zodat alleen het eindresultaat één keer in het geheugen komt. Gestreamd: zie export_api_url.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=spool_bytes) as file:
+        write_export(chunks, file, export_format)
+        file.seek(0)
+        return file.read()
+
+
+def export_api_url(api_url, station_ids, columns, export_format, start=None, end=None):
+    """Link naar /export van de API (gestreamd, zonder limiet); start en end zijn datums (lokaal, einde inclusief)."""
+    query = {'station': ','.join(station_ids), 'columns': ','.join(columns), 'format': EXPORT_FORMATS[export_format][0]}
+    if start is not None:
+        query['start'] = f"{start:%Y-%m-%d}"
+    if end is not None:
+        query['end'] = f"{end:%Y-%m-%d}"
+    return f"{api_url.rstrip('/')}/export?{urlencode(query)}"
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m malman.export', description="Exporteer de 10-minuten data (CSV of Parquet).")
+    parser.add_argument('--out', required=True, help="Doelbestand")
+    parser.add_argument('--format', choices=[fmt.lower() for fmt in EXPORT_FORMATS], help="Standaard volgens de extensie van --out")
+    parser.add_argument('--stations', help="Komma-gescheiden station-ID's (standaard alle stations)")
+    parser.add_argument('--columns', help=f"Komma-gescheiden kolommen (standaard alle: {', '.join(PLOT_COLS)})")
+    parser.add_argument('--start', help="Startdatum (YYYY-MM-DD, lokale tijd)")
+    parser.add_argument('--end', help="Einddatum (YYYY-MM-DD, lokale tijd, inclusief)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    if not archive_enabled():
+        raise SystemExit("WEER_ARCHIVE_DIR is leeg: de export leest uit het archief.")
+
+    registry = load_station_registry()
+    station_ids = args.stations.split(',') if args.stations else list(registry)
+    unknown = [station_id for station_id in station_ids if station_id not in registry]
+    if unknown:
+        raise SystemExit(f"Onbekende stations: {', '.join(unknown)}")
+    columns = args.columns.split(',') if args.columns else PLOT_COLS
+    unknown = [col for col in columns if col not in PLOT_COLS]
+    if unknown:
+        raise SystemExit(f"Onbekende kolommen: {', '.join(unknown)}")
+
+    extension = (args.format or args.out.rsplit('.', 1)[-1]).lower()
+    if extension == 'parquet' and 'Parquet' not in EXPORT_FORMATS:
+        raise SystemExit("Parquet export vraagt pyarrow.")
+    export_format = 'Parquet' if extension == 'parquet' else 'CSV'
+    start = pd.Timestamp(args.start).tz_localize(TARGET_TIMEZONE) if args.start else None
+    end = pd.Timestamp(args.end).tz_localize(TARGET_TIMEZONE) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1) if args.end else None
+
+    stations = []
+    for station_id in station_ids:
+        station_info = registry[station_id]
+        years = discover_available_years(station_info.get('start_jaar', START_YEAR), station_id, GITHUB_BASE_URL)
+        versions = get_station_file_versions(station_id, tuple(years), GITHUB_BASE_URL)
+        version = sync_station_archive(station_id, versions, location=station_location(station_info))
+        stations.append((station_id, station_info['naam'], version))
+
+    with open(args.out, 'wb') as file:
+        rows = write_export(iter_archive_chunks(stations, columns, start, end), file, export_format)
+    print(f"{rows} rijen ({export_format}) geschreven naar {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Live modus: leest alleen de staart (nieuwe regels) van het jaarbestand van het huidige jaar.
+
+Eén LiveFeed per serverproces (via st.cache_resource) wordt door alle open
+dashboards gedeeld. Elk station wordt hoogstens eens per LIVE_POLL_SECONDS
+bevraagd; daarbij worden alleen de bytes na de vorige leespositie opgehaald
+(HTTP Range request op GitHub, of seek() op een lokaal bestand in weatherdata/).
+De historie wordt dus nooit opnieuw geladen of herberekend.
+"""
+import datetime
+import os
+import threading
+import time
+from io import StringIO
+
+import pandas as pd
+import requests
+import streamlit as st
+
+from malman.core import parse_weather_frame
+from malman.derived import add_derived_columns
+from malman.quality import append_checked
+
+# Hoe vaak het dashboard ververst en hoe vaak een bron werkelijk bevraagd wordt
+LIVE_REFRESH_SECONDS = 60
+LIVE_POLL_SECONDS = 60
+
+# Bij de eerste poll wordt het laatste stuk van het bestand gelezen (±24 uur aan 10-minuten regels)
+INITIAL_TAIL_BYTES = 64 * 1024
+
+# Voor de kopregel wordt alleen het begin van het bestand gelezen
+HEADER_MAX_BYTES = 4096
+
+# Hoeveel uur aan live regels per station bewaard blijft
+LIVE_WINDOW_HOURS = 26
+
+
+def _is_remote(url):
+    return url.startswith('http://') or url.startswith('https://')
+
+
+def _read_from(url, start, length=None):
+    """
+    Leest de bytes vanaf positie start (negatief = laatste |start| bytes), met length hoogstens
+    zoveel bytes. Geeft (data, begin_positie, totale_grootte) terug.
+    """
+    if not _is_remote(url):
+        if not os.path.exists(url):
+            return b"", 0, 0
+        total_size = os.path.getsize(url)
+        begin = max(0, total_size + start) if start < 0 else start
+        with open(url, 'rb') as f:
+            f.seek(begin)
+            return f.read(-1 if length is None else length), begin, total_size
+
+    if start < 0:
+        range_header = f"bytes={start}"
+    else:
+        range_header = f"bytes={start}-" if length is None else f"bytes={start}-{start + length - 1}"
+    response = requests.get(url, headers={'Range': range_header, 'Accept-Encoding': 'identity'}, timeout=15)
+
+    if response.status_code == 416:  # Niets nieuws sinds de vorige leespositie
+        return b"", start, start
+    response.raise_for_status()
+
+    if response.status_code == 206:
+        # Content-Range: bytes begin-eind/totaal
+        range_part, _, total_part = response.headers.get('Content-Range', '').partition('/')
+        begin = int(range_part.split(' ')[-1].split('-')[0])
+        total_size = int(total_part) if total_part.isdigit() else begin + len(response.content)
+        return response.content, begin, total_size
+
+    # De server negeert Range en stuurt het hele bestand
+    content = response.content
+    total_size = len(content)
+    begin = max(0, total_size + start) if start < 0 else min(start, total_size)
+    end = total_size if length is None else begin + length
+    return content[begin:end], begin, total_size
+
+
+class _TailSource:
+    """Leespositie en recente regels van één stationsbestand."""
+
+    def __init__(self, station_id, base_url, target_timezone, location=None):
+        self.station_id = station_id
+        self.base_url = base_url
+        self.target_timezone = target_timezone
+        self.location = location
+        self.lock = threading.Lock()
+        self.year = None
+        self.offset = None
+        self.header = None
+        self.rows = pd.DataFrame()
+        self.last_poll = 0.0
+        self.last_error = None
+
+    def _url(self):
+        return f"{self.base_url}{self.station_id}/weather_{self.year}.csv"
+
+    def refresh(self):
+        current_year = datetime.datetime.now(datetime.timezone.utc).year
+        if current_year != self.year:
+            # Nieuw jaarbestand: opnieuw beginnen met een staart-lezing
+            self.year = current_year
+            self.offset = None
+            self.header = None
+
+        url = self._url()
+        if self.header is None:
+            head, _, total_size = _read_from(url, 0, HEADER_MAX_BYTES)
+            if not head:
+                return
+            if b'\n' not in head and total_size > len(head):
+                raise ValueError(f"Kopregel van {url} is langer dan {HEADER_MAX_BYTES} bytes")
+            self.header = head.split(b'\n', 1)[0].decode('utf-8').strip()
+
+        if self.offset is None:
+            data, begin, _ = _read_from(url, -INITIAL_TAIL_BYTES)
+            if begin > 0:
+                # Eerste (afgebroken) regel overslaan
+                skipped = data.find(b'\n') + 1
+                data, begin = data[skipped:], begin + skipped
+            elif data.startswith(self.header.encode('utf-8')):
+                skipped = data.find(b'\n') + 1
+                data, begin = data[skipped:], begin + skipped
+        else:
+            data, begin, _ = _read_from(url, self.offset)
+
+        # Alleen volledige regels verwerken; een half geschreven laatste regel volgt bij de volgende poll
+        complete = data[:data.rfind(b'\n') + 1] if b'\n' in data else b""
+        self.offset = begin + len(complete)
+        if not complete.strip():
+            return
+
+        df_new = pd.read_csv(StringIO(self.header + '\n' + complete.decode('utf-8', errors='replace')), sep=';', on_bad_lines='skip')
+        df_new = parse_weather_frame(df_new, self.target_timezone).sort_values('Timestamp_UTC', kind='stable')
+        df_new = add_derived_columns(df_new.reset_index(drop=True), self.location)
+
+        # Incrementele QC: alleen de nieuwe regels (en de naad met de vorige poll) worden gecontroleerd
+        rows = append_checked(self.rows, df_new)
+        cutoff = rows['Timestamp_Local'].max() - pd.Timedelta(hours=LIVE_WINDOW_HOURS)
+        self.rows = rows[rows['Timestamp_Local'] >= cutoff].reset_index(drop=True)
+
+
+class LiveFeed:
+    """Gedeelde staart-lezer voor alle sessies in dit serverproces."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources = {}
+
+    def poll(self, station_id, base_url, target_timezone, location=None, min_interval=LIVE_POLL_SECONDS):
+        """Geeft de recente regels van een station; leest de bron alleen als de vorige poll oud genoeg is."""
+        key = (station_id, base_url, target_timezone, location)
+        with self._lock:
+            source = self._sources.get(key)
+            if source is None:
+                source = self._sources[key] = _TailSource(station_id, base_url, target_timezone, location)
+
+        with source.lock:
+            if time.monotonic() - source.last_poll >= min_interval:
+                try:
+                    source.refresh()
+                    source.last_error = None
+                except Exception as e:
+                    source.last_error = str(e)
+                source.last_poll = time.monotonic()
+            return source.rows, source.last_error
+
+
+@st.cache_resource
+def get_live_feed():
+    """Eén LiveFeed per serverproces."""
+    return LiveFeed()
+
+
+def append_live_rows(filtered_df, live_frames, window_start=None):
+    """
+    Voegt per station alleen de live regels toe die nieuwer zijn dan de geladen data.
+    live_frames: dict van 'Station Naam' naar het DataFrame uit LiveFeed.poll().
+    Met window_start wordt het venster (bv. 'Laatste 24 uur') mee opgeschoven.
+    """
+    new_parts = []
+    for station_name, df_live in live_frames.items():
+        if df_live.empty:
+            continue
+        df_station = filtered_df[filtered_df['Station Naam'] == station_name]
+        last_loaded = df_station['Timestamp_Local'].max() if not df_station.empty else None
+        df_new = df_live if last_loaded is None else df_live[df_live['Timestamp_Local'] > last_loaded]
+        if not df_new.empty:
+            df_new = df_new.copy()
+            df_new['Station Naam'] = station_name
+            new_parts.append(df_new)
+
+    view_df = pd.concat([filtered_df] + new_parts, ignore_index=True) if new_parts else filtered_df
+    if window_start is not None:
+        view_df = view_df[view_df['Timestamp_Local'] >= window_start]
+    return view_df
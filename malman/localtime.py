@@ -0,0 +1,157 @@
+"""
+Lokale dagen als gehele getallen.
+
+Elke meting krijgt bij het inlezen een dagnummer LOCAL_DAY_COL (int32): het
+aantal dagen sinds 1970-01-01 in lokale kloktijd. Het volgt uit de UTC epoch
+met één np.searchsorted in een per tijdzone gecachte tabel met het begin (in
+UTC) van elke lokale dag. Er is dus geen tz-aware pandas bewerking nodig, en
+een dag rond de zomertijd is vanzelf 23 of 25 uur lang:
+
+    dagnummer d  <=>  dagbegin[d] <= epoch < dagbegin[d + 1]
+
+Dagen, maanden en kalenderdagen (schrikkeljaarkalender) zijn daarna gewone
+integer bewerkingen; groeperen gaat met np.bincount of np.*.reduceat over
+aaneengesloten groepen (group_starts).
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+LOCAL_DAY_COL = 'Local_Day'
+
+DAY_NS = 86_400 * 10**9
+
+# De tabel wordt per decennium opgebouwd, zodat alle data doorgaans één tabel deelt
+_TABLE_YEARS = 10
+
+# Eerste dag (0-based) van elke maand in een schrikkeljaar
+LEAP_MONTH_OFFSETS = np.concatenate(([0], np.cumsum([31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])))
+
+
+@functools.lru_cache(maxsize=64)
+def _day_start_table(tz, first_year, last_year):
+    """(dagnummer van 1 januari first_year, begin in UTC ns van elke lokale dag t/m 1 januari last_year + 1)."""
+    midnights = pd.date_range(f'{first_year}-01-01', f'{last_year + 1}-01-01', freq='D')
+    # Valt middernacht in een zomertijdsprong (niet in Europa), dan begint de dag bij de sprong
+    starts = midnights.tz_localize(tz, ambiguous=False, nonexistent='shift_forward').as_unit('ns').asi8.copy()
+    starts.flags.writeable = False
+    return int(np.datetime64(f'{first_year}-01-01', 'D').astype(np.int64)), starts
+
+
+def _table(tz, first_day, last_day):
+    """Tabel die dagen first_day t/m last_day + 1 dekt."""
+    years = np.array([first_day, last_day + 1], dtype='datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+    return _day_start_table(str(tz), int(years[0]) // _TABLE_YEARS * _TABLE_YEARS, int(years[1]) // _TABLE_YEARS * _TABLE_YEARS + _TABLE_YEARS - 1)
+
+
+def local_day_numbers(epoch_ns, tz):
+    """Lokaal dagnummer (int32, dagen sinds 1970-01-01) van UTC tijdstippen in ns."""
+    epoch_ns = np.asarray(epoch_ns, dtype=np.int64)
+    if len(epoch_ns) == 0:
+        return np.empty(0, dtype=np.int32)
+    # Lokale dag en UTC dag verschillen hoogstens één dag
+    first_day, starts = _table(tz, int(epoch_ns.min() // DAY_NS) - 1, int(epoch_ns.max() // DAY_NS) + 1)
+    return (first_day + np.searchsorted(starts, epoch_ns, side='right') - 1).astype(np.int32)
+
+
+def timestamp_local_days(timestamps):
+    """Lokaal dagnummer van een tz-aware Series of DatetimeIndex, in de eigen tijdzone."""
+    timestamps = pd.DatetimeIndex(timestamps)
+    return local_day_numbers(timestamps.as_unit('ns').asi8, timestamps.tz)
+
+
+def frame_local_days(df):
+    """LOCAL_DAY_COL van een frame met metingen; berekend uit Timestamp_Local als de kolom (nog) ontbreekt."""
+    if LOCAL_DAY_COL in df.columns:
+        return df[LOCAL_DAY_COL].to_numpy(dtype=np.int32)
+    return timestamp_local_days(df['Timestamp_Local'])
+
+
+def day_start_ns(days, tz):
+    """Begin (UTC ns) van lokale dagen."""
+    days = np.asarray(days, dtype=np.int64)
+    if len(days) == 0:
+        return np.empty(0, dtype=np.int64)
+    first_day, starts = _table(tz, int(days.min()), int(days.max()))
+    return starts[days - first_day]
+
+
+def day_starts(days, tz, unit='ns'):
+    """Lokale middernacht van elke dag als tz-aware DatetimeIndex (zoals Timestamp_Local.dt.normalize())."""
+    return pd.DatetimeIndex(day_start_ns(days, tz).view('datetime64[ns]')).tz_localize('UTC').tz_convert(tz).as_unit(unit)
+
+
+def day_lengths_ns(days, tz):
+    """Lengte (ns) van lokale dagen: 23, 24 of 25 uur."""
+    days = np.asarray(days, dtype=np.int64)
+    return day_start_ns(days + 1, tz) - day_start_ns(days, tz)
+
+
+def dates_to_days(dates):
+    """Dagnummer van datums (kloktijd; tz-aware of naïef, zoals de index van de dagelijkse samenvatting)."""
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    return dates.to_numpy().astype('datetime64[D]').astype(np.int64).astype(np.int32)
+
+
+def date_day_number(date):
+    """Dagnummer van één datum (datetime.date of Timestamp, kloktijd)."""
+    return int(np.datetime64(pd.Timestamp(date).date(), 'D').astype(np.int64))
+
+
+def day_strings(days):
+    """'YYYY-MM-DD' van dagnummers."""
+    return np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype(str)
+
+
+def month_numbers(days):
+    """Maandnummer (maanden sinds januari 1970) van dagnummers."""
+    return np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def month_starts(months):
+    """Eerste dag (naïef, zonder tijdzone) van maandnummers."""
+    return pd.DatetimeIndex(np.asarray(months, dtype=np.int64).astype('datetime64[M]').astype('datetime64[us]'))
+
+
+def calendar_fields(days):
+    """(jaar, maand 1-12, dag 1-31) van dagnummers, als integer arrays."""
+    dates = np.asarray(days, dtype=np.int64).astype('datetime64[D]')
+    months = dates.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    return (
+        years.astype(np.int64) + 1970,
+        (months - years).astype(np.int64) + 1,
+        (dates - months).astype(np.int64) + 1,
+    )
+
+
+def leap_day_of_year(days):
+    """Dagnummer (0-365) in de kalender van een schrikkeljaar; 1 maart is altijd dag 60."""
+    _, month, day = calendar_fields(days)
+    return LEAP_MONTH_OFFSETS[month - 1] + day - 1
+
+
+def group_starts(*keys):
+    """Beginposities van de aaneengesloten groepen in (gesorteerde) sleutelarrays, voor np.*.reduceat."""
+    n = len(keys[0])
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    change = np.zeros(n - 1, dtype=bool)
+    for key in keys:
+        key = np.asarray(key)
+        change |= key[1:] != key[:-1]
+    return np.concatenate(([0], np.flatnonzero(change) + 1))
+
+
+def epoch_window_mask(df, start=None, end=None):
+    """start <= tijdstip <= end (tz-aware Timestamps, None = open) als boolean array, op de UTC epoch."""
+    epoch_ns = df['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    mask = np.ones(len(epoch_ns), dtype=bool)
+    if start is not None:
+        mask &= epoch_ns >= pd.Timestamp(start).value
+    if end is not None:
+        mask &= epoch_ns <= pd.Timestamp(end).value
+    return mask
@@ -0,0 +1,144 @@
+"""
+Meting per rerun (wandkloktijd, cache hit/miss en aantal rijen per fase).
+
+Gebruik in het hoofdscript:
+
+    profiler = RerunProfiler(enabled=True, export='cProfile')
+    with profiler.stage("Data laden", cached=True) as stage:
+        df = load_data(...)
+        stage['rows'] = len(df)
+
+Gecachte functies roepen note_cache_miss() aan in hun body; die body draait
+alleen bij een cache miss. Zo weet de omringende fase of de cache geraakt werd.
+"""
+import contextvars
+import cProfile
+import io
+import pstats
+import time
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+import plotly.graph_objects as go
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # optionele afhankelijkheid
+    PyinstrumentProfiler = None
+
+EXPORT_OPTIONS = ["Geen", "cProfile", "pyinstrument"]
+
+# De actieve profiler van de huidige rerun (Streamlit draait elke sessie in een eigen thread)
+_active_profiler = contextvars.ContextVar('active_profiler', default=None)
+
+
+def note_cache_miss(name):
+    """Markeert dat de body van een gecachte functie werd uitgevoerd (cache miss)."""
+    profiler = _active_profiler.get()
+    if profiler is not None:
+        profiler.cache_misses.append(name)
+
+
+class RerunProfiler:
+    """Verzamelt de fasen van één rerun. Uitgeschakeld kost een fase vrijwel niets."""
+
+    def __init__(self, enabled=False, export="Geen"):
+        self.enabled = enabled
+        self.export = export if enabled else "Geen"
+        self.stages = []
+        self.cache_misses = []
+        self._t0 = time.perf_counter()
+        self._cprofile = None
+        self._pyinstrument = None
+        self._finished = False
+
+        # Zet ook bij uitgeschakelde meting de actieve profiler (terug naar None)
+        _active_profiler.set(self if enabled else None)
+        if not enabled:
+            return
+
+        if self.export == "cProfile":
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        elif self.export == "pyinstrument" and PyinstrumentProfiler is not None:
+            self._pyinstrument = PyinstrumentProfiler()
+            self._pyinstrument.start()
+
+    def stage(self, name, cached=False, rows=None):
+        """Context manager die één fase meet. Het gegeven dict mag 'rows' invullen."""
+        # Na finish() (bv. bij een fragment-rerun) wordt niets meer bijgehouden
+        if not self.enabled or self._finished:
+            return nullcontext({})
+        return self._measure(name, cached, rows)
+
+    @contextmanager
+    def _measure(self, name, cached, rows):
+        record = {'rows': rows}
+        misses_before = len(self.cache_misses)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            end = time.perf_counter()
+            if cached:
+                cache_status = 'miss' if len(self.cache_misses) > misses_before else 'hit'
+            else:
+                cache_status = '-'
+            self.stages.append({
+                'Fase': name,
+                'Start (ms)': (start - self._t0) * 1000,
+                'Duur (ms)': (end - start) * 1000,
+                'Cache': cache_status,
+                'Rijen': record.get('rows'),
+            })
+
+    def finish(self):
+        """Stopt de optionele profilers en geeft de export terug als (bestandsnaam, tekst) of None."""
+        if not self.enabled:
+            return None
+        self._finished = True
+        _active_profiler.set(None)
+
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            stream = io.StringIO()
+            pstats.Stats(self._cprofile, stream=stream).sort_stats('cumulative').print_stats(60)
+            return 'rerun_cprofile.txt', stream.getvalue()
+
+        if self._pyinstrument is not None:
+            self._pyinstrument.stop()
+            return 'rerun_pyinstrument.html', self._pyinstrument.output_html()
+
+        return None
+
+    def total_ms(self):
+        return (time.perf_counter() - self._t0) * 1000
+
+    def stages_frame(self):
+        """De gemeten fasen als DataFrame, in volgorde van uitvoering."""
+        df_stages = pd.DataFrame(self.stages, columns=['Fase', 'Start (ms)', 'Duur (ms)', 'Cache', 'Rijen'])
+        df_stages['Rijen'] = df_stages['Rijen'].astype('Int64')
+        return df_stages
+
+
+def build_waterfall_figure(df_stages):
+    """Bouwt een horizontale watervalgrafiek (start + duur per fase)."""
+    color_map = {'hit': '#2ca02c', 'miss': '#d62728', '-': '#1f77b4'}
+
+    fig = go.Figure(go.Bar(
+        y=df_stages['Fase'],
+        x=df_stages['Duur (ms)'],
+        base=df_stages['Start (ms)'],
+        orientation='h',
+        marker_color=[color_map.get(c, '#1f77b4') for c in df_stages['Cache']],
+        customdata=df_stages[['Cache', 'Rijen']].astype(object).where(df_stages[['Cache', 'Rijen']].notna(), '-').values,
+        hovertemplate="<b>%{y}</b><br>Duur: %{x:.1f} ms<br>Cache: %{customdata[0]}<br>Rijen: %{customdata[1]}<extra></extra>",
+    ))
+    fig.update_layout(
+        height=max(250, 28 * len(df_stages) + 80),
+        margin=dict(l=10, r=10, t=30, b=10),
+        xaxis_title='Tijd sinds start rerun (ms)',
+        yaxis=dict(autorange='reversed'),
+        showlegend=False,
+    )
+    return fig
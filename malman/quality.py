@@ -0,0 +1,194 @@
+"""
+Datakwaliteit (QC) bij het inlezen: vlaggen per rij en dekking per dag.
+
+Elke rij krijgt twee uint8 kolommen:
+
+    QC_Flags     bitmasker van FLAG_* (dubbel tijdstip, gat ervoor, piek, buiten bereik, lage batterij)
+    QC_Verdacht  bitmasker per kolom uit QC_COLUMNS (bit i = QC_COLUMNS[i] is een piek of buiten bereik)
+
+Alle controles zijn gevectoriseerd en kijken hoogstens één rij terug en één
+rij vooruit. Daardoor is de QC incrementeel: een nieuw stuk (jaarbestand of
+live staart) wordt apart gecontroleerd en daarna herberekent recheck_boundary
+alleen de twee rijen rond de naad. De historie wordt nooit opnieuw gescand.
+"""
+import numpy as np
+import pandas as pd
+
+from malman.derived import DERIVED_SOURCES
+from malman.localtime import frame_local_days, day_starts, day_lengths_ns, dates_to_days
+
+FLAG_DUPLICATE = 1      # Tijdstip gelijk aan dat van de vorige rij (de eerste telt)
+FLAG_GAP_BEFORE = 2     # Meer dan anderhalve meetinterval sinds de vorige rij
+FLAG_SPIKE = 4          # Minstens één kolom springt weg en weer terug
+FLAG_RANGE = 8          # Minstens één kolom buiten het fysisch mogelijke bereik
+FLAG_LOW_BATTERY = 16   # Batterijspanning onder LOW_BATTERY_VOLTAGE
+
+# Meetinterval van de loggers
+CADENCE = pd.Timedelta(minutes=10)
+GAP_THRESHOLD = CADENCE * 1.5
+
+LOW_BATTERY_VOLTAGE = 3.7
+
+# Kolommen met een eigen bit in QC_Verdacht (vaste volgorde)
+QC_COLUMNS = ['temp', 'dauwpunt', 'natbol', 'luchtvocht', 'druk', 'zoninstraling', 'battery']
+
+# Fysisch mogelijk bereik per kolom
+RANGE_LIMITS = {
+    'temp': (-50.0, 40.0),
+    'dauwpunt': (-60.0, 35.0),
+    'natbol': (-50.0, 35.0),
+    'luchtvocht': (0.0, 100.0),
+    'druk': (920.0, 1070.0),
+    'zoninstraling': (0.0, 1500.0),
+    'battery': (0.0, 6.0),
+}
+
+# Maximale sprong (per meetinterval) heen én terug voordat een waarde als piek geldt.
+# Zoninstraling en batterij hebben geen piektest (wolken geven echte sprongen).
+SPIKE_LIMITS = {
+    'temp': 4.0,
+    'dauwpunt': 4.0,
+    'natbol': 4.0,
+    'luchtvocht': 20.0,
+    'druk': 3.0,
+}
+
+# Dagen onder deze dekking tellen niet mee voor extremen en records
+MIN_DAY_COVERAGE = 0.8
+
+QC_FLAG_COLS = ['QC_Flags', 'QC_Verdacht']
+
+
+def quality_check(df):
+    """
+    Voegt QC_Flags en QC_Verdacht toe aan de rijen van één station (gesorteerd op Timestamp_UTC).
+    De laatste rij kan nog geen piek zijn (er is geen volgende waarde); recheck_boundary vult dat
+    aan zodra het volgende stuk er is.
+    """
+    n = len(df)
+    flags = np.zeros(n, dtype=np.uint8)
+    suspect = np.zeros(n, dtype=np.uint8)
+    if n == 0:
+        return df.assign(QC_Flags=flags, QC_Verdacht=suspect)
+
+    epoch = df['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    step = np.diff(epoch)
+    flags[1:][step == 0] |= FLAG_DUPLICATE
+    flags[1:][step > GAP_THRESHOLD.value] |= FLAG_GAP_BEFORE
+
+    for bit, col in enumerate(QC_COLUMNS):
+        if col not in df.columns:
+            continue
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        low, high = RANGE_LIMITS[col]
+        out_of_range = (values < low) | (values > high)
+        flags[out_of_range] |= FLAG_RANGE
+        suspect[out_of_range] |= np.uint8(1 << bit)
+
+        limit = SPIKE_LIMITS.get(col)
+        if limit is not None and n >= 3:
+            jump_in = values[1:-1] - values[:-2]
+            jump_out = values[1:-1] - values[2:]
+            spike = np.zeros(n, dtype=bool)
+            spike[1:-1] = (np.abs(jump_in) > limit) & (np.abs(jump_out) > limit) & (np.sign(jump_in) == np.sign(jump_out))
+            flags[spike] |= FLAG_SPIKE
+            suspect[spike] |= np.uint8(1 << bit)
+
+    if 'battery' in df.columns:
+        flags[(df['battery'] < LOW_BATTERY_VOLTAGE).to_numpy()] |= FLAG_LOW_BATTERY
+
+    return df.assign(QC_Flags=flags, QC_Verdacht=suspect)
+
+
+def recheck_boundary(df_before, df_after):
+    """
+    Herberekent (in place) de vlaggen van de laatste rij van df_before en de eerste rij van
+    df_after, twee aansluitende en al gecontroleerde stukken van hetzelfde station.
+    """
+    if df_before.empty or df_after.empty:
+        return
+    tail = df_before.tail(2)
+    block = pd.concat([tail, df_after.head(2)], ignore_index=True).drop(columns=QC_FLAG_COLS)
+    checked = quality_check(block)
+
+    for col in QC_FLAG_COLS:
+        position = df_before.columns.get_loc(col)
+        df_before.iloc[-1, position] = checked[col].iloc[len(tail) - 1]
+        position = df_after.columns.get_loc(col)
+        df_after.iloc[0, position] = checked[col].iloc[len(tail)]
+
+
+def append_checked(df_checked, df_new):
+    """Controleert alleen de nieuwe rijen (met de naad) en voegt ze achter de gecontroleerde rijen."""
+    df_new = quality_check(df_new)
+    if df_checked.empty:
+        return df_new
+    df_checked = df_checked.copy()
+    recheck_boundary(df_checked, df_new)
+    return pd.concat([df_checked, df_new], ignore_index=True)
+
+
+def masked_values(df, col):
+    """
+    Waarden van col zonder dubbele rijen en zonder verdachte waarden (NaN); ongewijzigd zonder QC.
+    Een afgeleide kolom is verdacht zodra één van haar bronkolommen (DERIVED_SOURCES) dat is.
+    """
+    sources = DERIVED_SOURCES.get(col, [col])
+    if 'QC_Flags' not in df.columns or not all(source in QC_COLUMNS for source in sources):
+        return df[col]
+    bits = np.uint8(sum(1 << QC_COLUMNS.index(source) for source in sources))
+    bad = ((df['QC_Flags'] & FLAG_DUPLICATE) != 0) | ((df['QC_Verdacht'] & bits) != 0)
+    return df[col].mask(bad)
+
+
+def expected_observations(days):
+    """Verwacht aantal metingen per lokale dag (23, 24 of 25 uur rond de zomertijd)."""
+    days = pd.DatetimeIndex(days)
+    return pd.Index(day_lengths_ns(dates_to_days(days), days.tz) // CADENCE.value)
+
+
+def build_daily_completeness(df_combined):
+    """
+    Dekking per station en lokale dag: waarnemingen (zonder dubbele rijen), verwacht aantal,
+    dekking (0-1) en het aantal gaten, pieken/bereikfouten en lage batterij metingen.
+    De tellingen zijn np.bincount over de groepen (station, LOCAL_DAY_COL).
+    """
+    flags = df_combined['QC_Flags'].to_numpy() if 'QC_Flags' in df_combined.columns else np.zeros(len(df_combined), dtype=np.uint8)
+    station_codes, stations = pd.factorize(df_combined['Station Naam'], sort=True)
+    days = frame_local_days(df_combined)
+    first_day = int(days.min()) if len(days) else 0
+    span = int(days.max()) - first_day + 1 if len(days) else 1
+    groups, group_rows = np.unique(station_codes.astype(np.int64) * span + (days - first_day), return_inverse=True)
+
+    counts = {
+        'Waarnemingen': (flags & FLAG_DUPLICATE) == 0,
+        'Gaten': (flags & FLAG_GAP_BEFORE) != 0,
+        'Verdacht': (flags & (FLAG_SPIKE | FLAG_RANGE)) != 0,
+        'Lage Batterij': (flags & FLAG_LOW_BATTERY) != 0,
+    }
+    group_days = groups % span + first_day
+    tz = df_combined['Timestamp_Local'].dt.tz
+    index = pd.MultiIndex.from_arrays([
+        stations[groups // span],
+        day_starts(group_days, tz, df_combined['Timestamp_Local'].dt.unit),
+    ], names=['Station Naam', 'Date'])
+    df_completeness = pd.DataFrame({
+        name: np.bincount(group_rows, weights=values, minlength=len(groups)).astype(np.int64)
+        for name, values in counts.items()
+    }, index=index)
+
+    df_completeness['Verwacht'] = day_lengths_ns(group_days, tz) // CADENCE.value
+    df_completeness['Dekking'] = (df_completeness['Waarnemingen'] / df_completeness['Verwacht']).clip(upper=1.0)
+    return df_completeness
+
+
+def summarize_quality(df_completeness, min_coverage=MIN_DAY_COVERAGE):
+    """Korte samenvatting per station (voor Programma Checks)."""
+    grouped = df_completeness.groupby(level='Station Naam')
+    return pd.DataFrame({
+        'Gaten': grouped['Gaten'].sum(),
+        'Verdacht': grouped['Verdacht'].sum(),
+        'Lage Batterij': grouped['Lage Batterij'].sum(),
+        'Onvolledige Dagen': grouped['Dekking'].apply(lambda coverage: int((coverage < min_coverage).sum())),
+    })
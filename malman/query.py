@@ -0,0 +1,204 @@
+"""
+Samengestelde zoekvragen op de dagelijkse samenvatting (Tab 3).
+
+Een zoekvraag combineert vergelijkingen op de daggrootheden met AND/OR/NOT
+(of EN/OF/NIET) en haakjes, bijvoorbeeld:
+
+    Temp_High_C >= 25 AND Hum_Avg_P < 40 AND Pres_Avg_hPa > 1020
+    (Temp_Low_C < 0 OF Temp_High_C > 30) EN NIET ClearSky_Avg < 0.3
+
+Een vergelijking is kolom OP getal, getal OP kolom of kolom OP kolom, met
+OP uit >=, <=, >, <, = (of ==) en !=. De tekst wordt nooit met eval()
+uitgevoerd: een kleine recursieve parser zet de zoekvraag één keer (gecached
+per tekst en kolomset) om in geneste NumPy bewerkingen, die daarna per
+evaluatie alleen nog de betrokken kolommen als arrays aanspreken.
+
+Een ontbrekende waarde (NaN) voldoet aan geen enkele vergelijking, ook niet
+via NOT: zoals in SQL is zo'n vergelijking onbekend. Elke deelexpressie geeft
+daarom (waar, bekend) als boolean arrays; NOT keert alleen bekende rijen om,
+en AND/OR volgen de driewaardige logica (onwaar AND onbekend is onwaar, waar
+OR onbekend is waar). Alleen rijen die bekend en waar zijn voldoen.
+"""
+import functools
+import operator
+import re
+
+import numpy as np
+
+COMPARISON_OPERATORS = {
+    '>=': operator.ge,
+    '<=': operator.le,
+    '>': operator.gt,
+    '<': operator.lt,
+    '=': operator.eq,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# Sleutelwoorden (Engels en Nederlands), hoofdletterongevoelig
+KEYWORDS = {'and': 'AND', 'en': 'AND', 'or': 'OR', 'of': 'OR', 'not': 'NOT', 'niet': 'NOT'}
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<number>-?\d+(?:[.,]\d+)?)"
+    r"|(?P<op>>=|<=|==|!=|=|<|>)"
+    r"|(?P<paren>[()])"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"
+    r")"
+)
+
+
+class QueryError(ValueError):
+    """Fout in een zoekvraag; de melding is voor de gebruiker bedoeld."""
+
+
+def _tokenize(text):
+    """Splitst de zoekvraag in (soort, waarde, positie)."""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if match is None or match.end() == position:
+            raise QueryError(f"Onverwacht teken '{text[position:].strip()[:1]}' op positie {position + 1}.")
+        kind = match.lastgroup
+        value = match.group(kind)
+        start = match.start(kind) + 1
+        if kind == 'name' and value.lower() in KEYWORDS:
+            kind, value = 'keyword', KEYWORDS[value.lower()]
+        tokens.append((kind, value, start))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursieve parser: or_expr -> and_expr (OR and_expr)*, and_expr -> factor (AND factor)*."""
+
+    def __init__(self, text, columns):
+        self.tokens = _tokenize(text)
+        self.index = 0
+        # Kolomnamen hoofdletterongevoelig herkennen
+        self.columns = {column.lower(): column for column in columns}
+        self.used_columns = []
+
+    def peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else (None, None, None)
+
+    def take(self):
+        token = self.peek()
+        self.index += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise QueryError("De zoekvraag is leeg.")
+        node = self.or_expr()
+        kind, value, position = self.peek()
+        if kind is not None:
+            raise QueryError(f"Onverwacht '{value}' op positie {position}.")
+        return node
+
+    def or_expr(self):
+        node = self.and_expr()
+        while self.peek()[:2] == ('keyword', 'OR'):
+            self.take()
+            node = functools.partial(_or, node, self.and_expr())
+        return node
+
+    def and_expr(self):
+        node = self.factor()
+        while self.peek()[:2] == ('keyword', 'AND'):
+            self.take()
+            node = functools.partial(_and, node, self.factor())
+        return node
+
+    def factor(self):
+        kind, value, position = self.peek()
+        if (kind, value) == ('keyword', 'NOT'):
+            self.take()
+            return functools.partial(_not, self.factor())
+        if (kind, value) == ('paren', '('):
+            self.take()
+            node = self.or_expr()
+            if self.take()[:2] != ('paren', ')'):
+                raise QueryError(f"Sluithaakje ontbreekt bij het haakje op positie {position}.")
+            return node
+        return self.comparison()
+
+    def operand(self):
+        kind, value, position = self.take()
+        if kind == 'number':
+            number = float(value.replace(',', '.'))
+            return lambda arrays: number
+        if kind == 'name':
+            column = self.columns.get(value.lower())
+            if column is None:
+                raise QueryError(f"Onbekende kolom '{value}' op positie {position}. Beschikbaar: {', '.join(self.columns.values())}.")
+            if column not in self.used_columns:
+                self.used_columns.append(column)
+            return lambda arrays: arrays[column]
+        if kind is None:
+            raise QueryError("De zoekvraag eindigt onverwacht; er ontbreekt een kolom of getal.")
+        raise QueryError(f"Kolom of getal verwacht op positie {position}, niet '{value}'.")
+
+    def comparison(self):
+        left = self.operand()
+        op_kind, op_value, op_position = self.take()
+        if op_kind != 'op':
+            where = f"op positie {op_position}" if op_position else "aan het einde"
+            raise QueryError(f"Vergelijking (>=, <=, >, <, =, !=) verwacht {where}.")
+        right = self.operand()
+        return functools.partial(_compare, COMPARISON_OPERATORS[op_value], left, right)
+
+
+# Knopen van de gecompileerde zoekvraag: elk geeft (waar, bekend)
+def _compare(compare, left, right, arrays):
+    left_values, right_values = left(arrays), right(arrays)
+    known = ~(np.isnan(left_values) | np.isnan(right_values))
+    return np.asarray(compare(left_values, right_values)) & known, known
+
+
+def _not(inner, arrays):
+    true, known = inner(arrays)
+    return ~true & known, known
+
+
+def _and(left, right, arrays):
+    left_true, left_known = left(arrays)
+    right_true, right_known = right(arrays)
+    # Bekend als beide kanten bekend zijn, of één kant bekend onwaar is
+    known = (left_known & right_known) | (left_known & ~left_true) | (right_known & ~right_true)
+    return left_true & right_true, known
+
+
+def _or(left, right, arrays):
+    left_true, left_known = left(arrays)
+    right_true, right_known = right(arrays)
+    # Bekend als beide kanten bekend zijn, of één kant waar is
+    return left_true | right_true, (left_known & right_known) | left_true | right_true
+
+
+class DailyQuery:
+    """Een gecompileerde zoekvraag: mask(df) geeft per rij of de dag voldoet."""
+
+    def __init__(self, text, columns):
+        parser = _Parser(text, columns)
+        self.text = text
+        self._evaluate = parser.parse()
+        # Gebruikte kolommen in volgorde van voorkomen (de eerste is de 'hoofdkolom' van de zoekvraag)
+        self.columns = tuple(parser.used_columns)
+        if not self.columns:
+            raise QueryError("De zoekvraag bevat geen kolom.")
+
+    def mask(self, df):
+        """Booleaanse NumPy array met de dagen die aan de zoekvraag voldoen."""
+        arrays = {column: df[column].to_numpy(dtype=np.float64, na_value=np.nan) for column in self.columns}
+        with np.errstate(invalid='ignore'):
+            true, _ = self._evaluate(arrays)
+            return np.broadcast_to(true, len(df)).copy()
+
+
+@functools.lru_cache(maxsize=128)
+def compile_query(text, columns):
+    """Gecachte DailyQuery per (tekst, kolommen); columns is een tuple van toegestane kolomnamen."""
+    return DailyQuery(text, columns)
@@ -0,0 +1,211 @@
+"""
+Gedeelde cache (SQLite) voor meerdere Streamlit serverprocessen.
+
+st.cache_data is per proces: achter een load balancer zou elke worker de
+GitHub CSV bestanden en de 80-jarige ERA5 reeks zelf downloaden en de
+rollups zelf berekenen. Met WEER_SHARED_CACHE (pad naar een SQLite bestand,
+leeg = uitgeschakeld) komt onder st.cache_data een tweede laag die alle
+processen op de machine delen:
+
+    st.cache_data (geheugen, per proces)  ->  shared_cached (SQLite, gedeeld)  ->  berekenen/downloaden
+
+Elke rij is een logisch item (namespace, sleutel) met een versie: een nieuwe
+versie van hetzelfde jaarbestand vervangt de oude rij, zodat het bestand niet
+groeit met elke ververste versie van het huidige jaar. Per namespace blijven
+hoogstens max_entries rijen (de laatst gebruikte) bewaard. Het gebruiksmoment
+wordt grof bijgehouden: een treffer schrijft alleen als het vorige moment
+ouder is dan SHARED_CACHE_TOUCH_SECONDS, en slaat dat over als de database
+bezet is.
+
+Verversen gebeurt door één schrijver: wie een item mist, neemt een
+bestandsvergrendeling op (namespace, sleutel) en kijkt daarna opnieuw; andere
+processen wachten op die vergrendeling en lezen daarna het zojuist geschreven
+resultaat in plaats van zelf te downloaden. De database draait in WAL modus,
+zodat lezers nooit op de schrijver wachten.
+
+Waarden worden met pickle opgeslagen; het bestand hoort dus alleen schrijfbaar
+te zijn voor de gebruiker van de serverprocessen. Verhoog SHARED_CACHE_FORMAT
+als de vorm van een opgeslagen waarde wijzigt. Een fout in de cache (bestand
+op slot, beschadigd) valt terug op gewoon berekenen.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+try:
+    import fcntl
+except ImportError:  # Windows: geen bestandsvergrendeling tussen processen
+    fcntl = None
+
+SHARED_CACHE_PATH = os.environ.get("WEER_SHARED_CACHE", "")
+
+# Maakt deel uit van elke sleutel: verhogen maakt alle opgeslagen waarden ongeldig
+SHARED_CACHE_FORMAT = 2
+
+SHARED_CACHE_MAX_ENTRIES = 256
+
+# Hoe lang een proces wacht op de schrijver (SQLite busy timeout), in seconden
+SHARED_CACHE_TIMEOUT_SECONDS = 60
+
+# Een treffer werkt 'accessed' pas bij als die ouder is dan dit (seconden); genoeg voor de LRU volgorde
+SHARED_CACHE_TOUCH_SECONDS = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    version TEXT,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+def shared_cache_enabled(path=SHARED_CACHE_PATH):
+    return bool(path)
+
+
+def _key_hash(key_parts):
+    return hashlib.sha1(repr((SHARED_CACHE_FORMAT, key_parts)).encode('utf-8')).hexdigest()
+
+
+class SharedCache:
+    """Eén SQLite cachebestand; een verbinding per thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_dir = path + '.locks'
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=SHARED_CACHE_TIMEOUT_SECONDS, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _writer(self, namespace, key):
+        """Eén schrijver per item, ook over meerdere serverprocessen heen."""
+        with open(os.path.join(self.lock_dir, f'{namespace}-{key}.lock'), 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get(self, namespace, key, version=None, ttl=None):
+        """(True, waarde) bij een geldige rij met deze versie (en niet ouder dan ttl seconden), anders (False, None)."""
+        connection = self._connection()
+        row = connection.execute(
+            'SELECT version, created, accessed, payload FROM cache WHERE namespace = ? AND key = ?', (namespace, key)
+        ).fetchone()
+        now = time.time()
+        if row is None or row[0] != version or (ttl is not None and now - row[1] >= ttl):
+            return False, None
+        if now - row[2] >= SHARED_CACHE_TOUCH_SECONDS:
+            self._touch(connection, namespace, key, now)
+        return True, pickle.loads(row[3])
+
+    @staticmethod
+    def _touch(connection, namespace, key, now):
+        """Werkt 'accessed' bij zonder op een schrijver te wachten: bij een bezette database wordt het overgeslagen."""
+        connection.execute('PRAGMA busy_timeout = 0')
+        try:
+            connection.execute('UPDATE cache SET accessed = ? WHERE namespace = ? AND key = ?', (now, namespace, key))
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            connection.execute(f'PRAGMA busy_timeout = {SHARED_CACHE_TIMEOUT_SECONDS * 1000}')
+
+    def put(self, namespace, key, value, version=None, max_entries=SHARED_CACHE_MAX_ENTRIES):
+        """Schrijft (of vervangt) een rij en houdt de max_entries laatst gebruikte rijen van de namespace."""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'INSERT OR REPLACE INTO cache (namespace, key, version, created, accessed, payload) VALUES (?, ?, ?, ?, ?, ?)',
+                (namespace, key, version, now, now, payload),
+            )
+            connection.execute(
+                'DELETE FROM cache WHERE namespace = ? AND key NOT IN '
+                '(SELECT key FROM cache WHERE namespace = ? ORDER BY accessed DESC LIMIT ?)',
+                (namespace, namespace, max_entries),
+            )
+
+    def get_or_compute(self, namespace, key_parts, compute, version=None, ttl=None,
+                       max_entries=SHARED_CACHE_MAX_ENTRIES, keep=None):
+        """
+        De waarde uit de cache, of compute() door één schrijver tegelijk.
+        keep(waarde) beslist of een berekende waarde bewaard wordt (bv. geen mislukte download).
+        """
+        key = _key_hash(key_parts)
+        found, value = self.get(namespace, key, version, ttl)
+        if found:
+            return value
+        with self._writer(namespace, key):
+            # Een ander proces kan het item intussen geschreven hebben
+            found, value = self.get(namespace, key, version, ttl)
+            if found:
+                return value
+            value = compute()
+            if keep is None or keep(value):
+                self.put(namespace, key, value, version, max_entries)
+            return value
+
+    def clear(self, namespace=None):
+        with self._connection() as connection:
+            if namespace is None:
+                connection.execute('DELETE FROM cache')
+            else:
+                connection.execute('DELETE FROM cache WHERE namespace = ?', (namespace,))
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_cache(path=SHARED_CACHE_PATH):
+    """Eén SharedCache per serverproces en bestand."""
+    return SharedCache(path)
+
+
+def shared_cached(namespace, key_parts, compute, version=None, ttl=None,
+                  max_entries=SHARED_CACHE_MAX_ENTRIES, keep=None, path=SHARED_CACHE_PATH):
+    """
+    compute() via de gedeelde cache: key_parts (hashbaar, met een stabiele repr) identificeert het item,
+    version de inhoud (een andere versie wordt opnieuw berekend en vervangt de rij).
+    Zonder WEER_SHARED_CACHE, of bij een fout in de cache, wordt gewoon compute() aangeroepen.
+    """
+    if not shared_cache_enabled(path):
+        return compute()
+    try:
+        cache = get_shared_cache(path)
+    except (OSError, sqlite3.Error):
+        return compute()
+
+    computed = []
+
+    def compute_once():
+        computed.append(compute())
+        return computed[0]
+
+    try:
+        return cache.get_or_compute(namespace, key_parts, compute_once, version, ttl, max_entries, keep)
+    except (OSError, sqlite3.Error, pickle.PickleError, EOFError):
+        # Een al berekende waarde niet opnieuw berekenen als alleen het wegschrijven mislukte
+        return computed[0] if computed else compute()
@@ -0,0 +1,178 @@
+"""
+Zonnestraling: dagelijkse en maandelijkse instraling (kWh/m²) en zonuren uit zoninstraling.
+
+Per station en lokale dag (LOCAL_DAY_COL) wordt de gemeten globale instraling
+(W/m², QC gemaskeerd, negatieve nachtwaarden op 0) met de trapeziumregel over
+de tijd geïntegreerd. De gewichten komen uit observation_weights: gaten tot
+RADIATION_MAX_GAP worden lineair overbrugd, een langer gat telt als één
+meetinterval en verlaagt de dekking van de dag.
+
+    Rad_kWh_m2       gemeten instraling van de dag
+    ClearSky_kWh_m2  instraling bij onbewolkte hemel (Haurwitz, zie malman/derived.py) op dezelfde
+                     tijdstippen en met dezelfde gewichten, zodat gaten de verhouding niet scheeftrekken
+    Rad_Ratio        Rad_kWh_m2 / ClearSky_kWh_m2
+    Sun_Hours        uren met een instraling van minstens SUNSHINE_THRESHOLD_WM2 (schatting van de zonneschijnduur)
+    SunMax_Hours     idem bij onbewolkte hemel (het maximum voor die dag)
+    Dekking          overbrugde tijd gedeeld door de lengte van de lokale dag (0-1)
+
+De hemel-bij-heldere-hemel volgt uit de stationslocatie (station_locations); zonder
+locatie blijven die kolommen NaN. De dagrollup is gecached op de dataversie
+(ook in de gedeelde cache); maand- en jaarcijfers komen uit de dagrollup, zodat een
+jaaroverzicht de 10-minuten rijen niet opnieuw doorloopt.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from plotly.subplots import make_subplots
+
+from malman.core import observation_weights
+from malman.derived import clear_sky_irradiance
+from malman.localtime import (
+    calendar_fields, dates_to_days, day_lengths_ns, day_starts, frame_local_days, group_starts, month_numbers, month_starts,
+)
+from malman.profiling import note_cache_miss
+from malman.quality import MIN_DAY_COVERAGE, masked_values
+from malman.shared_cache import shared_cached
+
+# WMO drempel voor zonneschijn (directe straling); toegepast op de globale instraling een schatting
+SUNSHINE_THRESHOLD_WM2 = 120.0
+
+# Instraling verandert snel met de bewolking: alleen korte gaten worden overbrugd
+RADIATION_MAX_GAP = pd.Timedelta(hours=1)
+
+RADIATION_COLUMNS = ['Rad_kWh_m2', 'ClearSky_kWh_m2', 'Rad_Ratio', 'Sun_Hours', 'SunMax_Hours', 'Dekking']
+
+
+def build_daily_radiation(df_combined, station_locations=()):
+    """
+    Dagelijkse instraling en zonuren per station (index 'Date', lokale middernacht; kolom 'Station Naam'
+    en RADIATION_COLUMNS). station_locations: paren (Station Naam, (lat, lon, hoogte)).
+    """
+    locations = dict(station_locations)
+    station_codes, stations = pd.factorize(df_combined['Station Naam'], sort=True)
+    epoch_ns = df_combined['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    order = np.lexsort((epoch_ns, station_codes))
+    station_codes, epoch_ns = station_codes[order], epoch_ns[order]
+    days = frame_local_days(df_combined)[order]
+    irradiance = np.clip(masked_values(df_combined, 'zoninstraling').to_numpy(dtype=np.float64, na_value=np.nan)[order], 0.0, None)
+
+    valid = ~np.isnan(irradiance)
+    hours = observation_weights(epoch_ns, station_codes, valid, max_gap=RADIATION_MAX_GAP) / 60
+
+    # Heldere hemel per station op de eigen locatie
+    clear_sky = np.full(len(epoch_ns), np.nan)
+    station_starts = group_starts(station_codes)
+    for lo, hi in zip(station_starts, np.append(station_starts[1:], len(epoch_ns))):
+        location = locations.get(stations[station_codes[lo]])
+        if location is not None and location[0] is not None:
+            clear_sky[lo:hi] = clear_sky_irradiance(epoch_ns[lo:hi], location[0], location[1])
+
+    starts = group_starts(station_codes, days)
+
+    def daily(values):
+        return np.add.reduceat(values, starts) if len(starts) else np.empty(0)
+
+    measured = valid & (hours > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        radiation = daily(np.where(measured, irradiance * hours, 0.0)) / 1000
+        clear_radiation = daily(np.where(measured, clear_sky * hours, 0.0)) / 1000
+        group_days = days[starts]
+        tz = df_combined['Timestamp_Local'].dt.tz
+        df_daily = pd.DataFrame({
+            'Station Naam': stations[station_codes[starts]],
+            'Rad_kWh_m2': radiation,
+            'ClearSky_kWh_m2': clear_radiation,
+            'Rad_Ratio': np.where(clear_radiation > 0, radiation / clear_radiation, np.nan),
+            'Sun_Hours': daily(np.where(measured & (irradiance >= SUNSHINE_THRESHOLD_WM2), hours, 0.0)),
+            'SunMax_Hours': daily(np.where(measured & (clear_sky >= SUNSHINE_THRESHOLD_WM2), hours, 0.0)),
+            'Dekking': np.minimum(daily(np.where(measured, hours, 0.0)) / (day_lengths_ns(group_days, tz) / 3.6e12), 1.0),
+        }, index=day_starts(group_days, tz, df_combined['Timestamp_Local'].dt.unit).rename('Date'))
+    # Zonder locatie is er geen heldere hemel
+    no_clear_sky = np.isnan(daily(np.where(measured, clear_sky, 0.0)))
+    df_daily.loc[no_clear_sky, ['ClearSky_kWh_m2', 'Rad_Ratio', 'SunMax_Hours']] = np.nan
+    return df_daily
+
+
+def build_period_radiation(df_daily_radiation, by='month', min_coverage=MIN_DAY_COVERAGE):
+    """
+    Maand- (by='month') of jaartotalen (by='year') per station uit de dagrollup. Dagen onder
+    min_coverage tellen niet mee; 'Dagen' is het aantal meegetelde dagen. Geeft een DataFrame
+    met 'Station Naam', 'Periode' (eerste dag, zonder tijdzone) of 'Jaar', en de totalen.
+    """
+    df_daily = df_daily_radiation[df_daily_radiation['Dekking'] >= min_coverage]
+    station_codes, stations = pd.factorize(df_daily['Station Naam'], sort=True)
+    days = dates_to_days(df_daily.index)
+    periods = month_numbers(days) if by == 'month' else calendar_fields(days)[0]
+    order = np.lexsort((periods, station_codes))
+    station_codes, periods = station_codes[order], periods[order]
+    starts = group_starts(station_codes, periods)
+
+    def total(col):
+        values = df_daily[col].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        return np.add.reduceat(values, starts) if len(starts) else np.empty(0)
+
+    radiation, clear_radiation = total('Rad_kWh_m2'), total('ClearSky_kWh_m2')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        df_period = pd.DataFrame({
+            'Station Naam': stations[station_codes[starts]],
+            'Periode' if by == 'month' else 'Jaar': month_starts(periods[starts]) if by == 'month' else periods[starts],
+            'Rad_kWh_m2': radiation,
+            'ClearSky_kWh_m2': clear_radiation,
+            'Rad_Ratio': np.where(clear_radiation > 0, radiation / clear_radiation, np.nan),
+            'Sun_Hours': total('Sun_Hours'),
+            'SunMax_Hours': total('SunMax_Hours'),
+            'Dagen': np.diff(np.append(starts, len(periods))),
+        })
+    return df_period
+
+
+def build_radiation_figure(df_daily, df_monthly, station_name):
+    """Twee panelen voor één station: dagelijkse instraling met de heldere hemel, en zonuren per maand."""
+    fig = make_subplots(
+        rows=2, cols=1, vertical_spacing=0.12, row_heights=[0.55, 0.45],
+        subplot_titles=(f"Instraling per dag {station_name} (kWh/m²)", "Zonuren per maand (≥ 120 W/m²)"),
+    )
+    # Lokale kloktijd zonder tijdzone (zie build_comparison_figure)
+    x_daily = df_daily.index.tz_localize(None)
+    fig.add_trace(go.Bar(
+        x=x_daily, y=df_daily['Rad_kWh_m2'], name='Gemeten', marker_color='#ff7f0e',
+        customdata=np.stack([df_daily['Sun_Hours'], df_daily['Dekking'] * 100], axis=-1),
+        hovertemplate="%{x|%d-%m-%Y}<br>%{y:.2f} kWh/m²<br>Zonuren: %{customdata[0]:.1f}<br>Dekking: %{customdata[1]:.0f}%<extra></extra>",
+    ), row=1, col=1)
+    fig.add_trace(go.Scatter(
+        x=x_daily, y=df_daily['ClearSky_kWh_m2'], mode='lines', name='Heldere hemel', line=dict(width=1, color='grey'),
+        hovertemplate="Heldere hemel: %{y:.2f} kWh/m²<extra></extra>",
+    ), row=1, col=1)
+    fig.add_trace(go.Bar(
+        x=df_monthly['Periode'], y=df_monthly['Sun_Hours'], name='Zonuren', marker_color='#ffbf00',
+        customdata=df_monthly[['SunMax_Hours', 'Dagen']].to_numpy(),
+        hovertemplate="%{x|%m-%Y}<br>%{y:.0f} uur (max. %{customdata[0]:.0f})<br>%{customdata[1]} dagen<extra></extra>",
+    ), row=2, col=1)
+    fig.add_trace(go.Scatter(
+        x=df_monthly['Periode'], y=df_monthly['SunMax_Hours'], mode='markers', name='Maximum (heldere hemel)',
+        marker=dict(symbol='line-ew-open', size=18, color='grey'), hoverinfo='skip',
+    ), row=2, col=1)
+    fig.update_xaxes(tickformat="%m-%Y", row=2, col=1)
+    fig.update_layout(height=700, showlegend=False, margin=dict(t=40), bargap=0.1)
+    return fig
+
+
+# -------------------------------------------------------------------
+# Gecachte varianten (gesleuteld op de dataversie; het DataFrame wordt niet gehasht)
+# -------------------------------------------------------------------
+@st.cache_data(show_spinner=False)
+def compute_daily_radiation(_df_combined, data_version, station_locations=()):
+    """Gecachte dagrollup van de instraling (Tab 10: Zonnestraling)."""
+    note_cache_miss('compute_daily_radiation')
+    return shared_cached(
+        'daily_radiation', (data_version, station_locations), lambda: build_daily_radiation(_df_combined, station_locations)
+    )
+
+
+@st.cache_data(show_spinner=False)
+def compute_period_radiation(_df_combined, data_version, station_locations=(), by='month', min_coverage=MIN_DAY_COVERAGE):
+    """Gecachte maand- of jaartotalen uit de (gecachte) dagrollup."""
+    note_cache_miss('compute_period_radiation')
+    df_daily = compute_daily_radiation(_df_combined, data_version, station_locations)
+    return build_period_radiation(df_daily, by, min_coverage)
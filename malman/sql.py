@@ -0,0 +1,426 @@
+"""
+SQL analyse (SQLite) over het stationsarchief en de ERA5 benchmark.
+
+Het memory-mapped archief (malman/archive.py) en de ERA5 reeksen worden als
+tabellen in één SQLite bestand gezet; de dagelijkse samenvatting, de extremen
+en de klimatologie zijn views daarop. Een vraag loopt zo op de pagina's op
+schijf (out-of-core) en alleen het resultaat komt in het geheugen, ook voor
+tientallen jaren 10-minuten data.
+
+    stations          station_id, station, lat, lon, hoogte, location
+    observations      station_id, year, ts_utc (epoch s), local_time, local_date, PLOT_COLS, qc_flags, qc_verdacht
+    local_days        local_date, expected (verwacht aantal metingen: 23/24/25 uur rond de zomertijd)
+    era5              location, date, temp_high, temp_low, temp_avg
+    normal_periods    period, start_date, end_date (CLIMATE_NORMAL_PERIODS)
+
+    observations_qc   observations met verdachte waarden (QC) als NULL, zoals masked_values
+    daily_summary     per station en lokale dag: Temp_High_C, Temp_Low_C, Temp_Avg_C, Pres_Avg_hPa,
+                      Hum_Avg_P, Waarnemingen, Dekking
+    monthly_summary   per station en maand (uit daily_summary)
+    extremes          top SQL_EXTREMES_TOP_N dagen per soort (zoals Tab 5) en station,
+                      dagen met voldoende dekking
+    climate_normals   ERA5 normaal per locatie, periode en kalenderdag ('MM-DD')
+    daily_vs_normal   daily_summary met de normaal van de stationslocatie en de anomalie
+
+De daggemiddelden in SQL zijn rekenkundige gemiddelden van de metingen; de app
+weegt ze naar de tijd (build_daily_summary) en kan dus licht afwijken bij gaten.
+
+Alleen gewijzigde jaarbestanden worden opnieuw overgezet (per jaar de bronversie
+in de tabel sources); één schrijver tegelijk, ook over serverprocessen heen.
+Met WEER_SQL_DB wordt het bestand gekozen (standaard weer.sqlite in de
+archiefmap; zonder archief is de SQL analyse uitgeschakeld).
+
+    python -m malman.sql
+    python -m malman.sql --query "SELECT * FROM monthly_summary"
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from malman.core import (
+    BENCHMARK_END_DATE_FULL, BENCHMARK_START_DATE_FULL, CLIMATE_NORMAL_PERIODS, GITHUB_BASE_URL, PLOT_COLS, START_YEAR,
+    benchmark_location, combine_data_version, discover_available_years, fetch_complete_historical_data,
+    get_station_file_versions, load_station_registry, station_location,
+)
+from malman.archive import ARCHIVE_DIR, archive_version, archive_years, read_archive_rows, sync_station_archive
+from malman.climatology import period_key
+from malman.era5 import Era5Unavailable, era5_cached
+from malman.derived import DERIVED_SOURCES
+from malman.profiling import note_cache_miss
+from malman.localtime import LOCAL_DAY_COL, day_lengths_ns, day_strings
+from malman.quality import CADENCE, FLAG_DUPLICATE, MIN_DAY_COVERAGE, QC_COLUMNS
+
+try:
+    import fcntl
+except ImportError:  # Windows: geen bestandsvergrendeling tussen processen
+    fcntl = None
+
+SQL_DB_PATH = os.environ.get("WEER_SQL_DB", os.path.join(ARCHIVE_DIR, 'weer.sqlite') if ARCHIVE_DIR else '')
+
+# Verhogen bij een wijziging van tabellen of views: het bestand wordt dan opnieuw opgebouwd
+SQL_FORMAT = 1
+
+# Rijen per insert (uit het archief) en grenzen van de SQL console
+SQL_INSERT_CHUNK_ROWS = 50_000
+SQL_MAX_ROWS = 10_000
+SQL_TIMEOUT_SECONDS = 30
+
+SQL_EXTREMES_TOP_N = 10
+
+# Soort -> (expressie op daily_summary, aflopend); dezelfde soorten als find_extreme_days
+SQL_EXTREMES = {
+    'hoogste_max_temp': ('Temp_High_C', True),
+    'hoogste_min_temp': ('Temp_Low_C', True),
+    'hoogste_gem_temp': ('Temp_Avg_C', True),
+    'laagste_min_temp': ('Temp_Low_C', False),
+    'laagste_max_temp': ('Temp_High_C', False),
+    'laagste_gem_temp': ('Temp_Avg_C', False),
+    'grootste_range': ('Temp_High_C - Temp_Low_C', True),
+}
+
+# Voorbeelden voor de SQL console
+SQL_EXAMPLES = {
+    "Maandoverzicht": "SELECT station, month, Temp_Avg_C, Temp_High_C, Temp_Low_C, Dagen\nFROM monthly_summary\nORDER BY station, month",
+    "Warmste dagen": "SELECT station, date, waarde AS Temp_High_C, rang\nFROM extremes\nWHERE soort = 'hoogste_max_temp'\nORDER BY station, rang",
+    "Tropische nachten per jaar": "SELECT station, substr(date, 1, 4) AS jaar, COUNT(*) AS nachten\nFROM daily_summary\nWHERE Temp_Low_C >= 20\nGROUP BY station, jaar",
+    "Anomalie per maand (1990-2019)": "SELECT station, substr(date, 1, 7) AS month, AVG(Anomalie_C) AS Anomalie_C\nFROM daily_vs_normal\nWHERE period = '1990-2019'\nGROUP BY station, month\nORDER BY station, month",
+    "Uurgemiddelde temperatuur (laatste week)": "SELECT station_id, substr(local_time, 1, 13) AS uur, AVG(temp) AS temp\nFROM observations_qc\nWHERE ts_utc >= (SELECT MAX(ts_utc) FROM observations) - 7 * 86400\nGROUP BY station_id, uur\nORDER BY station_id, uur",
+}
+
+
+class SqlConsoleError(ValueError):
+    """Fout in een vraag van de SQL console; de melding is voor de gebruiker bedoeld."""
+
+
+# Niet toegestaan in de console: andere databasebestanden koppelen (ATTACH maakt of leest
+# willekeurige bestanden, ook met mode=ro) en PRAGMA's (die o.a. query_only weer uitzetten)
+_DENIED_ACTIONS = {sqlite3.SQLITE_ATTACH, sqlite3.SQLITE_DETACH, sqlite3.SQLITE_PRAGMA}
+
+
+def _console_authorizer(action, *_):
+    return sqlite3.SQLITE_DENY if action in _DENIED_ACTIONS else sqlite3.SQLITE_OK
+
+
+def sql_enabled(db_path=SQL_DB_PATH):
+    return bool(db_path)
+
+
+def location_key(location):
+    """Tekstsleutel van een (lat, lon, hoogte) locatie, zoals in de tabellen stations en era5."""
+    return json.dumps(list(benchmark_location(location)))
+
+
+def _qc_expression(col):
+    """SQL expressie voor col zonder verdachte waarden (zie masked_values)."""
+    sources = DERIVED_SOURCES.get(col, [col])
+    if not all(source in QC_COLUMNS for source in sources):
+        return col
+    bits = sum(1 << QC_COLUMNS.index(source) for source in sources)
+    return f"CASE WHEN qc_flags & {FLAG_DUPLICATE} = 0 AND qc_verdacht & {bits} = 0 THEN {col} END"
+
+
+def _schema_statements():
+    value_cols = ', '.join(f'{col} REAL' for col in PLOT_COLS)
+    qc_cols = ',\n    '.join(f'{_qc_expression(col)} AS {col}' for col in PLOT_COLS)
+    extremes = '\n    UNION ALL\n    '.join(
+        f"SELECT station_id, station, date, '{kind}' AS soort, {expression} AS waarde, "
+        f"RANK() OVER (PARTITION BY station_id ORDER BY {expression} {'DESC' if descending else 'ASC'}) AS rang "
+        f"FROM daily_summary WHERE Dekking >= {MIN_DAY_COVERAGE} AND {expression} IS NOT NULL"
+        for kind, (expression, descending) in SQL_EXTREMES.items()
+    )
+    return [
+        "CREATE TABLE sources (source TEXT NOT NULL, part TEXT NOT NULL, version TEXT, PRIMARY KEY (source, part))",
+        "CREATE TABLE stations (station_id TEXT PRIMARY KEY, station TEXT, lat REAL, lon REAL, hoogte REAL, location TEXT)",
+        f"CREATE TABLE observations (station_id TEXT NOT NULL, year INTEGER NOT NULL, ts_utc INTEGER NOT NULL, "
+        f"local_time TEXT, local_date TEXT, {value_cols}, qc_flags INTEGER, qc_verdacht INTEGER)",
+        "CREATE INDEX observations_station_time ON observations (station_id, ts_utc)",
+        "CREATE INDEX observations_station_year ON observations (station_id, year)",
+        "CREATE TABLE local_days (local_date TEXT PRIMARY KEY, expected INTEGER) WITHOUT ROWID",
+        "CREATE TABLE era5 (location TEXT NOT NULL, date TEXT NOT NULL, temp_high REAL, temp_low REAL, temp_avg REAL, "
+        "PRIMARY KEY (location, date)) WITHOUT ROWID",
+        "CREATE TABLE normal_periods (period TEXT PRIMARY KEY, start_date TEXT, end_date TEXT)",
+        f"""CREATE VIEW observations_qc AS SELECT
+    station_id, ts_utc, local_time, local_date, qc_flags & {FLAG_DUPLICATE} = 0 AS is_observation,
+    {qc_cols}
+FROM observations""",
+        """CREATE VIEW daily_summary AS SELECT
+    o.station_id, s.station, o.local_date AS date,
+    MAX(o.temp) AS Temp_High_C, MIN(o.temp) AS Temp_Low_C, AVG(o.temp) AS Temp_Avg_C,
+    AVG(o.druk) AS Pres_Avg_hPa, AVG(o.luchtvocht) AS Hum_Avg_P,
+    SUM(o.is_observation) AS Waarnemingen,
+    MIN(1.0, SUM(o.is_observation) * 1.0 / d.expected) AS Dekking
+FROM observations_qc o
+JOIN stations s ON s.station_id = o.station_id
+JOIN local_days d ON d.local_date = o.local_date
+GROUP BY o.station_id, o.local_date
+HAVING Temp_Avg_C IS NOT NULL""",
+        """CREATE VIEW monthly_summary AS SELECT
+    station_id, station, substr(date, 1, 7) AS month,
+    AVG(Temp_Avg_C) AS Temp_Avg_C, AVG(Temp_High_C) AS Temp_High_Avg_C, AVG(Temp_Low_C) AS Temp_Low_Avg_C,
+    MAX(Temp_High_C) AS Temp_High_C, MIN(Temp_Low_C) AS Temp_Low_C,
+    AVG(Pres_Avg_hPa) AS Pres_Avg_hPa, AVG(Hum_Avg_P) AS Hum_Avg_P, COUNT(*) AS Dagen
+FROM daily_summary
+GROUP BY station_id, month""",
+        f"""CREATE VIEW extremes AS SELECT * FROM (
+    {extremes}
+) WHERE rang <= {SQL_EXTREMES_TOP_N}""",
+        """CREATE VIEW climate_normals AS SELECT
+    e.location, p.period, substr(e.date, 6, 5) AS month_day,
+    AVG(e.temp_avg) AS Temp_Avg_C, AVG(e.temp_high) AS Temp_High_C, AVG(e.temp_low) AS Temp_Low_C, COUNT(*) AS jaren
+FROM era5 e
+JOIN normal_periods p ON e.date BETWEEN p.start_date AND p.end_date
+GROUP BY e.location, p.period, month_day""",
+        """CREATE VIEW daily_vs_normal AS SELECT
+    d.station_id, d.station, d.date, n.period, d.Temp_Avg_C, n.Temp_Avg_C AS Normaal_Avg_C,
+    d.Temp_Avg_C - n.Temp_Avg_C AS Anomalie_C, d.Dekking
+FROM daily_summary d
+JOIN stations s ON s.station_id = d.station_id
+JOIN climate_normals n ON n.location = s.location AND n.month_day = substr(d.date, 6, 5)""",
+    ]
+
+
+def _connect(db_path):
+    connection = sqlite3.connect(db_path, timeout=SQL_TIMEOUT_SECONDS, isolation_level=None)
+    connection.execute('PRAGMA journal_mode=WAL')
+    return connection
+
+
+@contextmanager
+def _locked(db_path):
+    """Eén schrijver tegelijk, ook over meerdere serverprocessen heen."""
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    with open(db_path + '.lock', 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _ensure_schema(connection):
+    """Bouwt de tabellen en views (opnieuw) op als het bestand een ander SQL_FORMAT heeft."""
+    if connection.execute('PRAGMA user_version').fetchone()[0] == SQL_FORMAT:
+        return
+    with connection:
+        connection.execute('BEGIN IMMEDIATE')
+        objects = connection.execute("SELECT type, name FROM sqlite_master WHERE type IN ('view', 'table')").fetchall()
+        for kind, name in sorted(objects, key=lambda item: item[0] != 'view'):
+            connection.execute(f'DROP {kind.upper()} IF EXISTS "{name}"')
+        for statement in _schema_statements():
+            connection.execute(statement)
+        connection.execute(f'PRAGMA user_version = {SQL_FORMAT}')
+
+
+def _observation_rows(df_chunk, station_id, year):
+    """Rijen voor de tabel observations uit een stuk van het archief."""
+    local_times = df_chunk['Timestamp_Local']
+    columns = {
+        'station_id': np.full(len(df_chunk), station_id, dtype=object),
+        'year': np.full(len(df_chunk), year, dtype=np.int64),
+        'ts_utc': df_chunk['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64) // 1_000_000_000,
+        'local_time': local_times.dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy(dtype=object),
+        'local_date': day_strings(df_chunk[LOCAL_DAY_COL]).astype(object),
+    }
+    for col in PLOT_COLS + ['QC_Flags', 'QC_Verdacht']:
+        columns[col] = df_chunk[col].to_numpy()
+    # NaN wordt in SQLite NULL
+    return list(zip(*(values.tolist() for values in columns.values())))
+
+
+def _sync_station(connection, station_id, station_name, location, file_versions, archive_dir):
+    """Zet de gewijzigde jaren van één station over; geeft het aantal overgezette rijen. location: (lat, lon, hoogte)."""
+    version = archive_version(file_versions, location)
+    connection.execute(
+        'INSERT OR REPLACE INTO stations VALUES (?, ?, ?, ?, ?, ?)',
+        (station_id, station_name, *location, location_key(location)),
+    )
+    stored = dict(connection.execute('SELECT part, version FROM sources WHERE source = ?', (station_id,)).fetchall())
+    years = archive_years(station_id, version, archive_dir)
+    placeholders = ', '.join('?' * (5 + len(PLOT_COLS) + 2))
+    rows = 0
+    for year, year_version, lo, hi in years:
+        # Ook de locatie telt mee: die bepaalt de afgeleide grootheden
+        source_version = combine_data_version(year_version, location)
+        if stored.pop(str(year), None) == source_version:
+            continue
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM observations WHERE station_id = ? AND year = ?', (station_id, year))
+            for chunk_lo in range(lo, hi, SQL_INSERT_CHUNK_ROWS):
+                df_chunk = read_archive_rows(station_id, version, chunk_lo, min(chunk_lo + SQL_INSERT_CHUNK_ROWS, hi), archive_dir=archive_dir)
+                connection.executemany(f'INSERT INTO observations VALUES ({placeholders})', _observation_rows(df_chunk, station_id, year))
+                days = np.unique(df_chunk[LOCAL_DAY_COL].to_numpy())
+                connection.executemany(
+                    'INSERT OR IGNORE INTO local_days VALUES (?, ?)',
+                    zip(day_strings(days), (day_lengths_ns(days, df_chunk['Timestamp_Local'].dt.tz) // CADENCE.value).tolist()),
+                )
+            connection.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?)', (station_id, str(year), source_version))
+        rows += hi - lo
+    # Jaren die niet meer in het archief staan
+    for year in stored:
+        with connection:
+            connection.execute('DELETE FROM observations WHERE station_id = ? AND year = ?', (station_id, int(year)))
+            connection.execute('DELETE FROM sources WHERE source = ? AND part = ?', (station_id, year))
+    return rows
+
+
+def _sync_era5(connection, location, df_complete):
+    """Zet de ERA5 reeks van een locatie over (eenmalig per locatie en reeks)."""
+    key = location_key(location)
+    # Inhoud, niet alleen het aantal dagen: een ververste reeks met gecorrigeerde waarden wordt ook overgezet
+    content = int(pd.util.hash_pandas_object(df_complete[['Date', 'Temp_High_C', 'Temp_Low_C', 'Temp_Avg_C']], index=False).sum())
+    version = combine_data_version(BENCHMARK_START_DATE_FULL, BENCHMARK_END_DATE_FULL, content)
+    if connection.execute('SELECT 1 FROM sources WHERE source = ? AND part = ? AND version = ?', ('era5', key, version)).fetchone():
+        return 0
+    with connection:
+        connection.execute('BEGIN IMMEDIATE')
+        connection.execute('DELETE FROM era5 WHERE location = ?', (key,))
+        connection.executemany('INSERT INTO era5 VALUES (?, ?, ?, ?, ?)', zip(
+            [key] * len(df_complete),
+            pd.DatetimeIndex(df_complete['Date']).strftime('%Y-%m-%d'),
+            df_complete['Temp_High_C'].tolist(),
+            df_complete['Temp_Low_C'].tolist(),
+            df_complete['Temp_Avg_C'].tolist(),
+        ))
+        connection.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?)', ('era5', key, version))
+    return len(df_complete)
+
+
+def sync_sql_database(stations, era5_series=(), db_path=SQL_DB_PATH, archive_dir=ARCHIVE_DIR):
+    """
+    Brengt de SQL database in lijn met het archief (dat eerst gesynchroniseerd moet zijn, zie sync_station_archive).
+    stations: (station_id, station_naam, locatie, file_versions); era5_series: (locatie, df_complete).
+    Geeft het aantal overgezette rijen (observations, era5) terug.
+    """
+    with _locked(db_path):
+        connection = _connect(db_path)
+        try:
+            _ensure_schema(connection)
+            with connection:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO normal_periods VALUES (?, ?, ?)',
+                    [(period_key(name), start, end) for name, (start, end) in CLIMATE_NORMAL_PERIODS.items()],
+                )
+            observation_rows = sum(
+                _sync_station(connection, station_id, station_name, location, file_versions, archive_dir)
+                for station_id, station_name, location, file_versions in stations
+            )
+            era5_rows = sum(_sync_era5(connection, location, df_complete) for location, df_complete in era5_series if not df_complete.empty)
+        finally:
+            connection.close()
+    return observation_rows, era5_rows
+
+
+@era5_cached(show_spinner="SQL database bijwerken...")
+def compute_sql_sync(data_version, stations, era5_locations=(), db_path=SQL_DB_PATH):
+    """
+    Gecachte sync_sql_database: één keer per dataversie (en set ERA5 locaties) per proces.
+    stations: (station_id, station_naam, locatie, file_versions) als tuples.
+    Ontbreekt een ERA5 reeks, dan wordt de sync bij een volgende aanroep herhaald.
+    """
+    note_cache_miss('compute_sql_sync')
+    era5_results = [
+        (location, fetch_complete_historical_data(BENCHMARK_START_DATE_FULL, BENCHMARK_END_DATE_FULL, location))
+        for location in era5_locations
+    ]
+    rows = sync_sql_database(stations, [(location, df_complete) for location, (df_complete, _) in era5_results], db_path)
+    failed = [status for _, (df_complete, status) in era5_results if df_complete.empty]
+    if failed:
+        raise Era5Unavailable(failed[0], rows)
+    return rows
+
+
+def describe_sql_schema(db_path=SQL_DB_PATH):
+    """Tabellen en views met hun kolommen: DataFrame (naam, soort, kolommen)."""
+    connection = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        objects = connection.execute(
+            "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view') AND name != 'sources' ORDER BY type, name"
+        ).fetchall()
+        rows = [
+            (name, kind, ', '.join(column[1] for column in connection.execute(f'PRAGMA table_info("{name}")')))
+            for name, kind in objects
+        ]
+    finally:
+        connection.close()
+    return pd.DataFrame(rows, columns=['Naam', 'Soort', 'Kolommen'])
+
+
+def run_sql_query(query, db_path=SQL_DB_PATH, max_rows=SQL_MAX_ROWS, timeout=SQL_TIMEOUT_SECONDS):
+    """
+    Voert één alleen-lezen vraag uit. Geeft (DataFrame met hoogstens max_rows rijen, afgekapt, seconden).
+    Een vraag die langer dan timeout seconden loopt wordt afgebroken.
+    """
+    if not query.strip():
+        raise SqlConsoleError("De vraag is leeg.")
+    if not os.path.exists(db_path):
+        raise SqlConsoleError("De SQL database bestaat nog niet.")
+    connection = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    started = time.monotonic()
+    # Elke 10.000 VM instructies controleren of de tijd om is (niet-nul = afbreken)
+    connection.set_progress_handler(lambda: time.monotonic() - started > timeout, 10_000)
+    try:
+        connection.execute('PRAGMA query_only = ON')
+        connection.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 0)
+        connection.set_authorizer(_console_authorizer)
+        cursor = connection.execute(query)
+        if cursor.description is None:
+            return pd.DataFrame(), False, time.monotonic() - started
+        rows = cursor.fetchmany(max_rows + 1)
+        columns = [column[0] for column in cursor.description]
+    except sqlite3.OperationalError as e:
+        if str(e) == 'interrupted':
+            raise SqlConsoleError(f"De vraag is na {timeout} s afgebroken.")
+        raise SqlConsoleError(str(e))
+    except sqlite3.DatabaseError as e:
+        if str(e) == 'not authorized':
+            raise SqlConsoleError("ATTACH, DETACH en PRAGMA zijn niet toegestaan in de SQL console.")
+        raise SqlConsoleError(str(e))
+    except (sqlite3.Error, sqlite3.Warning) as e:
+        raise SqlConsoleError(str(e))
+    finally:
+        connection.close()
+    return pd.DataFrame(rows[:max_rows], columns=columns), len(rows) > max_rows, time.monotonic() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m malman.sql', description="Werk de SQL database bij (en voer eventueel een vraag uit).")
+    parser.add_argument('--query', help="SQL vraag (alleen-lezen); het resultaat gaat als CSV naar stdout")
+    parser.add_argument('--no-era5', action='store_true', help="ERA5 reeksen niet ophalen")
+    args = parser.parse_args(argv)
+    if not sql_enabled() or not ARCHIVE_DIR:
+        raise SystemExit("WEER_ARCHIVE_DIR of WEER_SQL_DB is leeg: SQL analyse uitgeschakeld.")
+
+    stations = []
+    locations = []
+    for station_id, station_info in load_station_registry().items():
+        location = station_location(station_info)
+        years = discover_available_years(station_info.get('start_jaar', START_YEAR), station_id, GITHUB_BASE_URL)
+        versions = get_station_file_versions(station_id, tuple(years), GITHUB_BASE_URL)
+        sync_station_archive(station_id, versions, location=location)
+        stations.append((station_id, station_info['naam'], location, versions))
+        locations.append(benchmark_location(location))
+    era5_series = [] if args.no_era5 else [
+        (location, fetch_complete_historical_data(BENCHMARK_START_DATE_FULL, BENCHMARK_END_DATE_FULL, location)[0])
+        for location in dict.fromkeys(locations)
+    ]
+    observation_rows, era5_rows = sync_sql_database(stations, era5_series)
+    print(f"{SQL_DB_PATH}: {observation_rows} metingen en {era5_rows} ERA5 dagen overgezet", flush=True)
+
+    if args.query:
+        df, truncated, seconds = run_sql_query(args.query)
+        print(df.to_csv(index=False), end='')
+        if truncated:
+            print(f"(afgekapt op {SQL_MAX_ROWS} rijen)")
+
+
+if __name__ == '__main__':
+    main()
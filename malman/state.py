@@ -0,0 +1,72 @@
+"""
+Expliciete afhankelijkheden tussen de fasen van een rerun (per sessie).
+
+Een fase wordt alleen opnieuw berekend als haar afhankelijkheden (een tuple van
+eenvoudige, vergelijkbare waarden zoals station-ids, jaren en datums) veranderd
+zijn sinds de vorige rerun van dezelfde sessie. Zo hoeft een volledige rerun
+die door een ander onderdeel van de app veroorzaakt wordt (bv. het wisselen van
+tab of normaalperiode) de data pipeline niet opnieuw te doorlopen. Widgets
+binnen een tab draaien in een st.fragment en raken deze fasen helemaal niet.
+
+Grote resultaten die voor alle sessies gelijk zijn (de volledige historie van
+de stations) gaan via share_across_sessions: één exemplaar per serverproces in
+plaats van één per sessie in st.session_state. Zo'n resultaat is gedeeld en
+wordt dus niet gewijzigd.
+"""
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+_STATE_KEY = '_stage_results'
+
+# Hoeveel gedeelde resultaten (combinaties van fase en afhankelijkheden) een proces vasthoudt
+SHARED_STAGE_MAX_ENTRIES = 4
+
+
+def reuse_if_unchanged(name, deps, compute):
+    """Geeft het bewaarde resultaat van fase 'name' terug, of berekent het opnieuw als deps wijzigden."""
+    store = st.session_state.setdefault(_STATE_KEY, {})
+    entry = store.get(name)
+    if entry is not None and entry[0] == deps:
+        return entry[1]
+
+    value = compute()
+    store[name] = (deps, value)
+    return value
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_stages():
+    """De gedeelde resultaten van dit serverproces (laatst gebruikte achteraan)."""
+    return threading.Lock(), OrderedDict()
+
+
+def share_across_sessions(name, deps, compute, max_entries=SHARED_STAGE_MAX_ENTRIES):
+    """
+    Zoals reuse_if_unchanged, maar één resultaat per (name, deps) voor alle sessies in dit proces;
+    de sessie zelf bewaart niets. Alleen de max_entries laatst gebruikte resultaten blijven bestaan.
+    Twee sessies die tegelijk missen rekenen allebei; het eerste resultaat wordt bewaard.
+    """
+    lock, results = _shared_stages()
+    key = (name, deps)
+    with lock:
+        if key in results:
+            results.move_to_end(key)
+            return results[key]
+
+    value = compute()
+    with lock:
+        value = results.setdefault(key, value)
+        results.move_to_end(key)
+        while len(results) > max_entries:
+            results.popitem(last=False)
+    return value
+
+
+def clear_stage_results():
+    """Vergeet alle bewaarde fasen (bv. samen met het wissen van de cache), ook de gedeelde."""
+    st.session_state.pop(_STATE_KEY, None)
+    lock, results = _shared_stages()
+    with lock:
+        results.clear()
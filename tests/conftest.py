@@ -0,0 +1,45 @@
+"""
+Fixtures voor de correctheidstests.
+
+De tests draaien zonder netwerk tegen de gebundelde bestanden in weatherdata/
+(of tegen kleine, in de test opgebouwde frames). De snelheid wordt apart
+gemeten in benchmarks/.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from malman.core import STATION_MAP, TARGET_TIMEZONE, load_data  # noqa: E402
+
+BUNDLED_BASE_URL = os.path.join(ROOT, 'weatherdata') + os.sep
+BUNDLED_YEARS = [2025, 2026]
+STATION_ID = next(iter(STATION_MAP))
+
+
+@pytest.fixture(scope='session')
+def bundled_base_url():
+    return BUNDLED_BASE_URL
+
+
+@pytest.fixture(scope='session')
+def station_frame():
+    """De volledige gebundelde historie van het eerste station, zoals load_data die geeft."""
+    return load_data(STATION_ID, BUNDLED_YEARS, BUNDLED_BASE_URL, STATION_MAP, TARGET_TIMEZONE)
+
+
+@pytest.fixture(scope='session')
+def combined_frame():
+    """Alle gebundelde stations samengevoegd zoals het hoofdscript dat doet (met 'Station Naam')."""
+    frames = []
+    for station_id, station_name in STATION_MAP.items():
+        df_station = load_data(station_id, BUNDLED_YEARS, BUNDLED_BASE_URL, STATION_MAP, TARGET_TIMEZONE).copy()
+        df_station['Station Naam'] = station_name
+        frames.append(df_station)
+    return pd.concat(frames, ignore_index=True)
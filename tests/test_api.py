@@ -0,0 +1,130 @@
+import http.client
+import io
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+import malman.api
+from malman.api import ApiSnapshot, WeatherApi, make_server
+from malman.core import load_station_registry
+
+
+@pytest.fixture(scope='module')
+def api(combined_frame):
+    api = WeatherApi(load_station_registry())
+    api.snapshot = ApiSnapshot('test', combined_frame)
+    return api
+
+
+@pytest.fixture(scope='module')
+def server(api):
+    server = make_server(api, '127.0.0.1', 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _get(server, path, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=30)
+    try:
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def test_export_streams_full_history(api, server):
+    status, headers, body = _get(server, '/export?columns=temp,druk')
+    assert status == 200
+    assert headers['Transfer-Encoding'] == 'chunked' and 'Content-Length' not in headers
+    df = pd.read_csv(io.BytesIO(body))
+    assert list(df.columns) == ['Station Naam', 'Timestamp_UTC', 'Timestamp_Local', 'temp', 'druk']
+    assert len(df) == len(api.snapshot.df_combined)
+
+    # Zelfde dataversie en parameters: 304 zonder inhoud
+    status, _, body = _get(server, '/export?columns=temp,druk', {'If-None-Match': headers['ETag']})
+    assert (status, body) == (304, b'')
+
+
+def test_export_station_and_period(api, server):
+    status, _, body = _get(server, '/export?station=2308LH047&start=2025-06-01&end=2025-06-30&columns=temp')
+    assert status == 200
+    df = pd.read_csv(io.BytesIO(body))
+    assert set(df['Station Naam']) == {api.names['2308LH047']}
+    local_days = pd.to_datetime(df['Timestamp_Local'].str[:10])
+    assert local_days.min() == pd.Timestamp('2025-06-01') and local_days.max() == pd.Timestamp('2025-06-30')
+
+
+def test_export_rejects_unknown_format(server):
+    assert _get(server, '/export?format=xls')[0] == 400
+
+
+def test_not_loaded_yet():
+    status, headers, _ = WeatherApi(load_station_registry()).respond('/latest')
+    assert status == 503 and headers['Retry-After'] == '5'
+
+
+@pytest.mark.parametrize('path, query', [
+    ('/range', 'start=2025-13-01'),
+    ('/range', 'columns=temp,onbekend'),
+    ('/range', 'every=1min'),
+    ('/daily', 'min_coverage=2'),
+    ('/latest', 'station=ONBEKEND'),
+    ('/normals', 'period=1800-1829'),
+])
+def test_bad_parameters(api, path, query):
+    status, headers, body = api.respond(path, query)
+    assert status == 400 and headers['Cache-Control'] == 'no-store'
+    assert json.loads(body)['fout']
+
+
+def test_range_row_limit(api, monkeypatch):
+    monkeypatch.setattr(malman.api, 'API_MAX_RANGE_ROWS', 1000)
+    assert api.respond('/range', 'start=2025-06-01&end=2025-06-30')[0] == 400
+    # Met een groter interval past hetzelfde bereik wel
+    assert api.respond('/range', 'start=2025-06-01&end=2025-06-30&every=1D')[0] == 200
+
+
+def test_unknown_path(api):
+    assert api.respond('/onbekend')[0] == 404
+
+
+def test_etag_and_not_modified(api):
+    status, headers, body = api.respond('/daily', 'start=2025-06-01&end=2025-06-07')
+    assert status == 200 and headers['Content-Type'] == 'application/json' and len(json.loads(body)) > 0
+    etag = headers['ETag']
+
+    status, headers, body = api.respond('/daily', 'start=2025-06-01&end=2025-06-07', if_none_match=f'"x", {etag}')
+    assert (status, body, headers['ETag']) == (304, b'', etag)
+    assert api.respond('/daily', 'start=2025-06-01&end=2025-06-08', if_none_match=etag)[0] == 200
+
+
+def test_etag_follows_content_not_data_version(combined_frame):
+    # Een nieuwe dataversie met hetzelfde antwoord geeft dezelfde ETag (en dus 304)
+    etags = []
+    for data_version in ['v1', 'v2']:
+        api = WeatherApi(load_station_registry())
+        api.snapshot = ApiSnapshot(data_version, combined_frame)
+        etags.append(api.respond('/monthly')[1]['ETag'])
+    assert etags[0] == etags[1]
+
+
+def test_arrow_response(api):
+    pyarrow = pytest.importorskip('pyarrow')
+    status, headers, body = api.respond('/latest', 'columns=temp', accept='application/vnd.apache.arrow.stream')
+    assert status == 200 and headers['Content-Type'] == 'application/vnd.apache.arrow.stream'
+    table = pyarrow.ipc.open_stream(body).read_all()
+    assert table.num_rows == len(api.names) and 'temp' in table.column_names
+
+
+def test_http_status_and_not_modified(server):
+    status, headers, body = _get(server, '/latest')
+    assert status == 200 and int(headers['Content-Length']) == len(body)
+    status, _, body = _get(server, '/latest', {'If-None-Match': headers['ETag']})
+    assert (status, body) == (304, b'')
+    assert _get(server, '/range?every=x')[0] == 400
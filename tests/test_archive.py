@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import BUNDLED_YEARS, STATION_ID
+from malman.archive import (
+    UnversionedYearError, load_station_from_archive, open_station_archive, read_manifest, read_station_archive,
+    sync_station_archive,
+)
+from malman.core import TARGET_TIMEZONE, get_station_file_versions
+
+
+@pytest.fixture
+def file_versions(bundled_base_url):
+    return get_station_file_versions(STATION_ID, tuple(BUNDLED_YEARS), bundled_base_url)
+
+
+def test_incremental_sync_equals_full_build(bundled_base_url, file_versions, tmp_path):
+    incremental, full = str(tmp_path / 'incrementeel'), str(tmp_path / 'volledig')
+    first = sync_station_archive(STATION_ID, file_versions, bundled_base_url, TARGET_TIMEZONE, incremental)
+    old = open_station_archive(STATION_ID, first, incremental)
+    snapshot = {name: np.array(values) for name, values in old.items()}
+
+    # Alleen het laatste jaarbestand wijzigt
+    changed = list(file_versions[:-1]) + [(file_versions[-1][0], 'gewijzigd')]
+    second = sync_station_archive(STATION_ID, changed, bundled_base_url, TARGET_TIMEZONE, incremental)
+    rebuilt = sync_station_archive(STATION_ID, changed, bundled_base_url, TARGET_TIMEZONE, full)
+    assert second == rebuilt != first
+    pd.testing.assert_frame_equal(
+        read_station_archive(STATION_ID, second, archive_dir=incremental),
+        read_station_archive(STATION_ID, rebuilt, archive_dir=full),
+    )
+    # Een gemapte oudere versie blijft ongewijzigd
+    assert all(np.array_equal(snapshot[name], old[name], equal_nan=True) for name in snapshot)
+
+
+def test_unversioned_year_is_not_dropped(bundled_base_url, file_versions, tmp_path):
+    archive_dir = str(tmp_path)
+    version = sync_station_archive(STATION_ID, file_versions, bundled_base_url, TARGET_TIMEZONE, archive_dir)
+
+    # Mislukte HEAD request voor het eerste jaar: geen archief met alleen de overige jaren
+    unversioned = [(file_versions[0][0], None)] + list(file_versions[1:])
+    with pytest.raises(UnversionedYearError):
+        load_station_from_archive(STATION_ID, unversioned, bundled_base_url, TARGET_TIMEZONE, archive_dir)
+    assert read_manifest(os.path.join(archive_dir, STATION_ID))['version'] == version
+
+
+def test_rows_are_views_on_the_archive(bundled_base_url, file_versions, tmp_path):
+    archive_dir = str(tmp_path)
+    df_station = load_station_from_archive(STATION_ID, file_versions, bundled_base_url, TARGET_TIMEZONE, archive_dir)
+    version = read_manifest(os.path.join(archive_dir, STATION_ID))['version']
+    arrays = open_station_archive(STATION_ID, version, archive_dir)
+    for col in ['temp', 'QC_Flags']:
+        assert np.shares_memory(df_station[col].to_numpy(), arrays[col])
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from malman.climatology import (
+    ANOMALY_CLASSES, BAND_WINDOW_DAYS, MONTH_DAYS, PERCENTILES, build_percentile_bands, classify_anomalies,
+)
+
+
+@pytest.fixture(scope='module')
+def df_hist():
+    """Synthetische ERA5 dagreeks 1990-2019 (seizoen plus ruis) in het formaat van fetch_complete_historical_data."""
+    dates = pd.date_range('1990-01-01', '2019-12-31', freq='D')
+    rng = np.random.default_rng(7)
+    avg = -5 + 12 * np.sin((dates.dayofyear.to_numpy() - 110) / 365.25 * 2 * np.pi) + rng.normal(0, 3, len(dates))
+    return pd.DataFrame({'Date': dates, 'Temp_High_C': avg + rng.uniform(2, 6, len(dates)), 'Temp_Low_C': avg - 4, 'Temp_Avg_C': avg})
+
+
+@pytest.fixture(scope='module')
+def df_bands(df_hist):
+    return build_percentile_bands(df_hist)
+
+
+def test_bands_are_ordered(df_bands):
+    assert list(df_bands.index) == list(MONTH_DAYS)
+    for col in ['Temp_High_C', 'Temp_Low_C', 'Temp_Avg_C']:
+        values = df_bands[[f"{col}_P{p}" for p in PERCENTILES]].to_numpy()
+        assert not np.isnan(values).any()
+        assert (np.diff(values, axis=1) >= 0).all(), col
+    # Elke percentiel van de maximumtemperatuur ligt boven die van het gemiddelde
+    for p in PERCENTILES:
+        assert (df_bands[f"Temp_High_C_P{p}"] > df_bands[f"Temp_Avg_C_P{p}"]).all()
+
+
+def _leap_day_of_year(dates):
+    """Dagnummer in de kalender van een schrikkeljaar (29 februari is altijd dag 59)."""
+    dates = pd.DatetimeIndex(dates)
+    return dates.dayofyear.to_numpy() - 1 + ((~dates.is_leap_year) & (dates.month > 2))
+
+
+@pytest.mark.parametrize('month_day', ['01-03', '02-29', '07-15', '12-30'])
+def test_band_matches_pooled_window(df_hist, df_bands, month_day):
+    # De band van een dag: alle jaren, alle dagen binnen ±BAND_WINDOW_DAYS (rond over de jaargrens)
+    day = list(MONTH_DAYS).index(month_day)
+    distance = np.abs(_leap_day_of_year(df_hist['Date']) - day)
+    pooled = df_hist['Temp_Avg_C'].to_numpy()[np.minimum(distance, 366 - distance) <= BAND_WINDOW_DAYS]
+    expected = np.percentile(pooled, PERCENTILES)
+    assert df_bands.loc[month_day, [f"Temp_Avg_C_P{p}" for p in PERCENTILES]].to_numpy() == pytest.approx(expected)
+
+
+def test_classify_anomalies_edges():
+    p5, p10, p90, p95 = 1.0, 2.0, 8.0, 9.0
+    values = [0.9, 1.0, 2.0, 8.0, 9.0, 9.1, np.nan]
+    classes = classify_anomalies(values, p5, p10, p90, p95)
+    assert list(classes[:-1]) == [ANOMALY_CLASSES[0], ANOMALY_CLASSES[1], ANOMALY_CLASSES[2], ANOMALY_CLASSES[2],
+                                  ANOMALY_CLASSES[3], ANOMALY_CLASSES[4]]
+    assert pd.isna(classes[-1])
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from malman.derived import (
+    DERIVED_COLS, add_derived_columns, clear_sky_irradiance, heat_index, humidex, saturation_vapour_pressure,
+    sea_level_pressure, solar_cos_zenith,
+)
+from malman.quality import masked_values, quality_check
+
+EQUINOX_NOON_NS = pd.Timestamp('2025-03-20 12:00', tz='UTC').value
+HOUR_NS = pd.Timedelta(hours=1).value
+
+
+def test_saturation_vapour_pressure():
+    # Tabelwaarden boven water: 6.11 hPa bij 0 °C, 23.4 hPa bij 20 °C
+    assert saturation_vapour_pressure(np.array([0.0, 20.0])) == pytest.approx([6.11, 23.37], abs=0.05)
+
+
+def test_heat_index_nws_table():
+    # NWS tabel: 90 °F bij 70% luchtvochtigheid voelt als 106 °F
+    assert heat_index(np.array([(90 - 32) * 5 / 9]), np.array([70.0]))[0] == pytest.approx((106 - 32) * 5 / 9, abs=0.3)
+    # Onder de drempel is de gevoelstemperatuur de temperatuur zelf
+    assert heat_index(np.array([20.0]), np.array([90.0]))[0] == 20.0
+
+
+def test_humidex_environment_canada():
+    # Environment Canada: 30 °C met een dauwpunt van 15 °C geeft humidex 34
+    assert humidex(30.0, 15.0) == pytest.approx(34.0, abs=0.1)
+
+
+def test_sea_level_pressure():
+    assert sea_level_pressure(1000.0, 15.0, 0.0) == 1000.0
+    # ±1.2 hPa per 10 m in de onderste honderden meters
+    assert sea_level_pressure(1000.0, 15.0, 100.0) == pytest.approx(1011.9, abs=0.1)
+
+
+def test_clear_sky_at_equinox_noon():
+    assert solar_cos_zenith(np.array([EQUINOX_NOON_NS]), 0.0, 0.0)[0] == pytest.approx(1.0, abs=0.002)
+    irradiance = clear_sky_irradiance(np.array([EQUINOX_NOON_NS, EQUINOX_NOON_NS + 12 * HOUR_NS]), 0.0, 0.0)
+    assert irradiance[0] == pytest.approx(1098.0 * np.exp(-0.057), rel=0.002)
+    assert irradiance[1] == 0.0
+
+
+def _frame(**columns):
+    n = len(next(iter(columns.values())))
+    timestamps = pd.date_range('2025-03-20 06:00', periods=n, freq='10min', tz='UTC')
+    return pd.DataFrame({'Timestamp_UTC': timestamps, **columns})
+
+
+def test_add_derived_columns_without_location():
+    df = add_derived_columns(_frame(temp=[20.0], dauwpunt=[20.0], luchtvocht=[100.0], druk=[1000.0], zoninstraling=[500.0]))
+    assert list(df.columns[-len(DERIVED_COLS):]) == DERIVED_COLS
+    # Verzadigde lucht van 20 °C bevat ±17.3 g/m³ waterdamp
+    assert df['abs_vocht'].iloc[0] == pytest.approx(17.3, abs=0.1)
+    assert np.isnan(df['druk_zee'].iloc[0]) and np.isnan(df['helderheid'].iloc[0])
+
+
+def test_clearness_only_with_the_sun_up():
+    df = _frame(zoninstraling=[0.0, 500.0])
+    df['Timestamp_UTC'] = pd.to_datetime([EQUINOX_NOON_NS - 12 * HOUR_NS, EQUINOX_NOON_NS], utc=True)
+    df = add_derived_columns(df, (0.0, 0.0, 10.0))
+    assert np.isnan(df['helderheid'].iloc[0])
+    assert df['helderheid'].iloc[1] == pytest.approx(500.0 / clear_sky_irradiance(np.array([EQUINOX_NOON_NS]), 0.0, 0.0)[0])
+
+
+def test_derived_value_is_masked_with_its_source():
+    # Een temperatuurpiek maakt ook de afgeleide grootheden van die rij verdacht, de dampdruk (alleen dauwpunt) niet
+    df = quality_check(add_derived_columns(_frame(temp=[10.0, 25.0, 10.0], dauwpunt=[5.0, 5.0, 5.0], luchtvocht=[70.0] * 3)))
+    assert np.isnan(masked_values(df, 'abs_vocht').iloc[1]) and np.isnan(masked_values(df, 'humidex').iloc[1])
+    assert not np.isnan(masked_values(df, 'dampdruk').iloc[1])
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import STATION_ID
+from malman.core import STATION_MAP
+from malman.events import TENDENCY_TOLERANCE, EventCatalog, detect_events, pressure_tendency, station_rows
+
+HOUR_NS = pd.Timedelta(hours=1).value
+
+
+def _tendency_at_offset(offset_ns):
+    """Tendens van de laatste meting als de meting van 3 uur eerder offset_ns van het exacte tijdstip ligt."""
+    epoch_ns = np.array([offset_ns, 3 * HOUR_NS], dtype=np.int64)
+    return pressure_tendency(epoch_ns, np.array([1000.0, 996.0]))[-1]
+
+
+@pytest.mark.parametrize('offset_ns', [0, TENDENCY_TOLERANCE.value, -TENDENCY_TOLERANCE.value])
+def test_tendency_within_tolerance(offset_ns):
+    assert _tendency_at_offset(offset_ns) == -4.0
+
+
+@pytest.mark.parametrize('offset_ns', [TENDENCY_TOLERANCE.value + 1, -TENDENCY_TOLERANCE.value - 1])
+def test_tendency_outside_tolerance(offset_ns):
+    assert np.isnan(_tendency_at_offset(offset_ns))
+
+
+def test_tendency_uses_nearest_neighbour():
+    # Metingen 2 min vóór en 4 min na het tijdstip van 3 uur eerder: de dichtstbijzijnde telt
+    epoch_ns = np.array([-2 * 60 * 10**9, 4 * 60 * 10**9, 3 * HOUR_NS], dtype=np.int64)
+    tendency = pressure_tendency(epoch_ns, np.array([1000.0, 1010.0, 1001.0]))
+    assert tendency[-1] == 1.0 and np.isnan(tendency[0])
+
+
+@pytest.fixture(scope='module')
+def df_station(station_frame):
+    df = station_frame.copy()
+    df['Station Naam'] = STATION_MAP[STATION_ID]
+    return station_rows(df, STATION_MAP[STATION_ID])
+
+
+def _split_points(df_station, df_events):
+    """Splitsingen midden in de langste gebeurtenis van elk type, en een laatste dag."""
+    epoch_ns = df_station['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    points = [len(df_station) - 144]
+    for _, df_type in df_events.groupby('Type'):
+        event = df_type.loc[df_type['Duur (uur)'].idxmax()]
+        middle = event['Begin'] + (event['Einde'] - event['Begin']) / 2
+        points.append(int(np.searchsorted(epoch_ns, middle.value)))
+    return sorted(set(points))
+
+
+def test_incremental_update_equals_full_detection(df_station):
+    station_name = STATION_MAP[STATION_ID]
+    df_full = detect_events(df_station, station_name)
+    assert not df_full.empty
+    for split in _split_points(df_station, df_full):
+        catalog = EventCatalog(station_name)
+        catalog.update(df_station.iloc[:split], ((2025, 'a'),))
+        # Alleen het laatste jaarbestand groeit
+        df_events = catalog.update(df_station, ((2025, 'b'),))
+        pd.testing.assert_frame_equal(df_events, df_full, check_dtype=False, obj=f'splitsing op rij {split}')
+
+
+def test_changed_older_year_recomputes(df_station):
+    station_name = STATION_MAP[STATION_ID]
+    catalog = EventCatalog(station_name)
+    catalog.update(df_station, ((2025, 'a'), (2026, 'a')))
+    df_shorter = df_station.iloc[1000:]
+    df_events = catalog.update(df_shorter, ((2025, 'b'), (2026, 'a')))
+    pd.testing.assert_frame_equal(df_events, detect_events(df_shorter, station_name), check_dtype=False)
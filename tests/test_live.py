@@ -0,0 +1,56 @@
+import os
+
+from malman import live
+from malman.core import TARGET_TIMEZONE
+from malman.live import HEADER_MAX_BYTES, _read_from, _TailSource
+
+
+class _Response:
+    status_code = 206
+
+    def __init__(self, content, begin, total_size):
+        self.content = content
+        self.headers = {'Content-Range': f'bytes {begin}-{begin + len(content) - 1}/{total_size}'}
+
+    def raise_for_status(self):
+        pass
+
+
+def _write_year_file(path, lines):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'\n'.join(lines) + b'\n')
+
+
+def test_local_read_is_bounded(tmp_path):
+    path = str(tmp_path / 'weather.csv')
+    _write_year_file(path, [b'x' * 100] * 100)
+    data, begin, total_size = _read_from(path, 0, HEADER_MAX_BYTES)
+    assert (len(data), begin, total_size) == (HEADER_MAX_BYTES, 0, 101 * 100)
+
+
+def test_header_requests_only_a_prefix(bundled_base_url, monkeypatch):
+    with open(os.path.join(bundled_base_url, '2308LH047', 'weather_2025.csv'), 'rb') as f:
+        content = f.read()
+    ranges = []
+
+    def fake_get(url, headers, timeout):
+        spec = headers['Range'].split('=')[1]
+        ranges.append(spec)
+        if spec.startswith('-'):
+            begin = max(0, len(content) + int(spec))
+            return _Response(content[begin:], begin, len(content))
+        first, _, last = spec.partition('-')
+        end = int(last) + 1 if last else len(content)
+        return _Response(content[int(first):end], int(first), len(content))
+
+    monkeypatch.setattr(live.requests, 'get', fake_get)
+    source = _TailSource('2308LH047', 'https://example.invalid/', TARGET_TIMEZONE)
+    # Het jaarbestand van 2025 staat in voor dat van het huidige jaar
+    monkeypatch.setattr(source, '_url', lambda: 'https://example.invalid/2308LH047/weather_2025.csv')
+    source.refresh()
+
+    assert ranges[0] == f'0-{HEADER_MAX_BYTES - 1}'
+    assert all(spec != '0-' for spec in ranges)
+    assert source.header == content.split(b'\n', 1)[0].decode('utf-8').strip()
+    assert not source.rows.empty
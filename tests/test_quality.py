@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from malman.quality import (
+    FLAG_DUPLICATE, FLAG_GAP_BEFORE, FLAG_LOW_BATTERY, FLAG_RANGE, FLAG_SPIKE, QC_COLUMNS, QC_FLAG_COLS,
+    append_checked, build_daily_completeness, quality_check, recheck_boundary,
+)
+
+TZ = 'Europe/Stockholm'
+
+
+def _frame(n=12, start='2025-06-01 00:00'):
+    timestamps = pd.date_range(start, periods=n, freq='10min', tz='UTC')
+    return pd.DataFrame({
+        'Timestamp_UTC': timestamps,
+        'Timestamp_Local': timestamps.tz_convert(TZ),
+        'temp': np.full(n, 10.0),
+        'druk': np.full(n, 1000.0),
+        'battery': np.full(n, 4.2),
+    })
+
+
+def _bit(col):
+    return 1 << QC_COLUMNS.index(col)
+
+
+def test_flag_bits():
+    df = _frame()
+    df.loc[3, 'temp'] = 20.0                     # piek: heen en terug
+    df.loc[5, 'druk'] = 1100.0                   # buiten bereik, en daarmee ook een piek
+    df.loc[11, 'battery'] = 7.0                  # buiten bereik (batterij heeft geen piektest)
+    df.loc[6, 'battery'] = 3.5                   # lage batterij
+    df.loc[8, 'Timestamp_UTC'] = df.loc[7, 'Timestamp_UTC']  # dubbel tijdstip
+    df.loc[9:, 'Timestamp_UTC'] += pd.Timedelta(minutes=30)  # gat vóór rij 9
+    flags = quality_check(df)
+
+    assert flags.loc[3, 'QC_Flags'] == FLAG_SPIKE and flags.loc[3, 'QC_Verdacht'] == _bit('temp')
+    assert flags.loc[5, 'QC_Flags'] == FLAG_RANGE | FLAG_SPIKE and flags.loc[5, 'QC_Verdacht'] == _bit('druk')
+    assert flags.loc[11, 'QC_Flags'] == FLAG_RANGE and flags.loc[11, 'QC_Verdacht'] == _bit('battery')
+    assert flags.loc[6, 'QC_Flags'] == FLAG_LOW_BATTERY and flags.loc[6, 'QC_Verdacht'] == 0
+    assert flags.loc[8, 'QC_Flags'] == FLAG_DUPLICATE
+    assert flags.loc[9, 'QC_Flags'] == FLAG_GAP_BEFORE
+    clean = ~flags.index.isin([3, 5, 6, 8, 9, 11])
+    assert (flags.loc[clean, QC_FLAG_COLS] == 0).all().all()
+
+
+def test_step_is_not_a_spike():
+    # Een blijvende sprong (bv. een front) is geen piek: alleen heen en terug telt
+    df = _frame()
+    df.loc[4:, 'temp'] = 20.0
+    assert (quality_check(df)['QC_Flags'] & FLAG_SPIKE == 0).all()
+
+
+@pytest.mark.parametrize('split', range(1, 11))
+def test_recheck_boundary_equals_full_check(split):
+    df = _frame()
+    df.loc[[2, 5, 8], 'temp'] = 20.0
+    df.loc[6, 'druk'] = 990.0
+    df.loc[7, 'druk'] = 1000.0
+    expected = quality_check(df)
+
+    before, after = quality_check(df.iloc[:split]).copy(), quality_check(df.iloc[split:]).reset_index(drop=True)
+    recheck_boundary(before, after)
+    combined = pd.concat([before, after], ignore_index=True)
+    pd.testing.assert_frame_equal(combined[QC_FLAG_COLS], expected[QC_FLAG_COLS])
+
+    appended = append_checked(quality_check(df.iloc[:split]), df.iloc[split:].reset_index(drop=True))
+    pd.testing.assert_frame_equal(appended[QC_FLAG_COLS], expected[QC_FLAG_COLS])
+
+
+def test_completeness_on_dst_day():
+    # 30 maart 2025 (zomertijd) heeft 23 uur: 138 verwachte metingen
+    timestamps = pd.date_range(pd.Timestamp('2025-03-30', tz=TZ), pd.Timestamp('2025-03-31', tz=TZ), freq='10min', inclusive='left')
+    df = quality_check(pd.DataFrame({
+        'Timestamp_UTC': timestamps.tz_convert('UTC'), 'Timestamp_Local': timestamps, 'temp': 5.0,
+    }).drop(index=[10, 11]).reset_index(drop=True))
+    df['Station Naam'] = 'A'
+    day = build_daily_completeness(df).iloc[0]
+    assert (day['Verwacht'], day['Waarnemingen'], day['Gaten']) == (138, 136, 1)
+    assert day['Dekking'] == pytest.approx(136 / 138)
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from malman.query import QueryError, compile_query
+
+COLUMNS = ('A', 'B')
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({'A': [1.0, 3.0, np.nan, 7.0], 'B': [np.nan, 2.0, 2.0, 9.0]})
+
+
+@pytest.mark.parametrize('text, rows', [
+    ("A != 3", [True, False, False, True]),
+    ("NOT A > 5", [True, True, False, False]),
+    ("A > 5 OR B > 1", [False, True, True, True]),
+    ("NOT (A > 5 OR B > 1)", [False, False, False, False]),
+    ("NOT (A > 5 AND B > 100)", [True, True, True, True]),
+    ("A = A", [True, True, False, True]),
+])
+def test_missing_values_never_match(df, text, rows):
+    assert compile_query(text, COLUMNS).mask(df).tolist() == rows
+
+
+def test_dutch_keywords_and_reversed_comparison(df):
+    assert compile_query("NIET 5 < a EN b > 1", COLUMNS).mask(df).tolist() == [False, True, False, False]
+
+
+@pytest.mark.parametrize('text', ["A >", "C > 1", "A > 1 AND", "(A > 1", "A < B < 3"])
+def test_invalid_query(text):
+    with pytest.raises(QueryError):
+        compile_query(text, COLUMNS)
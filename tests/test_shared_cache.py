@@ -0,0 +1,50 @@
+import sqlite3
+import time
+
+from malman import shared_cache
+from malman.shared_cache import SharedCache
+
+
+def _accessed(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute('SELECT accessed FROM cache').fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_hit_does_not_write_when_recently_used(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SharedCache(path)
+    cache.put('ns', 'k', {'a': 1}, version='v1')
+    accessed = _accessed(path)
+    assert cache.get('ns', 'k', 'v1') == (True, {'a': 1})
+    assert _accessed(path) == accessed
+
+
+def test_hit_touches_stale_entry(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.db')
+    cache = SharedCache(path)
+    cache.put('ns', 'k', 1, version='v1')
+    accessed = _accessed(path)
+    monkeypatch.setattr(shared_cache, 'SHARED_CACHE_TOUCH_SECONDS', 0)
+    time.sleep(0.01)
+    assert cache.get('ns', 'k', 'v1') == (True, 1)
+    assert _accessed(path) > accessed
+
+
+def test_reader_does_not_wait_for_writer(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.db')
+    cache = SharedCache(path)
+    cache.put('ns', 'k', 1, version='v1')
+    monkeypatch.setattr(shared_cache, 'SHARED_CACHE_TOUCH_SECONDS', 0)
+
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    try:
+        started = time.monotonic()
+        assert cache.get('ns', 'k', 'v1') == (True, 1)
+        assert time.monotonic() - started < 1
+    finally:
+        writer.execute('ROLLBACK')
+        writer.close()
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from malman.derived import clear_sky_irradiance
+from malman.quality import quality_check
+from malman.solar import RADIATION_COLUMNS, SUNSHINE_THRESHOLD_WM2, build_daily_radiation, build_period_radiation
+
+TZ = 'Europe/Stockholm'
+LOCATION = (63.0, 14.0, 300.0)
+
+
+def _day_frame(day, irradiance=500.0, station='A'):
+    """Eén volledige lokale dag aan 10-minuten metingen met een vaste (of gegeven) instraling, met QC."""
+    start = pd.Timestamp(day, tz=TZ)
+    timestamps = pd.date_range(start, start + pd.Timedelta(days=1), freq='10min', inclusive='left')
+    timestamps = pd.DatetimeIndex([ts for ts in timestamps if ts.normalize() == start])
+    df = pd.DataFrame({
+        'Timestamp_UTC': timestamps.tz_convert('UTC'),
+        'Timestamp_Local': timestamps,
+        'zoninstraling': irradiance if np.ndim(irradiance) else np.full(len(timestamps), irradiance),
+    })
+    df = quality_check(df)
+    df['Station Naam'] = station
+    return df
+
+
+def test_constant_irradiance_integrates_to_daily_energy():
+    df_daily = build_daily_radiation(_day_frame('2025-06-01'))
+    assert list(df_daily.columns) == ['Station Naam'] + RADIATION_COLUMNS
+    day = df_daily.iloc[0]
+    assert day['Rad_kWh_m2'] == pytest.approx(500 * 24 / 1000)
+    assert day['Sun_Hours'] == pytest.approx(24.0) and day['Dekking'] == pytest.approx(1.0)
+    # Zonder locatie geen heldere hemel
+    assert np.isnan(day['ClearSky_kWh_m2']) and np.isnan(day['Rad_Ratio'])
+
+
+def test_dst_day_has_23_hours():
+    day = build_daily_radiation(_day_frame('2025-03-30')).iloc[0]
+    assert day['Rad_kWh_m2'] == pytest.approx(500 * 23 / 1000) and day['Dekking'] == pytest.approx(1.0)
+
+
+def test_short_gap_is_bridged_long_gap_lowers_coverage():
+    df = _day_frame('2025-06-01')
+    short = build_daily_radiation(df.drop(index=range(60, 65))).iloc[0]
+    assert short['Rad_kWh_m2'] == pytest.approx(12.0) and short['Dekking'] == pytest.approx(1.0)
+
+    # Een gat van 90 minuten telt als één meetinterval: 80 minuten ontbreken
+    long = build_daily_radiation(df.drop(index=range(60, 68))).iloc[0]
+    assert long['Dekking'] == pytest.approx((24 * 60 - 80) / (24 * 60))
+    assert long['Rad_kWh_m2'] == pytest.approx(0.5 * (24 * 60 - 80) / 60)
+
+
+def test_suspect_values_do_not_count():
+    irradiance = np.full(144, 500.0)
+    irradiance[10] = 2000.0   # buiten bereik: de buren overbruggen de gemaskeerde meting
+    irradiance[:6] = -5.0     # ook buiten bereik: het eerste uur ontbreekt
+    day = build_daily_radiation(_day_frame('2025-06-01', irradiance)).iloc[0]
+    assert day['Rad_kWh_m2'] == pytest.approx(0.5 * 23)
+    assert day['Sun_Hours'] == pytest.approx(23.0) and day['Dekking'] == pytest.approx(23 / 24)
+
+
+def test_negative_values_without_qc_count_as_zero():
+    irradiance = np.full(144, 500.0)
+    irradiance[:6] = -5.0
+    df = _day_frame('2025-06-01', irradiance).drop(columns=['QC_Flags', 'QC_Verdacht'])
+    day = build_daily_radiation(df).iloc[0]
+    assert day['Rad_kWh_m2'] == pytest.approx(0.5 * 23)
+    assert day['Dekking'] == pytest.approx(1.0)
+
+
+def test_clear_sky_day_has_ratio_one():
+    df = _day_frame('2025-06-21')
+    epoch_ns = df['Timestamp_UTC'].to_numpy('datetime64[ns]').view(np.int64)
+    df['zoninstraling'] = clear_sky_irradiance(epoch_ns, LOCATION[0], LOCATION[1])
+    day = build_daily_radiation(df, (('A', LOCATION),)).iloc[0]
+    assert day['Rad_Ratio'] == pytest.approx(1.0)
+    assert day['Sun_Hours'] == pytest.approx(day['SunMax_Hours'])
+    assert 0 < day['Sun_Hours'] < 24 and (df['zoninstraling'] >= SUNSHINE_THRESHOLD_WM2).any()
+
+
+def test_monthly_totals_skip_incomplete_days():
+    df_full = _day_frame('2025-06-01')
+    df_partial = _day_frame('2025-06-02').iloc[:72]
+    df_daily = build_daily_radiation(pd.concat([df_full, df_partial, _day_frame('2025-07-01')], ignore_index=True))
+    df_monthly = build_period_radiation(df_daily, by='month')
+    assert df_monthly['Dagen'].tolist() == [1, 1]
+    assert df_monthly['Rad_kWh_m2'].tolist() == pytest.approx([12.0, 12.0])
+    df_yearly = build_period_radiation(df_daily, by='year')
+    assert df_yearly[['Jaar', 'Dagen']].values.tolist() == [[2025, 2]]
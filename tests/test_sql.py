@@ -0,0 +1,37 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from malman.sql import SqlConsoleError, run_sql_query, sync_sql_database
+
+LOCATION = (59.0, 15.0, 40.0)
+
+
+def _era5(days=10, offset=0.0):
+    dates = pd.date_range('2000-01-01', periods=days, freq='D')
+    avg = pd.Series(range(days), dtype='float64') + offset
+    return pd.DataFrame({'Date': dates, 'Temp_High_C': avg + 4, 'Temp_Low_C': avg - 4, 'Temp_Avg_C': avg})
+
+
+def test_console_denies_attach_and_pragma(tmp_path):
+    db_path = str(tmp_path / 'weer.sqlite')
+    sqlite3.connect(db_path).close()
+    for query in [f"ATTACH DATABASE '{tmp_path / 'ander.sqlite'}' AS ander", "PRAGMA query_only = OFF"]:
+        with pytest.raises(SqlConsoleError):
+            run_sql_query(query, db_path)
+    assert not (tmp_path / 'ander.sqlite').exists()
+
+
+def test_era5_resyncs_on_changed_values(tmp_path):
+    db_path = str(tmp_path / 'weer.sqlite')
+    df_era5 = _era5()
+    assert sync_sql_database([], [(LOCATION, df_era5)], db_path, str(tmp_path)) == (0, len(df_era5))
+    assert sync_sql_database([], [(LOCATION, df_era5)], db_path, str(tmp_path)) == (0, 0)
+
+    # Zelfde aantal dagen, gecorrigeerde waarde: moet opnieuw worden overgezet
+    df_fixed = df_era5.copy()
+    df_fixed.loc[3, 'Temp_Avg_C'] = 42.0
+    assert sync_sql_database([], [(LOCATION, df_fixed)], db_path, str(tmp_path)) == (0, len(df_fixed))
+    df_result, _, _ = run_sql_query("SELECT temp_avg FROM era5 WHERE date = '2000-01-04'", db_path)
+    assert df_result.iloc[0, 0] == 42.0
@@ -0,0 +1,29 @@
+from malman.state import share_across_sessions
+
+
+def test_one_result_per_process_and_deps():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return object()
+
+    first = share_across_sessions('test_stage', ('a', 1), compute)
+    assert share_across_sessions('test_stage', ('a', 1), compute) is first
+    assert share_across_sessions('test_stage', ('a', 2), compute) is not first
+    assert len(calls) == 2
+
+
+def test_least_recently_used_is_dropped():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    for deps in range(3):
+        share_across_sessions('test_lru', deps, compute, max_entries=2)
+    share_across_sessions('test_lru', 2, compute, max_entries=2)
+    assert len(calls) == 3
+    share_across_sessions('test_lru', 0, compute, max_entries=2)
+    assert len(calls) == 4